@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+誤認識修正のマイクロベンチマーク
+
+従来の「語句ごとに re.sub を全セグメントへ適用」する方式と
+CorrectionEngine（辞書全体を1つの正規表現にまとめて1回で走査）を比較する。
+語句数がreモジュールのパターンキャッシュ（512件）を超えると、従来方式は
+呼び出しごとに再コンパイルが発生して極端に遅くなる点に注意。
+
+使い方:
+    python benchmarks/bench_corrections.py --terms 300 --segments 2000
+"""
+
+import argparse
+import os
+import random
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from modules.correction_engine import CorrectionEngine
+
+KATAKANA = "アイウエオカキクケコサシスセソタチツテトナニヌネノハヒフヘホマミムメモヤユヨラリルレロワン"
+
+
+def make_terms(count, rng):
+    """ランダムな社内用語（誤認識→正しい表記）を作成"""
+    terms = {}
+    while len(terms) < count:
+        wrong = "".join(rng.choice(KATAKANA) for _ in range(rng.randint(3, 8)))
+        terms[wrong] = wrong + "株式会社"
+    return list(terms.items())
+
+
+def make_segments(count, terms, rng):
+    """一部に辞書の語句を含むセグメントを作成"""
+    segments = []
+    for _ in range(count):
+        words = ["本日の会議では", "について確認しました", "次回までに", "を共有します"]
+        text = "".join(rng.choice(words) for _ in range(3))
+        if rng.random() < 0.2:
+            text += rng.choice(terms)[0]
+        segments.append(text)
+    return segments
+
+
+def legacy_corrections(patterns, segments):
+    """従来方式: 語句ごとに全セグメントへre.sub"""
+    result = []
+    for text in segments:
+        for pattern, replacement in patterns:
+            text = re.sub(pattern, replacement, text)
+        result.append(text)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="誤認識修正のマイクロベンチマーク")
+    parser.add_argument("--terms", type=int, default=300, help="辞書の語句数")
+    parser.add_argument("--segments", type=int, default=2000, help="セグメント数")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    terms = make_terms(args.terms, rng)
+    segments = make_segments(args.segments, terms, rng)
+    total_chars = sum(len(text) for text in segments)
+
+    start = time.perf_counter()
+    legacy = legacy_corrections([(re.escape(w), r) for w, r in terms], segments)
+    legacy_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    engine = CorrectionEngine(terms)
+    compile_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    engine_result = [engine.apply(text)[0] for text in segments]
+    engine_time = time.perf_counter() - start
+
+    assert engine_result == legacy, "結果が従来方式と一致しません"
+
+    print(f"辞書: {args.terms}語 / セグメント: {args.segments} ({total_chars}文字)")
+    print(f"従来方式 (re.sub ループ): {legacy_time:.3f}秒 "
+          f"({total_chars / legacy_time / 1e6:.2f} M文字/秒)")
+    print(f"CorrectionEngine:         {engine_time:.3f}秒 "
+          f"({total_chars / engine_time / 1e6:.2f} M文字/秒, コンパイル {compile_time:.3f}秒)")
+    print(f"高速化: {legacy_time / engine_time:.1f}倍")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+セグメント結合・整形のマイクロベンチマーク
+
+単語単位に近い短いセグメントを大量に含む合成結果（既定10万セグメント）で、
+従来の実装（timedeltaによる時刻変換・文字列の += 連結・文末判定のたびに結合中の文字列をrstrip）と
+modules.segments（整数演算・断片リストのjoin・__slots__のSegment）を比較する。
+出力が従来実装と一致することも確認する。
+
+使い方:
+    python benchmarks/bench_segments.py --segments 100000
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+import tracemalloc
+from datetime import timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from modules import segments as segment_utils
+
+WORDS = ["本日は", "会議の", "議題について", "確認します", "資料を", "共有して", "ください", "次回", "までに"]
+
+
+def make_result(count, rng):
+    """短いセグメント（1〜3語、ときどき文末・長めの無音）が続く合成結果を作成"""
+    segments = []
+    position = 0.0
+    for i in range(count):
+        duration = rng.uniform(0.2, 1.2)
+        words = []
+        word_start = position
+        for _ in range(rng.randint(1, 3)):
+            word_end = word_start + duration / 3
+            words.append({"word": rng.choice(WORDS), "start": word_start, "end": word_end,
+                          "probability": rng.random()})
+            word_start = word_end
+        if rng.random() < 0.05:
+            words[-1]["word"] += "。"
+        segments.append({"id": i, "start": position, "end": word_start,
+                         "text": " " + "".join(word["word"] for word in words), "words": words})
+        position = word_start + (rng.uniform(1.0, 3.0) if rng.random() < 0.1 else rng.uniform(0.0, 0.3))
+    return {"text": "".join(segment["text"] for segment in segments), "segments": segments}
+
+
+def legacy_format_timestamp(seconds):
+    td = timedelta(seconds=seconds)
+    hours, remainder = divmod(td.total_seconds(), 3600)
+    minutes, seconds = divmod(remainder, 60)
+    return f"{int(hours):02d}:{int(minutes):02d}:{int(seconds):02d}"
+
+
+def legacy_is_sentence_end(text):
+    sentence_endings = ['。', '！', '？', '.', '!', '?']
+    return any(text.rstrip().endswith(ending) for ending in sentence_endings)
+
+
+def legacy_timestamped_text(result):
+    """従来方式: 1行ずつ += で連結"""
+    timestamped_text = ""
+    for segment in result["segments"]:
+        start_time = legacy_format_timestamp(segment["start"])
+        end_time = legacy_format_timestamp(segment["end"])
+        timestamped_text += f"[{start_time} - {end_time}] {segment['text'].strip()}\n"
+    return timestamped_text
+
+
+def legacy_merge_segments(result, merge_threshold=1.0, max_segment_length=30.0):
+    """従来方式: 辞書のセグメントに += で連結し、毎回結合中の文字列全体で文末判定"""
+    segments = result.get("segments", [])
+    if not segments:
+        return []
+    merged_segments = []
+    current = {"start": segments[0]["start"], "end": segments[0]["end"],
+               "text": segments[0]["text"].strip()}
+    for segment in segments[1:]:
+        if (segment["start"] - current["end"] < merge_threshold
+                and current["end"] - current["start"] < max_segment_length
+                and not legacy_is_sentence_end(current["text"])):
+            current["end"] = segment["end"]
+            current["text"] += segment["text"].strip()
+        else:
+            merged_segments.append(current)
+            current = {"start": segment["start"], "end": segment["end"],
+                       "text": segment["text"].strip()}
+    merged_segments.append(current)
+    return merged_segments
+
+
+def legacy_continuous_text(result, enable_timestamps):
+    merged = legacy_merge_segments(result)
+    if enable_timestamps:
+        return "\n".join(f"[{legacy_format_timestamp(s['start'])} - {legacy_format_timestamp(s['end'])}] "
+                         f"{s['text']}" for s in merged)
+    return "".join(s["text"] for s in merged)
+
+
+def timed(function, *args):
+    start = time.perf_counter()
+    value = function(*args)
+    return value, time.perf_counter() - start
+
+
+def merged_memory(function, result):
+    """結合結果を保持するのに必要なメモリ（バイト）"""
+    tracemalloc.start()
+    merged = function(result)
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del merged
+    return size
+
+
+def main():
+    parser = argparse.ArgumentParser(description="セグメント結合・整形のマイクロベンチマーク")
+    parser.add_argument("--segments", type=int, default=100000, help="合成セグメント数")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    result = make_result(args.segments, random.Random(args.seed))
+    new_merge = lambda r: segment_utils.merge_segments(r["segments"])
+
+    cases = [
+        ("タイムスタンプ付き (standard)",
+         lambda: legacy_timestamped_text(result),
+         lambda: "".join(f"{line}\n" for line in segment_utils.timestamped_lines(result["segments"]))),
+        ("結合 (merge_segments)",
+         lambda: legacy_merge_segments(result),
+         lambda: [s.to_dict() for s in new_merge(result)]),
+        ("連続テキスト (continuous)",
+         lambda: legacy_continuous_text(result, False),
+         lambda: "".join(s.text for s in new_merge(result))),
+        ("結合+時刻 (minimal)",
+         lambda: legacy_continuous_text(result, True),
+         lambda: "\n".join(segment_utils.timestamped_lines(new_merge(result)))),
+    ]
+
+    print(f"セグメント数: {args.segments}")
+    for label, legacy, current in cases:
+        legacy_value, legacy_time = timed(legacy)
+        current_value, current_time = timed(current)
+        assert current_value == legacy_value, f"{label}: 結果が従来方式と一致しません"
+        print(f"{label:<28} 従来 {legacy_time:.3f}秒 / 新 {current_time:.3f}秒 "
+              f"({legacy_time / current_time:.1f}倍)")
+
+    legacy_bytes = merged_memory(legacy_merge_segments, result)
+    current_bytes = merged_memory(new_merge, result)
+    print(f"結合結果のメモリ: 辞書 {legacy_bytes / 1e6:.1f} MB / Segment {current_bytes / 1e6:.1f} MB")
+
+    resegmented, resegment_time = timed(segment_utils.resegment_by_words, result["segments"])
+    print(f"単語単位の再分割: {resegment_time:.3f}秒 "
+          f"({args.segments} → {len(resegmented)}セグメント)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+CLI起動時間のベンチマーク
+
+`--help`・存在しないファイルの指定（引数チェックのみ）の起動時間を
+インタプリタの起動を含むプロセス全体の実時間で計測し、中央値が予算を超えたら終了コード1を返す。
+重い依存（whisper/torch/requests/numpy）の読み込み有無は tests/unit/test_startup_time.py で確認する。
+
+使い方:
+    python benchmarks/bench_startup.py --repeat 5 --budget 1.5
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+REPO_ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+
+def measure(args, repeat):
+    """transcriber.pyをrepeat回起動し、各回の実時間（秒）を返す"""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "transcriber.py", *args], cwd=REPO_ROOT,
+                       capture_output=True, timeout=60)
+        times.append(time.perf_counter() - start)
+    return times
+
+
+def main():
+    parser = argparse.ArgumentParser(description="CLI起動時間のベンチマーク")
+    parser.add_argument("--repeat", type=int, default=5, help="各ケースの起動回数")
+    parser.add_argument("--budget", type=float, default=1.5, help="起動時間の予算（秒、中央値で判定）")
+    args = parser.parse_args()
+
+    missing = os.path.join(tempfile.gettempdir(), "bench_startup_missing.wav")
+    cases = {"--help": ["--help"], "存在しないファイル": [missing]}
+
+    over_budget = []
+    for name, cli_args in cases.items():
+        times = measure(cli_args, args.repeat)
+        median = statistics.median(times)
+        print(f"{name}: 中央値 {median:.3f}秒 (最小 {min(times):.3f}秒 / 最大 {max(times):.3f}秒)")
+        if median > args.budget:
+            over_budget.append(name)
+
+    if over_budget:
+        print(f"予算 {args.budget:.2f}秒 を超えました: {', '.join(over_budget)}")
+        sys.exit(1)
+    print(f"全ケースが予算 {args.budget:.2f}秒 以内です")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,262 @@
+#!/usr/bin/env python3
+"""
+文字起こし性能ベンチマーク
+
+samples/ の音声ファイルと合成音声（長さ別）について、モデル・VAD設定ごとに
+実時間係数（RTF）・ピークメモリ・セグメント/秒・後処理時間（誤認識修正と各出力形式の生成）を計測し、
+結果をJSONで保存する。--compare で過去の結果と比較し、悪化があれば終了コード1を返す。
+
+各ケースは新しいプロセスで実行するため、ピークメモリはモデル読み込みを含むケース単位の値になる。
+キャッシュ（文字起こし・PCM）は使用しない。
+
+使い方:
+    python benchmarks/bench_transcription.py --models tiny base --vad off on
+    python benchmarks/bench_transcription.py --synthetic 30 300 --output results/after.json \\
+        --compare results/before.json
+"""
+
+import argparse
+import copy
+import json
+import multiprocessing
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import wave
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from modules.batch_processor import collect_audio_files
+
+REPO_ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+SAMPLE_RATE = 16000
+FORMATS = ("standard", "continuous", "minimal")
+
+# 比較時に悪化とみなす指標（値が大きいほど悪い）
+COMPARED_METRICS = ("rtf", "peak_rss_mb", "post_processing_time")
+
+
+def make_synthetic_audio(path, seconds, seed=0):
+    """
+    発話に似た合成音声（倍音を持つ有声区間と無音の繰り返し）をWAVで作成
+
+    Args:
+        path: 出力先のWAVファイル
+        seconds: 長さ（秒）
+        seed: 乱数シード（同じシードなら同じ音声）
+    """
+    import numpy as np
+
+    rng = np.random.default_rng(seed)
+    audio = np.zeros(int(seconds * SAMPLE_RATE), dtype=np.float32)
+    position = 0
+    while position < len(audio):
+        voiced = int(rng.uniform(0.8, 4.0) * SAMPLE_RATE)
+        pause = int(rng.uniform(0.2, 1.5) * SAMPLE_RATE)
+        t = np.arange(min(voiced, len(audio) - position)) / SAMPLE_RATE
+        pitch = rng.uniform(100, 220) * (1 + 0.1 * np.sin(2 * np.pi * 3 * t))
+        phase = 2 * np.pi * np.cumsum(pitch) / SAMPLE_RATE
+        burst = sum(np.sin(k * phase) / k for k in range(1, 6))
+        envelope = np.abs(np.sin(2 * np.pi * 4 * t))
+        audio[position:position + len(t)] = 0.2 * burst * envelope
+        position += voiced + pause
+    audio += rng.normal(0, 0.003, len(audio)).astype(np.float32)
+
+    with wave.open(path, "wb") as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(SAMPLE_RATE)
+        f.writeframes((np.clip(audio, -1, 1) * 32767).astype(np.int16).tobytes())
+
+
+def peak_rss_mb():
+    """このプロセスのピークRSS（MB）"""
+    import resource
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # LinuxはKB、macOSはバイト単位
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def run_case(audio_path, model, backend, enable_vad):
+    """
+    1ケースを計測（専用のワーカープロセスで実行）
+
+    Returns:
+        計測結果の辞書
+    """
+    from modules.audio_processor import AudioProcessor
+
+    processor = AudioProcessor(model_name=model, backend=backend)
+
+    start = time.perf_counter()
+    processor.model
+    load_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    audio = processor.load_audio(audio_path)
+    decode_time = time.perf_counter() - start
+    duration = len(audio) / SAMPLE_RATE
+
+    start = time.perf_counter()
+    params = processor.build_transcribe_params("ja")
+    if enable_vad:
+        raw = processor._transcribe_speech_only(audio, params)
+    else:
+        raw = processor._run_whisper(audio, params)
+    transcribe_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    result = processor._apply_corrections(copy.deepcopy(raw))
+    correction_time = time.perf_counter() - start
+
+    format_times = {}
+    for format_type in FORMATS:
+        start = time.perf_counter()
+        processor.create_formatted_text(result, format_type)
+        format_times[format_type] = time.perf_counter() - start
+
+    segments = len(result["segments"])
+    return {
+        "file": os.path.basename(audio_path),
+        "model": model,
+        "backend": backend,
+        "vad": enable_vad,
+        "duration": duration,
+        "load_time": load_time,
+        "decode_time": decode_time,
+        "transcribe_time": transcribe_time,
+        "rtf": transcribe_time / duration if duration else None,
+        "segments": segments,
+        "segments_per_sec": segments / transcribe_time if transcribe_time else None,
+        "correction_time": correction_time,
+        "format_times": format_times,
+        "post_processing_time": correction_time + sum(format_times.values()),
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def git_revision():
+    """現在のコミットID（取得できない場合None）"""
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def case_key(entry):
+    return (entry["file"], entry["model"], entry["backend"], entry["vad"])
+
+
+def compare_results(current, baseline, threshold):
+    """
+    基準の結果と比較して表示
+
+    Args:
+        current: 今回の結果リスト
+        baseline: 基準の結果リスト
+        threshold: 悪化とみなす増加率（0.1で10%）
+
+    Returns:
+        悪化したケースの(ケース, 指標, 基準値, 今回値)のリスト
+    """
+    baseline_by_key = {case_key(entry): entry for entry in baseline}
+    regressions = []
+    print("\n=== 基準との比較 ===")
+    for entry in current:
+        reference = baseline_by_key.get(case_key(entry))
+        if reference is None:
+            continue
+        changes = []
+        for metric in COMPARED_METRICS:
+            before, after = reference.get(metric), entry.get(metric)
+            if not before or after is None:
+                continue
+            ratio = after / before - 1
+            changes.append(f"{metric} {ratio:+.1%}")
+            if ratio > threshold:
+                regressions.append((case_key(entry), metric, before, after))
+        print(f"{entry['file']} / {entry['model']} / VAD {'on' if entry['vad'] else 'off'}: "
+              + ", ".join(changes))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="文字起こし性能ベンチマーク")
+    parser.add_argument("--models", nargs="+", default=["base"], help="計測するWhisperモデル")
+    parser.add_argument("--backend", default="whisper", help="推論バックエンド (whisper, faster-whisper)")
+    parser.add_argument("--vad", nargs="+", choices=["off", "on"], default=["off", "on"],
+                        help="計測するVAD設定")
+    parser.add_argument("--samples", default=os.path.join(REPO_ROOT, "samples"),
+                        help="音声ファイルのディレクトリ（空なら合成音声のみ）")
+    parser.add_argument("--synthetic", nargs="*", type=float, default=[30, 120, 600],
+                        help="合成音声の長さ（秒）")
+    parser.add_argument("--output", help="結果JSONの出力先（デフォルト: benchmarks/results/<日時>.json）")
+    parser.add_argument("--compare", help="比較する過去の結果JSON")
+    parser.add_argument("--threshold", type=float, default=0.10,
+                        help="悪化とみなす増加率 (デフォルト: 0.10)")
+    args = parser.parse_args()
+
+    audio_files = collect_audio_files([args.samples]) if os.path.isdir(args.samples) else []
+    with tempfile.TemporaryDirectory() as synthetic_dir:
+        for seconds in args.synthetic:
+            path = os.path.join(synthetic_dir, f"synthetic_{seconds:g}s.wav")
+            make_synthetic_audio(path, seconds)
+            audio_files.append(path)
+
+        if not audio_files:
+            print("エラー: 計測対象の音声がありません")
+            sys.exit(2)
+
+        cases = [(path, model, args.backend, vad == "on")
+                 for model in args.models for vad in args.vad for path in audio_files]
+        print(f"計測ケース: {len(cases)} ({len(audio_files)}ファイル × "
+              f"{len(args.models)}モデル × VAD {'/'.join(args.vad)})")
+
+        results = []
+        context = multiprocessing.get_context("spawn")
+        for case in cases:
+            # ケースごとに新しいプロセスでピークメモリを測る
+            with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+                entry = executor.submit(run_case, *case).result()
+            results.append(entry)
+            print(f"{entry['file']} / {entry['model']} / VAD {'on' if entry['vad'] else 'off'}: "
+                  f"RTF {entry['rtf']:.3f} / {entry['segments_per_sec']:.1f} seg/s / "
+                  f"後処理 {entry['post_processing_time'] * 1000:.1f}ms / "
+                  f"ピークメモリ {entry['peak_rss_mb']:.0f}MB")
+
+    report = {
+        "meta": {
+            "created_at": datetime.now().isoformat(timespec="seconds"),
+            "git_revision": git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "backend": args.backend,
+        },
+        "results": results,
+    }
+    output = args.output or os.path.join(
+        REPO_ROOT, "benchmarks", "results", f"{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"\n結果を保存しました: {output}")
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)["results"]
+        regressions = compare_results(results, baseline, args.threshold)
+        for key, metric, before, after in regressions:
+            print(f"悪化: {' / '.join(map(str, key))} {metric} {before:.3f} → {after:.3f}")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
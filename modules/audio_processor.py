@@ -1,45 +1,100 @@
-import whisper
 import os
-from datetime import timedelta
+import time
 from typing import Dict, List, Optional
-import re
+from . import metrics, segments
+from .correction_engine import CorrectionEngine
+from .decode_profiles import (DEFAULT_PROFILE, count_retries, decode_report,
+                              resolve_profile, temperature_ladder)
+from .inference_backends import create_backend
+from .model_registry import MODEL_REGISTRY
 
 class AudioProcessor:
     """音声処理クラス - Whisperを使用した文字起こし"""
     
-    def __init__(self, model_name: str = "base", device: str = "cpu"):
+    def __init__(self, model_name: str = "base", device: str = "cpu", cache=None,
+                 min_silence_duration: float = 0.5,
+                 correction_dictionary: Optional[str] = None,
+                 backend: str = "whisper", compute_type: str = "int8",
+                 cpu_threads: int = 0, pcm_cache=None,
+                 worker_start_method: str = "auto", diarizer=None,
+                 decode_profile: str = DEFAULT_PROFILE, max_retries: Optional[int] = None):
         """
         初期化
         
         Args:
             model_name: Whisperモデル名 (tiny, base, small, medium, large, large-v2, large-v3)
             device: 使用デバイス (cpu, cuda, mps)
+            cache: TranscriptionCache（Noneの場合はキャッシュしない）
+            min_silence_duration: VADで発話の区切りとみなす最小無音長（秒）
+            correction_dictionary: 誤認識辞書ファイルのパス（省略時は同梱の辞書）
+            backend: 推論バックエンド (whisper, faster-whisper)
+            compute_type: faster-whisperの演算精度 (int8, float32等)
+            cpu_threads: 推論スレッド数（0の場合は既定値）
+            pcm_cache: PCMCache（指定時はデコード結果をメモリマップで共有）
+            worker_start_method: チャンク並列処理のワーカー起動方法 (auto, fork, spawn)
+            diarizer: SpeakerDiarizer（指定時はデコードと並行して話者分離し、セグメントに話者ラベルを付与）
+            decode_profile: デコードプロファイル (fast, balanced, accurate)
+            max_retries: 温度フォールバックの再試行回数の上限（Noneの場合はプロファイルの既定値）
         """
         # モデル名の正規化
         if model_name == "large":
             model_name = "large-v3"  # 最新版を使用
             
-        print(f"Whisperモデル '{model_name}' を読み込み中...")
-        self.model = whisper.load_model(model_name, device=device)
         self.model_name = model_name
         self.device = device
-        print("Whisperモデルの読み込み完了")
-        
-        # 日本語誤認識の修正パターン
-        self.correction_patterns = [
-            (r'八中', '発注'),
-            (r'八乗っと', '発注ロット'),
-            (r'インフォマト', 'インフォマート'),
-            (r'インフマート', 'インフォマート'),
-            (r'スクレッドシート', 'スプレッドシート'),
-            (r'成球所', '請求書'),
-            (r'悦子', 'えつこ'),
-            (r'靖子', 'えつこ'),
-        ]
+        self.backend = create_backend(backend, compute_type, cpu_threads)
+        # モデルは実際に文字起こしするまで読み込まない（キャッシュヒット時は読み込み不要）
+        self._model = None
+        self.cache = cache
+        self.pcm_cache = pcm_cache
+        self.worker_start_method = worker_start_method
+        self.diarizer = diarizer
+        self.decode_profile = resolve_profile(decode_profile, max_retries)
+        self.min_silence_duration = min_silence_duration
+        
+        # 日本語誤認識の修正辞書（1回の走査で全語句を置換）
+        self.correction_engine = CorrectionEngine.from_file(correction_dictionary)
+    
+    @property
+    def model(self):
+        """
+        Whisperモデル（初回アクセス時に取得。同じプロセスで読み込み済みなら共有）
+        
+        取得したモデルはこのAudioProcessorを使う全スレッドで共有する。同時デコードできない
+        バックエンド（thread_safe=False）ではバックエンドがモデル単位のロックでデコードを直列化する
+        （同じモデルを使う他のAudioProcessorとも同じロックを使う）。
+        """
+        if self._model is None:
+            # whisper/torch等の推論ライブラリはバックエンドがここで初めてimportする
+            self._model = MODEL_REGISTRY.get(self.backend, self.model_name, self.device)
+        return self._model
+    
+    def load_audio(self, audio_path: str):
+        """
+        音声ファイルを16kHzモノラルの波形にデコード
+        
+        PCMキャッシュがある場合はデコード済みファイルをメモリマップして返すため、
+        VAD・チャンク分割・再デコード等の複数の処理で音声を一度しかデコードしない。
+        
+        Args:
+            audio_path: 音声ファイルのパス
+            
+        Returns:
+            float32の波形配列（PCMキャッシュ使用時はnumpy.memmap）
+        """
+        if not os.path.exists(audio_path):
+            raise FileNotFoundError(f"音声ファイルが見つかりません: {audio_path}")
+        if self.pcm_cache is not None:
+            with metrics.span("audio_decode", source="pcm_cache"):
+                return self.pcm_cache.load(audio_path)
+        import whisper
+        with metrics.span("audio_decode", source="ffmpeg"):
+            return whisper.load_audio(audio_path)
     
     def transcribe(self, audio_path: str, language: str = "ja", 
-                   enable_vad: bool = True, 
-                   prompt: Optional[str] = None) -> Dict:
+                   enable_vad: bool = False, 
+                   prompt: Optional[str] = None,
+                   audio=None) -> Dict:
         """
         音声ファイルを文字起こし
         
@@ -48,50 +103,357 @@ class AudioProcessor:
             language: 言語コード (ja, en等)
             enable_vad: VAD (Voice Activity Detection) を有効にするか
             prompt: Whisperに与える初期プロンプト（文脈を提供）
+            audio: デコード済みの波形（load_audioの結果）。指定時は再デコードしない
             
         Returns:
             Whisperの結果辞書
         """
-        if not os.path.exists(audio_path):
+        if audio is None and not os.path.exists(audio_path):
             raise FileNotFoundError(f"音声ファイルが見つかりません: {audio_path}")
         
         print(f"音声ファイルを文字起こし中: {audio_path}")
         
+        transcribe_params = self.build_transcribe_params(language, prompt)
+        
+        # キャッシュ済みなら再デコードせずに返す
+        cache_key = self._cache_key(audio_path, self._cache_params(transcribe_params, enable_vad))
+        if cache_key:
+            cached = self.cache.get(cache_key)
+            metrics.increment("transcription_cache_requests_total",
+                              result="miss" if cached is None else "hit")
+            if cached is not None:
+                print("キャッシュ済みの文字起こし結果を使用します")
+                diarization = self._start_diarization(audio_path, audio)
+                result = self._with_decode_report(self._apply_corrections(cached), cached=True)
+                return self._finish_diarization(diarization, result)
+        
+        # PCMキャッシュがない場合、VADなし・話者分離なしではWhisperにファイルを直接デコードさせる
+        if audio is None and (enable_vad or self.pcm_cache is not None or self.diarizer is not None):
+            audio = self.load_audio(audio_path)
+        diarization = self._start_diarization(audio_path, audio)
+        
+        if enable_vad:
+            # 発話区間だけをデコードしてタイムスタンプを元の時間軸に戻す
+            result = self._transcribe_speech_only(audio, transcribe_params)
+        else:
+            result = self._run_whisper(audio if audio is not None else audio_path, transcribe_params)
+        
+        # キャッシュには誤認識修正前の生結果を保存
+        if cache_key:
+            self.cache.put(cache_key, result)
+        
+        # 後処理で誤認識を修正
+        result = self._with_decode_report(self._apply_corrections(result))
+        
+        print(f"文字起こし完了 - {len(result['segments'])}個のセグメント")
+        return self._finish_diarization(diarization, result)
+    
+    def build_transcribe_params(self, language: str = "ja",
+                                prompt: Optional[str] = None) -> Dict:
+        """
+        Whisperに渡すデコードパラメータを作成
+        
+        Args:
+            language: 言語コード (ja, en等)
+            prompt: Whisperに与える初期プロンプト
+            
+        Returns:
+            model.transcribeのキーワード引数辞書
+        """
+        profile = self.decode_profile
+        temperatures = profile["temperatures"]
+        
         # Whisperで文字起こし実行（改善されたパラメータ）
         transcribe_params = {
             "language": language,
             "task": "transcribe",
             "word_timestamps": True,  # 単語レベルのタイムスタンプ
             "verbose": False,
-            "temperature": 0.0,  # より決定的な出力のため
+            # 閾値を満たさない区間は温度を上げて再試行（段階数-1が再試行回数の上限）
+            "temperature": temperatures[0] if len(temperatures) == 1 else temperatures,
             "compression_ratio_threshold": 2.4,  # 圧縮率の閾値
             "logprob_threshold": -1.0,  # ログ確率の閾値
             "no_speech_threshold": 0.6,  # 無音検出の閾値
             "condition_on_previous_text": True,  # 前の文脈を考慮
         }
+        if profile["beam_size"]:
+            transcribe_params["beam_size"] = profile["beam_size"]
+        if profile["best_of"] and len(temperatures) > 1:
+            transcribe_params["best_of"] = profile["best_of"]
         
         # プロンプトがある場合のみ追加
         if prompt:
             transcribe_params["initial_prompt"] = prompt
+        return transcribe_params
+    
+    def _transcribe_speech_only(self, audio, transcribe_params: Dict) -> Dict:
+        """VADで検出した発話区間のみを連結してデコード"""
+        timeline, vad_report = self._detect_speech(audio)
+        if not timeline.regions:
+            return {"text": "", "segments": [], "language": transcribe_params["language"],
+                    "vad": vad_report}
+        
+        result = self._run_whisper(timeline.build_audio(audio), transcribe_params)
+        timeline.remap_segments(result["segments"])
+        result["vad"] = vad_report
+        return result
+    
+    def _detect_speech(self, audio):
+        """
+        VADで発話区間を検出
+        
+        Args:
+            audio: 波形
+            
+        Returns:
+            (SpeechTimeline, "vad" レポート（発話区間数・発話率・省略した秒数・処理時間）)
+        """
+        from .vad import SpeechTimeline, VoiceActivityDetector
+        from .audio_segmenter import SAMPLE_RATE
+        
+        vad_start = time.time()
+        with metrics.span("vad"):
+            regions = VoiceActivityDetector(min_silence_duration=self.min_silence_duration).detect(audio)
+        timeline = SpeechTimeline(regions)
+        
+        total_duration = len(audio) / SAMPLE_RATE
+        speech_duration = sum(end - start for start, end in regions)
+        vad_report = {
+            "speech_regions": len(regions),
+            "speech_ratio": speech_duration / total_duration if total_duration > 0 else 0.0,
+            "skipped_seconds": total_duration - timeline.compact_duration,
+            "vad_time": time.time() - vad_start,
+        }
+        print(f"VAD: 発話 {vad_report['speech_ratio']:.1%} ({len(regions)}区間) - "
+              f"無音 {vad_report['skipped_seconds']:.1f}秒のデコードを省略")
+        return timeline, vad_report
+    
+    def _start_diarization(self, audio_path: str, audio=None):
+        """
+        話者分離を別スレッドで開始（話者分離なしの場合None）
+        
+        NumPyのFFT・行列演算とWhisperの推論はどちらもGILを解放するため、
+        同じデコード済み波形に対してデコードと並行に実行できる。
+        
+        Args:
+            audio_path: 音声ファイルのパス
+            audio: デコード済みの波形（Noneの場合はここでデコード）
+            
+        Returns:
+            (話者区間リスト, 処理時間) を返すFuture
+        """
+        if self.diarizer is None:
+            return None
+        from concurrent.futures import ThreadPoolExecutor
+        if audio is None:
+            audio = self.load_audio(audio_path)
+        
+        def run():
+            start = time.perf_counter()
+            with metrics.span("diarization"):
+                turns = self.diarizer.diarize(audio)
+            return turns, time.perf_counter() - start
+        
+        executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="diarization")
+        future = executor.submit(run)
+        executor.shutdown(wait=False)
+        return future
+    
+    def _finish_diarization(self, diarization, result: Dict) -> Dict:
+        """
+        話者分離の完了を待ってセグメント・単語に話者ラベルを付与
+        
+        Args:
+            diarization: _start_diarizationの戻り値
+            result: Whisperの結果辞書
+            
+        Returns:
+            話者ラベルと "diarization"（話者数・話者区間数・処理時間）を追加した結果辞書
+        """
+        if diarization is None:
+            return result
+        from .diarization import assign_speakers
+        
+        turns, elapsed = diarization.result()
+        assign_speakers(result["segments"], turns)
+        speakers = len({turn[2] for turn in turns})
+        result["diarization"] = {"speakers": speakers, "turns": len(turns), "seconds": elapsed}
+        print(f"話者分離完了 - {speakers}人 ({elapsed:.1f}秒、デコードと並行)")
+        return result
+    
+    def _cache_params(self, transcribe_params: Dict, enable_vad: bool) -> Dict:
+        """キャッシュキー用のパラメータ（VAD設定も結果に影響するため含める）"""
+        if not enable_vad:
+            return transcribe_params
+        return dict(transcribe_params, vad={"min_silence_duration": self.min_silence_duration})
+    
+    def _run_whisper(self, audio_input, transcribe_params: Dict) -> Dict:
+        """Whisperでデコード（誤認識修正前の生結果を返す）"""
+        model = self.model
+        # 非対応のパラメータはバックエンドがデコード前に取り除く（TypeErrorで全体を再実行しない）
+        with metrics.span("inference", model=self.model_name, backend=self.backend.cache_id):
+            result = self.backend.transcribe(model, audio_input, transcribe_params)
+        
+        # 確定時の温度から各セグメントの再試行回数を記録
+        ladder = temperature_ladder(transcribe_params.get("temperature", 0.0))
+        retries = 0
+        for segment in result.get("segments", []):
+            segment["retries"] = count_retries(segment.get("temperature", ladder[0]), ladder)
+            retries += segment["retries"]
+        metrics.increment("segments_decoded_total", len(result.get("segments", [])),
+                          model=self.model_name)
+        if retries:
+            metrics.increment("decode_retries_total", retries, model=self.model_name,
+                              profile=self.decode_profile["name"])
+        return result
+    
+    def _with_decode_report(self, result: Dict, cached: bool = False) -> Dict:
+        """再試行回数・時間の集計を "decode" として追加（キャッシュ済みの結果は再試行0として記録）"""
+        result["decode"] = decode_report(result.get("segments", []), self.decode_profile["name"], cached)
+        return result
+    
+    def _cache_key(self, audio_path: str, params: Dict) -> Optional[str]:
+        """キャッシュキーを作成（キャッシュ無効・実ファイル以外はNone）"""
+        if self.cache is None or not os.path.isfile(audio_path):
+            return None
+        # バックエンド・演算精度が違えば結果も変わるためキーに含める
+        return self.cache.make_key(audio_path, self.model_name,
+                                   dict(params, backend=self.backend.cache_id))
+    
+    def is_cached(self, audio_path: str, language: str = "ja",
+                  prompt: Optional[str] = None, enable_vad: bool = False) -> bool:
+        """
+        文字起こし結果がキャッシュ済みか確認
+        
+        Args:
+            audio_path: 音声ファイルのパス
+            language: 言語コード
+            prompt: Whisperに与える初期プロンプト
+            enable_vad: VADを有効にするか
             
-        # VADは新しいwhisperバージョンでのみサポート（現在はスキップ）
-        try:
-            result = self.model.transcribe(audio_path, **transcribe_params)
-        except TypeError as e:
-            # パラメータが対応していない場合は基本的なパラメータのみで再実行
-            print(f"一部のパラメータがサポートされていません。基本設定で実行します。")
-            result = self.model.transcribe(
-                audio_path,
-                language=language,
-                word_timestamps=True,
-                verbose=False
+        Returns:
+            キャッシュ済みの場合True
+        """
+        params = self._cache_params(self.build_transcribe_params(language, prompt), enable_vad)
+        cache_key = self._cache_key(audio_path, params)
+        return cache_key is not None and self.cache.get(cache_key) is not None
+    
+    def transcribe_stream(self, audio_path: str, language: str = "ja",
+                          prompt: Optional[str] = None,
+                          window_length: float = 30.0,
+                          start_window: int = 0):
+        """
+        音声を無音位置でウィンドウに区切り、デコードしたそばからセグメントを返すジェネレータ
+        
+        Args:
+            audio_path: 音声ファイルのパス
+            language: 言語コード (ja, en等)
+            prompt: Whisperに与える初期プロンプト
+            window_length: ウィンドウの最大長（秒）
+            start_window: この番号のウィンドウから処理する（チェックポイントからの再開用）
+            
+        Yields:
+            (ウィンドウ番号, ウィンドウ数, 全体の時間軸に補正済みのセグメントリスト)
+        """
+        from .audio_segmenter import SAMPLE_RATE, shift_segments, split_at_silence
+        
+        audio = self.load_audio(audio_path)
+        windows = split_at_silence(audio, window_length, self.min_silence_duration,
+                                   search_window=min(10.0, window_length / 3))
+        print(f"音声ファイルを逐次文字起こし中: {audio_path} ({len(windows)}ウィンドウ)")
+        
+        previous_text = ""
+        for index, (start, end) in enumerate(windows):
+            if index < start_window:
+                continue
+            # 前ウィンドウ末尾の文字列を初期プロンプトにして文脈をつなぐ
+            context = "".join(filter(None, [prompt, previous_text[-100:]])) or None
+            params = self.build_transcribe_params(language, context)
+            result = self._run_whisper(audio[start:end], params)
+            result = self._apply_corrections(result)
+            shifted = shift_segments(result["segments"], start / SAMPLE_RATE)
+            previous_text = result.get("text", "")
+            yield index, len(windows), shifted
+    
+    def transcribe_chunked(self, audio_path: str, workers: int = 2,
+                           chunk_length: float = 600.0,
+                           min_silence: float = 0.5,
+                           language: str = "ja",
+                           prompt: Optional[str] = None,
+                           enable_vad: bool = False) -> Dict:
+        """
+        長時間音声を無音位置でチャンク分割し、複数プロセスで並列に文字起こし
+        
+        Args:
+            audio_path: 音声ファイルのパス
+            workers: ワーカープロセス数
+            chunk_length: 最大チャンク長（秒）
+            min_silence: 分割点として探す無音の長さ（秒）
+            language: 言語コード (ja, en等)
+            prompt: Whisperに与える初期プロンプト
+            enable_vad: VADで検出した発話区間だけを連結してからチャンク分割するか
+            
+        Returns:
+            Whisperの結果辞書（タイムスタンプは音声全体での位置）
+        """
+        from .chunked_transcriber import ChunkedTranscriber
+        
+        # チャンク分割の設定も結果に影響するためキャッシュキーに含める
+        cache_params = dict(self._cache_params(self.build_transcribe_params(language, prompt), enable_vad),
+                            chunk_length=chunk_length, min_silence=min_silence,
+                            workers=workers)
+        cache_key = self._cache_key(audio_path, cache_params)
+        if cache_key:
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                print("キャッシュ済みの文字起こし結果を使用します")
+                diarization = self._start_diarization(audio_path)
+                result = self._with_decode_report(self._apply_corrections(cached), cached=True)
+                return self._finish_diarization(diarization, result)
+        
+        audio = self.load_audio(audio_path)
+        print(f"音声ファイルを文字起こし中: {audio_path}")
+        
+        chunked = ChunkedTranscriber(
+            model_name=self.model_name,
+            device=self.device,
+            backend=self.backend.name,
+            compute_type=getattr(self.backend, "compute_type", "int8"),
+            decode_profile=self.decode_profile["name"],
+            max_retries=self.decode_profile["max_retries"],
+            start_method=self.worker_start_method,
+            processor=self,
+            workers=workers,
+            chunk_length=chunk_length,
+            min_silence=min_silence
+        )
+        # 単一プロセスと同じく発話区間だけを連結した音声を分割し、結合後に元の時間軸へ戻す
+        timeline = vad_report = None
+        speech_audio = audio
+        if enable_vad:
+            timeline, vad_report = self._detect_speech(audio)
+            speech_audio = timeline.build_audio(audio)
+        
+        # 話者分離のスレッドはワーカーのfork後に開始する（元の時間軸の波形で行う）
+        diarization = []
+        if timeline is not None and not timeline.regions:
+            diarization.append(self._start_diarization(audio_path, audio))
+            result = {"text": "", "segments": [], "language": language}
+        else:
+            result = chunked.transcribe(
+                speech_audio, language=language, prompt=prompt,
+                on_submitted=lambda: diarization.append(self._start_diarization(audio_path, audio))
             )
+        if timeline is not None:
+            timeline.remap_segments(result["segments"])
+            result["vad"] = vad_report
         
-        # 後処理で誤認識を修正
-        result = self._apply_corrections(result)
+        if cache_key:
+            self.cache.put(cache_key, result)
+        result = self._with_decode_report(self._apply_corrections(result))
         
         print(f"文字起こし完了 - {len(result['segments'])}個のセグメント")
-        return result
+        return self._finish_diarization(diarization[0] if diarization else None, result)
     
     def format_timestamp(self, seconds: float) -> str:
         """
@@ -103,10 +465,7 @@ class AudioProcessor:
         Returns:
             HH:MM:SS形式の時刻文字列
         """
-        td = timedelta(seconds=seconds)
-        hours, remainder = divmod(td.total_seconds(), 3600)
-        minutes, seconds = divmod(remainder, 60)
-        return f"{int(hours):02d}:{int(minutes):02d}:{int(seconds):02d}"
+        return segments.format_timestamp(seconds)
     
     def create_timestamped_text(self, whisper_result: Dict) -> str:
         """
@@ -118,16 +477,27 @@ class AudioProcessor:
         Returns:
             タイムスタンプ付きテキスト
         """
-        timestamped_text = ""
+        lines = segments.timestamped_lines(whisper_result["segments"])
+        return "".join(f"{line}\n" for line in lines)
+    
+    def create_formatted_text(self, whisper_result: Dict, 
+                              format_type: str = "standard") -> str:
+        """
+        出力形式に応じたテキストを生成
         
-        for segment in whisper_result["segments"]:
-            start_time = self.format_timestamp(segment["start"])
-            end_time = self.format_timestamp(segment["end"])
-            text = segment["text"].strip()
+        Args:
+            whisper_result: Whisperの結果辞書
+            format_type: 出力形式 ("standard", "continuous", "minimal")
             
-            timestamped_text += f"[{start_time} - {end_time}] {text}\n"
-        
-        return timestamped_text
+        Returns:
+            整形されたテキスト
+        """
+        with metrics.span("format", format=format_type):
+            if format_type == "continuous":
+                return self.create_continuous_text(whisper_result, enable_timestamps=False)
+            elif format_type == "minimal":
+                return self.create_continuous_text(whisper_result, enable_timestamps=True)
+            return self.create_timestamped_text(whisper_result)
     
     def get_plain_text(self, whisper_result: Dict) -> str:
         """
@@ -151,19 +521,9 @@ class AudioProcessor:
         Returns:
             修正後の結果辞書
         """
-        # 全体テキストの修正
-        if "text" in result:
-            for pattern, replacement in self.correction_patterns:
-                result["text"] = re.sub(pattern, replacement, result["text"])
-        
-        # 各セグメントの修正
-        if "segments" in result:
-            for segment in result["segments"]:
-                if "text" in segment:
-                    for pattern, replacement in self.correction_patterns:
-                        segment["text"] = re.sub(pattern, replacement, segment["text"])
-        
-        return result
+        # 全体テキスト・各セグメント・単語タイムスタンプをまとめて修正
+        with metrics.span("corrections"):
+            return self.correction_engine.apply_to_result(result)
     
     def merge_segments(self, whisper_result: Dict, 
                       merge_threshold: float = 1.0,
@@ -179,47 +539,27 @@ class AudioProcessor:
         Returns:
             結合されたセグメントのリスト
         """
-        segments = whisper_result.get("segments", [])
-        if not segments:
-            return []
-        
-        merged_segments = []
-        current_segment = {
-            "start": segments[0]["start"],
-            "end": segments[0]["end"],
-            "text": segments[0]["text"].strip()
-        }
+        merged = segments.merge_segments(whisper_result.get("segments", []),
+                                         merge_threshold, max_segment_length)
+        return [segment.to_dict() for segment in merged]
+    
+    def resegment_words(self, whisper_result: Dict, max_duration: float = 10.0,
+                        max_gap: float = 0.8) -> Dict:
+        """
+        単語タイムスタンプでセグメントを文・無音単位に区切り直す
         
-        for i in range(1, len(segments)):
-            segment = segments[i]
-            silence_duration = segment["start"] - current_segment["end"]
-            segment_duration = current_segment["end"] - current_segment["start"]
-            
-            # セグメントを結合するか判定
-            should_merge = (
-                silence_duration < merge_threshold and
-                segment_duration < max_segment_length and
-                not self._is_sentence_end(current_segment["text"])
-            )
+        Args:
+            whisper_result: Whisperの結果辞書（単語タイムスタンプ付き）
+            max_duration: 1セグメントの最大長（秒）
+            max_gap: この長さを超える単語間の無音で区切る（秒）
             
-            if should_merge:
-                # セグメントを結合
-                current_segment["end"] = segment["end"]
-                current_segment["text"] += segment["text"].strip()
-            else:
-                # 現在のセグメントを保存して新しいセグメントを開始
-                merged_segments.append(current_segment)
-                current_segment = {
-                    "start": segment["start"],
-                    "end": segment["end"],
-                    "text": segment["text"].strip()
-                }
-        
-        # 最後のセグメントを追加
-        if current_segment:
-            merged_segments.append(current_segment)
-        
-        return merged_segments
+        Returns:
+            セグメントを置き換えた結果辞書（単語がない場合は元の結果）
+        """
+        if not any(segment.get("words") for segment in whisper_result.get("segments", [])):
+            return whisper_result
+        return dict(whisper_result, segments=segments.resegment_by_words(
+            whisper_result["segments"], max_duration, max_gap))
     
     def _is_sentence_end(self, text: str) -> bool:
         """
@@ -231,8 +571,7 @@ class AudioProcessor:
         Returns:
             文が終了している場合True
         """
-        sentence_endings = ['。', '！', '？', '.', '!', '?']
-        return any(text.rstrip().endswith(ending) for ending in sentence_endings)
+        return segments.is_sentence_end(text)
     
     def create_continuous_text(self, whisper_result: Dict, 
                              enable_timestamps: bool = False) -> str:
@@ -246,16 +585,9 @@ class AudioProcessor:
         Returns:
             連続したテキスト
         """
-        merged_segments = self.merge_segments(whisper_result)
+        merged_segments = segments.merge_segments(whisper_result.get("segments", []))
         
         if enable_timestamps:
-            text_lines = []
-            for segment in merged_segments:
-                start_time = self.format_timestamp(segment["start"])
-                end_time = self.format_timestamp(segment["end"])
-                text = segment["text"]
-                text_lines.append(f"[{start_time} - {end_time}] {text}")
-            return "\n".join(text_lines)
-        else:
-            # タイムスタンプなしの連続テキスト
-            return "".join(segment["text"] for segment in merged_segments)
\ No newline at end of file
+            return "\n".join(segments.timestamped_lines(merged_segments))
+        # タイムスタンプなしの連続テキスト（話者分離時は話者ごとに改行）
+        return segments.continuous_text(merged_segments)
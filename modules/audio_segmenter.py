@@ -0,0 +1,106 @@
+import numpy as np
+from typing import Dict, List, Tuple
+
+# Whisperの入力サンプリングレート
+SAMPLE_RATE = 16000
+
+
+def frame_energies(audio: np.ndarray, sample_rate: int = SAMPLE_RATE,
+                   frame_ms: int = 30) -> np.ndarray:
+    """
+    フレームごとのRMSエネルギー（dB）を計算
+
+    Args:
+        audio: float32の波形
+        sample_rate: サンプリングレート
+        frame_ms: フレーム長（ミリ秒）
+
+    Returns:
+        フレームごとのエネルギー（dB）の配列
+    """
+    frame_length = int(sample_rate * frame_ms / 1000)
+    num_frames = len(audio) // frame_length
+    if num_frames == 0:
+        return np.zeros(0, dtype=np.float32)
+
+    frames = np.asarray(audio[:num_frames * frame_length], dtype=np.float32)
+    frames = frames.reshape(num_frames, frame_length)
+    rms = np.sqrt(np.mean(frames * frames, axis=1) + 1e-12)
+    return (20.0 * np.log10(rms)).astype(np.float32)
+
+
+def split_at_silence(audio: np.ndarray,
+                     chunk_length: float,
+                     min_silence: float = 0.5,
+                     search_window: float = 30.0,
+                     sample_rate: int = SAMPLE_RATE,
+                     frame_ms: int = 30) -> List[Tuple[int, int]]:
+    """
+    長い音声を無音区間で分割
+
+    chunk_length秒ごとの目標位置の手前search_window秒の範囲で、
+    min_silence秒の平均エネルギーが最も低い位置を分割点とする。
+
+    Args:
+        audio: float32の波形
+        chunk_length: 最大チャンク長（秒）
+        min_silence: 分割点として評価する無音の長さ（秒）
+        search_window: 分割点を探す範囲（秒）
+        sample_rate: サンプリングレート
+        frame_ms: エネルギー計算のフレーム長（ミリ秒）
+
+    Returns:
+        (開始サンプル, 終了サンプル) のリスト
+    """
+    total_samples = len(audio)
+    chunk_samples = int(chunk_length * sample_rate)
+    if chunk_samples <= 0 or total_samples <= chunk_samples:
+        return [(0, total_samples)]
+
+    frame_length = int(sample_rate * frame_ms / 1000)
+    energies = frame_energies(audio, sample_rate, frame_ms)
+
+    # min_silence秒の移動平均（フレーム単位）
+    window_frames = max(1, int(min_silence * 1000 / frame_ms))
+    kernel = np.ones(window_frames, dtype=np.float32) / window_frames
+    smoothed = np.convolve(energies, kernel, mode="valid")
+
+    search_frames = max(1, int(search_window * 1000 / frame_ms))
+    min_chunk_frames = max(1, (chunk_samples // frame_length) // 2)
+
+    boundaries = [0]
+    start_frame = 0
+    while (len(energies) - start_frame) * frame_length > chunk_samples:
+        target_frame = start_frame + chunk_samples // frame_length
+        lo = max(start_frame + min_chunk_frames, target_frame - search_frames)
+        hi = min(target_frame, len(smoothed))
+        if hi > lo:
+            quietest = lo + int(np.argmin(smoothed[lo:hi]))
+            cut_frame = quietest + window_frames // 2
+        else:
+            cut_frame = target_frame
+        boundaries.append(cut_frame * frame_length)
+        start_frame = cut_frame
+
+    boundaries.append(total_samples)
+    return [(boundaries[i], boundaries[i + 1]) for i in range(len(boundaries) - 1)]
+
+
+def shift_segments(segments: List[Dict], offset: float) -> List[Dict]:
+    """
+    セグメント（および単語）のタイムスタンプをoffset秒ずらす
+
+    Args:
+        segments: Whisperのセグメントリスト
+        offset: 加算する秒数
+
+    Returns:
+        同じリスト（インプレースで更新）
+    """
+    for segment in segments:
+        segment["start"] += offset
+        segment["end"] += offset
+        for word in segment.get("words") or []:
+            word["start"] += offset
+            word["end"] += offset
+    return segments
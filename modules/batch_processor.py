@@ -0,0 +1,232 @@
+import os
+import glob
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from datetime import datetime
+from typing import Dict, List, Optional
+
+# 一括処理の対象とする音声ファイル拡張子
+AUDIO_EXTENSIONS = (".mp3", ".wav", ".m4a", ".mp4", ".flac", ".ogg", ".webm", ".aac", ".wma")
+
+
+def collect_audio_files(paths: List[str]) -> List[str]:
+    """
+    パス・globパターン・ディレクトリから音声ファイル一覧を作成
+
+    Args:
+        paths: ファイルパス、globパターン、ディレクトリのリスト
+
+    Returns:
+        重複を除いた音声ファイルパスのリスト（指定順）
+    """
+    audio_files = []
+    seen = set()
+
+    for path in paths:
+        if os.path.isdir(path):
+            candidates = sorted(
+                os.path.join(path, name) for name in os.listdir(path)
+                if name.lower().endswith(AUDIO_EXTENSIONS)
+            )
+        elif glob.has_magic(path):
+            candidates = sorted(
+                match for match in glob.glob(path)
+                if os.path.isfile(match) and match.lower().endswith(AUDIO_EXTENSIONS)
+            )
+        else:
+            candidates = [path]
+
+        for candidate in candidates:
+            key = os.path.abspath(candidate)
+            if key not in seen:
+                seen.add(key)
+                audio_files.append(candidate)
+
+    return audio_files
+
+
+class BatchProcessor:
+    """一括処理クラス - 読み込み済みのWhisperモデルで複数ファイルを文字起こし"""
+
+    def __init__(self, audio_processor, output_formatter, batch_size: int = 5, cascade=None):
+        """
+        初期化
+
+        Args:
+            audio_processor: 読み込み済みのAudioProcessor（全ファイルで共有）
+            output_formatter: OutputFormatter
+            batch_size: 同時に処理するファイル数
+            cascade: 低信頼区間を大きいモデルで再デコードするModelCascade（Noneの場合は行わない）
+        """
+        self.audio_processor = audio_processor
+        self.output_formatter = output_formatter
+        self.batch_size = max(1, batch_size)
+        self.cascade = cascade
+        # Whisperモデル（AudioProcessor.modelで全スレッド共有）は推論中にフックを差し替えるため同時実行しない
+        # （WhisperBackendもモデル単位で直列化する）。ここでは読み込み・VAD・話者分離の準備も含めて待たせ、
+        # 並列化するのはffmpegによるデコード・整形・保存のみ（スレッドセーフなバックエンドは推論も並列）
+        if getattr(getattr(audio_processor, "backend", None), "thread_safe", False):
+            self._model_lock = nullcontext()
+        else:
+            self._model_lock = threading.Lock()
+
+    def process(self, audio_files: List[str],
+                format_type: str = "standard",
+                enable_vad: bool = False,
+                prompt: Optional[str] = None,
+                overwrite: bool = False,
+                metadata: Dict = None,
+                output_format: str = "txt",
+                resegment: bool = False) -> Dict:
+        """
+        複数の音声ファイルを文字起こし
+
+        Args:
+            audio_files: 音声ファイルパスのリスト
+            format_type: 出力形式 ("standard", "continuous", "minimal")
+            enable_vad: VADを有効にするか
+            prompt: Whisperに与える初期プロンプト
+            overwrite: 既存の出力があっても再処理するか
+            metadata: 各出力ファイルに付与するメタデータ
+            output_format: ファイル形式 ("txt", "json", "srt", "vtt")
+            resegment: 単語タイムスタンプでセグメントを区切り直すか
+
+        Returns:
+            実行サマリー辞書（files: ファイル別結果, total_time: 総処理時間）
+        """
+        start_time = time.time()
+
+        with ThreadPoolExecutor(max_workers=self.batch_size) as executor:
+            futures = [
+                executor.submit(self.process_file, audio_file, format_type,
+                                enable_vad, prompt, overwrite, metadata, output_format,
+                                resegment)
+                for audio_file in audio_files
+            ]
+            results = [future.result() for future in futures]
+
+        return {
+            "files": results,
+            "total_time": time.time() - start_time,
+        }
+
+    def process_file(self, audio_file: str, format_type: str = "standard",
+                     enable_vad: bool = False, prompt: Optional[str] = None,
+                     overwrite: bool = False, metadata: Dict = None,
+                     output_format: str = "txt", resegment: bool = False) -> Dict:
+        """
+        1ファイルを処理して結果を返す（例外は結果に記録）
+
+        複数スレッドから同時に呼び出してよい（推論のみ排他）。引数はprocessと同じ。
+
+        Returns:
+            ファイル別結果（status: success/skipped/failed, output_path, decode_time,
+            transcribe_time, error）
+        """
+        entry = {"audio_file": audio_file, "status": "success",
+                 "output_path": None, "decode_time": 0.0,
+                 "transcribe_time": 0.0, "error": None}
+
+        existing = self.output_formatter.find_existing_output(audio_file, "whisper", format_type, output_format)
+        if existing and not overwrite:
+            print(f"スキップ（出力済み）: {audio_file}")
+            entry["status"] = "skipped"
+            entry["output_path"] = existing
+            return entry
+
+        try:
+            # キャッシュ済みの場合はデコードも不要
+            audio = None
+            if not self.audio_processor.is_cached(audio_file, prompt=prompt, enable_vad=enable_vad):
+                decode_start = time.time()
+                audio = self.audio_processor.load_audio(audio_file)
+                entry["decode_time"] = time.time() - decode_start
+
+            with self._model_lock:
+                transcribe_start = time.time()
+                whisper_result = self.audio_processor.transcribe(
+                    audio_file,
+                    enable_vad=enable_vad,
+                    prompt=prompt,
+                    audio=audio
+                )
+                if self.cascade is not None:
+                    whisper_result = self.cascade.refine(audio_file, whisper_result, prompt=prompt, audio=audio)
+                entry["transcribe_time"] = time.time() - transcribe_start
+            if resegment:
+                whisper_result = self.audio_processor.resegment_words(whisper_result)
+
+            file_metadata = dict(metadata or {})
+            file_metadata["processing_time"] = entry["decode_time"] + entry["transcribe_time"]
+            if "decode" in whisper_result:
+                file_metadata["decode_retries"] = whisper_result["decode"]["retries"]
+            if "cascade" in whisper_result:
+                file_metadata["cascade_model"] = whisper_result["cascade"]["model"]
+                file_metadata["cascade_escalation_ratio"] = whisper_result["cascade"]["escalation_ratio"]
+
+            if output_format == "txt":
+                output_text = self.audio_processor.create_formatted_text(whisper_result, format_type)
+                entry["output_path"] = self.output_formatter.save_transcription(
+                    output_text,
+                    audio_file,
+                    "whisper",
+                    file_metadata,
+                    format_type=format_type,
+                    segments=whisper_result["segments"]
+                )
+            else:
+                entry["output_path"] = self.output_formatter.save_structured(
+                    whisper_result,
+                    audio_file,
+                    output_format,
+                    "whisper",
+                    file_metadata
+                )
+        except Exception as e:
+            print(f"エラーが発生しました ({audio_file}): {e}")
+            entry["status"] = "failed"
+            entry["error"] = str(e)
+
+        return entry
+
+    def save_summary(self, summary: Dict) -> str:
+        """
+        一括処理のサマリーを保存
+
+        Args:
+            summary: processの戻り値
+
+        Returns:
+            保存されたサマリーファイルのパス
+        """
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        summary_path = os.path.join(self.output_formatter.output_dir, f"batch_summary_{timestamp}.txt")
+
+        files = summary["files"]
+        counts = {status: sum(1 for f in files if f["status"] == status)
+                  for status in ("success", "skipped", "failed")}
+
+        with open(summary_path, 'w', encoding='utf-8') as f:
+            f.write("# 一括処理サマリー\n\n")
+            f.write(f"処理日時: {datetime.now().strftime('%Y年%m月%d日 %H:%M:%S')}\n")
+            f.write(f"対象ファイル数: {len(files)}\n")
+            f.write(f"成功: {counts['success']} / スキップ: {counts['skipped']} / 失敗: {counts['failed']}\n")
+            f.write(f"総処理時間: {summary['total_time']:.2f}秒\n\n")
+
+            f.write("## ファイル別結果\n")
+            f.write("="*60 + "\n")
+            for entry in files:
+                f.write(f"- {entry['audio_file']}: {entry['status']}")
+                if entry["status"] == "success":
+                    f.write(f" (デコード {entry['decode_time']:.2f}秒, "
+                            f"文字起こし {entry['transcribe_time']:.2f}秒)")
+                if entry["output_path"]:
+                    f.write(f" -> {entry['output_path']}")
+                if entry["error"]:
+                    f.write(f"\n    エラー: {entry['error']}")
+                f.write("\n")
+
+        print(f"一括処理サマリーを保存しました: {summary_path}")
+        return summary_path
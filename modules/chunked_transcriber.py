@@ -0,0 +1,271 @@
+import gc
+import math
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
+
+from .audio_segmenter import SAMPLE_RATE, shift_segments, split_at_silence
+from .inference_backends import create_backend
+from .model_registry import fork_sharing_available, process_memory
+
+# ワーカープロセス内で保持するAudioProcessor（fork時は親プロセスで読み込み済みのものを継承）
+_worker_processor = None
+# ワーカーでのモデル読み込み時間（親プロセスのモデルを共有した場合は0）
+_worker_load_time = 0.0
+
+
+def _init_worker(model_name: str, device: str, num_threads: int,
+                 backend: str = "whisper", compute_type: str = "int8",
+                 decode_profile: str = "fast", max_retries: Optional[int] = None):
+    """ワーカープロセスの初期化（spawn） - ワーカーごとにモデルを1回だけ読み込む"""
+    global _worker_processor, _worker_load_time
+    from .audio_processor import AudioProcessor
+
+    # 各ワーカーがCPUコアを奪い合わないようスレッド数を制限
+    _worker_processor = AudioProcessor(model_name=model_name, device=device, backend=backend,
+                                       compute_type=compute_type, cpu_threads=num_threads,
+                                       decode_profile=decode_profile, max_retries=max_retries)
+    start = time.perf_counter()
+    _worker_processor.model  # 最初のチャンク処理前に読み込みを済ませる
+    _worker_load_time = time.perf_counter() - start
+
+
+def _init_forked_worker(num_threads: int):
+    """ワーカープロセスの初期化（fork） - 親プロセスのモデルをコピーオンライトで共有"""
+    global _worker_load_time
+    _worker_load_time = 0.0
+    _worker_processor.backend.set_num_threads(num_threads)
+
+
+def _worker_stats() -> Dict:
+    """ワーカーのプロセスID・モデル読み込み時間・メモリ使用量"""
+    stats = {"pid": os.getpid(), "load_time": _worker_load_time}
+    stats.update(process_memory())
+    return stats
+
+
+def _transcribe_chunk(index: int, audio, language: str,
+                      prompt: Optional[str]) -> Tuple[int, Dict, Dict]:
+    """
+    ワーカープロセスで1チャンクを文字起こし（誤認識修正は結合後に親プロセスで行う）
+
+    audioが (PCMファイルのパス, 開始サンプル, 終了サンプル) の場合は、
+    波形を受け渡さずにワーカー側でその範囲だけを読み込む。
+    """
+    if isinstance(audio, tuple):
+        from .pcm_cache import read_pcm_range
+        audio = read_pcm_range(*audio)
+    params = _worker_processor.build_transcribe_params(language, prompt)
+    return index, _worker_processor._run_whisper(audio, params), _worker_stats()
+
+
+def stitch_results(chunk_results: List[Dict],
+                   chunk_ranges: List[Tuple[float, float]]) -> Dict:
+    """
+    チャンクごとの結果を全体のタイムラインで結合
+
+    各チャンクのタイムスタンプを全体位置に補正し、前のチャンクと
+    重複する範囲（中心がチャンクの担当開始位置より前）のセグメントと、
+    チャンク境界で直前と同一テキストになった重複セグメントを除去する。
+
+    Args:
+        chunk_results: チャンク順のWhisper結果辞書
+        chunk_ranges: 各チャンクの(音声内の開始秒, 担当開始秒)
+
+    Returns:
+        結合されたWhisperの結果辞書
+    """
+    segments = []
+    language = None
+
+    for result, (audio_start, owned_start) in zip(chunk_results, chunk_ranges):
+        language = language or result.get("language")
+        at_boundary = bool(segments)
+        for segment in shift_segments(result.get("segments", []), audio_start):
+            center = (segment["start"] + segment["end"]) / 2
+            if center < owned_start:
+                continue
+            if at_boundary and segment["text"].strip() == segments[-1]["text"].strip():
+                continue
+            at_boundary = False
+            segments.append(segment)
+
+    for i, segment in enumerate(segments):
+        segment["id"] = i
+
+    return {
+        "text": "".join(segment["text"] for segment in segments),
+        "segments": segments,
+        "language": language,
+    }
+
+
+class ChunkedTranscriber:
+    """長時間音声のチャンク分割並列文字起こしクラス"""
+
+    def __init__(self, model_name: str = "base", device: str = "cpu",
+                 workers: int = 2, chunk_length: float = 600.0,
+                 min_silence: float = 0.5, overlap: float = 1.0,
+                 backend: str = "whisper", compute_type: str = "int8",
+                 decode_profile: str = "fast", max_retries: Optional[int] = None,
+                 start_method: str = "auto", processor=None):
+        """
+        初期化
+
+        Args:
+            model_name: Whisperモデル名
+            device: 使用デバイス
+            workers: ワーカープロセス数（各プロセスが1モデルを保持）
+            chunk_length: 最大チャンク長（秒）
+            min_silence: 分割点として探す無音の長さ（秒）
+            overlap: 各チャンクの先頭に付ける前チャンクとの重なり（秒）
+            backend: 推論バックエンド (whisper, faster-whisper)
+            compute_type: faster-whisperの演算精度
+            decode_profile: デコードプロファイル (fast, balanced, accurate)
+            max_retries: 温度フォールバックの再試行回数の上限（Noneの場合はプロファイルの既定値）
+            start_method: ワーカーの起動方法。"fork" は親プロセスでモデルを1回読み込んでから
+                forkし、重みを全ワーカーでコピーオンライト共有する。"spawn" はワーカーごとに
+                読み込む。"auto" はバックエンドとOSが対応していればfork
+            processor: fork時に共有する親プロセスのAudioProcessor（省略時は作成）
+        """
+        self.model_name = model_name
+        self.device = device
+        self.workers = max(1, workers)
+        self.chunk_length = chunk_length
+        self.min_silence = min_silence
+        self.overlap = overlap
+        self.backend = backend
+        self.compute_type = compute_type
+        self.decode_profile = decode_profile
+        self.max_retries = max_retries
+        self.start_method = start_method
+        self.processor = processor
+        # 直近のtranscribeでのワーカーごとの読み込み時間・メモリ使用量
+        self.worker_stats = []
+
+    def plan_chunks(self, audio) -> List[Tuple[int, int]]:
+        """
+        チャンクの分割位置を決定
+
+        全ワーカーに仕事が行き渡るよう、チャンク長は
+        chunk_lengthを上限として音声長/ワーカー数まで短くする（最短60秒）。
+
+        Args:
+            audio: float32の波形
+
+        Returns:
+            (開始サンプル, 終了サンプル) のリスト
+        """
+        duration = len(audio) / SAMPLE_RATE
+        chunk_length = min(self.chunk_length, max(60.0, math.ceil(duration / self.workers)))
+        return split_at_silence(audio, chunk_length, self.min_silence)
+
+    def transcribe(self, audio, language: str = "ja",
+                   prompt: Optional[str] = None,
+                   on_submitted: Optional[Callable[[], None]] = None) -> Dict:
+        """
+        チャンクを並列に文字起こしして結合
+
+        Args:
+            audio: float32の波形（16kHzモノラル）。PCMキャッシュのメモリマップの場合、
+                ワーカーには波形ではなくファイル内の位置だけを渡す
+            language: 言語コード
+            prompt: Whisperに与える初期プロンプト
+            on_submitted: 全チャンクの投入後（ワーカーのfork後）に親プロセスで呼ぶ関数。
+                親で別スレッドを起動する処理はforkと重ならないようここで始める
+
+        Returns:
+            Whisperの結果辞書（タイムスタンプは全体位置）
+        """
+        boundaries = self.plan_chunks(audio)
+        overlap_samples = int(self.overlap * SAMPLE_RATE)
+        pcm_path = getattr(audio, "filename", None)
+
+        chunks = []
+        chunk_ranges = []
+        for start, end in boundaries:
+            audio_start = max(0, start - overlap_samples)
+            chunks.append((pcm_path, audio_start, end) if pcm_path else audio[audio_start:end])
+            chunk_ranges.append((audio_start / SAMPLE_RATE, start / SAMPLE_RATE))
+
+        workers = min(self.workers, len(chunks))
+        num_threads = max(1, (os.cpu_count() or 1) // workers)
+        print(f"チャンク並列文字起こし: {len(chunks)}チャンク / {workers}ワーカー "
+              f"(各{num_threads}スレッド)")
+
+        start_time = time.time()
+        chunk_results = [None] * len(chunks)
+        worker_stats = {}
+        share_model = self._use_fork()
+        if share_model:
+            context, initializer, initargs = self._prepare_fork(num_threads)
+        else:
+            context = multiprocessing.get_context("spawn")
+            initializer = _init_worker
+            initargs = (self.model_name, self.device, num_threads, self.backend, self.compute_type,
+                        self.decode_profile, self.max_retries)
+
+        try:
+            with ProcessPoolExecutor(max_workers=workers, mp_context=context,
+                                     initializer=initializer, initargs=initargs) as executor:
+                futures = [
+                    executor.submit(_transcribe_chunk, i, chunk, language, prompt)
+                    for i, chunk in enumerate(chunks)
+                ]
+                if on_submitted is not None:
+                    on_submitted()
+                for future in futures:
+                    index, result, stats = future.result()
+                    chunk_results[index] = result
+                    previous = worker_stats.get(stats["pid"], stats)
+                    for key in ("rss_mb", "private_mb"):
+                        if previous.get(key) is not None and stats.get(key) is not None:
+                            stats[key] = max(stats[key], previous[key])
+                    worker_stats[stats["pid"]] = stats
+                    print(f"チャンク {index + 1}/{len(chunks)} 完了 "
+                          f"({time.time() - start_time:.1f}秒経過)")
+        finally:
+            if share_model:
+                gc.unfreeze()
+
+        self.worker_stats = list(worker_stats.values())
+        self._report_workers(share_model)
+        return stitch_results(chunk_results, chunk_ranges)
+
+    def _use_fork(self) -> bool:
+        """親プロセスで読み込んだモデルをforkで共有するか"""
+        if self.start_method == "spawn":
+            return False
+        backend = self.processor.backend if self.processor is not None else \
+            create_backend(self.backend, self.compute_type)
+        available = fork_sharing_available(backend)
+        if self.start_method == "fork" and not available:
+            print(f"forkによるモデル共有に対応していないため、ワーカーごとに読み込みます ({backend.cache_id})")
+        return available
+
+    def _prepare_fork(self, num_threads: int):
+        """親プロセスでモデルを読み込み、fork用のコンテキストと初期化関数を返す"""
+        global _worker_processor
+        if self.processor is None:
+            from .audio_processor import AudioProcessor
+            self.processor = AudioProcessor(model_name=self.model_name, device=self.device,
+                                            backend=self.backend, compute_type=self.compute_type,
+                                            decode_profile=self.decode_profile,
+                                            max_retries=self.max_retries)
+        self.processor.model
+        _worker_processor = self.processor
+        # 既存オブジェクトをGCの走査対象から外し、子プロセスでの参照カウント以外のページ複製を防ぐ
+        gc.freeze()
+        return multiprocessing.get_context("fork"), _init_forked_worker, (num_threads,)
+
+    def _report_workers(self, shared: bool):
+        """ワーカーごとのモデル読み込み時間とメモリ使用量を表示"""
+        mode = "親プロセスで読み込んだモデルをfork共有" if shared else "ワーカーごとに読み込み"
+        print(f"ワーカーのメモリ使用量 ({mode}):")
+        for stats in self.worker_stats:
+            memory = f"RSS {stats['rss_mb']:.0f}MB" if stats.get("rss_mb") is not None else "RSS 不明"
+            if stats.get("private_mb") is not None:
+                memory += f" (専有 {stats['private_mb']:.0f}MB)"
+            print(f"  PID {stats['pid']}: モデル読み込み {stats['load_time']:.1f}秒 / {memory}")
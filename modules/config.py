@@ -15,14 +15,107 @@ class Config:
     # Whisper設定
     WHISPER_MODEL = os.getenv("WHISPER_MODEL", "base")
     WHISPER_DEVICE = os.getenv("WHISPER_DEVICE", "cpu")
+    WHISPER_BACKEND = os.getenv("WHISPER_BACKEND", "whisper")  # whisper または faster-whisper
+    WHISPER_COMPUTE_TYPE = os.getenv("WHISPER_COMPUTE_TYPE", "int8")  # faster-whisperの演算精度
+    WHISPER_CPU_THREADS = int(os.getenv("WHISPER_CPU_THREADS", "0"))  # 0は既定値
+    DECODE_PROFILE = os.getenv("DECODE_PROFILE", "fast")  # fast, balanced, accurate
+    DECODE_MAX_RETRIES = int(os.getenv("DECODE_MAX_RETRIES", "-1"))  # 温度フォールバックの再試行上限（-1はプロファイルの既定値）
     
     # 出力設定
     OUTPUT_DIR = os.getenv("OUTPUT_DIR", "./output")
+    OUTPUT_FORMAT = os.getenv("OUTPUT_FORMAT", "txt")
     LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
+    LOG_FILE = os.getenv("LOG_FILE")  # 処理区間ごとの構造化ログ（JSON Lines）
+    METRICS_FILE = os.getenv("METRICS_FILE")  # 終了時にPrometheusテキスト形式で書き出す
+    
+    # 処理設定
+    BATCH_SIZE = int(os.getenv("BATCH_SIZE", "5"))
+    CHUNK_LENGTH_SECONDS = float(os.getenv("CHUNK_LENGTH_SECONDS", "600"))
+    MIN_SILENCE_DURATION = float(os.getenv("MIN_SILENCE_DURATION", "0.5"))
+    # --workers のワーカー起動方法 (auto: 可能ならモデル読み込み後にforkして重みを共有, fork, spawn)
+    WORKER_START_METHOD = os.getenv("WORKER_START_METHOD", "auto")
+    
+    # モデルカスケード（--cascade）。下書きモデルの低信頼セグメントだけを大きいモデルで再デコード
+    CASCADE_MODEL = os.getenv("CASCADE_MODEL")
+    CASCADE_LOGPROB_THRESHOLD = float(os.getenv("CASCADE_LOGPROB_THRESHOLD", "-0.7"))
+    CASCADE_NO_SPEECH_THRESHOLD = float(os.getenv("CASCADE_NO_SPEECH_THRESHOLD", "0.6"))
+    CASCADE_COMPRESSION_THRESHOLD = float(os.getenv("CASCADE_COMPRESSION_THRESHOLD", "2.4"))
+    
+    # 話者分離（--diarize）。話者数0は自動推定
+    ENABLE_DIARIZATION = os.getenv("ENABLE_DIARIZATION", "false").lower() == "true"
+    DIARIZATION_NUM_SPEAKERS = int(os.getenv("DIARIZATION_NUM_SPEAKERS", "0"))
+    DIARIZATION_MAX_SPEAKERS = int(os.getenv("DIARIZATION_MAX_SPEAKERS", "8"))
+    
+    # 誤認識辞書（1行に「誤認識<TAB>正しい表記」、未指定時は同梱の辞書）
+    CORRECTION_DICTIONARY = os.getenv("CORRECTION_DICTIONARY")
+    
+    # キャッシュ設定
+    TRANSCRIPTION_CACHE_DIR = os.getenv("TRANSCRIPTION_CACHE_DIR", "./cache/transcriptions")
+    TRANSCRIPTION_CACHE_MAX_MB = float(os.getenv("TRANSCRIPTION_CACHE_MAX_MB", "1024"))
+    PCM_CACHE_DIR = os.getenv("PCM_CACHE_DIR", "./cache/pcm")
+    PCM_CACHE_MAX_MB = float(os.getenv("PCM_CACHE_MAX_MB", "4096"))
+    
+    # 常駐サービス設定（--serve）
+    SERVICE_HOST = os.getenv("SERVICE_HOST", "127.0.0.1")
+    SERVICE_PORT = int(os.getenv("SERVICE_PORT", "8765"))
+    SERVICE_WORKERS = int(os.getenv("SERVICE_WORKERS", "1"))
+    # ジョブで指定できるモデル（カンマ区切り、空の場合は全Whisperモデル）
+    SERVICE_MODELS = [name.strip() for name in os.getenv("SERVICE_MODELS", "").split(",") if name.strip()]
+    
+    # 監視フォルダ設定（--watch）
+    WATCH_DIR = os.getenv("WATCH_DIR", "./input")
+    WATCH_LEDGER_PATH = os.getenv("WATCH_LEDGER_PATH", "./cache/watch_ledger.sqlite3")
+    WATCH_WORKERS = int(os.getenv("WATCH_WORKERS", "2"))
+    WATCH_SETTLE_SECONDS = float(os.getenv("WATCH_SETTLE_SECONDS", "2.0"))  # この間サイズが変わらなければ書き込み完了
+    WATCH_POLL_INTERVAL = float(os.getenv("WATCH_POLL_INTERVAL", "1.0"))  # inotifyが使えない場合の走査間隔
+    
+    # 全文検索インデックス（--search）。保存した文字起こしをセグメント単位で登録
+    ENABLE_SEARCH_INDEX = os.getenv("ENABLE_SEARCH_INDEX", "true").lower() == "true"
+    SEARCH_INDEX_PATH = os.getenv("SEARCH_INDEX_PATH", "./cache/transcript_index.sqlite3")
+    SEARCH_CONTEXT_SEGMENTS = int(os.getenv("SEARCH_CONTEXT_SEGMENTS", "1"))  # 検索結果の前後に表示する発言数
     
     # API URLs
-    DEEPSEEK_API_URL = "https://api.deepseek.com/v1/chat/completions"
-    OPENAI_API_URL = "https://api.openai.com/v1/chat/completions"
+    DEEPSEEK_API_URL = os.getenv("DEEPSEEK_API_URL", "https://api.deepseek.com/v1/chat/completions")
+    OPENAI_API_URL = os.getenv("OPENAI_API_URL", "https://api.openai.com/v1/chat/completions")
+    GEMINI_API_URL = os.getenv(
+        "GEMINI_API_URL",
+        "https://generativelanguage.googleapis.com/v1beta/models/gemini-1.5-flash-latest:generateContent"
+    )
+    
+    # LLM後処理設定
+    LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "4"))
+    LLM_CHUNK_CHARS = int(os.getenv("LLM_CHUNK_CHARS", "3000"))
+    LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "4"))
+    # 選択的後処理（--llm-selective）。低信頼・誤認識辞書に該当したセグメントだけを前後の文脈付きで送る
+    LLM_SELECTIVE = os.getenv("LLM_SELECTIVE", "false").lower() == "true"
+    LLM_CONTEXT_SEGMENTS = int(os.getenv("LLM_CONTEXT_SEGMENTS", "1"))
+    LLM_SELECT_LOGPROB_THRESHOLD = float(os.getenv("LLM_SELECT_LOGPROB_THRESHOLD", "-0.5"))
+    LLM_REQUEST_TIMEOUT = float(os.getenv("LLM_REQUEST_TIMEOUT", "120"))  # 応答待ちのタイムアウト（秒）
+    
+    # API別のレート制限（1分あたりのリクエスト数・トークン数。0は無制限）
+    DEEPSEEK_RPM = float(os.getenv("DEEPSEEK_RPM", "0"))
+    DEEPSEEK_TPM = float(os.getenv("DEEPSEEK_TPM", "0"))
+    OPENAI_RPM = float(os.getenv("OPENAI_RPM", "500"))
+    OPENAI_TPM = float(os.getenv("OPENAI_TPM", "200000"))
+    GEMINI_RPM = float(os.getenv("GEMINI_RPM", "15"))
+    GEMINI_TPM = float(os.getenv("GEMINI_TPM", "1000000"))
+    LLM_RATE_BURST = float(os.getenv("LLM_RATE_BURST", "0.1"))  # 一度に送れる量（1分間のクォータに対する割合）
+    # 待ちがLLM_SPILLOVER_MAX_WAIT秒を超える送信を他の利用可能なAPIへ回す（--llm-spillover）
+    LLM_SPILLOVER = os.getenv("LLM_SPILLOVER", "false").lower() == "true"
+    LLM_SPILLOVER_MAX_WAIT = float(os.getenv("LLM_SPILLOVER_MAX_WAIT", "10"))
+    
+    LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH", "./cache/llm_responses.sqlite3")
+    LLM_CACHE_TTL_HOURS = float(os.getenv("LLM_CACHE_TTL_HOURS", "720"))
+    LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "10000"))
+    
+    @classmethod
+    def llm_rate_limits(cls):
+        """API名をキーとした (RPM, TPM) の辞書"""
+        return {
+            "deepseek": (cls.DEEPSEEK_RPM, cls.DEEPSEEK_TPM),
+            "openai": (cls.OPENAI_RPM, cls.OPENAI_TPM),
+            "gemini": (cls.GEMINI_RPM, cls.GEMINI_TPM),
+        }
     
     @classmethod
     def validate_api_keys(cls):
@@ -0,0 +1,185 @@
+import bisect
+import os
+import re
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# 同梱の誤認識辞書
+DEFAULT_DICTIONARY_PATH = os.path.join(os.path.dirname(__file__), "correction_dictionary.tsv")
+
+
+def load_dictionary(path: str) -> List[Tuple[str, str]]:
+    """
+    誤認識辞書ファイルを読み込む
+
+    1行に「誤認識<TAB>正しい表記」を記述する。空行と#で始まる行は無視。
+
+    Args:
+        path: 辞書ファイルのパス
+
+    Returns:
+        (誤認識, 正しい表記) のリスト
+    """
+    entries = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for line_number, line in enumerate(f, 1):
+            line = line.rstrip("\n")
+            if not line.strip() or line.lstrip().startswith("#"):
+                continue
+            parts = line.split("\t")
+            if len(parts) != 2 or not parts[0]:
+                raise ValueError(f"辞書の形式が不正です ({path}:{line_number}): {line}")
+            entries.append((parts[0], parts[1]))
+    return entries
+
+
+def _build_trie_pattern(terms: Iterable[str]) -> str:
+    """
+    語句集合から接頭辞を共有したトライ形式の正規表現を作成
+
+    各位置では長い語句を優先して一致させる（最長一致）。
+    """
+    trie = {}
+    for term in terms:
+        node = trie
+        for char in term:
+            node = node.setdefault(char, {})
+        node[""] = True
+
+    def build(node: Dict) -> str:
+        terminal = "" in node
+        branches = [re.escape(char) + build(child)
+                    for char, child in sorted(node.items()) if char != ""]
+        if not branches:
+            return ""
+        if len(branches) == 1:
+            body = branches[0]
+            grouped = f"(?:{body})" if terminal and len(body) > 1 else body
+        else:
+            grouped = "(?:" + "|".join(branches) + ")"
+        return grouped + "?" if terminal else grouped
+
+    return build(trie)
+
+
+class CorrectionEngine:
+    """誤認識修正クラス - 辞書全体を1つの正規表現にまとめ、1回の走査で置換"""
+
+    def __init__(self, entries: Iterable[Tuple[str, str]]):
+        """
+        初期化
+
+        Args:
+            entries: (誤認識, 正しい表記) のリスト。同じ誤認識は後の定義を優先
+        """
+        self.replacements = dict(entries)
+        self._pattern = (re.compile(_build_trie_pattern(self.replacements))
+                         if self.replacements else None)
+
+    @classmethod
+    def from_file(cls, path: Optional[str] = None) -> "CorrectionEngine":
+        """
+        辞書ファイルからエンジンを作成
+
+        Args:
+            path: 辞書ファイルのパス（省略時は同梱の辞書）
+
+        Returns:
+            CorrectionEngine
+        """
+        return cls(load_dictionary(path or DEFAULT_DICTIONARY_PATH))
+
+    def __len__(self) -> int:
+        return len(self.replacements)
+
+    def apply(self, text: str) -> Tuple[str, int]:
+        """
+        テキストの誤認識を修正
+
+        Args:
+            text: 対象テキスト
+
+        Returns:
+            (修正後テキスト, 置換した箇所の数)
+        """
+        if self._pattern is None or not text:
+            return text, 0
+        return self._pattern.subn(lambda m: self.replacements[m.group(0)], text)
+
+    def apply_to_words(self, words: List[Dict]) -> int:
+        """
+        単語タイムスタンプの単語列を修正（単語をまたぐ語句にも対応）
+
+        一致範囲にかかる単語は先頭の単語に置換後の表記をまとめ、
+        空になった単語は削除して先頭の単語の終了時刻を延ばす。
+
+        Args:
+            words: Whisperの単語リスト（インプレースで更新）
+
+        Returns:
+            置換した箇所の数
+        """
+        if self._pattern is None or not words:
+            return 0
+
+        joined = "".join(word["word"] for word in words)
+        matches = list(self._pattern.finditer(joined))
+        if not matches:
+            return 0
+
+        starts = []
+        position = 0
+        for word in words:
+            starts.append(position)
+            position += len(word["word"])
+
+        def owner(index: int) -> int:
+            return bisect.bisect_right(starts, index) - 1
+
+        pieces = [[] for _ in words]
+        last_owner = [i for i in range(len(words))]
+        position = 0
+        for match in matches:
+            for index in range(position, match.start()):
+                pieces[owner(index)].append(joined[index])
+            first = owner(match.start())
+            pieces[first].append(self.replacements[match.group(0)])
+            last_owner[first] = max(last_owner[first], owner(match.end() - 1))
+            position = match.end()
+        for index in range(position, len(joined)):
+            pieces[owner(index)].append(joined[index])
+
+        updated = []
+        for i, word in enumerate(words):
+            text = "".join(pieces[i])
+            if not text:
+                continue
+            word["word"] = text
+            word["end"] = max(word["end"], words[last_owner[i]]["end"])
+            updated.append(word)
+        words[:] = updated
+        return len(matches)
+
+    def apply_to_result(self, result: Dict) -> Dict:
+        """
+        Whisperの結果全体（全体テキスト・セグメント・単語）を修正
+
+        各セグメントには置換数を "corrections" として記録する。
+
+        Args:
+            result: Whisperの結果辞書
+
+        Returns:
+            修正後の結果辞書（インプレースで更新）
+        """
+        if "text" in result:
+            result["text"], _ = self.apply(result["text"])
+
+        for segment in result.get("segments", []):
+            hits = 0
+            if "text" in segment:
+                segment["text"], hits = self.apply(segment["text"])
+            if segment.get("words"):
+                self.apply_to_words(segment["words"])
+            segment["corrections"] = hits
+
+        return result
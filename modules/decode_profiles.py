@@ -0,0 +1,87 @@
+"""
+Whisperのデコードプロファイル
+
+ビームサーチ幅・サンプリング候補数・温度フォールバックの段階と再試行回数の上限を
+名前付きの組み合わせとして定義し、精度と処理速度のどちらを優先するかを明示的に選べるようにする。
+"""
+
+from typing import Dict, List, Optional, Sequence
+
+# 温度フォールバックの段階（Whisperの既定値と同じ）
+TEMPERATURE_LADDER = (0.0, 0.2, 0.4, 0.6, 0.8, 1.0)
+
+# beam_size/best_ofがNoneの場合は貪欲デコード（temperature=0）・Whisperの既定値（temperature>0）
+DECODE_PROFILES = {
+    # 温度0の貪欲デコードのみ（再試行なし）。従来の固定パラメータと同じ
+    "fast": {"beam_size": None, "best_of": None, "temperatures": TEMPERATURE_LADDER, "max_retries": 0},
+    # 圧縮率・対数確率の閾値を満たさない区間だけ温度を上げて最大2回再試行
+    "balanced": {"beam_size": None, "best_of": 3, "temperatures": TEMPERATURE_LADDER, "max_retries": 2},
+    # ビームサーチ（幅5）と全段階の温度フォールバック
+    "accurate": {"beam_size": 5, "best_of": 5, "temperatures": TEMPERATURE_LADDER, "max_retries": 5},
+}
+DEFAULT_PROFILE = "fast"
+
+
+def resolve_profile(name: str = DEFAULT_PROFILE, max_retries: Optional[int] = None) -> Dict:
+    """
+    プロファイル名からデコード設定を作成
+
+    Args:
+        name: プロファイル名 (fast, balanced, accurate)
+        max_retries: 再試行回数の上限（Noneの場合はプロファイルの既定値）
+
+    Returns:
+        name, beam_size, best_of, temperatures（再試行回数で打ち切った温度の段階）, max_retries の辞書
+    """
+    if name not in DECODE_PROFILES:
+        raise ValueError(f"未対応のデコードプロファイルです: {name} (選択肢: {', '.join(DECODE_PROFILES)})")
+    profile = dict(DECODE_PROFILES[name], name=name)
+    if max_retries is not None:
+        profile["max_retries"] = max(0, max_retries)
+    profile["temperatures"] = tuple(profile["temperatures"][:profile["max_retries"] + 1])
+    return profile
+
+
+def temperature_ladder(temperature) -> List[float]:
+    """デコードパラメータのtemperature（数値または段階のシーケンス）をリストにする"""
+    if isinstance(temperature, (int, float)):
+        return [float(temperature)]
+    return list(temperature)
+
+
+def count_retries(temperature: float, ladder: Sequence[float]) -> int:
+    """
+    セグメントの確定時の温度から再試行回数を求める
+
+    Args:
+        temperature: セグメントの "temperature"
+        ladder: デコードに使った温度の段階
+
+    Returns:
+        再試行回数（最初の温度で確定した場合0）
+    """
+    return min(range(len(ladder)), key=lambda i: abs(ladder[i] - temperature))
+
+
+def decode_report(segments: List[Dict], profile: str, cached: bool = False) -> Dict:
+    """
+    セグメントの再試行回数・時間を集計
+
+    Args:
+        segments: "retries"（と計測できた場合 "retry_seconds"）付きのセグメントリスト
+        profile: プロファイル名
+        cached: キャッシュ済みの結果か（この実行ではデコードしていないため再試行は0として集計）
+
+    Returns:
+        profile, cached, retries（合計回数）, retried_segments, retry_seconds（計測できない場合None）の辞書
+    """
+    if cached:
+        return {"profile": profile, "cached": True, "retries": 0, "retried_segments": 0, "retry_seconds": 0.0}
+    timed = [segment["retry_seconds"] for segment in segments if "retry_seconds" in segment]
+    return {
+        "profile": profile,
+        "cached": False,
+        "retries": sum(segment.get("retries", 0) for segment in segments),
+        "retried_segments": sum(1 for segment in segments if segment.get("retries", 0) > 0),
+        "retry_seconds": sum(timed) if timed else None,
+    }
@@ -0,0 +1,345 @@
+import numpy as np
+from typing import Dict, List, Optional, Tuple
+
+from .audio_segmenter import SAMPLE_RATE
+from .vad import VoiceActivityDetector
+
+# 話者ラベルの表記（出現順に1から番号を振る）
+SPEAKER_LABEL = "話者{}"
+
+# 特徴量フレーム（25ms窓・10msシフト）
+_FRAME_LENGTH = 400
+_FRAME_SHIFT = 160
+_N_FFT = 512
+_N_MELS = 40
+_N_MFCC = 20
+
+
+def _mel_filterbank(n_mels: int = _N_MELS, n_fft: int = _N_FFT,
+                    sample_rate: int = SAMPLE_RATE) -> np.ndarray:
+    """三角メルフィルタバンク (n_mels, n_fft // 2 + 1)"""
+    def hz_to_mel(hz):
+        return 2595.0 * np.log10(1.0 + hz / 700.0)
+
+    def mel_to_hz(mel):
+        return 700.0 * (10.0 ** (mel / 2595.0) - 1.0)
+
+    mel_points = np.linspace(hz_to_mel(60.0), hz_to_mel(sample_rate / 2 - 400.0), n_mels + 2)
+    bins = np.floor((n_fft + 1) * mel_to_hz(mel_points) / sample_rate).astype(int)
+    filters = np.zeros((n_mels, n_fft // 2 + 1), dtype=np.float32)
+    for i in range(n_mels):
+        left, center, right = bins[i], bins[i + 1], max(bins[i + 2], bins[i + 1] + 1)
+        center = max(center, left + 1)
+        filters[i, left:center] = (np.arange(left, center) - left) / (center - left)
+        filters[i, center:right] = (right - np.arange(center, right)) / (right - center)
+    return filters
+
+
+def _dct_matrix(n_out: int = _N_MFCC, n_in: int = _N_MELS) -> np.ndarray:
+    """DCT-II行列（対数メルエネルギー→MFCC）"""
+    k = np.arange(n_out)[:, None]
+    n = np.arange(n_in)[None, :]
+    return (np.cos(np.pi * k * (2 * n + 1) / (2 * n_in)) * np.sqrt(2.0 / n_in)).astype(np.float32)
+
+
+def mfcc(audio: np.ndarray) -> np.ndarray:
+    """
+    MFCC（10msごと）を計算
+
+    長時間音声でもスペクトルを一度に保持しないようブロック単位で計算する。
+
+    Args:
+        audio: float32の波形（16kHzモノラル）
+
+    Returns:
+        (フレーム数, 20) の配列
+    """
+    num_frames = max(0, (len(audio) - _FRAME_LENGTH) // _FRAME_SHIFT + 1)
+    features = np.empty((num_frames, _N_MFCC), dtype=np.float32)
+    window = np.hamming(_FRAME_LENGTH).astype(np.float32)
+    filters = _mel_filterbank().T
+    dct = _dct_matrix().T
+    offsets = np.arange(_FRAME_LENGTH)
+
+    block_frames = 8192
+    for first in range(0, num_frames, block_frames):
+        last = min(num_frames, first + block_frames)
+        start = first * _FRAME_SHIFT
+        block = np.asarray(audio[start:(last - 1) * _FRAME_SHIFT + _FRAME_LENGTH], dtype=np.float32)
+        frames = block[np.arange(last - first)[:, None] * _FRAME_SHIFT + offsets] * window
+        power = np.abs(np.fft.rfft(frames, n=_N_FFT, axis=1)) ** 2
+        features[first:last] = np.log(power @ filters + 1e-8) @ dct
+    return features
+
+
+def _kmeans(points: np.ndarray, k: int, iterations: int = 50, seed: int = 0) -> np.ndarray:
+    """k-means++初期化のk-means（再現性のため乱数シード固定）"""
+    rng = np.random.default_rng(seed)
+    centers = [points[rng.integers(len(points))]]
+    for _ in range(1, k):
+        distances = np.min([((points - center) ** 2).sum(axis=1) for center in centers], axis=0)
+        total = distances.sum()
+        index = rng.choice(len(points), p=distances / total) if total > 0 else rng.integers(len(points))
+        centers.append(points[index])
+    centers = np.array(centers)
+
+    labels = np.zeros(len(points), dtype=int)
+    for iteration in range(iterations):
+        distances = ((points[:, None, :] - centers[None, :, :]) ** 2).sum(axis=2)
+        new_labels = distances.argmin(axis=1)
+        if iteration > 0 and np.array_equal(new_labels, labels):
+            break
+        labels = new_labels
+        for c in range(k):
+            members = points[labels == c]
+            if len(members):
+                centers[c] = members.mean(axis=0)
+    return labels
+
+
+def _laplacian(similarity: np.ndarray, prune: float) -> np.ndarray:
+    """各行の上位の類似度だけを残した親和度行列の正規化ラプラシアン"""
+    n = len(similarity)
+    keep = min(n, max(2, int(np.ceil(prune * n))))
+    threshold = -np.partition(-similarity, keep - 1, axis=1)[:, keep - 1:keep]
+    affinity = np.where(similarity >= threshold, similarity, 0.0)
+    affinity = np.maximum(affinity, affinity.T)
+    scale = 1.0 / np.sqrt(np.maximum(affinity.sum(axis=1), 1e-10))
+    return np.eye(n) - scale[:, None] * affinity * scale[None, :]
+
+
+def silhouette(embeddings: np.ndarray, labels: np.ndarray) -> float:
+    """コサイン距離によるシルエット係数の平均（-1〜1、クラスタが明確に分かれているほど1に近い）"""
+    distance = 1.0 - embeddings @ embeddings.T
+    clusters = np.unique(labels)
+    if len(clusters) < 2:
+        return 0.0
+    sizes = np.array([np.sum(labels == c) for c in clusters])
+    # 各点から各クラスタへの平均距離（自クラスタは自分自身を除く）
+    mean_distance = np.stack([distance[:, labels == c].sum(axis=1) for c in clusters], axis=1)
+    own = np.searchsorted(clusters, labels)
+    rows = np.arange(len(labels))
+    divisor = np.broadcast_to(sizes, mean_distance.shape).astype(float).copy()
+    divisor[rows, own] -= 1
+    mean_distance /= np.maximum(divisor, 1)
+    intra = mean_distance[rows, own]
+    mean_distance[rows, own] = np.inf
+    nearest = mean_distance.min(axis=1)
+    return float(np.mean((nearest - intra) / np.maximum(np.maximum(intra, nearest), 1e-10)))
+
+
+def spectral_cluster(embeddings: np.ndarray, num_speakers: Optional[int] = None,
+                     max_speakers: int = 8, prune: float = 0.3,
+                     min_silhouette: float = 0.5) -> np.ndarray:
+    """
+    コサイン類似度のスペクトラルクラスタリング
+
+    話者数を指定しない場合は、正規化ラプラシアンの固有値ギャップから2人以上の話者数を推定し、
+    分けた結果のシルエット係数がmin_silhouette未満なら1人とみなす
+    （固有値ギャップだけでは1人の話者を分割してしまうため）。
+
+    Args:
+        embeddings: L2正規化済みの埋め込み (窓数, 次元)
+        num_speakers: 話者数（Noneの場合は推定）
+        max_speakers: 推定する話者数の上限
+        prune: 類似度行列の各行で残す近傍の割合（残りは0にする）
+        min_silhouette: 複数話者とみなすシルエット係数の下限
+
+    Returns:
+        窓ごとのクラスタ番号
+    """
+    n = len(embeddings)
+    if n < 3 or num_speakers == 1:
+        return np.zeros(n, dtype=int)
+
+    similarity = np.clip(embeddings @ embeddings.T, 0.0, 1.0)
+    eigenvalues, eigenvectors = np.linalg.eigh(_laplacian(similarity, prune))
+    k = num_speakers
+    if k is None:
+        limit = max(2, min(max_speakers, n - 1))
+        k = int(np.argmax(np.diff(eigenvalues[1:limit + 1]))) + 2
+    k = min(k, n)
+
+    spectral = eigenvectors[:, :k]
+    spectral /= np.linalg.norm(spectral, axis=1, keepdims=True) + 1e-10
+    labels = _kmeans(spectral, k)
+    if num_speakers is None and silhouette(embeddings, labels) < min_silhouette:
+        return np.zeros(n, dtype=int)
+    return labels
+
+
+class SpeakerDiarizer:
+    """話者分離クラス - CPUのみで動作するMFCC統計量の埋め込み＋スペクトラルクラスタリング"""
+
+    def __init__(self, num_speakers: Optional[int] = None, max_speakers: int = 8,
+                 window: float = 1.5, hop: float = 0.75,
+                 max_cluster_windows: int = 2000, min_silence_duration: float = 0.5):
+        """
+        初期化
+
+        Args:
+            num_speakers: 話者数（Noneの場合は推定）
+            max_speakers: 推定する話者数の上限
+            window: 埋め込みを計算する窓の長さ（秒）
+            hop: 窓のシフト（秒）
+            max_cluster_windows: クラスタリングに使う窓の上限（超過分は最も近い話者に割り当て）
+            min_silence_duration: 発話区間の検出で区切りとみなす最小無音長（秒）
+        """
+        self.num_speakers = num_speakers
+        self.max_speakers = max_speakers
+        self.window = window
+        self.hop = hop
+        self.max_cluster_windows = max_cluster_windows
+        self.vad = VoiceActivityDetector(min_silence_duration=min_silence_duration,
+                                         speech_pad=0.0)
+
+    def _windows(self, regions: List[Tuple[float, float]]) -> List[Tuple[float, float]]:
+        """発話区間内に埋め込み用の窓を並べる（窓より短い区間は区間全体を1窓とする）"""
+        windows = []
+        for start, end in regions:
+            if end - start <= self.window:
+                windows.append((start, end))
+                continue
+            position = start
+            while position + self.window < end:
+                windows.append((position, position + self.window))
+                position += self.hop
+            windows.append((max(start, end - self.window), end))
+        return windows
+
+    def embed(self, features: np.ndarray, windows: List[Tuple[float, float]]) -> np.ndarray:
+        """
+        窓ごとのMFCC平均・標準偏差を正規化した埋め込み
+
+        Args:
+            features: mfccの結果
+            windows: (開始秒, 終了秒) の窓リスト
+
+        Returns:
+            L2正規化済みの埋め込み (窓数, 38)
+        """
+        frame_rate = SAMPLE_RATE / _FRAME_SHIFT
+        # 音量の影響を除くため0次係数は使わない
+        stats = np.empty((len(windows), 2 * (_N_MFCC - 1)), dtype=np.float32)
+        for i, (start, end) in enumerate(windows):
+            frames = features[int(start * frame_rate):max(int(end * frame_rate), int(start * frame_rate) + 1), 1:]
+            stats[i, :_N_MFCC - 1] = frames.mean(axis=0)
+            stats[i, _N_MFCC - 1:] = frames.std(axis=0)
+        stats = (stats - stats.mean(axis=0)) / (stats.std(axis=0) + 1e-6)
+        return stats / (np.linalg.norm(stats, axis=1, keepdims=True) + 1e-10)
+
+    def _cluster(self, embeddings: np.ndarray) -> np.ndarray:
+        """クラスタリング（窓が多い場合は間引いてクラスタリングし、残りは最も近い話者の重心へ）"""
+        n = len(embeddings)
+        if n <= self.max_cluster_windows:
+            return spectral_cluster(embeddings, self.num_speakers, self.max_speakers)
+
+        sample = np.linspace(0, n - 1, self.max_cluster_windows).astype(int)
+        sample_labels = spectral_cluster(embeddings[sample], self.num_speakers, self.max_speakers)
+        # 間引いた窓に現れなかったラベルは重心を作らない（空のクラスタの平均はNaNになる）
+        labels = np.unique(sample_labels)
+        centroids = np.array([embeddings[sample][sample_labels == c].mean(axis=0) for c in labels])
+        return labels[(embeddings @ centroids.T).argmax(axis=1)]
+
+    @staticmethod
+    def _smooth(labels: np.ndarray, windows: List[Tuple[float, float]], width: int = 2) -> np.ndarray:
+        """
+        同じ発話区間内の前後width窓の多数決で短い話者の切り替わりを抑える
+
+        話者の交代は無音を挟むことが多いため、発話区間をまたいでは平滑化しない
+        （短い相づち等が前後の話者に吸収されないようにする）。
+        """
+        # 重なり合う窓の連続を1つの発話区間とみなす
+        groups = np.zeros(len(windows), dtype=int)
+        for i in range(1, len(windows)):
+            groups[i] = groups[i - 1] + (windows[i][0] >= windows[i - 1][1])
+
+        smoothed = labels.copy()
+        for i in range(len(labels)):
+            first, last = max(0, i - width), min(len(labels), i + width + 1)
+            neighborhood = labels[first:last][groups[first:last] == groups[i]]
+            counts = np.bincount(neighborhood)
+            if counts[labels[i]] < counts.max():
+                smoothed[i] = counts.argmax()
+        return smoothed
+
+    def diarize(self, audio: np.ndarray) -> List[Tuple[float, float, str]]:
+        """
+        話者の発話区間を推定
+
+        Args:
+            audio: float32の波形（16kHzモノラル）
+
+        Returns:
+            (開始秒, 終了秒, 話者ラベル) の話者区間リスト（昇順）
+        """
+        regions = self.vad.detect(audio)
+        windows = self._windows(regions)
+        if not windows:
+            return []
+
+        labels = self._smooth(self._cluster(self.embed(mfcc(audio), windows)), windows)
+
+        # 窓の境界（重なりの中点）で区切り、同じ話者が続く区間を結合
+        turns = []
+        names = {}
+        for i, (start, end) in enumerate(windows):
+            name = names.setdefault(labels[i], SPEAKER_LABEL.format(len(names) + 1))
+            if i > 0 and start < windows[i - 1][1]:
+                start = (start + windows[i - 1][1]) / 2
+            if i + 1 < len(windows) and windows[i + 1][0] < end:
+                end = (end + windows[i + 1][0]) / 2
+            if turns and turns[-1][2] == name and start - turns[-1][1] < self.vad.min_silence_duration:
+                turns[-1][1] = end
+            else:
+                turns.append([start, end, name])
+        return [(start, end, name) for start, end, name in turns]
+
+
+def _dominant_speaker(start: float, end: float, turns: List[Tuple[float, float, str]],
+                      first: int) -> Optional[str]:
+    """区間と最も長く重なる話者（重なりがなければ最も近い話者区間）"""
+    overlaps = {}
+    i = first
+    while i < len(turns) and turns[i][0] < end:
+        overlap = min(end, turns[i][1]) - max(start, turns[i][0])
+        if overlap > 0:
+            overlaps[turns[i][2]] = overlaps.get(turns[i][2], 0.0) + overlap
+        i += 1
+    if overlaps:
+        return max(overlaps, key=overlaps.get)
+    # 無音に落ちた区間は前後で近い方の話者
+    candidates = [turns[j] for j in (first - 1, first) if 0 <= j < len(turns)]
+    if not candidates:
+        return None
+    return min(candidates, key=lambda turn: max(turn[0] - end, start - turn[1]))[2]
+
+
+def assign_speakers(segments: List[Dict], turns: List[Tuple[float, float, str]]) -> List[Dict]:
+    """
+    セグメント・単語に話者ラベルを付与（"speaker"キー）
+
+    セグメントと話者区間はどちらも時刻順のため、話者区間の位置を進めながら
+    1回の走査で対応付ける（セグメント数＋話者区間数に比例する時間）。
+
+    Args:
+        segments: Whisperのセグメントリスト（開始時刻順）
+        turns: diarizeの結果
+
+    Returns:
+        同じリスト（インプレースで更新）
+    """
+    if not turns:
+        return segments
+
+    segment_turn = 0
+    word_turn = 0
+    for segment in segments:
+        while segment_turn < len(turns) and turns[segment_turn][1] <= segment["start"]:
+            segment_turn += 1
+        segment["speaker"] = _dominant_speaker(segment["start"], segment["end"], turns, segment_turn)
+        for word in segment.get("words") or []:
+            while word_turn < len(turns) and turns[word_turn][1] <= word["start"]:
+                word_turn += 1
+            word["speaker"] = _dominant_speaker(word["start"], word["end"], turns, word_turn)
+    return segments
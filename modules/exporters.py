@@ -0,0 +1,98 @@
+import json
+from typing import Dict, List, TextIO
+
+# 構造化出力形式と拡張子
+STRUCTURED_FORMATS = ("json", "srt", "vtt")
+
+
+def format_srt_timestamp(seconds: float) -> str:
+    """秒をSRT形式 (HH:MM:SS,mmm) に変換"""
+    milliseconds = int(round(max(0.0, seconds) * 1000))
+    hours, milliseconds = divmod(milliseconds, 3600000)
+    minutes, milliseconds = divmod(milliseconds, 60000)
+    secs, milliseconds = divmod(milliseconds, 1000)
+    return f"{hours:02d}:{minutes:02d}:{secs:02d},{milliseconds:03d}"
+
+
+def format_vtt_timestamp(seconds: float) -> str:
+    """秒をWebVTT形式 (HH:MM:SS.mmm) に変換"""
+    return format_srt_timestamp(seconds).replace(",", ".")
+
+
+def write_json(f: TextIO, whisper_result: Dict, metadata: Dict = None):
+    """
+    セグメントと単語タイムスタンプをJSONで書き出す（セグメント単位で逐次書き込み）
+
+    Args:
+        f: 書き込み先ファイル
+        whisper_result: Whisperの結果辞書
+        metadata: メタデータ辞書
+    """
+    f.write("{\n")
+    f.write(f'  "metadata": {json.dumps(metadata or {}, ensure_ascii=False, default=str)},\n')
+    f.write(f'  "language": {json.dumps(whisper_result.get("language"))},\n')
+    f.write(f'  "text": {json.dumps(whisper_result.get("text", "").strip(), ensure_ascii=False)},\n')
+    f.write('  "segments": [')
+
+    for i, segment in enumerate(whisper_result.get("segments", [])):
+        entry = {
+            "id": segment.get("id", i),
+            "start": round(segment["start"], 3),
+            "end": round(segment["end"], 3),
+            "text": segment["text"].strip(),
+        }
+        for key in ("speaker", "avg_logprob", "no_speech_prob", "compression_ratio",
+                    "retries", "retry_seconds"):
+            if key in segment:
+                entry[key] = segment[key]
+        if segment.get("words"):
+            entry["words"] = []
+            for word in segment["words"]:
+                item = {"word": word["word"], "start": round(word["start"], 3),
+                        "end": round(word["end"], 3), "probability": word.get("probability")}
+                if "speaker" in word:
+                    item["speaker"] = word["speaker"]
+                entry["words"].append(item)
+        f.write(("\n    " if i == 0 else ",\n    ") + json.dumps(entry, ensure_ascii=False))
+
+    f.write("\n  ]\n}\n")
+
+
+def write_srt(f: TextIO, segments: List[Dict]):
+    """
+    SRT字幕として書き出す（話者ラベルは「話者: 」として本文の先頭に付ける）
+
+    Args:
+        f: 書き込み先ファイル
+        segments: Whisperのセグメントリスト
+    """
+    index = 0
+    for segment in segments:
+        text = segment["text"].strip()
+        if not text:
+            continue
+        if segment.get("speaker"):
+            text = f"{segment['speaker']}: {text}"
+        index += 1
+        f.write(f"{index}\n"
+                f"{format_srt_timestamp(segment['start'])} --> {format_srt_timestamp(segment['end'])}\n"
+                f"{text}\n\n")
+
+
+def write_vtt(f: TextIO, segments: List[Dict]):
+    """
+    WebVTT字幕として書き出す（話者ラベルは声タグ <v 話者> で表す）
+
+    Args:
+        f: 書き込み先ファイル
+        segments: Whisperのセグメントリスト
+    """
+    f.write("WEBVTT\n\n")
+    for segment in segments:
+        text = segment["text"].strip()
+        if not text:
+            continue
+        if segment.get("speaker"):
+            text = f"<v {segment['speaker']}>{text}"
+        f.write(f"{format_vtt_timestamp(segment['start'])} --> {format_vtt_timestamp(segment['end'])}\n"
+                f"{text}\n\n")
@@ -0,0 +1,455 @@
+import ctypes
+import ctypes.util
+import os
+import select
+import sqlite3
+import struct
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
+
+from . import metrics
+from .batch_processor import AUDIO_EXTENSIONS
+from .transcription_cache import file_sha256
+
+# 書き込み途中のファイルによく使われる一時ファイルの接尾辞
+PARTIAL_SUFFIXES = (".part", ".partial", ".tmp", ".crdownload", ".download")
+
+# inotifyのイベント (linux/inotify.h)
+_IN_MODIFY = 0x00000002
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_TO = 0x00000080
+_IN_CREATE = 0x00000100
+_IN_Q_OVERFLOW = 0x00004000
+_EVENT_HEADER = struct.Struct("iIII")
+
+
+class JobLedger:
+    """処理台帳 - 音声の内容ハッシュごとの処理状態をSQLiteに記録し、再起動後の再処理を防ぐ"""
+
+    def __init__(self, db_path: str = "./cache/watch_ledger.sqlite3", max_attempts: int = 3):
+        """
+        初期化
+
+        Args:
+            db_path: SQLiteファイルのパス
+            max_attempts: 失敗したファイルを再試行する上限回数
+        """
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self.db_path = db_path
+        self.max_attempts = max_attempts
+        # ワーカースレッドから共有するため1接続をロックで保護
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        # 状態更新のたびにディスクへ確定させる（電源断でも完了済みを再処理しない）
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=FULL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS jobs (
+                hash TEXT PRIMARY KEY,
+                path TEXT NOT NULL,
+                size INTEGER,
+                mtime REAL,
+                status TEXT NOT NULL,
+                output_path TEXT,
+                error TEXT,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                created_at REAL NOT NULL,
+                updated_at REAL NOT NULL
+            )"""
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_path ON jobs(path)")
+        self._conn.commit()
+
+    def is_done(self, path: str, size: int, mtime: float) -> bool:
+        """
+        同じパス・サイズ・更新時刻のファイルが処理済みか（再起動時にハッシュ計算を省く）
+
+        Args:
+            path: 音声ファイルのパス
+            size: ファイルサイズ
+            mtime: 更新時刻
+
+        Returns:
+            処理済み（または再試行上限に達した失敗）ならTrue
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT 1 FROM jobs WHERE path = ? AND size = ? AND mtime = ? "
+                "AND (status = 'done' OR (status = 'failed' AND attempts >= ?))",
+                (path, size, mtime, self.max_attempts)
+            ).fetchone()
+        return row is not None
+
+    def claim(self, content_hash: str, path: str, size: int = None,
+              mtime: float = None) -> Tuple[bool, Optional[Dict]]:
+        """
+        処理権を取得
+
+        未登録、または再試行上限に達していない失敗済みのハッシュのみ取得できる。
+
+        Args:
+            content_hash: 音声ファイルの内容ハッシュ
+            path: 音声ファイルのパス
+            size: ファイルサイズ
+            mtime: 更新時刻
+
+        Returns:
+            (取得できたか, 取得できない場合は既存のジョブ)
+        """
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT path, status, output_path, attempts FROM jobs WHERE hash = ?", (content_hash,)
+            ).fetchone()
+            if row is not None and not (row[1] == "failed" and row[3] < self.max_attempts):
+                return False, {"path": row[0], "status": row[1], "output_path": row[2]}
+            self._conn.execute(
+                """INSERT INTO jobs (hash, path, size, mtime, status, attempts, created_at, updated_at)
+                   VALUES (?, ?, ?, ?, 'processing', 1, ?, ?)
+                   ON CONFLICT(hash) DO UPDATE SET path = excluded.path, size = excluded.size,
+                       mtime = excluded.mtime, status = 'processing', attempts = attempts + 1,
+                       error = NULL, updated_at = excluded.updated_at""",
+                (content_hash, path, size, mtime, now, now)
+            )
+            self._conn.commit()
+        return True, None
+
+    def complete(self, content_hash: str, output_path: Optional[str]):
+        """処理完了を記録"""
+        self._update(content_hash, "done", output_path=output_path)
+
+    def fail(self, content_hash: str, error: str):
+        """処理失敗を記録（max_attemptsまでは再起動・再投入時に再試行する）"""
+        self._update(content_hash, "failed", error=error)
+
+    def _update(self, content_hash: str, status: str, output_path: Optional[str] = None,
+                error: Optional[str] = None):
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET status = ?, output_path = ?, error = ?, updated_at = ? WHERE hash = ?",
+                (status, output_path, error, time.time(), content_hash)
+            )
+            self._conn.commit()
+
+    def recover(self) -> List[str]:
+        """
+        前回の実行で処理中のまま終了したジョブを再試行可能に戻す
+
+        Returns:
+            再処理が必要な音声ファイルのパス
+        """
+        with self._lock:
+            rows = self._conn.execute("SELECT path FROM jobs WHERE status = 'processing'").fetchall()
+            self._conn.execute(
+                "UPDATE jobs SET status = 'failed', error = 'interrupted', "
+                "attempts = attempts - 1 WHERE status = 'processing'"
+            )
+            self._conn.commit()
+        return [row[0] for row in rows]
+
+    def get(self, content_hash: str) -> Optional[Dict]:
+        """ハッシュのジョブを取得"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT path, status, output_path, error, attempts FROM jobs WHERE hash = ?",
+                (content_hash,)
+            ).fetchone()
+        if row is None:
+            return None
+        return dict(zip(("path", "status", "output_path", "error", "attempts"), row))
+
+    def counts(self) -> Dict[str, int]:
+        """状態ごとのジョブ数"""
+        with self._lock:
+            rows = self._conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall()
+        return dict(rows)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class InotifySource:
+    """inotify（ctypes経由）でディレクトリ内のファイル変更を受け取る（Linuxのみ）"""
+
+    MASK = _IN_MODIFY | _IN_CLOSE_WRITE | _IN_MOVED_TO | _IN_CREATE
+
+    def __init__(self, directory: str):
+        """
+        初期化
+
+        Args:
+            directory: 監視するディレクトリ（サブディレクトリは対象外）
+
+        Raises:
+            OSError: inotifyが使用できない場合
+        """
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        if not hasattr(libc, "inotify_init1"):
+            raise OSError("inotifyが使用できません")
+        self._fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1に失敗しました")
+        if libc.inotify_add_watch(self._fd, os.fsencode(directory), self.MASK) < 0:
+            error = ctypes.get_errno()
+            os.close(self._fd)
+            raise OSError(error, f"inotify_add_watchに失敗しました: {directory}")
+        self.directory = directory
+
+    def wait(self, timeout: float) -> Optional[List[str]]:
+        """
+        変更を待つ
+
+        Args:
+            timeout: 最大待ち時間（秒）
+
+        Returns:
+            変更のあったファイル名のリスト（イベントの取りこぼし時はNone＝全体を再走査）
+        """
+        readable, _, _ = select.select([self._fd], [], [], max(0.0, timeout))
+        if not readable:
+            return []
+        try:
+            data = os.read(self._fd, 64 * 1024)
+        except BlockingIOError:
+            return []
+
+        names = []
+        offset = 0
+        while offset + _EVENT_HEADER.size <= len(data):
+            _, mask, _, length = _EVENT_HEADER.unpack_from(data, offset)
+            offset += _EVENT_HEADER.size
+            name = data[offset:offset + length].rstrip(b"\0")
+            offset += length
+            if mask & _IN_Q_OVERFLOW:
+                return None
+            if name:
+                names.append(os.fsdecode(name))
+        return names
+
+    def close(self):
+        os.close(self._fd)
+
+
+class PollingSource:
+    """一定間隔の再走査でファイル変更を検出（inotifyが使えない環境用）"""
+
+    def __init__(self, directory: str, interval: float = 1.0):
+        """
+        初期化
+
+        Args:
+            directory: 監視するディレクトリ
+            interval: 走査間隔（秒）
+        """
+        self.directory = directory
+        self.interval = interval
+
+    def wait(self, timeout: float) -> Optional[List[str]]:
+        """interval秒（またはtimeoutの短い方）待ってから全体の再走査を指示する"""
+        time.sleep(max(0.0, min(self.interval, timeout)))
+        return None
+
+    def close(self):
+        pass
+
+
+def create_source(directory: str, use_inotify: bool = True, poll_interval: float = 1.0):
+    """inotifyが使えればInotifySource、使えなければPollingSourceを作成"""
+    if use_inotify:
+        try:
+            return InotifySource(directory)
+        except (OSError, AttributeError) as e:
+            print(f"inotifyを使用できないためポーリングで監視します: {e}")
+    return PollingSource(directory, poll_interval)
+
+
+class FolderWatcher:
+    """監視フォルダ - 書き込みが完了した音声ファイルを検出し、重複を除いてワーカーで処理"""
+
+    def __init__(self, directory: str, handler: Callable[[str], Dict], ledger: JobLedger,
+                 workers: int = 2, max_pending: Optional[int] = None,
+                 settle_seconds: float = 2.0, poll_interval: float = 1.0,
+                 use_inotify: bool = True):
+        """
+        初期化
+
+        Args:
+            directory: 監視するディレクトリ
+            handler: 1ファイルを処理する関数（BatchProcessor.process_fileと同じ形式の結果を返す）
+            ledger: 処理台帳
+            workers: 同時に処理するファイル数
+            max_pending: 処理待ちを含めて同時に受け付けるファイル数の上限（既定はworkersの2倍）
+            settle_seconds: サイズ・更新時刻がこの時間変わらなければ書き込み完了とみなす（秒）
+            poll_interval: ポーリング時の走査間隔（秒）
+            use_inotify: inotifyを使用するか（使えない場合はポーリング）
+        """
+        self.directory = directory
+        self.handler = handler
+        self.ledger = ledger
+        self.workers = max(1, workers)
+        self.settle_seconds = settle_seconds
+        self.poll_interval = poll_interval
+        self.use_inotify = use_inotify
+        self.source = None
+
+        self._slots = threading.BoundedSemaphore(max_pending or self.workers * 2)
+        self._stop = threading.Event()
+        # 書き込み完了待ちのファイル: パス -> ((サイズ, 更新時刻), 最後に変化を見た時刻)
+        self._candidates = {}
+        # 投入済みのファイル: パス -> (サイズ, 更新時刻)。同じ内容のまま再検出しない
+        self._submitted = {}
+        self._lock = threading.Lock()
+        self._active = 0
+        self.stats = {"processed": 0, "duplicate": 0, "failed": 0}
+
+    @staticmethod
+    def is_audio_file(name: str) -> bool:
+        """処理対象の音声ファイル名か（隠しファイル・書き込み途中の一時ファイルは除く）"""
+        lower = name.lower()
+        return (not name.startswith(".") and lower.endswith(AUDIO_EXTENSIONS)
+                and not lower.endswith(PARTIAL_SUFFIXES))
+
+    def _signature(self, path: str) -> Optional[Tuple[int, float]]:
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        return stat.st_size, stat.st_mtime
+
+    def _observe(self, names: Optional[List[str]]):
+        """変更のあったファイル（Noneの場合はディレクトリ全体）を書き込み完了待ちに登録"""
+        if names is None:
+            try:
+                names = os.listdir(self.directory)
+            except OSError:
+                return
+        now = time.time()
+        for name in names:
+            if not self.is_audio_file(name):
+                continue
+            path = os.path.join(self.directory, name)
+            signature = self._signature(path)
+            if signature is None or not os.path.isfile(path):
+                self._candidates.pop(path, None)
+                continue
+            if self._submitted.get(path) == signature:
+                continue
+            previous = self._candidates.get(path)
+            if previous is None or previous[0] != signature:
+                # 初めて見たファイルは更新時刻から書き込み後の経過時間を判断する
+                changed_at = min(now, signature[1]) if previous is None else now
+                self._candidates[path] = (signature, changed_at)
+
+    def _settled(self) -> List[str]:
+        """サイズ・更新時刻がsettle_seconds以上変わっていないファイル"""
+        now = time.time()
+        ready = []
+        for path, (signature, changed_at) in list(self._candidates.items()):
+            current = self._signature(path)
+            if current is None:
+                del self._candidates[path]
+            elif current != signature:
+                self._candidates[path] = (current, now)
+            elif now - changed_at >= self.settle_seconds:
+                ready.append(path)
+        return sorted(ready, key=lambda path: self._candidates[path][1])
+
+    def _next_timeout(self) -> float:
+        """次に書き込み完了を確認すべきまでの時間"""
+        if not self._candidates:
+            return self.poll_interval
+        now = time.time()
+        earliest = min(changed_at for _, changed_at in self._candidates.values())
+        return min(self.poll_interval, max(0.05, earliest + self.settle_seconds - now))
+
+    def _submit_ready(self, executor: ThreadPoolExecutor):
+        """書き込みが完了したファイルを空きがある分だけワーカーに投入"""
+        for path in self._settled():
+            if not self._slots.acquire(blocking=False):
+                break
+            signature, _ = self._candidates.pop(path)
+            self._submitted[path] = signature
+            if self.ledger.is_done(path, *signature):
+                self._slots.release()
+                continue
+            with self._lock:
+                self._active += 1
+            executor.submit(self._process, path, signature)
+
+    def _count(self, result: str):
+        with self._lock:
+            self.stats[result] += 1
+        metrics.increment("watch_files_total", result=result)
+
+    def _process(self, path: str, signature: Tuple[int, float]):
+        """ハッシュで重複を確認し、未処理ならhandlerで処理して台帳に記録"""
+        content_hash = None
+        try:
+            content_hash = file_sha256(path)
+            claimed, existing = self.ledger.claim(content_hash, path, *signature)
+            if not claimed:
+                content_hash = None
+                self._count("duplicate")
+                print(f"スキップ（処理済みの音声と同じ内容）: {path} "
+                      f"(既存: {existing['path']} / {existing['status']})")
+                return
+
+            print(f"監視フォルダの新規ファイルを処理中: {path}")
+            entry = self.handler(path)
+            if entry.get("status") == "failed":
+                self._count("failed")
+                self.ledger.fail(content_hash, entry.get("error") or "failed")
+            else:
+                self._count("processed")
+                self.ledger.complete(content_hash, entry.get("output_path"))
+                print(f"出力: {entry.get('output_path')}")
+        except Exception as e:
+            # ハッシュ計算前に移動・削除されたファイル等
+            self._count("failed")
+            print(f"エラーが発生しました ({path}): {e}")
+            if content_hash is not None:
+                self.ledger.fail(content_hash, str(e))
+        finally:
+            with self._lock:
+                self._active -= 1
+            self._slots.release()
+
+    @property
+    def idle(self) -> bool:
+        """処理中・書き込み完了待ちのファイルがないか"""
+        with self._lock:
+            return self._active == 0 and not self._candidates
+
+    def stop(self):
+        """監視を終了（処理中のファイルは完了まで待つ）"""
+        self._stop.set()
+
+    def run(self):
+        """
+        監視を開始（stopが呼ばれるまで戻らない）
+
+        起動時は前回処理中のまま終了したファイルと既存のファイルを確認してから変更の監視に移る。
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        self.source = create_source(self.directory, self.use_inotify, self.poll_interval)
+        mode = "inotify" if isinstance(self.source, InotifySource) else f"ポーリング ({self.poll_interval}秒間隔)"
+        print(f"監視フォルダ: {self.directory} ({mode} / 同時処理数: {self.workers})")
+
+        for path in self.ledger.recover():
+            print(f"前回中断したファイルを再処理します: {path}")
+
+        try:
+            with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="watch") as executor:
+                self._observe(None)
+                while not self._stop.is_set():
+                    self._submit_ready(executor)
+                    names = self.source.wait(self._next_timeout())
+                    self._observe(names)
+        finally:
+            self.source.close()
@@ -0,0 +1,293 @@
+import inspect
+import threading
+import time
+import weakref
+from typing import Dict, Iterable, List, Tuple
+
+# 選択可能な推論バックエンド
+BACKEND_NAMES = ("whisper", "faster-whisper")
+
+# openai-whisperとfaster-whisperで名前が異なるデコードパラメータ
+_FASTER_WHISPER_PARAM_NAMES = {"logprob_threshold": "log_prob_threshold"}
+# faster-whisperに存在しないパラメータ
+_FASTER_WHISPER_UNSUPPORTED = ("verbose",)
+
+# モデルごとのデコードのロック（モデルを共有する全バックエンド・AudioProcessorで同じロックを使う）
+_MODEL_LOCKS = weakref.WeakKeyDictionary()
+_MODEL_LOCKS_LOCK = threading.Lock()
+
+
+def model_lock(model) -> threading.Lock:
+    """モデルのデコード用ロックを取得（モデルが破棄されるとロックも破棄される）"""
+    with _MODEL_LOCKS_LOCK:
+        if model not in _MODEL_LOCKS:
+            _MODEL_LOCKS[model] = threading.Lock()
+        return _MODEL_LOCKS[model]
+
+
+class WhisperBackend:
+    """openai-whisper（PyTorch fp32）による推論"""
+
+    name = "whisper"
+    # PyTorchのWhisperはデコード中にモデルへフックを付けるため同時デコード不可
+    thread_safe = False
+    # 読み込み後にforkすれば重み（テンソル）をコピーオンライトで共有できる
+    fork_safe = True
+
+    def __init__(self, cpu_threads: int = 0):
+        """
+        初期化
+
+        Args:
+            cpu_threads: PyTorchのスレッド数（0の場合は既定値）
+        """
+        self.cpu_threads = cpu_threads
+        # 非対応のため取り除いたことを表示済みのパラメータ
+        self.dropped_params = set()
+
+    @property
+    def cache_id(self) -> str:
+        """キャッシュキーに含める識別子（結果に影響する設定のみ）"""
+        return self.name
+
+    def load_model(self, model_name: str, device: str):
+        """モデルを読み込む"""
+        import whisper
+        self.set_num_threads(self.cpu_threads)
+        return whisper.load_model(model_name, device=device)
+
+    def set_num_threads(self, cpu_threads: int):
+        """PyTorchのスレッド数を設定（0の場合は変更しない）"""
+        self.cpu_threads = cpu_threads
+        if cpu_threads > 0:
+            import torch
+            torch.set_num_threads(cpu_threads)
+
+    def transcribe(self, model, audio, params: Dict) -> Dict:
+        """
+        デコード
+
+        温度フォールバックの各試行（model.decode）の時間を計測し、
+        各セグメントに再試行にかかった時間を "retry_seconds" として記録する。
+
+        Args:
+            model: load_modelで読み込んだモデル
+            audio: 音声ファイルのパス、またはfloat32の波形（16kHzモノラル）
+            params: AudioProcessor.build_transcribe_paramsのパラメータ
+
+        Returns:
+            Whisperの結果辞書
+        """
+        params = _supported_params(self, model.transcribe, params, _decoding_option_names)
+        attempts = []
+
+        # モデルはレジストリ経由で全スレッド・全AudioProcessorが共有するため、
+        # decodeの差し替え（と推論中のフック）が他のスレッドのデコードと重ならないようモデル単位で直列化する
+        with model_lock(model):
+            decode = model.decode
+
+            def timed_decode(mel, options):
+                start = time.perf_counter()
+                result = decode(mel, options)
+                attempts.append((options.temperature, time.perf_counter() - start, result))
+                return result
+
+            model.decode = timed_decode
+            try:
+                result = model.transcribe(audio, **params)
+            finally:
+                del model.decode
+        attach_retry_times(result.get("segments", []), attempts)
+        return result
+
+
+class FasterWhisperBackend:
+    """faster-whisper（CTranslate2、int8量子化等）による推論"""
+
+    name = "faster-whisper"
+    # CTranslate2のモデルは複数スレッドから同時に呼び出せる
+    thread_safe = True
+    # CTranslate2の内部スレッドはforkで複製されないため、読み込み後のforkは不可
+    fork_safe = False
+
+    def __init__(self, compute_type: str = "int8", cpu_threads: int = 0):
+        """
+        初期化
+
+        Args:
+            compute_type: 演算精度 (int8, int8_float32, float32, float16等)
+            cpu_threads: CTranslate2のスレッド数（0の場合は既定値）
+        """
+        self.compute_type = compute_type
+        self.cpu_threads = cpu_threads
+        # 非対応のため取り除いたことを表示済みのパラメータ
+        self.dropped_params = set()
+
+    @property
+    def cache_id(self) -> str:
+        """キャッシュキーに含める識別子（量子化で結果が変わるため演算精度を含める）"""
+        return f"{self.name}-{self.compute_type}"
+
+    def load_model(self, model_name: str, device: str):
+        """モデルを読み込む（初回はHugging Faceから変換済みモデルを取得）"""
+        try:
+            from faster_whisper import WhisperModel
+        except ImportError:
+            raise ImportError(
+                "faster-whisperがインストールされていません: pip install faster-whisper"
+            ) from None
+        return WhisperModel(model_name, device=device, compute_type=self.compute_type,
+                            cpu_threads=self.cpu_threads)
+
+    def transcribe(self, model, audio, params: Dict) -> Dict:
+        """
+        デコードしてopenai-whisperと同じ形式の結果辞書に変換
+
+        Args:
+            model: load_modelで読み込んだモデル
+            audio: 音声ファイルのパス、またはfloat32の波形（16kHzモノラル）
+            params: AudioProcessor.build_transcribe_paramsのパラメータ
+
+        Returns:
+            Whisperの結果辞書（text, segments, language）
+        """
+        options = {_FASTER_WHISPER_PARAM_NAMES.get(key, key): value
+                   for key, value in params.items() if key not in _FASTER_WHISPER_UNSUPPORTED}
+        # faster-whisperの既定はビームサーチ（幅5）のため、未指定時はopenai-whisperと同じ貪欲デコードにする
+        options.setdefault("beam_size", 1)
+        options = _supported_params(self, model.transcribe, options)
+        segments, info = model.transcribe(audio, **options)
+
+        # segmentsは遅延評価のジェネレータ（ここで実際にデコードされる）
+        converted = [_convert_segment(i, segment) for i, segment in enumerate(segments)]
+        return {
+            "text": "".join(segment["text"] for segment in converted),
+            "segments": converted,
+            "language": info.language,
+        }
+
+
+def _decoding_option_names() -> Iterable[str]:
+    """openai-whisperのtranscribeが**decode_optionsとして受け付けるパラメータ名"""
+    import dataclasses
+    from whisper.decoding import DecodingOptions
+    return [field.name for field in dataclasses.fields(DecodingOptions)]
+
+
+def _supported_params(backend, function, params: Dict, extra_names=None) -> Dict:
+    """
+    デコード関数が受け付けないパラメータを事前に取り除く
+
+    ライブラリのバージョンによって存在しないパラメータを渡すとTypeErrorになるため、
+    シグネチャで確認してから呼び出す（取り除いたパラメータはバックエンドごとに一度だけ表示）。
+
+    Args:
+        backend: 推論バックエンド（表示済みのパラメータを記録）
+        function: デコード関数（model.transcribe）
+        params: デコードパラメータ
+        extra_names: 関数が**kwargsで受け付けるパラメータ名を返す関数
+
+    Returns:
+        受け付けられるパラメータのみの辞書
+    """
+    parameters = inspect.signature(function).parameters.values()
+    if any(parameter.kind is inspect.Parameter.VAR_KEYWORD for parameter in parameters):
+        if extra_names is None:
+            return params
+        names = set(extra_names())
+    else:
+        names = set()
+    names.update(parameter.name for parameter in parameters
+                 if parameter.kind is not inspect.Parameter.VAR_KEYWORD)
+
+    dropped = sorted(set(params) - names)
+    if dropped and not backend.dropped_params.issuperset(dropped):
+        backend.dropped_params.update(dropped)
+        print(f"一部のパラメータがサポートされていません（無視します）: {', '.join(dropped)}")
+    return {key: value for key, value in params.items() if key in names}
+
+
+def attach_retry_times(segments: List[Dict], attempts: List[Tuple[float, float, object]]):
+    """
+    温度フォールバックの試行時間をセグメントに割り当てる
+
+    試行は30秒ウィンドウごとに温度の低い順に行われ、温度が下がった時点で次のウィンドウになる。
+    ウィンドウの最終試行の (avg_logprob, temperature) とセグメントの値を照合し、
+    2回目以降の試行の合計時間をそのウィンドウのセグメントで等分して "retry_seconds" とする。
+    照合できない場合は記録しない。
+
+    Args:
+        segments: Whisperのセグメントリスト（インプレースで更新）
+        attempts: (温度, 処理時間, DecodingResult) の試行順リスト
+    """
+    windows = []
+    for temperature, elapsed, result in attempts:
+        if not windows or temperature <= windows[-1][-1][0]:
+            windows.append([])
+        windows[-1].append((temperature, elapsed, result))
+
+    groups = []
+    for segment in segments:
+        if groups and groups[-1][0].get("seek") == segment.get("seek"):
+            groups[-1].append(segment)
+        else:
+            groups.append([segment])
+
+    index = 0
+    for group in groups:
+        first = group[0]
+        while index < len(windows):
+            window = windows[index]
+            index += 1
+            final = window[-1][2]
+            if (getattr(final, "avg_logprob", None) == first.get("avg_logprob")
+                    and window[-1][0] == first.get("temperature")):
+                retry_seconds = sum(elapsed for _, elapsed, _ in window[1:])
+                for segment in group:
+                    segment["retry_seconds"] = retry_seconds / len(group)
+                break
+        else:
+            return
+
+
+def _convert_segment(index: int, segment) -> Dict:
+    """faster-whisperのSegmentをopenai-whisperのセグメント辞書に変換"""
+    converted = {
+        "id": index,
+        "seek": getattr(segment, "seek", 0),
+        "start": segment.start,
+        "end": segment.end,
+        "text": segment.text,
+        "tokens": list(getattr(segment, "tokens", [])),
+        "temperature": getattr(segment, "temperature", 0.0),
+        "avg_logprob": segment.avg_logprob,
+        "compression_ratio": segment.compression_ratio,
+        "no_speech_prob": segment.no_speech_prob,
+    }
+    if getattr(segment, "words", None):
+        converted["words"] = [
+            {"word": word.word, "start": word.start, "end": word.end,
+             "probability": word.probability}
+            for word in segment.words
+        ]
+    return converted
+
+
+def create_backend(name: str = "whisper", compute_type: str = "int8",
+                   cpu_threads: int = 0):
+    """
+    名前から推論バックエンドを作成
+
+    Args:
+        name: バックエンド名 (whisper, faster-whisper)
+        compute_type: faster-whisperの演算精度
+        cpu_threads: 推論スレッド数（0の場合は既定値）
+
+    Returns:
+        推論バックエンド
+    """
+    if name == "whisper":
+        return WhisperBackend(cpu_threads=cpu_threads)
+    if name == "faster-whisper":
+        return FasterWhisperBackend(compute_type=compute_type, cpu_threads=cpu_threads)
+    raise ValueError(f"未対応の推論バックエンドです: {name} (選択肢: {', '.join(BACKEND_NAMES)})")
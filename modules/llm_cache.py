@@ -0,0 +1,139 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Optional
+
+
+class LLMResponseCache:
+    """LLM応答キャッシュクラス - 同一プロンプトへの再課金を防ぐSQLiteキャッシュ"""
+
+    def __init__(self, db_path: str = "./cache/llm_responses.sqlite3",
+                 ttl_seconds: float = 30 * 24 * 3600,
+                 max_entries: int = 10000):
+        """
+        初期化
+
+        Args:
+            db_path: SQLiteファイルのパス
+            ttl_seconds: 応答の有効期間（秒）
+            max_entries: 保持する最大件数（超えると最終利用の古い順に削除）
+        """
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self.db_path = db_path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+
+        # 並列リクエストのスレッドから共有するため1接続をロックで保護
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                provider TEXT NOT NULL,
+                response TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                last_used REAL NOT NULL
+            )"""
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_last_used ON responses(last_used)")
+        self._conn.commit()
+
+    @staticmethod
+    def make_key(provider: str, model: str, temperature: float, prompt: str) -> str:
+        """
+        キャッシュキーを作成
+
+        Args:
+            provider: API名 (deepseek, gemini, openai)
+            model: モデル名
+            temperature: 生成温度
+            prompt: 送信するプロンプト
+
+        Returns:
+            キャッシュキー
+        """
+        payload = json.dumps([provider, model, temperature, prompt], ensure_ascii=False)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _lookup(self, key: str, touch: bool) -> Optional[str]:
+        """有効期限内の応答を取得（期限切れは削除）"""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT response, created_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            if now - row[1] > self.ttl_seconds:
+                self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self._conn.commit()
+                return None
+            if touch:
+                self._conn.execute("UPDATE responses SET last_used = ? WHERE key = ?", (now, key))
+                self._conn.commit()
+            return row[0]
+
+    def get(self, key: str) -> Optional[str]:
+        """
+        キャッシュから応答を取得（ヒット/ミスを計上）
+
+        Args:
+            key: make_keyで作成したキー
+
+        Returns:
+            応答テキスト（存在しない・期限切れの場合None）
+        """
+        response = self._lookup(key, touch=True)
+        with self._lock:
+            if response is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return response
+
+    def contains(self, key: str) -> bool:
+        """ヒット/ミスを計上せずに有効な応答があるか確認（コスト見積もり用）"""
+        return self._lookup(key, touch=False) is not None
+
+    def put(self, key: str, provider: str, response: str):
+        """
+        応答を保存
+
+        Args:
+            key: make_keyで作成したキー
+            provider: API名
+            response: 応答テキスト
+        """
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, provider, response, created_at, last_used) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (key, provider, response, now, now)
+            )
+            self._conn.execute("DELETE FROM responses WHERE created_at < ?", (now - self.ttl_seconds,))
+            self._conn.execute(
+                "DELETE FROM responses WHERE key IN ("
+                "SELECT key FROM responses ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,)
+            )
+            self._conn.commit()
+
+    def stats(self) -> Dict:
+        """ヒット数・ミス数・保存件数を取得"""
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+            return {"hits": self.hits, "misses": self.misses, "entries": entries}
+
+    def close(self):
+        """接続を閉じる"""
+        with self._lock:
+            self._conn.close()
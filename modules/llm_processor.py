@@ -1,47 +1,432 @@
 import requests
 import json
-import openai
-from typing import Optional
+import random
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+from requests.adapters import HTTPAdapter
+from . import metrics
 from .config import Config
+from .rate_limiter import ProviderScheduler, estimate_tokens
+
+# リトライ対象のHTTPステータス（レート制限・サーバーエラー）
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+# 接続確立までのタイムアウト（秒）。応答待ちはLLM_REQUEST_TIMEOUT
+CONNECT_TIMEOUT = 10
+
+# API別のモデル名と生成温度（キャッシュキーにも使用）
+MODEL_NAMES = {
+    "deepseek": "deepseek-chat",
+    "openai": "gpt-4o-mini",
+    "gemini": "gemini-1.5-flash-latest",
+}
+TEMPERATURE = 0.1
+
+# 選択的後処理で修正対象のセグメント行に付ける番号（LLMの応答からセグメントIDを取り出す）
+SEGMENT_LINE_PATTERN = re.compile(r"^\s*\[#(\d+)\]\s?(.*)$")
+CONTEXT_LINE_PREFIX = "(文脈) "
+
+
+def select_segments(segments: List[Dict], logprob_threshold: float = -0.5,
+                    no_speech_threshold: float = 0.6,
+                    compression_threshold: float = 2.4) -> List[int]:
+    """
+    LLMに送るセグメントを選ぶ
+
+    Whisperの信頼度が低いセグメントと、誤認識辞書で置換されたセグメント
+    （同じ発話に他の誤認識が残っている可能性が高い）を選ぶ。
+
+    Args:
+        segments: 誤認識修正済みのセグメントリスト（"corrections" に置換数）
+        logprob_threshold: これを下回るavg_logprobのセグメントを選ぶ
+        no_speech_threshold: これを上回るno_speech_probのセグメントを選ぶ
+        compression_threshold: これを上回るcompression_ratioのセグメントを選ぶ
+
+    Returns:
+        選んだセグメントの位置（リスト内の添字）のリスト
+    """
+    from .model_cascade import is_weak_segment
+    return [
+        i for i, segment in enumerate(segments)
+        if segment.get("text", "").strip() and (
+            segment.get("corrections", 0) > 0
+            or is_weak_segment(segment, logprob_threshold, no_speech_threshold, compression_threshold))
+    ]
+
+
+def parse_segment_lines(response: str, expected_ids) -> Dict[int, str]:
+    """
+    LLMの応答から [#ID] 付きの行を取り出す
+
+    Args:
+        response: LLMの応答テキスト
+        expected_ids: 送信した修正対象のセグメントID（それ以外の番号は無視）
+
+    Returns:
+        セグメントIDをキーとした修正後テキストの辞書
+    """
+    corrected = {}
+    for line in response.split("\n"):
+        match = SEGMENT_LINE_PATTERN.match(line)
+        if match and int(match.group(1)) in expected_ids and match.group(2).strip():
+            corrected[int(match.group(1))] = match.group(2).strip()
+    return corrected
 
 class LLMProcessor:
     """LLM処理クラス - 各種LLM APIを使用した文字起こし後処理"""
     
-    def __init__(self):
-        """初期化"""
+    def __init__(self, max_concurrency: int = None, chunk_chars: int = None,
+                 max_retries: int = None, cache=None, scheduler=None):
+        """
+        初期化
+        
+        Args:
+            max_concurrency: 同時に送信するチャンク数の上限
+            chunk_chars: 1チャンクの最大文字数
+            max_retries: 429/5xx応答時の最大リトライ回数
+            cache: LLMResponseCache（Noneの場合はキャッシュしない）
+            scheduler: ProviderScheduler（省略時は設定のRPM/TPMで作成）
+        """
         self.config = Config()
         self.available_apis = Config.validate_api_keys()
+        self.max_concurrency = max(1, max_concurrency or Config.LLM_MAX_CONCURRENCY)
+        self.chunk_chars = chunk_chars or Config.LLM_CHUNK_CHARS
+        self.max_retries = Config.LLM_MAX_RETRIES if max_retries is None else max_retries
+        self.cache = cache
+        self.scheduler = scheduler or ProviderScheduler(
+            Config.llm_rate_limits(), burst=Config.LLM_RATE_BURST,
+            spillover=Config.LLM_SPILLOVER, max_wait=Config.LLM_SPILLOVER_MAX_WAIT)
+        # 送信スレッドごとの直近の応答の使用トークン数（レート制限の精算用）
+        self._local = threading.local()
+        # improve_transcriptionのreportへの集計（チャンクは複数スレッドから送信される）
+        self._report_lock = threading.Lock()
+        
+        # 全リクエストで接続を使い回す（同時実行数分のコネクションをプール）
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=self.max_concurrency)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        
         print(f"利用可能なAPI: {', '.join(self.available_apis)}")
     
-    def improve_transcription(self, raw_text: str, api_choice: str = "deepseek") -> str:
+    def improve_transcription(self, raw_text: str, api_choice: str = "deepseek",
+                              spillover: bool = True, report: Optional[Dict] = None) -> str:
         """
         LLMを使用して文字起こし精度を向上
         
+        長い文字起こしはタイムスタンプ行の境界でチャンクに分割し、
+        並列に処理してから元の順序で結合する。
+        
         Args:
             raw_text: Whisperの生テキスト
             api_choice: 使用するAPI (deepseek, gemini, openai)
-            
+            spillover: レート制限で待ちが長い場合に他の利用可能なAPIへ回すことを許可するか
+                （スケジューラのspilloverが有効な場合のみ）
+            report: 指定時は tokens（APIが返した使用トークン数の合計。返さないAPIは概算）,
+                requests, errors（元のテキストに戻したチャンクのエラー）を書き込む
+        
         Returns:
             改善されたテキスト
         """
+        if report is not None:
+            report.update(tokens=0, requests=0, errors=[])
         if api_choice not in self.available_apis:
             raise ValueError(f"API '{api_choice}' は利用できません。利用可能: {self.available_apis}")
+        if api_choice not in ("deepseek", "openai", "gemini"):
+            raise ValueError(f"サポートされていないAPI: {api_choice}")
         
-        prompt = self._create_improvement_prompt(raw_text)
+        alternatives = self.available_apis if spillover else ()
+        chunks = self._split_transcript(raw_text)
+        with metrics.span("llm_improve", provider=api_choice):
+            if len(chunks) <= 1:
+                return self._improve_chunk(raw_text, api_choice, alternatives, report)
+            
+            print(f"LLM処理: {len(chunks)}チャンクを最大{self.max_concurrency}並列で送信")
+            with ThreadPoolExecutor(max_workers=self.max_concurrency) as executor:
+                improved = list(executor.map(
+                    lambda chunk: self._improve_chunk(chunk, api_choice, alternatives, report), chunks))
+            return "\n".join(improved)
+    
+    def compare_providers(self, raw_text: str, providers: List[str] = None) -> Dict[str, Dict]:
+        """
+        同じ文字起こしを複数のAPIで並列に改善して比較
         
-        try:
-            if api_choice == "deepseek":
-                return self._call_deepseek_api(prompt)
-            elif api_choice == "openai":
-                return self._call_openai_api(prompt)
-            elif api_choice == "gemini":
-                return self._call_gemini_api(prompt)
+        全体の所要時間は合計ではなく最も遅いAPIで決まる。
+        
+        Args:
+            raw_text: Whisperの生テキスト
+            providers: 比較するAPIのリスト（省略時は利用可能な全API）
+            
+        Returns:
+            API名をキーとした辞書（text, latency, tokens（APIが返した使用トークン数）, estimated_cost,
+            error（元のテキストに戻したチャンクがあればそのエラー））
+        """
+        providers = providers or list(self.available_apis)
+        if not providers:
+            return {}
+        
+        def run(api_choice: str) -> Dict:
+            # 課金対象（未キャッシュ分）は実行前に見積もる
+            estimated_cost = self.estimate_cost(raw_text, api_choice)
+            start_time = time.time()
+            report = {"tokens": 0, "errors": []}
+            try:
+                # 比較のため他のAPIへは回さない
+                text = self.improve_transcription(raw_text, api_choice, spillover=False, report=report)
+                error = None
+            except Exception as e:
+                text = raw_text
+                error = str(e)
+            # チャンク単位の失敗は元のテキストで補われるため、成功と区別して報告する
+            if error is None and report["errors"]:
+                error = f"{len(report['errors'])}チャンクで失敗: {report['errors'][0]}"
+            return {
+                "text": text,
+                "latency": time.time() - start_time,
+                "tokens": report["tokens"],
+                "estimated_cost": estimated_cost,
+                "error": error,
+            }
+        
+        print(f"LLM比較: {', '.join(providers)} を並列実行")
+        with ThreadPoolExecutor(max_workers=len(providers)) as executor:
+            results = list(executor.map(run, providers))
+        return dict(zip(providers, results))
+    
+    def improve_segments(self, whisper_result: Dict, api_choice: str = "deepseek",
+                         context_segments: int = 1, **thresholds) -> Dict:
+        """
+        信頼度の低いセグメント・誤認識辞書に該当したセグメントだけをLLMで修正
+        
+        選んだセグメントを前後context_segments個の文脈付きでまとめて送り、
+        応答の [#ID] 行をセグメントIDで元の結果に差し戻す。
+        応答にないセグメント・エラーになった送信分は元のテキストのまま残す。
+        
+        Args:
+            whisper_result: Whisperの結果辞書（誤認識修正済み）
+            api_choice: 使用するAPI (deepseek, gemini, openai)
+            context_segments: 修正対象の前後に文脈として付けるセグメント数
+            **thresholds: select_segmentsの閾値
+        
+        Returns:
+            セグメントのテキストを差し替え、"llm"（選択数・修正数）を追加した結果辞書
+        """
+        if api_choice not in self.available_apis:
+            raise ValueError(f"API '{api_choice}' は利用できません。利用可能: {self.available_apis}")
+        
+        segments = [dict(segment) for segment in whisper_result.get("segments", [])]
+        targets = select_segments(segments, **thresholds)
+        batches = self._build_selective_batches(segments, targets, context_segments)
+        
+        print(f"LLM選択的後処理: {len(targets)}/{len(segments)}セグメントを{len(batches)}回に分けて送信")
+        with metrics.span("llm_improve", provider=api_choice):
+            with ThreadPoolExecutor(max_workers=self.max_concurrency) as executor:
+                responses = list(executor.map(
+                    lambda batch: self._improve_batch(batch[0], batch[1], api_choice), batches))
+        
+        corrected = 0
+        positions = {segment.get("id", i): i for i, segment in enumerate(segments)}
+        for texts in responses:
+            for segment_id, text in texts.items():
+                segment = segments[positions[segment_id]]
+                if text != segment["text"].strip():
+                    # Whisperのセグメントは先頭の空白を含むため、元の前置きを保つ
+                    leading = segment["text"][:len(segment["text"]) - len(segment["text"].lstrip())]
+                    segment["text"] = leading + text
+                    corrected += 1
+        
+        result = dict(whisper_result, segments=segments)
+        result["text"] = "".join(segment["text"] for segment in segments)
+        result["llm"] = {"provider": api_choice, "selected": len(targets),
+                         "segments": len(segments), "corrected": corrected}
+        return result
+    
+    def _build_selective_batches(self, segments: List[Dict], targets: List[int],
+                                 context_segments: int) -> List[tuple]:
+        """
+        修正対象と前後の文脈を1ブロックにまとめ、chunk_chars以下の送信単位に詰める
+        
+        Args:
+            segments: セグメントリスト
+            targets: 修正対象の位置
+            context_segments: 前後に付ける文脈のセグメント数
+            
+        Returns:
+            (送信テキスト, 修正対象のセグメントIDの集合) のリスト
+        """
+        target_set = set(targets)
+        blocks = []
+        for i in targets:
+            start = max(0, i - context_segments)
+            end = min(len(segments), i + context_segments + 1)
+            if blocks and start <= blocks[-1][1]:
+                blocks[-1][1] = max(blocks[-1][1], end)
             else:
-                raise ValueError(f"サポートされていないAPI: {api_choice}")
+                blocks.append([start, end])
+        
+        batches = []
+        lines, ids, length = [], set(), 0
+        for start, end in blocks:
+            block, block_ids = [], set()
+            for i in range(start, end):
+                segment_id = segments[i].get("id", i)
+                text = segments[i]["text"].strip()
+                if i in target_set:
+                    block.append(f"[#{segment_id}] {text}")
+                    block_ids.add(segment_id)
+                else:
+                    block.append(CONTEXT_LINE_PREFIX + text)
+            block_text = "\n".join(block)
+            if lines and length + len(block_text) + 2 > self.chunk_chars:
+                batches.append(("\n\n".join(lines), ids))
+                lines, ids, length = [], set(), 0
+            lines.append(block_text)
+            ids |= block_ids
+            length += len(block_text) + 2
+        if lines:
+            batches.append(("\n\n".join(lines), ids))
+        return batches
+    
+    def _improve_batch(self, text: str, segment_ids, api_choice: str) -> Dict[int, str]:
+        """選択したセグメントの1送信分をLLMで修正（失敗時は空の辞書＝元のテキストのまま）"""
+        try:
+            response = self._call_api(api_choice, self._create_selective_prompt(text),
+                                      self.available_apis)
         except Exception as e:
+            metrics.increment("llm_fallbacks_total", provider=api_choice)
+            print(f"LLM処理でエラーが発生: {e}")
+            print("元のテキストを使用します")
+            return {}
+        return parse_segment_lines(response, segment_ids)
+    
+    def _improve_chunk(self, chunk: str, api_choice: str, alternatives=(),
+                       report: Optional[Dict] = None) -> str:
+        """1チャンクをLLMで改善（失敗時はそのチャンクの元テキストを返し、reportにエラーを記録）"""
+        prompt = self._create_improvement_prompt(chunk)
+        
+        try:
+            return self._call_api(api_choice, prompt, alternatives, report)
+        except Exception as e:
+            if report is not None:
+                with self._report_lock:
+                    report["errors"].append(str(e))
+            metrics.increment("llm_fallbacks_total", provider=api_choice)
             print(f"LLM処理でエラーが発生: {e}")
             print("元のテキストを返します")
-            return raw_text
+            return chunk
+    
+    def _call_api(self, api_choice: str, prompt: str, alternatives=(),
+                  report: Optional[Dict] = None) -> str:
+        """API名に応じて呼び出し先を切り替え（キャッシュ済みの応答があれば再送しない）"""
+        if self.cache is not None:
+            cache_key = self._cache_key(api_choice, prompt)
+            cached = self.cache.get(cache_key)
+            metrics.increment("llm_cache_requests_total", provider=api_choice,
+                              result="miss" if cached is None else "hit")
+            if cached is not None:
+                return cached
+            response, provider = self._dispatch(api_choice, prompt, alternatives, report)
+            # 他のAPIへ回した応答は実際に応答したAPIのキーで保存
+            self.cache.put(self._cache_key(provider, prompt), provider, response)
+            return response
+        return self._dispatch(api_choice, prompt, alternatives, report)[0]
+    
+    def _cache_key(self, api_choice: str, prompt: str) -> str:
+        """応答キャッシュのキー（API・モデル・温度・プロンプト）"""
+        return self.cache.make_key(api_choice, MODEL_NAMES.get(api_choice, ""), TEMPERATURE, prompt)
+    
+    def _dispatch(self, api_choice: str, prompt: str, alternatives=(),
+                  report: Optional[Dict] = None) -> tuple:
+        """
+        レート制限の送信枠を確保してAPIを呼び出す
+        
+        Args:
+            api_choice: 指定されたAPI
+            prompt: プロンプト
+            alternatives: 待ちが長い場合に回せる他のAPI
+            report: 指定時は使用トークン数（APIが返さない場合はプロンプトと応答の概算）と送信数を加算
+            
+        Returns:
+            (応答テキスト, 実際に呼び出したAPI名)
+        """
+        calls = {
+            "deepseek": self._call_deepseek_api,
+            "openai": self._call_openai_api,
+            "gemini": self._call_gemini_api,
+        }
+        if api_choice not in calls:
+            raise ValueError(f"サポートされていないAPI: {api_choice}")
+        
+        # 応答は修正対象とほぼ同じ長さのため、プロンプトの2倍を見込んで確保し応答後に精算
+        reserved = 2 * self.estimate_tokens(prompt)
+        wait_start = time.perf_counter()
+        provider = self.scheduler.acquire(api_choice, reserved,
+                                          [name for name in alternatives if name in calls])
+        metrics.increment("llm_rate_limit_wait_seconds_total", time.perf_counter() - wait_start,
+                          provider=provider)
+        if provider != api_choice:
+            metrics.increment("llm_spillover_total", provider=provider)
+        
+        metrics.increment("llm_prompt_tokens_estimated_total", self.estimate_tokens(prompt),
+                          provider=provider)
+        self._local.usage = None
+        self._local.reserved = reserved
+        try:
+            with metrics.span("llm_request", provider=provider):
+                response = calls[provider](prompt)
+        finally:
+            self.scheduler.settle(provider, reserved, self._local.usage)
+            self._local.reserved = None
+        if report is not None:
+            used = self._local.usage
+            if used is None:
+                used = self.estimate_tokens(prompt) + self.estimate_tokens(response)
+            with self._report_lock:
+                report["tokens"] += used
+                report["requests"] = report.get("requests", 0) + 1
+        return response, provider
+    
+    def rate_limit_report(self) -> Dict:
+        """
+        レート制限による待ちの集計
+        
+        Returns:
+            waited_seconds（送信枠の待ち時間の合計）, pauses（429による停止回数）, spilled（他のAPIへ回した数）
+        """
+        limiters = self.scheduler.limiters.values()
+        return {
+            "waited_seconds": sum(limiter.stats["waited_seconds"] for limiter in limiters),
+            "pauses": sum(limiter.stats["pauses"] for limiter in limiters),
+            "spilled": self.scheduler.spilled,
+        }
+    
+    def _split_transcript(self, raw_text: str) -> List[str]:
+        """
+        文字起こしを行単位（タイムスタンプ単位）でチャンクに分割
+        
+        Args:
+            raw_text: 文字起こしテキスト
+        
+        Returns:
+            chunk_chars以下のチャンクのリスト（1行がそれを超える場合はその行単独）
+        """
+        chunks = []
+        current = []
+        current_length = 0
+        
+        for line in raw_text.split("\n"):
+            if current and current_length + len(line) + 1 > self.chunk_chars:
+                chunks.append("\n".join(current))
+                current = []
+                current_length = 0
+            current.append(line)
+            current_length += len(line) + 1
+        
+        if current:
+            chunks.append("\n".join(current))
+        return chunks
     
     def _create_improvement_prompt(self, raw_text: str) -> str:
         """文字起こし改善用プロンプトを作成"""
@@ -59,6 +444,83 @@ class LLMProcessor:
 
 【修正後テキスト】"""
     
+    def _create_selective_prompt(self, text: str) -> str:
+        """選択したセグメントの修正用プロンプトを作成"""
+        return f"""以下は日本の会議音声をWhisperで文字起こしした結果のうち、誤認識の疑いがある行です。
+[#番号] で始まる行だけを、「{CONTEXT_LINE_PREFIX.strip()}」の行と前後の流れを参考に修正してください：
+
+1. 音声認識の誤認識（同音異義語・カタカナ語・専門用語・固有名詞）を修正
+2. 発言の意味は変えず、行の結合・分割はしない
+3. 修正後は [#番号] の行だけを、番号を保持して1行ずつ出力してください
+
+【修正対象テキスト】
+{text}
+
+【修正後テキスト】"""
+    
+    def _post_with_retry(self, url: str, headers: Dict, data: Dict,
+                         params: Optional[Dict] = None, provider: Optional[str] = None) -> Dict:
+        """
+        共有セッションでPOSTし、429/5xx・接続エラー時は指数バックオフでリトライ
+        
+        429応答時はRetry-Afterの間、同じAPIへの他スレッドの送信も止める（5xx・接続エラーは
+        このリクエストだけ待つ）。リトライも1回の送信としてレート制限の送信枠を確保し直し、
+        失敗した送信のトークン分は返却する。応答の使用トークン数はレート制限の精算のため記録する。
+        
+        Args:
+            url: APIのURL
+            headers: リクエストヘッダー
+            data: JSONボディ
+            params: クエリパラメータ
+            provider: API名（レート制限の対象。_dispatchから呼ぶ場合のみ送信枠を確保し直す）
+        
+        Returns:
+            レスポンスのJSON
+        """
+        reserved = getattr(self._local, "reserved", None) if provider is not None else None
+        for attempt in range(self.max_retries + 1):
+            if attempt and reserved is not None:
+                # 前回の送信はリクエスト数だけ消費し、トークン分を返却して枠を取り直す
+                self.scheduler.settle(provider, reserved, 0)
+                self.scheduler.limiter(provider).acquire(reserved)
+            try:
+                response = self.session.post(url, headers=headers, json=data, params=params,
+                                             timeout=(CONNECT_TIMEOUT, self.config.LLM_REQUEST_TIMEOUT))
+            except (requests.ConnectionError, requests.Timeout):
+                if attempt >= self.max_retries:
+                    raise
+                metrics.increment("llm_retries_total", reason="connection")
+                time.sleep(self._backoff_delay(attempt))
+                continue
+            
+            if response.status_code in RETRY_STATUS_CODES and attempt < self.max_retries:
+                metrics.increment("llm_retries_total", reason=str(response.status_code))
+                retry_after = response.headers.get("Retry-After")
+                delay = self._backoff_delay(attempt, retry_after)
+                if provider is not None and (response.status_code == 429 or retry_after):
+                    # クォータ超過はAPI全体の状態のため全スレッドの送信を止める（待ちは枠の確保で行う）
+                    self.scheduler.pause(provider, delay)
+                    if reserved is not None:
+                        continue
+                time.sleep(delay)
+                continue
+            
+            response.raise_for_status()
+            result = response.json()
+            usage = result.get("usage") or {}
+            self._local.usage = usage.get("total_tokens") or \
+                (result.get("usageMetadata") or {}).get("totalTokenCount")
+            return result
+    
+    def _backoff_delay(self, attempt: int, retry_after: Optional[str] = None) -> float:
+        """リトライまでの待ち時間（Retry-Afterがあれば優先）"""
+        if retry_after:
+            try:
+                return float(retry_after)
+            except ValueError:
+                pass
+        return min(30.0, 2 ** attempt) * (0.5 + random.random() / 2)
+    
     def _call_deepseek_api(self, prompt: str) -> str:
         """DeepSeek APIを呼び出し"""
         headers = {
@@ -67,43 +529,37 @@ class LLMProcessor:
         }
         
         data = {
-            "model": "deepseek-chat",
+            "model": MODEL_NAMES["deepseek"],
             "messages": [
                 {"role": "user", "content": prompt}
             ],
-            "temperature": 0.1
+            "temperature": TEMPERATURE
         }
         
-        response = requests.post(
-            self.config.DEEPSEEK_API_URL,
-            headers=headers,
-            json=data,
-            timeout=60
-        )
-        response.raise_for_status()
-        
-        result = response.json()
+        result = self._post_with_retry(self.config.DEEPSEEK_API_URL, headers, data, provider="deepseek")
         return result["choices"][0]["message"]["content"].strip()
     
     def _call_openai_api(self, prompt: str) -> str:
-        """OpenAI APIを呼び出し"""
-        client = openai.OpenAI(api_key=self.config.OPENAI_API_KEY)
+        """OpenAI APIを呼び出し（Chat Completions REST API）"""
+        headers = {
+            "Authorization": f"Bearer {self.config.OPENAI_API_KEY}",
+            "Content-Type": "application/json"
+        }
         
-        response = client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[
+        data = {
+            "model": MODEL_NAMES["openai"],
+            "messages": [
                 {"role": "user", "content": prompt}
             ],
-            temperature=0.1
-        )
+            "temperature": TEMPERATURE
+        }
         
-        return response.choices[0].message.content.strip()
+        result = self._post_with_retry(self.config.OPENAI_API_URL, headers, data, provider="openai")
+        return result["choices"][0]["message"]["content"].strip()
     
     def _call_gemini_api(self, prompt: str) -> str:
         """Gemini APIを呼び出し"""
         # Gemini API実装（Google AI Studio API）
-        url = f"https://generativelanguage.googleapis.com/v1beta/models/gemini-1.5-flash-latest:generateContent?key={self.config.GEMINI_API_KEY}"
-        
         headers = {
             "Content-Type": "application/json"
         }
@@ -115,36 +571,89 @@ class LLMProcessor:
                 }]
             }],
             "generationConfig": {
-                "temperature": 0.1
+                "temperature": TEMPERATURE
             }
         }
         
-        response = requests.post(url, headers=headers, json=data, timeout=60)
-        response.raise_for_status()
-        
-        result = response.json()
+        result = self._post_with_retry(self.config.GEMINI_API_URL, headers, data,
+                                       params={"key": self.config.GEMINI_API_KEY}, provider="gemini")
         return result["candidates"][0]["content"]["parts"][0]["text"].strip()
     
-    def estimate_cost(self, text: str, api_choice: str) -> float:
+    def estimate_tokens(self, text: str) -> int:
+        """
+        トークン数を概算
+        
+        Args:
+            text: 対象テキスト
+            
+        Returns:
+            推定トークン数
+        """
+        # 文字種ごとの目安で計算（漢字は1文字1トークン、英数字は4文字1トークン等）
+        return estimate_tokens(text)
+    
+    def estimate_cost(self, text: str, api_choice: str, whisper_result: Dict = None,
+                      **selection) -> float:
         """
         処理コストを概算
         
+        応答キャッシュが有効な場合、キャッシュ済みのチャンクは課金されないため除外する。
+        
         Args:
             text: 処理するテキスト
             api_choice: 使用するAPI
+            whisper_result: 指定時は選択的後処理（improve_segments）で送る分を見積もる
+            **selection: improve_segmentsのcontext_segments・閾値
             
         Returns:
             推定コスト（USD）
         """
-        # 簡易的なトークン数計算（日本語: 約2文字=1トークン）
-        estimated_tokens = len(text) // 2
+        return self.estimate_usage(text, api_choice, whisper_result, **selection)["cost"]
+    
+    def estimate_usage(self, text: str, api_choice: str, whisper_result: Dict = None,
+                       context_segments: int = 1, **thresholds) -> Dict:
+        """
+        送信するトークン数とコストを概算
+        
+        Args:
+            text: 全文を送る場合の文字起こしテキスト
+            api_choice: 使用するAPI
+            whisper_result: 指定時は選択的後処理で送る分を見積もり、全文との差を節約分とする
+            context_segments: improve_segmentsの文脈のセグメント数
+            **thresholds: select_segmentsの閾値
+            
+        Returns:
+            tokens, cost, full_tokens（全文を送る場合）, saved_tokens の辞書
+        """
+        full_prompts = [(chunk, self._create_improvement_prompt(chunk))
+                        for chunk in self._split_transcript(text)]
+        if whisper_result is None:
+            prompts = full_prompts
+        else:
+            segments = whisper_result.get("segments", [])
+            batches = self._build_selective_batches(
+                segments, select_segments(segments, **thresholds), context_segments)
+            prompts = [(batch, self._create_selective_prompt(batch)) for batch, _ in batches]
+        
+        full_tokens = sum(self.estimate_tokens(chunk) for chunk, _ in full_prompts)
+        tokens = sum(self.estimate_tokens(chunk) for chunk, _ in prompts)
+        if self.cache is not None:
+            billed = sum(self.estimate_tokens(chunk) for chunk, prompt in prompts
+                         if not self.cache.contains(self._cache_key(api_choice, prompt)))
+        else:
+            billed = tokens
         
         # API別料金（1Mトークンあたり）
         rates = {
             "deepseek": 0.14,
-            "gemini": 0.075, 
+            "gemini": 0.075,
             "openai": 0.15
         }
         
         rate = rates.get(api_choice, 0.15)
-        return (estimated_tokens / 1000000) * rate
\ No newline at end of file
+        return {
+            "tokens": tokens,
+            "cost": (billed / 1000000) * rate,
+            "full_tokens": full_tokens,
+            "saved_tokens": full_tokens - tokens,
+        }
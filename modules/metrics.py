@@ -0,0 +1,225 @@
+import contextvars
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, Iterable, Optional, Tuple
+
+# 処理時間ヒストグラムのバケット（秒）
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0,
+                   60.0, 120.0, 300.0, 600.0)
+
+# メトリクス名の接頭辞
+_PREFIX = "mojiokoshi_"
+
+# 構造化ログ（configure_loggingでファイル出力を設定するまでは何も出力しない）
+logger = logging.getLogger("mojiokoshi")
+logger.addHandler(logging.NullHandler())
+logger.propagate = False
+
+# 実行中のスパン名（入れ子の親を記録するため）
+_current_span = contextvars.ContextVar("current_span", default=None)
+
+
+class _JSONFormatter(logging.Formatter):
+    """ログレコードを1行のJSONに変換"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "event": record.getMessage(),
+            "pid": record.process,
+            "thread": record.threadName,
+        }
+        entry.update(getattr(record, "fields", {}))
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+def configure_logging(log_file: Optional[str], level: str = "INFO"):
+    """
+    構造化ログ（JSON Lines）の出力先を設定
+
+    Args:
+        log_file: ログファイルのパス（Noneの場合は出力しない）
+        level: ログレベル (DEBUG, INFO, WARNING, ERROR)
+    """
+    for handler in list(logger.handlers):
+        if not isinstance(handler, logging.NullHandler):
+            logger.removeHandler(handler)
+            handler.close()
+    logger.setLevel(getattr(logging, level.upper(), logging.INFO))
+    if log_file:
+        directory = os.path.dirname(log_file)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        handler = logging.FileHandler(log_file, encoding="utf-8")
+        handler.setFormatter(_JSONFormatter())
+        logger.addHandler(handler)
+
+
+def log_event(event: str, level: int = logging.INFO, **fields):
+    """
+    構造化ログに1件記録
+
+    Args:
+        event: イベント名
+        level: ログレベル
+        **fields: 記録する値
+    """
+    if logger.isEnabledFor(level):
+        logger.log(level, event, extra={"fields": fields})
+
+
+class MetricsRegistry:
+    """カウンタ・ヒストグラムの集計クラス（Prometheusテキスト形式で出力可能）"""
+
+    def __init__(self, buckets: Iterable[float] = DEFAULT_BUCKETS):
+        """
+        初期化
+
+        Args:
+            buckets: ヒストグラムのバケット上限（秒）
+        """
+        self.buckets = tuple(sorted(buckets))
+        self._counters = {}
+        self._histograms = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _series(name: str, labels: Dict) -> Tuple[str, Tuple]:
+        return name, tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+    def increment(self, name: str, value: float = 1, **labels):
+        """カウンタを加算"""
+        series = self._series(name, labels)
+        with self._lock:
+            self._counters[series] = self._counters.get(series, 0) + value
+
+    def observe(self, name: str, value: float, **labels):
+        """ヒストグラムに値を記録"""
+        series = self._series(name, labels)
+        with self._lock:
+            histogram = self._histograms.get(series)
+            if histogram is None:
+                histogram = self._histograms[series] = {
+                    "buckets": [0] * len(self.buckets), "sum": 0.0, "count": 0
+                }
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    histogram["buckets"][i] += 1
+            histogram["sum"] += value
+            histogram["count"] += 1
+
+    def counter_value(self, name: str, **labels) -> float:
+        """カウンタの現在値（未記録は0）"""
+        with self._lock:
+            return self._counters.get(self._series(name, labels), 0)
+
+    def histogram_value(self, name: str, **labels) -> Optional[Dict]:
+        """ヒストグラムの集計値（sum, count）"""
+        with self._lock:
+            histogram = self._histograms.get(self._series(name, labels))
+            if histogram is None:
+                return None
+            return {"sum": histogram["sum"], "count": histogram["count"]}
+
+    def reset(self):
+        """全メトリクスを消去"""
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+    def render_prometheus(self) -> str:
+        """Prometheusのテキスト形式で出力"""
+        def format_labels(labels: Tuple, extra: Tuple = ()) -> str:
+            pairs = labels + extra
+            if not pairs:
+                return ""
+            escaped = (value.replace("\\", "\\\\").replace('"', '\\"') for _, value in pairs)
+            return "{" + ",".join(f'{key}="{value}"' for (key, _), value in zip(pairs, escaped)) + "}"
+
+        lines = []
+        with self._lock:
+            counters = sorted(self._counters.items())
+            histograms = sorted(self._histograms.items())
+
+        declared = set()
+        for (name, labels), value in counters:
+            if name not in declared:
+                lines.append(f"# TYPE {_PREFIX}{name} counter")
+                declared.add(name)
+            lines.append(f"{_PREFIX}{name}{format_labels(labels)} {value:g}")
+
+        for (name, labels), histogram in histograms:
+            if name not in declared:
+                lines.append(f"# TYPE {_PREFIX}{name} histogram")
+                declared.add(name)
+            for bound, count in zip(self.buckets, histogram["buckets"]):
+                lines.append(f"{_PREFIX}{name}_bucket{format_labels(labels, (('le', f'{bound:g}'),))} {count}")
+            lines.append(f"{_PREFIX}{name}_bucket{format_labels(labels, (('le', '+Inf'),))} "
+                         f"{histogram['count']}")
+            lines.append(f"{_PREFIX}{name}_sum{format_labels(labels)} {histogram['sum']:.6f}")
+            lines.append(f"{_PREFIX}{name}_count{format_labels(labels)} {histogram['count']}")
+
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path: str):
+        """Prometheusのテキスト形式でファイルに書き出す（node_exporterのtextfile collector向け）"""
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(self.render_prometheus())
+        os.replace(tmp_path, path)
+
+
+# プロセス全体で共有する集計先
+REGISTRY = MetricsRegistry()
+
+
+def increment(name: str, value: float = 1, **labels):
+    """共有レジストリのカウンタを加算"""
+    REGISTRY.increment(name, value, **labels)
+
+
+@contextmanager
+def span(name: str, **labels):
+    """
+    処理区間の計測
+
+    終了時に処理時間を `{name}_seconds` ヒストグラムに記録し、
+    例外で終了した場合は `{name}_errors_total` を加算する。
+    構造化ログには親スパン名・処理時間・ラベルを1行で記録する。
+
+    Args:
+        name: スパン名 (model_load, audio_decode, inference等)
+        **labels: メトリクスとログに付けるラベル（値の種類が少ないものに限る）
+    """
+    parent = _current_span.get()
+    token = _current_span.set(name)
+    start = time.perf_counter()
+    status = "ok"
+    error = None
+    try:
+        yield
+    except BaseException as e:
+        status = "error"
+        error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        duration = time.perf_counter() - start
+        _current_span.reset(token)
+        REGISTRY.observe(f"{name}_seconds", duration, **labels)
+        if status == "error":
+            REGISTRY.increment(f"{name}_errors_total", **labels)
+        fields = {"span": name, "parent": parent, "duration_ms": round(duration * 1000, 3),
+                  "status": status}
+        if error:
+            fields["error"] = error
+        fields.update(labels)
+        log_event("span", logging.WARNING if error else logging.INFO, **fields)
@@ -0,0 +1,214 @@
+"""
+信頼度に基づくモデルカスケード
+
+小さいモデルで全体をデコードし、信頼度の低い時間範囲だけを大きいモデルで
+再デコードして結果に差し戻す。大半の区間は高速なモデルの結果をそのまま使うため、
+大きいモデルの精度に近い結果を一部のCPU時間で得られる。
+"""
+
+import time
+from typing import Dict, List, Optional, Tuple
+from . import metrics
+from .audio_segmenter import SAMPLE_RATE, shift_segments
+
+# 再デコード時に文脈として与える直前のテキストの長さ（文字数）
+CONTEXT_CHARS = 200
+
+
+def is_weak_segment(segment: Dict, logprob_threshold: float = -0.7,
+                    no_speech_threshold: float = 0.6,
+                    compression_threshold: float = 2.4) -> bool:
+    """
+    セグメントの信頼度が低いか判定
+
+    平均対数確率が低い、無音確率が高い（無音上の幻覚の疑い）、
+    圧縮率が高い（繰り返しの疑い）のいずれかに該当すれば低信頼とする。
+    指標を持たないセグメントは低信頼としない。
+
+    Args:
+        segment: Whisperのセグメント
+        logprob_threshold: これを下回るavg_logprobを低信頼とする
+        no_speech_threshold: これを上回るno_speech_probを低信頼とする
+        compression_threshold: これを上回るcompression_ratioを低信頼とする
+
+    Returns:
+        低信頼ならTrue
+    """
+    if not segment.get("text", "").strip():
+        return False
+    return (segment.get("avg_logprob", 0.0) < logprob_threshold
+            or segment.get("no_speech_prob", 0.0) > no_speech_threshold
+            or segment.get("compression_ratio", 0.0) > compression_threshold)
+
+
+def find_weak_ranges(segments: List[Dict], merge_gap: float = 1.0,
+                     **thresholds) -> List[Tuple[float, float]]:
+    """
+    低信頼セグメントの時間範囲を求める
+
+    間隔がmerge_gap以下の低信頼セグメントは1つの範囲にまとめる
+    （短い範囲を個別に再デコードすると文脈が途切れるため）。
+
+    Args:
+        segments: 開始時刻順のセグメントリスト
+        merge_gap: この秒数以下の間隔の範囲を結合する
+        **thresholds: is_weak_segmentの閾値
+
+    Returns:
+        (開始秒, 終了秒) のリスト
+    """
+    ranges = []
+    for segment in segments:
+        if not is_weak_segment(segment, **thresholds):
+            continue
+        if ranges and segment["start"] - ranges[-1][1] <= merge_gap:
+            ranges[-1][1] = max(ranges[-1][1], segment["end"])
+        else:
+            ranges.append([segment["start"], segment["end"]])
+    return [(start, end) for start, end in ranges]
+
+
+def splice_segments(draft: List[Dict], replacements: List[Tuple[float, float, List[Dict]]]) -> List[Dict]:
+    """
+    時間範囲ごとの再デコード結果を下書きのセグメント列に差し戻す
+
+    中点が範囲内にある下書きセグメントを取り除き、中点が範囲内にある
+    再デコード結果で置き換える（前後の余白部分の重複は捨てる）。
+    話者ラベル付きの場合、置き換えたセグメントとその単語は、取り除いた下書きの
+    単語（単語がなければセグメント）の話者区間のうち重なりが最大の話者を引き継ぐ。
+
+    Args:
+        draft: 下書きのセグメントリスト（開始時刻順）
+        replacements: (開始秒, 終了秒, 再デコードしたセグメントリスト) のリスト（開始時刻順）
+
+    Returns:
+        開始時刻順に並べ直し、idを振り直したセグメントリスト
+    """
+    def inside(segment, start, end):
+        return start <= (segment["start"] + segment["end"]) / 2 < end
+
+    spliced, index = [], 0
+    for start, end, decoded in replacements:
+        replaced = []
+        while index < len(draft) and (draft[index]["start"] + draft[index]["end"]) / 2 < end:
+            segment = draft[index]
+            (replaced if inside(segment, start, end) else spliced).append(segment)
+            index += 1
+        kept = [segment for segment in decoded if inside(segment, start, end)]
+        turns = _speaker_turns(replaced)
+        if turns:
+            from .diarization import assign_speakers
+            assign_speakers(kept, turns)
+        spliced.extend(kept)
+    spliced.extend(draft[index:])
+
+    for i, segment in enumerate(spliced):
+        segment["id"] = i
+    return spliced
+
+
+def _speaker_turns(segments: List[Dict]) -> List[Tuple[float, float, str]]:
+    """下書きの話者ラベルを話者区間に変換（単語の話者があれば単語単位）"""
+    words = [word for segment in segments for word in segment.get("words") or []
+             if word.get("speaker") is not None]
+    labelled = words or [segment for segment in segments if segment.get("speaker") is not None]
+    return sorted((item["start"], item["end"], item["speaker"]) for item in labelled)
+
+
+class ModelCascade:
+    """下書きモデルの低信頼区間だけを大きいモデルで再デコード"""
+
+    def __init__(self, final_processor, logprob_threshold: float = -0.7,
+                 no_speech_threshold: float = 0.6, compression_threshold: float = 2.4,
+                 merge_gap: float = 1.0, padding: float = 0.3):
+        """
+        初期化
+
+        Args:
+            final_processor: 再デコードに使うAudioProcessor（大きいモデル）
+            logprob_threshold: これを下回るavg_logprobのセグメントを再デコード
+            no_speech_threshold: これを上回るno_speech_probのセグメントを再デコード
+            compression_threshold: これを上回るcompression_ratioのセグメントを再デコード
+            merge_gap: この秒数以下の間隔の低信頼範囲はまとめて再デコード（余白が重なる2×padding以下の間隔は常にまとめる）
+            padding: 再デコード時に範囲の前後に付ける余白（秒）
+        """
+        self.final = final_processor
+        self.thresholds = {
+            "logprob_threshold": logprob_threshold,
+            "no_speech_threshold": no_speech_threshold,
+            "compression_threshold": compression_threshold,
+        }
+        self.merge_gap = merge_gap
+        self.padding = padding
+
+    def refine(self, audio_path: str, draft_result: Dict, language: str = "ja",
+               prompt: Optional[str] = None, audio=None) -> Dict:
+        """
+        下書きの結果の低信頼区間を再デコードして差し戻す
+
+        Args:
+            audio_path: 音声ファイルのパス
+            draft_result: 下書きモデルの結果辞書（誤認識修正済み）
+            language: 言語コード
+            prompt: Whisperに与える初期プロンプト
+            audio: デコード済みの波形（Noneの場合はfinal_processorで読み込む）
+
+        Returns:
+            セグメントを差し替え、"cascade"（再デコード範囲・秒数・エスカレーション率）を追加した結果辞書
+        """
+        start_time = time.perf_counter()
+        draft_segments = sorted(draft_result.get("segments", []), key=lambda s: s["start"])
+        # 余白を付けた窓が重なる範囲はまとめる（重なった音声を二重にデコード・計上しない）
+        ranges = find_weak_ranges(draft_segments, max(self.merge_gap, 2 * self.padding), **self.thresholds)
+
+        replacements = []
+        escalated_seconds = 0.0
+        total_seconds = draft_segments[-1]["end"] if draft_segments else 0.0
+        if ranges:
+            if audio is None:
+                audio = self.final.load_audio(audio_path)
+            total_seconds = len(audio) / SAMPLE_RATE
+            language = draft_result.get("language") or language
+            with metrics.span("cascade", model=self.final.model_name):
+                for start, end in ranges:
+                    window_start = max(start - self.padding, 0.0)
+                    window_end = min(end + self.padding, total_seconds)
+                    context = self._context(draft_segments, start, prompt)
+                    decoded = self._decode(audio, window_start, window_end, language, context)
+                    replacements.append((start, end, decoded))
+                    escalated_seconds += window_end - window_start
+            metrics.increment("cascade_escalated_seconds_total", escalated_seconds,
+                              model=self.final.model_name)
+
+        result = dict(draft_result)
+        result["segments"] = splice_segments(draft_segments, replacements)
+        result["text"] = "".join(segment["text"] for segment in result["segments"])
+        result["cascade"] = {
+            "model": self.final.model_name,
+            "ranges": len(ranges),
+            "escalated_seconds": escalated_seconds,
+            "total_seconds": total_seconds,
+            "escalation_ratio": escalated_seconds / total_seconds if total_seconds > 0 else 0.0,
+            "seconds": time.perf_counter() - start_time,
+        }
+        print(f"カスケード: {len(ranges)}区間 {escalated_seconds:.1f}秒を{self.final.model_name}で再デコード "
+              f"(エスカレーション率 {result['cascade']['escalation_ratio']:.1%})")
+        return result
+
+    def _context(self, segments: List[Dict], start: float, prompt: Optional[str]) -> Optional[str]:
+        """範囲の直前の下書きテキストを初期プロンプトにする（ユーザー指定のプロンプトを先頭に付ける）"""
+        preceding = "".join(segment["text"] for segment in segments if segment["end"] <= start)
+        context = preceding.strip()[-CONTEXT_CHARS:]
+        return " ".join(part for part in (prompt, context) if part) or None
+
+    def _decode(self, audio, window_start: float, window_end: float,
+                language: str, prompt: Optional[str]) -> List[Dict]:
+        """1範囲を大きいモデルでデコードし、元の時間軸に戻して誤認識を修正"""
+        import numpy as np
+        clip = np.ascontiguousarray(
+            audio[int(window_start * SAMPLE_RATE):int(window_end * SAMPLE_RATE)], dtype=np.float32)
+        params = self.final.build_transcribe_params(language, prompt)
+        params["condition_on_previous_text"] = False
+        result = self.final._run_whisper(clip, params)
+        shift_segments(result["segments"], window_start)
+        return self.final._apply_corrections(result)["segments"]
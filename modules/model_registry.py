@@ -0,0 +1,117 @@
+import os
+import threading
+import time
+from typing import Dict, Optional
+
+from . import metrics
+
+
+def process_memory() -> Dict[str, Optional[float]]:
+    """
+    このプロセスのメモリ使用量（MB）
+
+    rss_mbは共有ページを含む常駐サイズ、private_mbはこのプロセスだけが使うページ（USS）。
+    fork後にモデルをコピーオンライトで共有している場合、private_mbには重みが含まれない。
+    /procが無い環境ではピークRSSのみ返す。
+
+    Returns:
+        {"rss_mb", "private_mb"}（取得できない値はNone）
+    """
+    usage = {"rss_mb": None, "private_mb": None}
+    try:
+        with open("/proc/self/smaps_rollup", 'r') as f:
+            fields = {}
+            for line in f:
+                parts = line.split()
+                if len(parts) >= 2 and parts[0].endswith(":") and parts[1].isdigit():
+                    fields[parts[0][:-1]] = int(parts[1])
+        usage["rss_mb"] = fields.get("Rss", 0) / 1024
+        usage["private_mb"] = (fields.get("Private_Clean", 0) + fields.get("Private_Dirty", 0)) / 1024
+    except OSError:
+        import resource
+        import sys
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # LinuxはKB、macOSはバイト単位
+        usage["rss_mb"] = peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+    return usage
+
+
+class ModelRegistry:
+    """モデルレジストリ - 読み込んだモデルをプロセス内で (バックエンド, モデル名, デバイス) ごとに共有"""
+
+    def __init__(self):
+        self._models = {}
+        self._load_times = {}
+        self._lock = threading.Lock()
+        self._key_locks = {}
+
+    def _key(self, backend, model_name: str, device: str):
+        # スレッドセーフでない推論エンジンのモデルもスレッド間で共有する
+        # （同時デコードはWhisperBackendがモデル単位のロックで直列化する）
+        return (backend.cache_id, model_name, device)
+
+    def get(self, backend, model_name: str, device: str = "cpu"):
+        """
+        モデルを取得（未読み込みの場合のみ読み込む）
+
+        Args:
+            backend: 推論バックエンド（inference_backends）
+            model_name: モデル名
+            device: 使用デバイス
+
+        Returns:
+            バックエンドのload_modelが返したモデル
+        """
+        key = self._key(backend, model_name, device)
+        with self._lock:
+            if key in self._models:
+                metrics.increment("model_registry_requests_total", result="hit")
+                return self._models[key]
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+
+        # 同じモデルの読み込みが重複しないようキーごとに待つ（別モデルの読み込みは妨げない）
+        with key_lock:
+            with self._lock:
+                if key in self._models:
+                    metrics.increment("model_registry_requests_total", result="hit")
+                    return self._models[key]
+            metrics.increment("model_registry_requests_total", result="miss")
+            print(f"Whisperモデル '{model_name}' を読み込み中... ({backend.cache_id})")
+            start = time.perf_counter()
+            with metrics.span("model_load", model=model_name, backend=backend.cache_id):
+                model = backend.load_model(model_name, device)
+            load_time = time.perf_counter() - start
+            with self._lock:
+                self._models[key] = model
+                self._load_times[key] = load_time
+            print(f"Whisperモデルの読み込み完了 ({load_time:.1f}秒)")
+            return model
+
+    def load_time(self, backend, model_name: str, device: str = "cpu") -> Optional[float]:
+        """このプロセスで読み込みにかかった時間（未読み込み・他プロセスから継承した場合None）"""
+        with self._lock:
+            return self._load_times.get(self._key(backend, model_name, device))
+
+    def loaded(self):
+        """読み込み済みモデルのキー一覧"""
+        with self._lock:
+            return list(self._models)
+
+    def clear(self):
+        """全モデルを破棄"""
+        with self._lock:
+            self._models.clear()
+            self._load_times.clear()
+            self._key_locks.clear()
+
+
+# プロセス全体で共有するレジストリ（fork後の子プロセスはこの内容を引き継ぐ）
+MODEL_REGISTRY = ModelRegistry()
+
+
+def fork_sharing_available(backend) -> bool:
+    """モデル読み込み後のforkで重みを共有できるか（Linux等のfork対応環境かつ対応バックエンド）"""
+    import multiprocessing
+    return (getattr(backend, "fork_safe", False)
+            and "fork" in multiprocessing.get_all_start_methods()
+            and os.name == "posix")
@@ -1,18 +1,132 @@
 import os
+import sys
+import glob
+import json
+import re
 from datetime import datetime
-from typing import Dict
+from typing import Dict, List, Optional
+from . import metrics
+from .exporters import STRUCTURED_FORMATS, write_json, write_srt, write_vtt
+from .segments import timestamped_lines
+from .transcript_index import parse_transcript_text
+
+
+class StreamingTranscript:
+    """逐次出力クラス - デコード済みセグメントをファイルへ追記し、再開用チェックポイントを保存"""
+    
+    def __init__(self, output_path: str, checkpoint_path: str, state: Dict, echo: bool = True,
+                 index=None, audio_filename: str = None, api_used: str = "whisper"):
+        """
+        初期化（通常はOutputFormatter.open_streamから生成）
+        
+        Args:
+            output_path: 出力ファイルのパス
+            checkpoint_path: チェックポイントファイルのパス
+            state: チェックポイントの内容（completed_windows, bytes_written等）
+            echo: 標準出力にも表示するか
+            index: 完了時に登録するTranscriptIndex（Noneの場合は登録しない）
+            audio_filename: 元の音声ファイル名（インデックス用）
+            api_used: 使用したAPI名（インデックス用）
+        """
+        self.output_path = output_path
+        self.checkpoint_path = checkpoint_path
+        self.state = state
+        self.echo = echo
+        self.index = index
+        self.audio_filename = audio_filename
+        self.api_used = api_used
+        
+        # 前回チェックポイント後に書きかけた内容は捨てて続きから追記
+        with open(output_path, 'a', encoding='utf-8'):
+            pass
+        with open(output_path, 'r+b') as f:
+            f.truncate(state["bytes_written"])
+        self._file = open(output_path, 'a', encoding='utf-8')
+    
+    @property
+    def completed_windows(self) -> int:
+        """完了済みのウィンドウ数（再開時はこの番号から処理する）"""
+        return self.state["completed_windows"]
+    
+    def write_header(self, header: str):
+        """新規ファイルの先頭にヘッダーを書き込む"""
+        if self.state["bytes_written"] == 0:
+            self._file.write(header + "\n" + "="*80 + "\n" + "文字起こし結果\n" + "="*80 + "\n\n")
+            self._commit()
+    
+    def write_segments(self, segments: List[Dict]):
+        """
+        セグメントを追記
+        
+        Args:
+            segments: 全体の時間軸に補正済みのセグメントリスト
+        """
+        chunk = "".join(f"{line}\n" for line in timestamped_lines(segments))
+        self._file.write(chunk)
+        self._file.flush()
+        if self.echo:
+            sys.stdout.write(chunk)
+            sys.stdout.flush()
+    
+    def complete_window(self, window_index: int):
+        """
+        ウィンドウの書き込み完了を記録（チェックポイント保存）
+        
+        Args:
+            window_index: 完了したウィンドウ番号
+        """
+        self.state["completed_windows"] = window_index + 1
+        self._commit()
+    
+    def _commit(self):
+        """ファイルを同期してからチェックポイントを原子的に更新"""
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self.state["bytes_written"] = os.path.getsize(self.output_path)
+        tmp_path = self.checkpoint_path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.state, f, ensure_ascii=False)
+        os.replace(tmp_path, self.checkpoint_path)
+    
+    def close(self, finished: bool = True):
+        """
+        出力を閉じる
+        
+        Args:
+            finished: 全ウィンドウ完了時True（チェックポイントを削除）
+        """
+        self._file.close()
+        if finished and os.path.exists(self.checkpoint_path):
+            os.remove(self.checkpoint_path)
+        if finished and self.index is not None:
+            # 途中で中断したファイルは再開後に完成してから登録する
+            with open(self.output_path, 'r', encoding='utf-8') as f:
+                segments = parse_transcript_text(f.read())
+            _add_to_index(self.index, self.output_path, segments, self.audio_filename, self.api_used)
+
+
+def _add_to_index(index, output_path: str, segments: List[Dict], audio_filename: str, api_used: str):
+    """保存したファイルのセグメントを検索インデックスに登録（失敗しても保存結果には影響させない）"""
+    try:
+        with metrics.span("search_index", api=api_used):
+            index.add(output_path, segments, audio_filename, api_used)
+    except Exception as e:
+        print(f"警告: 検索インデックスへの登録に失敗しました ({output_path}): {e}")
+
 
 class OutputFormatter:
     """出力処理クラス - テキスト整形とファイル出力"""
     
-    def __init__(self, output_dir: str = "./output"):
+    def __init__(self, output_dir: str = "./output", index=None):
         """
         初期化
         
         Args:
             output_dir: 出力ディレクトリ
+            index: 保存した文字起こしを登録するTranscriptIndex（Noneの場合は登録しない）
         """
         self.output_dir = output_dir
+        self.index = index
         os.makedirs(output_dir, exist_ok=True)
     
     def save_transcription(self, 
@@ -20,7 +134,8 @@ class OutputFormatter:
                           audio_filename: str, 
                           api_used: str = "whisper",
                           metadata: Dict = None,
-                          format_type: str = "standard") -> str:
+                          format_type: str = "standard",
+                          segments: List[Dict] = None) -> str:
         """
         文字起こし結果をファイルに保存
         
@@ -30,6 +145,7 @@ class OutputFormatter:
             api_used: 使用したAPI名
             metadata: メタデータ辞書
             format_type: 出力形式 ("standard", "continuous", "minimal")
+            segments: 検索インデックスに登録するセグメント（Noneの場合はtextの行から復元）
             
         Returns:
             保存されたファイルのパス
@@ -49,21 +165,136 @@ class OutputFormatter:
             output_text = text
         elif format_type == "continuous":
             # 連続したテキスト形式（goodサンプルのような形式）
-            output_text = self._format_continuous_text(text, audio_filename, api_used, metadata)
+            # create_continuous_textがセグメントから直接生成済みのため再解析しない
+            output_text = text
         else:
             # 標準形式（タイムスタンプ付き）
-            header = self._create_header(audio_filename, api_used, metadata)
+            header = self.create_header(audio_filename, api_used, metadata)
             output_text = header + "\n" + "="*80 + "\n" + "文字起こし結果\n" + "="*80 + "\n\n" + text
         
         # ファイルに保存
-        with open(output_path, 'w', encoding='utf-8') as f:
+        with metrics.span("output_write", format="txt"), \
+                open(output_path, 'w', encoding='utf-8') as f:
             f.write(output_text)
         
         print(f"文字起こし結果を保存しました: {output_path}")
+        if self.index is not None:
+            if segments is None:
+                segments = parse_transcript_text(text)
+            _add_to_index(self.index, output_path, segments, audio_filename, api_used)
         return output_path
     
-    def _create_header(self, audio_filename: str, api_used: str, metadata: Dict = None) -> str:
-        """ファイルヘッダーを作成"""
+    def save_structured(self,
+                        whisper_result: Dict,
+                        audio_filename: str,
+                        output_format: str,
+                        api_used: str = "whisper",
+                        metadata: Dict = None) -> str:
+        """
+        セグメントから構造化形式（JSON, SRT, WebVTT）で直接保存
+        
+        Args:
+            whisper_result: Whisperの結果辞書
+            audio_filename: 元の音声ファイル名
+            output_format: 出力形式 ("json", "srt", "vtt")
+            api_used: 使用したAPI名
+            metadata: メタデータ辞書（JSONのみ出力）
+            
+        Returns:
+            保存されたファイルのパス
+        """
+        if output_format not in STRUCTURED_FORMATS:
+            raise ValueError(f"サポートされていない出力形式: {output_format}")
+        
+        base_name = os.path.splitext(os.path.basename(audio_filename))[0]
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        output_path = os.path.join(self.output_dir, f"{base_name}_{api_used}_{timestamp}.{output_format}")
+        
+        # 文字列を連結せずセグメント単位でファイルへ書き込む
+        with metrics.span("output_write", format=output_format), \
+                open(output_path, 'w', encoding='utf-8') as f:
+            if output_format == "json":
+                write_json(f, whisper_result, metadata)
+            elif output_format == "srt":
+                write_srt(f, whisper_result.get("segments", []))
+            else:
+                write_vtt(f, whisper_result.get("segments", []))
+        
+        print(f"文字起こし結果を保存しました: {output_path}")
+        if self.index is not None:
+            _add_to_index(self.index, output_path, whisper_result.get("segments", []),
+                          audio_filename, api_used)
+        return output_path
+    
+    def open_stream(self, audio_filename: str, api_used: str = "whisper",
+                    resume_key: Dict = None, echo: bool = True) -> StreamingTranscript:
+        """
+        逐次出力用のファイルを開く（チェックポイントがあれば続きから再開）
+        
+        Args:
+            audio_filename: 元の音声ファイル名
+            api_used: 使用したAPI名
+            resume_key: 再開可否の判定に使う情報（音声サイズ・モデル・ウィンドウ長等）
+            echo: 標準出力にも表示するか
+            
+        Returns:
+            StreamingTranscript
+        """
+        # 再開できるようファイル名にタイムスタンプを含めない
+        base_name = os.path.splitext(os.path.basename(audio_filename))[0]
+        output_path = os.path.join(self.output_dir, f"{base_name}_{api_used}_stream.txt")
+        checkpoint_path = output_path + ".checkpoint.json"
+        
+        state = {"resume_key": resume_key or {}, "completed_windows": 0, "bytes_written": 0}
+        if os.path.exists(checkpoint_path):
+            try:
+                with open(checkpoint_path, 'r', encoding='utf-8') as f:
+                    saved = json.load(f)
+                if saved.get("resume_key") == state["resume_key"] and os.path.exists(output_path):
+                    state = saved
+                    print(f"チェックポイントから再開します（完了済み: {state['completed_windows']}ウィンドウ）")
+            except (OSError, ValueError):
+                pass
+        
+        if state["completed_windows"] == 0 and state["bytes_written"] == 0 and os.path.exists(output_path):
+            os.remove(output_path)
+        
+        print(f"文字起こし結果を逐次保存します: {output_path}")
+        return StreamingTranscript(output_path, checkpoint_path, state, echo=echo,
+                                   index=self.index, audio_filename=audio_filename, api_used=api_used)
+    
+    def find_existing_output(self, 
+                             audio_filename: str, 
+                             api_used: str = "whisper",
+                             format_type: str = "standard",
+                             output_format: str = "txt") -> Optional[str]:
+        """
+        既に保存済みの文字起こし結果を検索
+        
+        Args:
+            audio_filename: 元の音声ファイル名
+            api_used: 使用したAPI名
+            format_type: 出力形式 ("standard", "continuous", "minimal")。txtのみ使用
+            output_format: ファイル形式 ("txt", "json", "srt", "vtt")
+            
+        Returns:
+            最新の出力ファイルのパス（存在しない場合None）
+        """
+        base_name = os.path.splitext(os.path.basename(audio_filename))[0]
+        format_suffix = f"_{format_type}" if format_type != "standard" and output_format == "txt" else ""
+        prefix = f"{base_name}_{api_used}{format_suffix}_"
+        pattern = f"{glob.escape(prefix)}*.{output_format}"
+        
+        # 別形式の出力（例: standard検索時の _continuous_）と区別するため
+        # プレフィックス以降がタイムスタンプのみのファイルに限定
+        candidates = [
+            path for path in glob.glob(os.path.join(self.output_dir, pattern))
+            if re.fullmatch(r"\d{8}_\d{6}\." + output_format, os.path.basename(path)[len(prefix):])
+        ]
+        return max(candidates) if candidates else None
+    
+    def create_header(self, audio_filename: str, api_used: str, metadata: Dict = None) -> str:
+        """ファイルヘッダーを作成（逐次モードではStreamingTranscript.write_headerに渡す）"""
         header = f"""# 音声文字起こし結果
 
 ## 処理情報
@@ -73,20 +304,26 @@ class OutputFormatter:
 """
         
         if metadata:
-            header += f"- Whisperモデル: {metadata.get('whisper_model', 'unknown')}\n"
+            header += f"- Whisperモデル: {metadata.get('whisper_model', 'unknown')}"
+            header += f" ({metadata['backend']})\n" if 'backend' in metadata else "\n"
             header += f"- 処理時間: {metadata.get('processing_time', 'unknown')}秒\n"
+            if 'vad_speech_ratio' in metadata:
+                header += (f"- VAD: 発話率 {metadata['vad_speech_ratio']:.1%} "
+                           f"(無音 {metadata.get('vad_skipped_seconds', 0):.1f}秒を省略)\n")
             if 'estimated_cost' in metadata:
                 header += f"- 推定コスト: ${metadata['estimated_cost']:.4f}\n"
         
         return header
     
-    def create_comparison_report(self, results: Dict[str, str], audio_filename: str) -> str:
+    def create_comparison_report(self, results: Dict[str, str], audio_filename: str,
+                                 metrics: Dict[str, Dict] = None) -> str:
         """
         複数API結果の比較レポートを作成
         
         Args:
             results: API名をキーとした結果辞書
             audio_filename: 元の音声ファイル名
+            metrics: API名をキーとした計測値（latency, tokens, estimated_cost, error）
             
         Returns:
             保存されたレポートファイルのパス
@@ -101,6 +338,15 @@ class OutputFormatter:
             f.write(f"音声ファイル: {audio_filename}\n")
             f.write(f"処理日時: {datetime.now().strftime('%Y年%m月%d日 %H:%M:%S')}\n\n")
             
+            if metrics:
+                f.write("## API別計測値\n")
+                f.write("| API | 処理時間 | 推定トークン数 | 推定コスト | エラー |\n")
+                f.write("|-----|----------|----------------|------------|--------|\n")
+                for api_name, metric in metrics.items():
+                    f.write(f"| {api_name} | {metric['latency']:.2f}秒 | {metric['tokens']} | "
+                            f"${metric['estimated_cost']:.4f} | {metric.get('error') or '-'} |\n")
+                f.write("\n")
+            
             for api_name, result_text in results.items():
                 f.write(f"## {api_name.upper()} 結果\n")
                 f.write("="*60 + "\n")
@@ -131,31 +377,3 @@ class OutputFormatter:
         tail_lines = lines[-(max_lines//2):]
         
         return '\n'.join(head_lines) + f'\n\n... ({len(lines) - max_lines}行省略) ...\n\n' + '\n'.join(tail_lines)
-    
-    def _format_continuous_text(self, text: str, audio_filename: str, api_used: str, metadata: Dict = None) -> str:
-        """
-        連続テキスト形式で出力（goodサンプルのような形式）
-        
-        Args:
-            text: 文字起こしテキスト
-            audio_filename: 元の音声ファイル名
-            api_used: 使用したAPI名
-            metadata: メタデータ
-            
-        Returns:
-            整形されたテキスト
-        """
-        # タイムスタンプを除去して連続テキストにする
-        lines = text.split('\n')
-        continuous_text = ""
-        
-        for line in lines:
-            # タイムスタンプ形式の行を検出して除去
-            if line.startswith('[') and '] ' in line:
-                # タイムスタンプ部分を除去
-                text_part = line.split('] ', 1)[1] if '] ' in line else line
-                continuous_text += text_part
-            else:
-                continuous_text += line
-        
-        return continuous_text
\ No newline at end of file
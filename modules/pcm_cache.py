@@ -0,0 +1,157 @@
+import os
+import shutil
+import subprocess
+import threading
+import numpy as np
+
+from .audio_segmenter import SAMPLE_RATE
+from .transcription_cache import FileHashMemo
+
+# ffmpegの出力を書き出す単位
+_COPY_BLOCK_SIZE = 1024 * 1024
+
+
+def open_pcm(pcm_path: str) -> np.memmap:
+    """
+    PCMファイルをメモリマップで開く
+
+    コピーオンライトで開くため、書き込み可能な配列を要求するライブラリにも
+    そのまま渡せる（読むだけのページはファイルと共有され、プロセスのメモリを消費しない）。
+
+    Args:
+        pcm_path: 16kHzモノラルfloat32のPCMファイル
+
+    Returns:
+        float32のメモリマップ配列
+    """
+    if os.path.getsize(pcm_path) == 0:
+        # 空ファイルはメモリマップできない
+        return np.zeros(0, dtype=np.float32)
+    return np.memmap(pcm_path, dtype=np.float32, mode="c")
+
+
+def read_pcm_range(pcm_path: str, start: int, end: int) -> np.ndarray:
+    """
+    PCMファイルの指定範囲だけを読み込む（ワーカープロセス用）
+
+    Args:
+        pcm_path: PCMファイルのパス
+        start: 開始サンプル
+        end: 終了サンプル
+
+    Returns:
+        範囲分のfloat32配列
+    """
+    return np.array(open_pcm(pcm_path)[start:end])
+
+
+class PCMCache:
+    """PCMキャッシュクラス - 音声を一度だけ16kHzモノラルfloat32にデコードしてファイルに保存"""
+
+    def __init__(self, cache_dir: str = "./cache/pcm", max_size_mb: float = 4096):
+        """
+        初期化
+
+        Args:
+            cache_dir: キャッシュディレクトリ
+            max_size_mb: キャッシュの最大サイズ（MB）。超えると最終利用の古い順に削除
+        """
+        self.cache_dir = cache_dir
+        self.max_size_bytes = int(max_size_mb * 1024 * 1024)
+        os.makedirs(cache_dir, exist_ok=True)
+        self._hash_memo = FileHashMemo()
+        self._lock = threading.Lock()
+
+    def pcm_path(self, audio_path: str) -> str:
+        """
+        デコード済みPCMファイルのパスを取得（未作成ならデコードして作成）
+
+        Args:
+            audio_path: 音声ファイルのパス
+
+        Returns:
+            PCMファイルのパス
+        """
+        if not os.path.exists(audio_path):
+            raise FileNotFoundError(f"音声ファイルが見つかりません: {audio_path}")
+
+        path = os.path.join(self.cache_dir, f"{self._hash_memo.get(audio_path)}.f32")
+
+        if os.path.exists(path):
+            # 最終利用時刻を更新（LRU）
+            os.utime(path, None)
+            return path
+
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            self._decode(audio_path, tmp_path)
+            os.replace(tmp_path, path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        self.evict(keep=path)
+        return path
+
+    def load(self, audio_path: str) -> np.memmap:
+        """
+        音声をメモリマップした波形として取得
+
+        Args:
+            audio_path: 音声ファイルのパス
+
+        Returns:
+            float32のメモリマップ配列（16kHzモノラル）
+        """
+        return open_pcm(self.pcm_path(audio_path))
+
+    def _decode(self, audio_path: str, output_path: str):
+        """ffmpegでデコードし、出力を逐次ファイルへ書き出す（全体をメモリに載せない）"""
+        command = [
+            "ffmpeg", "-nostdin", "-threads", "0", "-i", audio_path,
+            "-f", "f32le", "-ac", "1", "-ar", str(SAMPLE_RATE), "-"
+        ]
+        try:
+            process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        except FileNotFoundError:
+            raise RuntimeError("ffmpegが見つかりません。ffmpegをインストールしてください") from None
+
+        with process, open(output_path, 'wb') as f:
+            # stdoutを書き出す間にstderrのパイプが詰まらないよう別スレッドで読む
+            stderr_chunks = []
+            reader = threading.Thread(target=lambda: stderr_chunks.append(process.stderr.read()),
+                                      daemon=True)
+            reader.start()
+            shutil.copyfileobj(process.stdout, f, _COPY_BLOCK_SIZE)
+            reader.join()
+            if process.wait() != 0:
+                message = b"".join(stderr_chunks).decode("utf-8", errors="replace").strip()
+                last_line = message.splitlines()[-1] if message else ""
+                raise RuntimeError(f"音声のデコードに失敗しました: {audio_path} {last_line}")
+
+    def evict(self, keep: str = None):
+        """最大サイズを超えた分を最終利用時刻の古い順に削除（keepは削除しない）"""
+        with self._lock:
+            entries = []
+            total_size = 0
+            for name in os.listdir(self.cache_dir):
+                if not name.endswith(".f32"):
+                    continue
+                path = os.path.join(self.cache_dir, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+                total_size += stat.st_size
+
+            entries.sort()
+            for _, size, path in entries:
+                if total_size <= self.max_size_bytes:
+                    break
+                if path == keep:
+                    continue
+                try:
+                    os.remove(path)
+                    total_size -= size
+                except OSError:
+                    pass
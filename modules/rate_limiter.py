@@ -0,0 +1,238 @@
+"""
+LLM APIのレート制限（RPM/TPM）に合わせた送信スケジューラ
+
+プロバイダーごとにリクエスト数・トークン数のトークンバケットを持ち、
+送信を到着順に待たせてクォータ内で途切れなく送る。429応答を受けた場合は
+Retry-Afterの間そのプロバイダーへの送信を全スレッドで止める。
+"""
+
+import math
+import re
+import threading
+import time
+from typing import Dict, Iterable, Optional, Tuple
+
+# 文字種ごとのトークン数の目安（BPE系トークナイザでの日本語・英語の平均）
+_TOKEN_PATTERN = re.compile(
+    r"(?P<kanji>[\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff])"
+    r"|(?P<kana>[\u3040-\u30ff\uff66-\uff9f]+)"
+    r"|(?P<word>[A-Za-z0-9]+)"
+    r"|(?P<space>\s+)"
+    r"|(?P<other>.)"
+)
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    トークン数を文字種から概算
+
+    漢字は1文字1トークン、かなは連続する3文字で2トークン、英数字は4文字で1トークン、
+    記号は1文字1トークンとして数える（空白は前後の語に含まれるため数えない）。
+
+    Args:
+        text: 対象テキスト
+
+    Returns:
+        推定トークン数
+    """
+    tokens = 0.0
+    for match in _TOKEN_PATTERN.finditer(text):
+        kind = match.lastgroup
+        if kind == "kanji" or kind == "other":
+            tokens += 1
+        elif kind == "kana":
+            tokens += len(match.group()) * 2 / 3
+        elif kind == "word":
+            tokens += math.ceil(len(match.group()) / 4)
+    return math.ceil(tokens)
+
+
+class RateLimiter:
+    """1プロバイダーのRPM/TPMトークンバケット（到着順に送信を許可）"""
+
+    def __init__(self, requests_per_minute: float = 0, tokens_per_minute: float = 0,
+                 burst: float = 0.1):
+        """
+        初期化
+
+        Args:
+            requests_per_minute: 1分あたりのリクエスト数の上限（0は無制限）
+            tokens_per_minute: 1分あたりのトークン数の上限（0は無制限）
+            burst: 一度に送れる量（1分間のクォータに対する割合）。プロバイダーは
+                1分より短い区間でも制限するため、既定では6秒分までに抑える
+        """
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.request_capacity = max(1.0, requests_per_minute * burst)
+        self.token_capacity = max(1.0, tokens_per_minute * burst)
+        self._requests = self.request_capacity
+        self._tokens = self.token_capacity
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._cond = threading.Condition()
+        self._next_ticket = 0
+        self._serving = 0
+        self.stats = {"requests": 0, "tokens": 0, "waited_seconds": 0.0, "pauses": 0}
+
+    def _refill(self, now: float):
+        """経過時間分をバケットに補充"""
+        elapsed = now - self._updated
+        self._updated = now
+        if self.requests_per_minute:
+            self._requests = min(self.request_capacity,
+                                 self._requests + elapsed * self.requests_per_minute / 60)
+        if self.tokens_per_minute:
+            self._tokens = min(self.token_capacity,
+                               self._tokens + elapsed * self.tokens_per_minute / 60)
+
+    def _wait_locked(self, tokens: int, now: float) -> float:
+        """この送信を許可できるまでの秒数（ロック保持中に呼ぶ）"""
+        self._refill(now)
+        wait = max(0.0, self._paused_until - now)
+        if self.requests_per_minute and self._requests < 1:
+            wait = max(wait, (1 - self._requests) * 60 / self.requests_per_minute)
+        if self.tokens_per_minute:
+            # バケットより大きい送信はバケットが満杯になった時点で許可する
+            needed = min(tokens, self.token_capacity)
+            if self._tokens < needed:
+                wait = max(wait, (needed - self._tokens) * 60 / self.tokens_per_minute)
+        return wait
+
+    def wait_time(self, tokens: int) -> float:
+        """
+        今から送信した場合の待ち時間の見込み（先に並んでいる送信を含む）
+
+        Args:
+            tokens: 送信するトークン数（応答分を含む）
+
+        Returns:
+            秒数
+        """
+        with self._cond:
+            queued = self._next_ticket - self._serving
+            wait = self._wait_locked(tokens, time.monotonic())
+        if queued and self.requests_per_minute:
+            wait += queued * 60 / self.requests_per_minute
+        return wait
+
+    def acquire(self, tokens: int) -> float:
+        """
+        送信枠が空くまで待って確保（到着順）
+
+        Args:
+            tokens: 送信するトークン数（応答分を含む見込み）
+
+        Returns:
+            待った秒数
+        """
+        start = time.monotonic()
+        with self._cond:
+            ticket = self._next_ticket
+            self._next_ticket += 1
+            while True:
+                timeout = None
+                if ticket == self._serving:
+                    timeout = self._wait_locked(tokens, time.monotonic())
+                    if timeout <= 0:
+                        if self.requests_per_minute:
+                            self._requests -= 1
+                        if self.tokens_per_minute:
+                            self._tokens -= tokens
+                        self._serving += 1
+                        waited = time.monotonic() - start
+                        self.stats["requests"] += 1
+                        self.stats["tokens"] += tokens
+                        self.stats["waited_seconds"] += waited
+                        self._cond.notify_all()
+                        return waited
+                self._cond.wait(timeout)
+
+    def settle(self, reserved: int, actual: Optional[int]):
+        """
+        応答の実際のトークン数で見込みとの差を精算
+
+        Args:
+            reserved: acquireで確保したトークン数
+            actual: APIが返した使用トークン数（不明な場合None）
+        """
+        if actual is None or not self.tokens_per_minute:
+            return
+        with self._cond:
+            self._tokens = min(self.token_capacity, self._tokens + reserved - actual)
+            self.stats["tokens"] += actual - reserved
+            self._cond.notify_all()
+
+    def pause(self, seconds: float):
+        """
+        429応答時にseconds秒間このプロバイダーへの送信を止める
+
+        Args:
+            seconds: 停止する秒数（Retry-After）
+        """
+        with self._cond:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+            self.stats["pauses"] += 1
+            self._cond.notify_all()
+
+
+class ProviderScheduler:
+    """プロバイダーごとのRateLimiterへの振り分け（待ちが長い場合は他のプロバイダーへ回す）"""
+
+    def __init__(self, limits: Dict[str, Tuple[float, float]], burst: float = 0.1,
+                 spillover: bool = False, max_wait: float = 10.0):
+        """
+        初期化
+
+        Args:
+            limits: プロバイダー名をキーとした (RPM, TPM) の辞書（0は無制限）
+            burst: 一度に送れる量（1分間のクォータに対する割合）
+            spillover: 待ち時間がmax_waitを超える場合に他の利用可能なプロバイダーへ回すか
+            max_wait: 他のプロバイダーへ回す待ち時間の閾値（秒）
+        """
+        self.limiters = {name: RateLimiter(rpm, tpm, burst) for name, (rpm, tpm) in limits.items()}
+        self.spillover = spillover
+        self.max_wait = max_wait
+        self.spilled = 0
+        self._lock = threading.Lock()
+
+    def limiter(self, provider: str) -> RateLimiter:
+        """プロバイダーのRateLimiter（未設定のプロバイダーは無制限）"""
+        with self._lock:
+            if provider not in self.limiters:
+                self.limiters[provider] = RateLimiter()
+            return self.limiters[provider]
+
+    def acquire(self, provider: str, tokens: int, alternatives: Iterable[str] = ()) -> str:
+        """
+        送信先を決めて送信枠を確保
+
+        Args:
+            provider: 指定されたプロバイダー
+            tokens: 送信するトークン数（応答分を含む見込み）
+            alternatives: 回せる他のプロバイダー（spillover有効時のみ使用）
+
+        Returns:
+            送信するプロバイダー名
+        """
+        chosen = provider
+        if self.spillover:
+            wait = self.limiter(provider).wait_time(tokens)
+            if wait > self.max_wait:
+                for name in alternatives:
+                    if name != provider:
+                        other = self.limiter(name).wait_time(tokens)
+                        if other < wait:
+                            chosen, wait = name, other
+                if chosen != provider:
+                    with self._lock:
+                        self.spilled += 1
+        self.limiter(chosen).acquire(tokens)
+        return chosen
+
+    def settle(self, provider: str, reserved: int, actual: Optional[int]):
+        """応答の実際のトークン数で精算（RateLimiter.settle）"""
+        self.limiter(provider).settle(reserved, actual)
+
+    def pause(self, provider: str, seconds: float):
+        """429応答時にプロバイダーへの送信を止める（RateLimiter.pause）"""
+        self.limiter(provider).pause(seconds)
@@ -0,0 +1,224 @@
+from typing import Dict, Iterable, List, Optional
+
+# 文末とみなす文字（str.endswithにタプルで渡して1回で判定）
+SENTENCE_ENDINGS = ('。', '！', '？', '.', '!', '?')
+
+
+class Segment:
+    """整形用の軽量セグメント（辞書より小さく、属性アクセスが速い）"""
+
+    __slots__ = ("start", "end", "text", "speaker")
+
+    def __init__(self, start: float, end: float, text: str, speaker: Optional[str] = None):
+        self.start = start
+        self.end = end
+        self.text = text
+        self.speaker = speaker
+
+    def to_dict(self) -> Dict:
+        segment = {"start": self.start, "end": self.end, "text": self.text}
+        if self.speaker is not None:
+            segment["speaker"] = self.speaker
+        return segment
+
+    def __repr__(self) -> str:
+        return f"Segment({self.start!r}, {self.end!r}, {self.text!r}, {self.speaker!r})"
+
+
+def format_timestamp(seconds: float) -> str:
+    """
+    秒をHH:MM:SS形式に変換（整数演算のみ）
+
+    Args:
+        seconds: 秒数
+
+    Returns:
+        HH:MM:SS形式の時刻文字列
+    """
+    seconds = int(seconds)
+    return f"{seconds // 3600:02d}:{seconds % 3600 // 60:02d}:{seconds % 60:02d}"
+
+
+def is_sentence_end(text: str) -> bool:
+    """文が終了しているかを判定"""
+    return text.rstrip().endswith(SENTENCE_ENDINGS)
+
+
+def merge_segments(segments: Iterable[Dict], merge_threshold: float = 1.0,
+                   max_segment_length: float = 30.0) -> List[Segment]:
+    """
+    短いセグメントを結合して、より自然な文章単位にする
+
+    結合中のテキストは断片のリストに溜めて確定時に1回だけjoinするため、
+    セグメント数に対して線形時間で処理できる。話者ラベルが変わる位置では結合しない。
+
+    Args:
+        segments: Whisperのセグメントリスト
+        merge_threshold: セグメント間の無音時間の閾値（秒）
+        max_segment_length: 最大セグメント長（秒）
+
+    Returns:
+        結合されたSegmentのリスト
+    """
+    merged = []
+    pieces = []
+    start = end = 0.0
+    speaker = None
+    # 結合中のテキストの末尾（空でない最後の断片）で文末を判定する
+    tail = ""
+
+    for segment in segments:
+        text = segment["text"].strip()
+        if pieces and (segment["start"] - end < merge_threshold
+                       and end - start < max_segment_length
+                       and not tail.endswith(SENTENCE_ENDINGS)
+                       and segment.get("speaker") == speaker):
+            end = segment["end"]
+        else:
+            if pieces:
+                merged.append(Segment(start, end, "".join(pieces), speaker))
+            pieces = []
+            start, end = segment["start"], segment["end"]
+            speaker = segment.get("speaker")
+            tail = ""
+        pieces.append(text)
+        if text:
+            tail = text
+
+    if pieces:
+        merged.append(Segment(start, end, "".join(pieces), speaker))
+    return merged
+
+
+def continuous_text(merged: List[Segment]) -> str:
+    """
+    結合済みセグメントを連続したテキストにする
+
+    話者ラベルがある場合は話者が変わるごとに改行し、「話者: 」を先頭に付ける。
+
+    Args:
+        merged: merge_segmentsの結果
+
+    Returns:
+        連続したテキスト
+    """
+    if not any(segment.speaker for segment in merged):
+        return "".join(segment.text for segment in merged)
+
+    paragraphs = []
+    pieces = []
+    speaker = None
+    for segment in merged:
+        if pieces and segment.speaker != speaker:
+            paragraphs.append(_with_speaker(speaker, "".join(pieces)))
+            pieces = []
+        speaker = segment.speaker
+        pieces.append(segment.text)
+    if pieces:
+        paragraphs.append(_with_speaker(speaker, "".join(pieces)))
+    return "\n".join(paragraphs)
+
+
+def _with_speaker(speaker: Optional[str], text: str) -> str:
+    return f"{speaker}: {text}" if speaker else text
+
+
+def timestamped_lines(segments: Iterable) -> List[str]:
+    """
+    「[開始 - 終了] テキスト」形式の行を生成（改行は呼び出し側でjoinする）
+
+    話者ラベルがある場合は「[開始 - 終了] 話者: テキスト」とする。
+
+    Args:
+        segments: Whisperのセグメント辞書またはSegmentのリスト
+
+    Returns:
+        1セグメント1行の文字列リスト
+    """
+    lines = []
+    for segment in segments:
+        if isinstance(segment, Segment):
+            start, end, text, speaker = segment.start, segment.end, segment.text, segment.speaker
+        else:
+            start, end, text = segment["start"], segment["end"], segment["text"].strip()
+            speaker = segment.get("speaker")
+        lines.append(f"[{format_timestamp(start)} - {format_timestamp(end)}] "
+                     f"{_with_speaker(speaker, text)}")
+    return lines
+
+
+def resegment_by_words(segments: List[Dict], max_duration: float = 10.0,
+                       max_gap: float = 0.8) -> List[Dict]:
+    """
+    単語タイムスタンプでセグメントを区切り直す
+
+    Whisperのセグメントは約30秒の窓に依存して文の途中で切れることがあるため、
+    単語単位で「文末」「max_gapを超える無音」「max_durationを超える長さ」「話者の交代」で区切り直す。
+    開始・終了時刻は単語の時刻になる。単語のないセグメントはそのまま残す。
+    LLMの選択的後処理で使う信頼度と誤認識の置換数は、単語の元になったセグメントの
+    最も悪い値（avg_logprobは最小、no_speech_prob・compression_ratioは最大）と置換数の合計を引き継ぐ。
+
+    Args:
+        segments: Whisperのセグメントリスト（word_timestamps=Trueの結果）
+        max_duration: 1セグメントの最大長（秒）
+        max_gap: この長さを超える単語間の無音で区切る（秒）
+
+    Returns:
+        区切り直したセグメント辞書のリスト（id, start, end, text, words、話者分離済みならspeaker、
+        元のセグメントにあればavg_logprob, no_speech_prob, compression_ratio, corrections）
+    """
+    resegmented = []
+    current = []
+    sources = []
+
+    def flush():
+        if current:
+            segment = {
+                "id": len(resegmented),
+                "start": current[0]["start"],
+                "end": current[-1]["end"],
+                "text": "".join(word["word"] for word in current),
+                "words": list(current),
+            }
+            if current[0].get("speaker"):
+                segment["speaker"] = current[0]["speaker"]
+            segment.update(_inherited_scores(sources))
+            resegmented.append(segment)
+            current.clear()
+            sources.clear()
+
+    for segment in segments:
+        words = segment.get("words")
+        if not words:
+            flush()
+            resegmented.append(dict(segment, id=len(resegmented)))
+            continue
+        for word in words:
+            if current and (word["start"] - current[-1]["end"] > max_gap
+                            or word["end"] - current[0]["start"] > max_duration
+                            or word.get("speaker") != current[-1].get("speaker")):
+                flush()
+            current.append(word)
+            if not sources or sources[-1] is not segment:
+                sources.append(segment)
+            if word["word"].rstrip().endswith(SENTENCE_ENDINGS):
+                flush()
+
+    flush()
+    return resegmented
+
+
+# 区切り直したセグメントへ引き継ぐ値（元のセグメントのうち最も悪い値を使う）
+_WORST_SCORES = (("avg_logprob", min), ("no_speech_prob", max), ("compression_ratio", max))
+
+
+def _inherited_scores(sources: List[Dict]) -> Dict:
+    """単語の元になったセグメントから信頼度の最悪値と置換数の合計を求める"""
+    scores = {}
+    for key, worst in _WORST_SCORES:
+        values = [source[key] for source in sources if source.get(key) is not None]
+        if values:
+            scores[key] = worst(values)
+    if any("corrections" in source for source in sources):
+        scores["corrections"] = sum(source.get("corrections", 0) for source in sources)
+    return scores
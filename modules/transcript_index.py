@@ -0,0 +1,367 @@
+"""
+文字起こし結果の全文検索インデックス
+
+保存した文字起こしをセグメント単位でSQLiteのFTS5（trigramトークナイザ）に登録し、
+語句を含む発言をファイル・タイムスタンプ・前後の発言付きで検索する。
+trigramは文字3-gramで索引を作るため、分かち書きのない日本語でも部分一致で検索できる。
+"""
+
+import glob
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional
+
+# 検索対象にする出力ファイルの拡張子
+INDEXED_EXTENSIONS = ("txt", "json", "srt", "vtt")
+
+# 「[HH:MM:SS - HH:MM:SS] 話者: テキスト」形式の行（segments.timestamped_linesの出力）
+TIMESTAMP_LINE_PATTERN = re.compile(r"^\[(\d+):(\d\d):(\d\d) - (\d+):(\d\d):(\d\d)\] ?(.*)$")
+# SRT/WebVTTのキューのタイミング行
+CUE_TIMING_PATTERN = re.compile(
+    r"^(\d+):(\d\d):(\d\d)[,.](\d{3}) --> (\d+):(\d\d):(\d\d)[,.](\d{3})"
+)
+SPEAKER_PREFIX_PATTERN = re.compile(r"^(話者\d+): (.*)$")
+VOICE_TAG_PATTERN = re.compile(r"^<v ([^>]+)>(.*)$")
+# 標準形式のヘッダーと本文の区切り（OutputFormatter.save_transcription）
+BODY_SEPARATOR = "=" * 80 + "\n文字起こし結果\n" + "=" * 80 + "\n"
+# タイムスタンプのないテキストを文単位に分ける
+SENTENCE_PATTERN = re.compile(r"[^。！？!?\n]+[。！？!?]*")
+
+
+def _seconds(hours: str, minutes: str, seconds: str, milliseconds: str = "0") -> float:
+    return int(hours) * 3600 + int(minutes) * 60 + int(seconds) + int(milliseconds) / 1000
+
+
+def _split_speaker(text: str, pattern=SPEAKER_PREFIX_PATTERN):
+    match = pattern.match(text)
+    return (match.group(1), match.group(2).strip()) if match else (None, text.strip())
+
+
+def parse_transcript_text(text: str) -> List[Dict]:
+    """
+    txt出力の本文からセグメントを復元
+
+    タイムスタンプ付きの行はそのまま1セグメントとし、タイムスタンプのない形式
+    （continuous等）は文単位に分けて start/end を None とする。
+
+    Args:
+        text: save_transcriptionで保存したテキスト（ヘッダー付きでも可）
+
+    Returns:
+        start, end, speaker, text のセグメント辞書のリスト
+    """
+    if BODY_SEPARATOR in text:
+        text = text.split(BODY_SEPARATOR, 1)[1]
+
+    segments = []
+    for line in text.splitlines():
+        match = TIMESTAMP_LINE_PATTERN.match(line)
+        if match:
+            speaker, body = _split_speaker(match.group(7))
+            if body:
+                segments.append({"start": _seconds(*match.group(1, 2, 3)),
+                                 "end": _seconds(*match.group(4, 5, 6)),
+                                 "speaker": speaker, "text": body})
+    if segments:
+        return segments
+
+    for line in text.splitlines():
+        speaker, body = _split_speaker(line)
+        for sentence in SENTENCE_PATTERN.findall(body):
+            if sentence.strip():
+                segments.append({"start": None, "end": None, "speaker": speaker, "text": sentence.strip()})
+    return segments
+
+
+def parse_subtitles(text: str) -> List[Dict]:
+    """
+    SRT/WebVTTのキューからセグメントを復元
+
+    Args:
+        text: write_srt/write_vttで保存したテキスト
+
+    Returns:
+        start, end, speaker, text のセグメント辞書のリスト
+    """
+    segments = []
+    current = None
+    for line in text.splitlines():
+        match = CUE_TIMING_PATTERN.match(line)
+        if match:
+            current = {"start": _seconds(*match.group(1, 2, 3, 4)),
+                       "end": _seconds(*match.group(5, 6, 7, 8)), "lines": []}
+            segments.append(current)
+        elif current is not None and line.strip():
+            current["lines"].append(line.strip())
+        else:
+            current = None
+
+    parsed = []
+    for cue in segments:
+        body = " ".join(cue["lines"])
+        speaker, body = _split_speaker(body, VOICE_TAG_PATTERN if body.startswith("<v ") else SPEAKER_PREFIX_PATTERN)
+        if body:
+            parsed.append({"start": cue["start"], "end": cue["end"], "speaker": speaker, "text": body})
+    return parsed
+
+
+def load_transcript_segments(path: str) -> Optional[List[Dict]]:
+    """
+    出力ファイルの形式に応じてセグメントを読み込む
+
+    Args:
+        path: 文字起こし結果のファイル（txt, json, srt, vtt）
+
+    Returns:
+        セグメント辞書のリスト（文字起こし結果でないファイルの場合None）
+    """
+    extension = os.path.splitext(path)[1].lstrip(".").lower()
+    with open(path, "r", encoding="utf-8") as f:
+        content = f.read()
+    if extension == "json":
+        try:
+            data = json.loads(content)
+        except ValueError:
+            return None
+        if not isinstance(data, dict) or "segments" not in data:
+            return None
+        return [{"start": segment.get("start"), "end": segment.get("end"),
+                 "speaker": segment.get("speaker"), "text": segment.get("text", "").strip()}
+                for segment in data["segments"]]
+    if extension in ("srt", "vtt"):
+        return parse_subtitles(content)
+    return parse_transcript_text(content)
+
+
+class TranscriptIndex:
+    """文字起こし全文検索クラス - セグメント単位のSQLite FTS5（trigram）インデックス"""
+
+    def __init__(self, db_path: str = "./cache/transcript_index.sqlite3"):
+        """
+        初期化
+
+        Args:
+            db_path: SQLiteファイルのパス
+        """
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self.db_path = db_path
+
+        # 一括処理・監視フォルダのスレッドから共有するため1接続をロックで保護
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.executescript(
+            """CREATE TABLE IF NOT EXISTS files (
+                id INTEGER PRIMARY KEY,
+                path TEXT UNIQUE NOT NULL,
+                audio_file TEXT,
+                api TEXT,
+                mtime REAL NOT NULL,
+                size INTEGER NOT NULL,
+                indexed_at REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS segments (
+                id INTEGER PRIMARY KEY,
+                file_id INTEGER NOT NULL,
+                position INTEGER NOT NULL,
+                start REAL,
+                end REAL,
+                speaker TEXT
+            );
+            CREATE INDEX IF NOT EXISTS idx_segments_file ON segments(file_id, position);
+            CREATE VIRTUAL TABLE IF NOT EXISTS segment_text USING fts5(text, tokenize='trigram');"""
+        )
+        self._conn.commit()
+
+    def add(self, path: str, segments: List[Dict], audio_file: str = None, api: str = None) -> int:
+        """
+        出力ファイルのセグメントを登録（同じパスの登録済みセグメントは置き換える）
+
+        Args:
+            path: 文字起こし結果のファイルパス
+            segments: start, end, text（と speaker）を持つセグメントのリスト
+            audio_file: 元の音声ファイル名
+            api: 使用したAPI名
+
+        Returns:
+            登録したセグメント数
+        """
+        path = os.path.abspath(path)
+        stat = os.stat(path)
+        rows = [segment for segment in segments if segment.get("text", "").strip()]
+        with self._lock, self._conn:
+            self._delete_locked(path)
+            cursor = self._conn.execute(
+                "INSERT INTO files (path, audio_file, api, mtime, size, indexed_at) VALUES (?, ?, ?, ?, ?, ?)",
+                (path, audio_file, api, stat.st_mtime, stat.st_size, time.time())
+            )
+            file_id = cursor.lastrowid
+            for position, segment in enumerate(rows):
+                segment_id = self._conn.execute(
+                    "INSERT INTO segments (file_id, position, start, end, speaker) VALUES (?, ?, ?, ?, ?)",
+                    (file_id, position, segment.get("start"), segment.get("end"), segment.get("speaker"))
+                ).lastrowid
+                self._conn.execute("INSERT INTO segment_text (rowid, text) VALUES (?, ?)",
+                                   (segment_id, segment["text"].strip()))
+        return len(rows)
+
+    def add_file(self, path: str, audio_file: str = None, api: str = None) -> int:
+        """
+        出力ファイルを読み込んで登録
+
+        Args:
+            path: 文字起こし結果のファイルパス（txt, json, srt, vtt）
+            audio_file: 元の音声ファイル名
+            api: 使用したAPI名
+
+        Returns:
+            登録したセグメント数（文字起こし結果でないファイルは0）
+        """
+        segments = load_transcript_segments(path)
+        if segments is None:
+            return 0
+        return self.add(path, segments, audio_file, api)
+
+    def remove(self, path: str):
+        """
+        出力ファイルの登録を削除
+
+        Args:
+            path: 文字起こし結果のファイルパス
+        """
+        with self._lock, self._conn:
+            self._delete_locked(os.path.abspath(path))
+
+    def _delete_locked(self, path: str):
+        """登録済みのファイルとセグメントを削除（ロック保持中に呼ぶ）"""
+        row = self._conn.execute("SELECT id FROM files WHERE path = ?", (path,)).fetchone()
+        if row is None:
+            return
+        self._conn.execute(
+            "DELETE FROM segment_text WHERE rowid IN (SELECT id FROM segments WHERE file_id = ?)", (row[0],)
+        )
+        self._conn.execute("DELETE FROM segments WHERE file_id = ?", (row[0],))
+        self._conn.execute("DELETE FROM files WHERE id = ?", (row[0],))
+
+    def update_directory(self, directory: str) -> Dict:
+        """
+        出力ディレクトリと索引を同期（変更のあったファイルだけ読み込み、消えたファイルは削除）
+
+        Args:
+            directory: 出力ディレクトリ
+
+        Returns:
+            indexed, unchanged, removed の件数の辞書
+        """
+        stats = {"indexed": 0, "unchanged": 0, "removed": 0}
+        with self._lock:
+            known = {path: (mtime, size) for path, mtime, size in
+                     self._conn.execute("SELECT path, mtime, size FROM files")}
+
+        present = set()
+        for extension in INDEXED_EXTENSIONS:
+            for path in glob.glob(os.path.join(glob.escape(directory), f"*.{extension}")):
+                name = os.path.basename(path)
+                # 逐次モードのチェックポイント・一括処理のサマリー・比較レポートは文字起こしではない
+                if (name.endswith(".checkpoint.json") or name.startswith("batch_summary_")
+                        or "_comparison_" in name):
+                    continue
+                path = os.path.abspath(path)
+                present.add(path)
+                stat = os.stat(path)
+                if known.get(path) == (stat.st_mtime, stat.st_size):
+                    stats["unchanged"] += 1
+                    continue
+                if self.add_file(path):
+                    stats["indexed"] += 1
+
+        root = os.path.abspath(directory) + os.sep
+        for path in known:
+            if path.startswith(root) and path not in present:
+                self.remove(path)
+                stats["removed"] += 1
+        return stats
+
+    def search(self, query: str, limit: int = 20, context: int = 1) -> List[Dict]:
+        """
+        語句を含むセグメントを検索
+
+        空白区切りの語句はすべてを含むセグメントに一致する。3文字以上の語句はFTS5の
+        trigram索引で、2文字以下の語句（「会議」等）は索引を使えないため本文の部分一致で絞り込む。
+
+        Args:
+            query: 検索語句
+            limit: 返す件数の上限
+            context: 前後に付ける発言の数
+
+        Returns:
+            path, audio_file, api, start, end, speaker, text, before, after の辞書のリスト
+            （新しいファイル順、ファイル内は時刻順。before/afterは前後のセグメント）
+        """
+        terms = query.split()
+        if not terms:
+            return []
+        phrases = ['"' + term.replace('"', '""') + '"' for term in terms if len(term) >= 3]
+        # trigramのLIKEは3文字未満のパターンで一致しないことがあるためinstrで判定する
+        shorts = [term for term in terms if len(term) < 3]
+
+        conditions = []
+        params = []
+        if phrases:
+            conditions.append("segment_text MATCH ?")
+            params.append(" AND ".join(phrases))
+        for term in shorts:
+            conditions.append("instr(segment_text.text, ?) > 0")
+            params.append(term)
+        params.append(limit)
+
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT s.file_id, s.position, f.path, f.audio_file, f.api, s.start, s.end, s.speaker, "
+                "segment_text.text FROM segment_text "
+                "JOIN segments s ON s.id = segment_text.rowid JOIN files f ON f.id = s.file_id "
+                f"WHERE {' AND '.join(conditions)} "
+                "ORDER BY f.mtime DESC, s.position LIMIT ?",
+                params
+            ).fetchall()
+
+            hits = []
+            for file_id, position, path, audio_file, api, start, end, speaker, text in rows:
+                neighbours = self._conn.execute(
+                    "SELECT s.position, s.start, s.end, s.speaker, segment_text.text FROM segments s "
+                    "JOIN segment_text ON segment_text.rowid = s.id "
+                    "WHERE s.file_id = ? AND s.position BETWEEN ? AND ? ORDER BY s.position",
+                    (file_id, position - context, position + context)
+                ).fetchall()
+                hit = {"path": path, "audio_file": audio_file, "api": api,
+                       "start": start, "end": end, "speaker": speaker, "text": text,
+                       "before": [], "after": []}
+                for n_position, n_start, n_end, n_speaker, n_text in neighbours:
+                    if n_position != position:
+                        hit["before" if n_position < position else "after"].append(
+                            {"start": n_start, "end": n_end, "speaker": n_speaker, "text": n_text})
+                hits.append(hit)
+        return hits
+
+    def stats(self) -> Dict:
+        """
+        登録件数を取得
+
+        Returns:
+            files, segments の件数の辞書
+        """
+        with self._lock:
+            files = self._conn.execute("SELECT COUNT(*) FROM files").fetchone()[0]
+            segments = self._conn.execute("SELECT COUNT(*) FROM segments").fetchone()[0]
+        return {"files": files, "segments": segments}
+
+    def close(self):
+        """接続を閉じる"""
+        with self._lock:
+            self._conn.close()
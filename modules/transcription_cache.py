@@ -0,0 +1,185 @@
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional
+
+# ファイルハッシュ計算時の読み込み単位
+_HASH_BLOCK_SIZE = 1024 * 1024
+# 内容ハッシュをメモ化するファイル数の上限（常駐サービス・監視フォルダで増え続けないように）
+_HASH_MEMO_SIZE = 256
+
+
+def file_sha256(path: str) -> str:
+    """
+    ファイル内容のSHA-256を計算
+
+    Args:
+        path: ファイルパス
+
+    Returns:
+        16進数のハッシュ文字列
+    """
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(_HASH_BLOCK_SIZE), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class FileHashMemo:
+    """内容ハッシュのメモ - 同一プロセス内での再ハッシュを避ける（最近使った順に上限まで保持）"""
+
+    def __init__(self, max_entries: int = _HASH_MEMO_SIZE):
+        """
+        初期化
+
+        Args:
+            max_entries: 保持するファイル数の上限
+        """
+        self.max_entries = max_entries
+        self._memo = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._memo)
+
+    def get(self, path: str) -> str:
+        """
+        ファイル内容のSHA-256を取得（パス・サイズ・更新時刻が同じ間はメモの値を返す）
+
+        Args:
+            path: ファイルパス
+
+        Returns:
+            16進数のハッシュ文字列
+        """
+        stat = os.stat(path)
+        memo_key = (os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
+        with self._lock:
+            if memo_key in self._memo:
+                self._memo.move_to_end(memo_key)
+                return self._memo[memo_key]
+        digest = file_sha256(path)
+        with self._lock:
+            self._memo[memo_key] = digest
+            while len(self._memo) > self.max_entries:
+                self._memo.popitem(last=False)
+        return digest
+
+
+class TranscriptionCache:
+    """文字起こしキャッシュクラス - Whisperの生結果を内容ハッシュで保存"""
+
+    def __init__(self, cache_dir: str = "./cache/transcriptions",
+                 max_size_mb: float = 1024):
+        """
+        初期化
+
+        Args:
+            cache_dir: キャッシュディレクトリ
+            max_size_mb: キャッシュの最大サイズ（MB）。超えると古い順に削除
+        """
+        self.cache_dir = cache_dir
+        self.max_size_bytes = int(max_size_mb * 1024 * 1024)
+        os.makedirs(cache_dir, exist_ok=True)
+        self._hash_memo = FileHashMemo()
+        self._lock = threading.Lock()
+
+    def audio_hash(self, audio_path: str) -> str:
+        """音声ファイルの内容ハッシュ（同一プロセス内はメモ化）"""
+        return self._hash_memo.get(audio_path)
+
+    def make_key(self, audio_path: str, model_name: str, params: Dict) -> str:
+        """
+        キャッシュキーを作成
+
+        Args:
+            audio_path: 音声ファイルのパス
+            model_name: Whisperモデル名
+            params: 結果に影響するデコードパラメータ
+
+        Returns:
+            キャッシュキー
+        """
+        payload = json.dumps(
+            {"audio": self.audio_hash(audio_path), "model": model_name, "params": params},
+            sort_keys=True, ensure_ascii=False, default=str
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _entry_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def get(self, key: str) -> Optional[Dict]:
+        """
+        キャッシュから結果を取得
+
+        Args:
+            key: make_keyで作成したキー
+
+        Returns:
+            Whisperの結果辞書（存在しない場合None）
+        """
+        path = self._entry_path(key)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                result = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        # 最終利用時刻を更新（LRU）
+        try:
+            os.utime(path, None)
+        except OSError:
+            pass
+        return result
+
+    def put(self, key: str, result: Dict):
+        """
+        結果をキャッシュに保存
+
+        Args:
+            key: make_keyで作成したキー
+            result: Whisperの結果辞書
+        """
+        path = self._entry_path(key)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(result, f, ensure_ascii=False,
+                      default=lambda o: o.tolist() if hasattr(o, "tolist") else str(o))
+        os.replace(tmp_path, path)
+        self.evict()
+
+    def evict(self):
+        """最大サイズを超えた分を最終利用時刻の古い順に削除"""
+        with self._lock:
+            entries = []
+            total_size = 0
+            for name in os.listdir(self.cache_dir):
+                if not name.endswith(".json"):
+                    continue
+                path = os.path.join(self.cache_dir, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+                total_size += stat.st_size
+
+            entries.sort()
+            for _, size, path in entries:
+                if total_size <= self.max_size_bytes:
+                    break
+                try:
+                    os.remove(path)
+                    total_size -= size
+                except OSError:
+                    pass
+
+    def clear(self):
+        """キャッシュを全削除"""
+        for name in os.listdir(self.cache_dir):
+            if name.endswith(".json"):
+                os.remove(os.path.join(self.cache_dir, name))
@@ -0,0 +1,331 @@
+import itertools
+import json
+import os
+import queue
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, Iterable, List, Optional
+from . import metrics
+
+# ジョブの状態
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+# ジョブで指定できるWhisperモデル名（既定の許可リスト）
+WHISPER_MODELS = ("tiny", "base", "small", "medium", "large", "large-v2", "large-v3")
+
+
+class TranscriptionJob:
+    """文字起こしジョブ"""
+
+    def __init__(self, audio_path: str, priority: int = 5, model: Optional[str] = None,
+                 language: str = "ja", prompt: Optional[str] = None,
+                 enable_vad: bool = False, format_type: str = "standard"):
+        """
+        初期化
+
+        Args:
+            audio_path: 音声ファイルのパス（サービスから読めるローカルパス）
+            priority: 優先度（小さいほど先に処理）
+            model: Whisperモデル名（Noneの場合はサービスの既定モデル）
+            language: 言語コード
+            prompt: Whisperに与える初期プロンプト
+            enable_vad: VADを有効にするか
+            format_type: テキストの出力形式 ("standard", "continuous", "minimal")
+        """
+        self.id = uuid.uuid4().hex
+        self.audio_path = audio_path
+        self.priority = priority
+        self.model = model
+        self.language = language
+        self.prompt = prompt
+        self.enable_vad = enable_vad
+        self.format_type = format_type
+        self.status = QUEUED
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.result = None
+        self.error = None
+
+    def to_dict(self, include_result: bool = False) -> Dict:
+        """状態を辞書で返す（include_result=Trueで結果も含める）"""
+        data = {
+            "id": self.id,
+            "audio_path": self.audio_path,
+            "priority": self.priority,
+            "model": self.model,
+            "status": self.status,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "queue_time": (self.started_at or time.time()) - self.created_at,
+            "processing_time": (self.finished_at - self.started_at)
+            if self.finished_at and self.started_at else None,
+            "error": self.error,
+        }
+        if include_result:
+            data["result"] = self.result
+        return data
+
+
+class TranscriptionService:
+    """常駐文字起こしサービス - モデルを読み込んだまま優先度付きキューでジョブを処理"""
+
+    def __init__(self, processor_factory: Callable[[str], object],
+                 default_model: str = "base",
+                 max_concurrency: int = 1,
+                 max_finished_jobs: int = 1000,
+                 allowed_models: Optional[Iterable[str]] = None,
+                 cascade=None):
+        """
+        初期化
+
+        Args:
+            processor_factory: モデル名からAudioProcessorを作成する関数
+            default_model: 既定のWhisperモデル名
+            max_concurrency: 同時に処理するジョブ数（ワーカースレッド数）
+            max_finished_jobs: 保持する完了済みジョブ数の上限（古い順に破棄）
+            allowed_models: ジョブで指定できるモデル名（省略時はWHISPER_MODELS。既定モデルは常に許可）
+            cascade: 低信頼区間を大きいモデルで再デコードするModelCascade（Noneの場合は行わない）
+        """
+        self.processor_factory = processor_factory
+        self.default_model = default_model
+        self.max_concurrency = max(1, max_concurrency)
+        self.max_finished_jobs = max_finished_jobs
+        self.allowed_models = set(allowed_models or WHISPER_MODELS) | {default_model}
+        self.cascade = cascade
+
+        # モデル名ごとのAudioProcessor（全ワーカーで共有。モデル自体もレジストリで共有される）
+        self._processors = {}
+        self._processors_lock = threading.Lock()
+        self._processor_locks = {}
+
+        self._queue = queue.PriorityQueue()
+        self._sequence = itertools.count()
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+        self._workers = []
+        self._stopping = threading.Event()
+
+    def start(self, preload_models: List[str] = None):
+        """
+        モデルを事前に読み込んでからワーカーを起動
+
+        Args:
+            preload_models: 起動時に読み込むモデル名（省略時は既定モデル）
+        """
+        for model in preload_models or [self.default_model]:
+            self._processor(model).model  # 読み込みを済ませておく
+        for i in range(self.max_concurrency):
+            worker = threading.Thread(target=self._worker_loop,
+                                      name=f"transcription-worker-{i}", daemon=True)
+            worker.start()
+            self._workers.append(worker)
+
+    def submit(self, audio_path: str, priority: int = 5, **options) -> TranscriptionJob:
+        """
+        ジョブを投入
+
+        Args:
+            audio_path: 音声ファイルのパス
+            priority: 優先度（小さいほど先に処理）
+            **options: TranscriptionJobのその他の引数
+
+        Returns:
+            投入したジョブ
+
+        Raises:
+            ValueError: 許可されていないモデルが指定された場合
+            FileNotFoundError: 音声ファイルが存在しない場合
+        """
+        model = options.get("model") or self.default_model
+        if model not in self.allowed_models:
+            raise ValueError(f"使用できないモデルです: {model} "
+                             f"（指定可能: {', '.join(sorted(self.allowed_models))}）")
+        if not os.path.exists(audio_path):
+            raise FileNotFoundError(f"音声ファイルが見つかりません: {audio_path}")
+
+        job = TranscriptionJob(audio_path, priority=priority, **options)
+        job.model = model
+        with self._lock:
+            self._jobs[job.id] = job
+        self._queue.put((priority, next(self._sequence), job.id))
+        return job
+
+    def get(self, job_id: str) -> Optional[TranscriptionJob]:
+        """ジョブを取得（存在しない場合None）"""
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def stats(self) -> Dict:
+        """キュー・実行中・完了件数"""
+        with self._lock:
+            statuses = [job.status for job in self._jobs.values()]
+        return {
+            "queued": statuses.count(QUEUED),
+            "running": statuses.count(RUNNING),
+            "done": statuses.count(DONE),
+            "failed": statuses.count(FAILED),
+            "workers": len(self._workers),
+        }
+
+    def shutdown(self):
+        """ワーカーを停止（実行中のジョブは完了を待つ）"""
+        self._stopping.set()
+        for _ in self._workers:
+            self._queue.put((float("-inf"), next(self._sequence), None))
+        for worker in self._workers:
+            worker.join()
+        self._workers = []
+
+    def _processor(self, model: str):
+        """モデル名のAudioProcessorを取得（初回のみ作成し、全ワーカーで共有）"""
+        with self._processors_lock:
+            if model in self._processors:
+                return self._processors[model]
+            model_lock = self._processor_locks.setdefault(model, threading.Lock())
+        # 同じモデルの作成が重複しないようモデルごとに待つ（別モデルのジョブは妨げない）
+        with model_lock:
+            with self._processors_lock:
+                if model in self._processors:
+                    return self._processors[model]
+            processor = self.processor_factory(model)
+            with self._processors_lock:
+                self._processors[model] = processor
+            return processor
+
+    def _worker_loop(self):
+        """ワーカースレッド - モデル名ごとのAudioProcessorを全ワーカーで共有し、ジョブ間で使い回す"""
+        while not self._stopping.is_set():
+            _, _, job_id = self._queue.get()
+            if job_id is None:
+                break
+            job = self.get(job_id)
+            if job is None:
+                continue
+
+            job.status = RUNNING
+            job.started_at = time.time()
+            metrics.REGISTRY.observe("job_queue_seconds", job.started_at - job.created_at)
+            try:
+                processor = self._processor(job.model)
+                whisper_result = processor.transcribe(
+                    job.audio_path,
+                    language=job.language,
+                    enable_vad=job.enable_vad,
+                    prompt=job.prompt
+                )
+                if self.cascade is not None:
+                    whisper_result = self.cascade.refine(job.audio_path, whisper_result,
+                                                         language=job.language, prompt=job.prompt)
+                job.result = {
+                    "text": processor.create_formatted_text(whisper_result, job.format_type),
+                    "segments": [
+                        {"start": s["start"], "end": s["end"], "text": s["text"].strip()}
+                        for s in whisper_result.get("segments", [])
+                    ],
+                    "language": whisper_result.get("language"),
+                }
+                job.status = DONE
+            except Exception as e:
+                job.error = str(e)
+                job.status = FAILED
+            finally:
+                job.finished_at = time.time()
+                metrics.increment("jobs_total", status=job.status)
+                self._prune_finished()
+
+    def _prune_finished(self):
+        """完了済みジョブが上限を超えたら古い順に破棄"""
+        with self._lock:
+            finished = [job_id for job_id, job in self._jobs.items() if job.status in (DONE, FAILED)]
+            for job_id in finished[:max(0, len(finished) - self.max_finished_jobs)]:
+                del self._jobs[job_id]
+
+
+def create_http_server(service: TranscriptionService, host: str = "127.0.0.1",
+                       port: int = 8765) -> ThreadingHTTPServer:
+    """
+    サービスのHTTPインターフェースを作成
+
+    POST /jobs                {"audio_path": ..., "priority": 5, "model": ..., ...} -> 202
+    GET  /jobs/<id>           ジョブの状態
+    GET  /jobs/<id>/result    ジョブの結果（未完了は409）
+    GET  /health              キュー状況
+    GET  /metrics             Prometheus形式のメトリクス
+
+    Args:
+        service: 起動済みのTranscriptionService
+        host: 待ち受けアドレス（既定はローカルのみ）
+        port: 待ち受けポート（0で空きポート）
+
+    Returns:
+        ThreadingHTTPServer（serve_foreverで待ち受け開始）
+    """
+    job_options = ("model", "language", "prompt", "enable_vad", "format_type")
+
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, format, *args):
+            pass
+
+        def _send_json(self, status: int, payload: Dict):
+            body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_POST(self):
+            if self.path.rstrip("/") != "/jobs":
+                self._send_json(404, {"error": "not found"})
+                return
+            try:
+                length = int(self.headers.get("Content-Length", 0))
+                request = json.loads(self.rfile.read(length) or b"{}")
+                options = {key: request[key] for key in job_options if key in request}
+                job = service.submit(request["audio_path"], priority=int(request.get("priority", 5)),
+                                     **options)
+            except (KeyError, ValueError, TypeError) as e:
+                self._send_json(400, {"error": f"不正なリクエスト: {e}"})
+                return
+            except FileNotFoundError as e:
+                self._send_json(404, {"error": str(e)})
+                return
+            self._send_json(202, job.to_dict())
+
+        def do_GET(self):
+            parts = [part for part in self.path.split("/") if part]
+            if parts == ["metrics"]:
+                body = metrics.REGISTRY.render_prometheus().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+                return
+            if parts == ["health"]:
+                self._send_json(200, service.stats())
+                return
+            if len(parts) in (2, 3) and parts[0] == "jobs":
+                job = service.get(parts[1])
+                if job is None:
+                    self._send_json(404, {"error": "job not found"})
+                elif len(parts) == 2:
+                    self._send_json(200, job.to_dict())
+                elif parts[2] == "result" and job.status in (DONE, FAILED):
+                    self._send_json(200, job.to_dict(include_result=True))
+                elif parts[2] == "result":
+                    self._send_json(409, job.to_dict())
+                else:
+                    self._send_json(404, {"error": "not found"})
+                return
+            self._send_json(404, {"error": "not found"})
+
+    return ThreadingHTTPServer((host, port), Handler)
@@ -0,0 +1,186 @@
+import bisect
+import numpy as np
+from typing import Dict, List, Tuple
+
+from .audio_segmenter import SAMPLE_RATE, frame_energies
+
+# 音声帯域（電話帯域相当）。この帯域のエネルギー比が低いフレームは非音声とみなす
+SPEECH_BAND_HZ = (300, 3400)
+
+
+class VoiceActivityDetector:
+    """音声区間検出クラス - CPUのみで動作するエネルギー/帯域比ベースのVAD"""
+
+    def __init__(self, min_silence_duration: float = 0.5,
+                 min_speech_duration: float = 0.25,
+                 speech_pad: float = 0.2,
+                 frame_ms: int = 30,
+                 threshold_offset_db: float = 12.0,
+                 min_speech_band_ratio: float = 0.3,
+                 min_threshold_db: float = -60.0,
+                 min_dynamic_range_db: float = 15.0):
+        """
+        初期化
+
+        Args:
+            min_silence_duration: これより短い無音は発話の一部として扱う（秒）
+            min_speech_duration: これより短い発話区間は捨てる（秒）
+            speech_pad: 各発話区間の前後に付ける余白（秒）
+            frame_ms: 判定フレーム長（ミリ秒）
+            threshold_offset_db: 推定ノイズフロアからの閾値（dB）
+            min_speech_band_ratio: 音声帯域エネルギー比の下限
+            min_threshold_db: エネルギー閾値の下限（dBFS）。ノイズフロアを推定できない場合はこの値を使う
+            min_dynamic_range_db: 下位10%と上位10%のエネルギー差がこれ未満の場合は無音が少なすぎて
+                ノイズフロアを推定できないとみなす（dB）
+        """
+        self.min_silence_duration = min_silence_duration
+        self.min_speech_duration = min_speech_duration
+        self.speech_pad = speech_pad
+        self.frame_ms = frame_ms
+        self.threshold_offset_db = threshold_offset_db
+        self.min_speech_band_ratio = min_speech_band_ratio
+        self.min_threshold_db = min_threshold_db
+        self.min_dynamic_range_db = min_dynamic_range_db
+
+    def _speech_band_ratio(self, audio: np.ndarray, num_frames: int) -> np.ndarray:
+        """フレームごとの音声帯域エネルギー比"""
+        frame_length = int(SAMPLE_RATE * self.frame_ms / 1000)
+        freqs = np.fft.rfftfreq(frame_length, 1.0 / SAMPLE_RATE)
+        band = (freqs >= SPEECH_BAND_HZ[0]) & (freqs <= SPEECH_BAND_HZ[1])
+
+        # 長時間音声でもスペクトルを一度に保持しないようブロック単位で計算
+        block_frames = 8192
+        ratios = np.empty(num_frames, dtype=np.float32)
+        for first in range(0, num_frames, block_frames):
+            last = min(num_frames, first + block_frames)
+            frames = np.asarray(audio[first * frame_length:last * frame_length], dtype=np.float32)
+            frames = frames.reshape(last - first, frame_length)
+            spectrum = np.abs(np.fft.rfft(frames, axis=1)) ** 2
+            ratios[first:last] = spectrum[:, band].sum(axis=1) / (spectrum.sum(axis=1) + 1e-12)
+        return ratios
+
+    def detect(self, audio: np.ndarray) -> List[Tuple[float, float]]:
+        """
+        発話区間を検出
+
+        Args:
+            audio: float32の波形（16kHzモノラル）
+
+        Returns:
+            (開始秒, 終了秒) の発話区間リスト
+        """
+        energies = frame_energies(audio, SAMPLE_RATE, self.frame_ms)
+        if len(energies) == 0:
+            return []
+
+        # 下位10%をノイズフロアとして適応的に閾値を決める
+        # （ほぼ無音のない録音では下位10%も発話になり、発話を捨ててしまうため下限の固定閾値にする）
+        noise_floor, loud = (float(value) for value in np.percentile(energies, [10, 90]))
+        if loud - noise_floor < self.min_dynamic_range_db:
+            threshold = self.min_threshold_db
+        else:
+            threshold = max(noise_floor + self.threshold_offset_db, self.min_threshold_db)
+        is_speech = energies > threshold
+        is_speech &= self._speech_band_ratio(audio, len(energies)) >= self.min_speech_band_ratio
+
+        frame_sec = self.frame_ms / 1000
+        regions = []
+        start = None
+        for i, speech in enumerate(is_speech):
+            if speech and start is None:
+                start = i
+            elif not speech and start is not None:
+                regions.append([start * frame_sec, i * frame_sec])
+                start = None
+        if start is not None:
+            regions.append([start * frame_sec, len(is_speech) * frame_sec])
+
+        # 短い無音で分かれた区間を結合
+        merged = []
+        for region in regions:
+            if merged and region[0] - merged[-1][1] < self.min_silence_duration:
+                merged[-1][1] = region[1]
+            else:
+                merged.append(region)
+
+        # 短すぎる区間を除去し、前後に余白を付けて重なりを結合
+        duration = len(audio) / SAMPLE_RATE
+        padded = []
+        for start_sec, end_sec in merged:
+            if end_sec - start_sec < self.min_speech_duration:
+                continue
+            start_sec = max(0.0, start_sec - self.speech_pad)
+            end_sec = min(duration, end_sec + self.speech_pad)
+            if padded and start_sec <= padded[-1][1]:
+                padded[-1][1] = end_sec
+            else:
+                padded.append([start_sec, end_sec])
+
+        return [(start_sec, end_sec) for start_sec, end_sec in padded]
+
+
+class SpeechTimeline:
+    """発話区間だけを連結した音声と元の時間軸との対応表"""
+
+    def __init__(self, regions: List[Tuple[float, float]], gap: float = 0.2):
+        """
+        初期化
+
+        Args:
+            regions: (開始秒, 終了秒) の発話区間リスト（昇順）
+            gap: 連結時に区間の間へ挿入する無音（秒）。区間をまたいだ結合を防ぐ
+        """
+        self.regions = regions
+        self.gap = gap
+        self.compact_starts = []
+        position = 0.0
+        for start, end in regions:
+            self.compact_starts.append(position)
+            position += (end - start) + gap
+        self.compact_duration = max(0.0, position - gap) if regions else 0.0
+
+    def build_audio(self, audio: np.ndarray) -> np.ndarray:
+        """
+        発話区間だけを連結した波形を作成
+
+        Args:
+            audio: 元の波形
+
+        Returns:
+            連結後の波形
+        """
+        gap = np.zeros(int(self.gap * SAMPLE_RATE), dtype=np.float32)
+        parts = []
+        for i, (start, end) in enumerate(self.regions):
+            if i > 0:
+                parts.append(gap)
+            parts.append(np.asarray(audio[int(start * SAMPLE_RATE):int(end * SAMPLE_RATE)],
+                                    dtype=np.float32))
+        return np.concatenate(parts) if parts else np.zeros(0, dtype=np.float32)
+
+    def to_original(self, t: float) -> float:
+        """連結後の時刻を元の時間軸の時刻に変換"""
+        if not self.regions:
+            return t
+        i = max(0, bisect.bisect_right(self.compact_starts, t) - 1)
+        start, end = self.regions[i]
+        # 区間間の挿入無音に落ちた時刻は直前の区間の終端に寄せる
+        return min(start + (t - self.compact_starts[i]), end)
+
+    def remap_segments(self, segments: List[Dict]) -> List[Dict]:
+        """
+        セグメント（および単語）のタイムスタンプを元の時間軸に戻す
+
+        Args:
+            segments: 連結音声に対するWhisperのセグメントリスト
+
+        Returns:
+            同じリスト（インプレースで更新）
+        """
+        for segment in segments:
+            segment["start"] = self.to_original(segment["start"])
+            segment["end"] = self.to_original(segment["end"])
+            for word in segment.get("words") or []:
+                word["start"] = self.to_original(word["start"])
+                word["end"] = self.to_original(word["end"])
+        return segments
@@ -0,0 +1,134 @@
+"""
+Batch processor unit tests
+"""
+
+import os
+from types import SimpleNamespace
+import pytest
+from modules.batch_processor import BatchProcessor, collect_audio_files
+from modules.output_formatter import OutputFormatter
+
+
+class FakeAudioProcessor:
+    """AudioProcessor stand-in that records how often it is used"""
+
+    def __init__(self, fail_on=None):
+        self.fail_on = fail_on
+        self.transcribed = []
+
+    def is_cached(self, audio_path, language="ja", prompt=None, enable_vad=True):
+        return False
+
+    def load_audio(self, audio_path):
+        if audio_path == self.fail_on:
+            raise RuntimeError("decode failed")
+        return [0.0]
+
+    def transcribe(self, audio_path, enable_vad=False, prompt=None, audio=None):
+        self.transcribed.append(audio_path)
+        return {"text": "テスト", "segments": [{"start": 0.0, "end": 1.0, "text": "テスト"}]}
+
+    def create_formatted_text(self, whisper_result, format_type="standard"):
+        return "[00:00:00 - 00:00:01] テスト\n"
+
+
+class FakeCascade:
+    """ModelCascade stand-in that replaces every segment and records its calls"""
+
+    def __init__(self):
+        self.refined = []
+
+    def refine(self, audio_path, draft_result, language="ja", prompt=None, audio=None):
+        self.refined.append((audio_path, prompt, audio))
+        return dict(draft_result, segments=[{"start": 0.0, "end": 1.0, "text": "修正済み"}],
+                    cascade={"model": "large-v3", "escalation_ratio": 1.0})
+
+
+@pytest.fixture
+def input_dir(tmp_path):
+    directory = tmp_path / "input"
+    directory.mkdir()
+    for name in ("a.mp3", "b.wav", "notes.txt"):
+        (directory / name).write_bytes(b"data")
+    return directory
+
+
+class TestCollectAudioFiles:
+    """Input expansion tests"""
+
+    def test_directory_lists_audio_only(self, input_dir):
+        files = collect_audio_files([str(input_dir)])
+        assert [os.path.basename(f) for f in files] == ["a.mp3", "b.wav"]
+
+    def test_glob_and_duplicates(self, input_dir):
+        files = collect_audio_files([str(input_dir / "*.mp3"), str(input_dir / "a.mp3")])
+        assert len(files) == 1
+
+
+class TestBatchProcessor:
+    """Batch processing tests"""
+
+    def test_processes_all_and_records_failures(self, input_dir, tmp_path):
+        audio_processor = FakeAudioProcessor(fail_on=str(input_dir / "b.wav"))
+        formatter = OutputFormatter(str(tmp_path / "output"))
+        batch = BatchProcessor(audio_processor, formatter, batch_size=2)
+
+        summary = batch.process(collect_audio_files([str(input_dir)]))
+        statuses = {os.path.basename(e["audio_file"]): e["status"] for e in summary["files"]}
+
+        assert statuses == {"a.mp3": "success", "b.wav": "failed"}
+        assert os.path.exists(batch.save_summary(summary))
+
+    def test_skips_existing_outputs(self, input_dir, tmp_path):
+        audio_processor = FakeAudioProcessor()
+        formatter = OutputFormatter(str(tmp_path / "output"))
+        batch = BatchProcessor(audio_processor, formatter)
+        files = collect_audio_files([str(input_dir)])
+
+        batch.process(files)
+        summary = batch.process(files)
+
+        assert all(e["status"] == "skipped" for e in summary["files"])
+        assert len(audio_processor.transcribed) == 2
+
+    def test_other_format_output_is_not_reused(self, input_dir, tmp_path):
+        formatter = OutputFormatter(str(tmp_path / "output"))
+        audio_file = str(input_dir / "a.mp3")
+        formatter.save_transcription("text", audio_file, format_type="continuous")
+
+        assert formatter.find_existing_output(audio_file, "whisper", "standard") is None
+        assert formatter.find_existing_output(audio_file, "whisper", "continuous") is not None
+
+    def test_cascade_refines_each_file(self, input_dir, tmp_path):
+        cascade = FakeCascade()
+        formatter = OutputFormatter(str(tmp_path / "output"))
+        batch = BatchProcessor(FakeAudioProcessor(), formatter, cascade=cascade)
+
+        summary = batch.process(collect_audio_files([str(input_dir)]), prompt="会議", output_format="json")
+
+        assert sorted(os.path.basename(path) for path, _, _ in cascade.refined) == ["a.mp3", "b.wav"]
+        assert all(prompt == "会議" and audio == [0.0] for _, prompt, audio in cascade.refined)
+        for entry in summary["files"]:
+            with open(entry["output_path"], encoding="utf-8") as f:
+                assert "修正済み" in f.read()
+
+
+class TestBatchCli:
+    """Options the batch and watch modes cannot honour are rejected"""
+
+    @pytest.mark.parametrize("options", [{"llm": "openai", "compare": False}, {"llm": "whisper", "compare": True}])
+    def test_llm_options_are_rejected(self, input_dir, capsys, options):
+        from transcriber import run_batch, run_watch
+        args = SimpleNamespace(audio_files=[str(input_dir)], watch=str(input_dir), **options)
+
+        run_batch(args, config=None)
+        run_watch(args, config=None)
+
+        out = capsys.readouterr().out
+        assert out.count("LLM後処理（--llm / --compare）に対応していません") == 2
+
+    def test_batch_and_watch_share_metadata(self):
+        from transcriber import batch_metadata
+        args = SimpleNamespace(model="base", backend="whisper", enable_vad=True, diarize=False,
+                               profile="accurate", format="minimal")
+        assert batch_metadata(args)["decode_profile"] == "accurate"
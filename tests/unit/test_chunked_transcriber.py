@@ -0,0 +1,92 @@
+"""
+Silence splitting and chunk stitching unit tests
+"""
+
+import numpy as np
+from modules.audio_segmenter import SAMPLE_RATE, split_at_silence
+from modules.chunked_transcriber import stitch_results
+
+
+def make_audio(pattern):
+    """Build audio from (seconds, is_speech) pairs"""
+    rng = np.random.default_rng(0)
+    parts = []
+    for seconds, is_speech in pattern:
+        n = int(seconds * SAMPLE_RATE)
+        amplitude = 0.3 if is_speech else 0.001
+        parts.append((rng.standard_normal(n) * amplitude).astype(np.float32))
+    return np.concatenate(parts)
+
+
+class TestSplitAtSilence:
+    """Silence-aware split point tests"""
+
+    def test_short_audio_is_single_chunk(self):
+        audio = make_audio([(5, True)])
+        assert split_at_silence(audio, chunk_length=10) == [(0, len(audio))]
+
+    def test_cuts_inside_silence(self):
+        # speech 0-52s, silence 52-54s, speech 54-70s
+        audio = make_audio([(52, True), (2, False), (16, True)])
+        chunks = split_at_silence(audio, chunk_length=60, search_window=20)
+
+        assert len(chunks) == 2
+        cut = chunks[0][1] / SAMPLE_RATE
+        assert 52.0 <= cut <= 54.0
+        assert chunks[0][1] == chunks[1][0]
+        assert chunks[-1][1] == len(audio)
+
+
+class TestStitchResults:
+    """Global timestamp and overlap de-duplication tests"""
+
+    def test_offsets_and_overlap_removal(self):
+        first = {"language": "ja", "segments": [
+            {"start": 0.0, "end": 4.0, "text": "最初の発言"},
+            {"start": 55.0, "end": 59.5, "text": "境界の発言"},
+        ]}
+        # second chunk starts 1s before its owned range (overlap)
+        second = {"language": "ja", "segments": [
+            {"start": 0.0, "end": 0.8, "text": "境界の発言",
+             "words": [{"word": "境界", "start": 0.0, "end": 0.4}]},
+            {"start": 1.5, "end": 3.0, "text": "次の発言",
+             "words": [{"word": "次", "start": 1.5, "end": 2.0}]},
+        ]}
+
+        result = stitch_results([first, second], [(0.0, 0.0), (59.0, 60.0)])
+
+        texts = [s["text"] for s in result["segments"]]
+        assert texts == ["最初の発言", "境界の発言", "次の発言"]
+        assert result["segments"][2]["start"] == 60.5
+        assert result["segments"][2]["words"][0]["start"] == 60.5
+        assert [s["id"] for s in result["segments"]] == [0, 1, 2]
+
+
+class TestChunkedVad:
+    """--enable-vad with --workers decodes only speech and restores the original timeline"""
+
+    def test_chunks_are_cut_from_speech_only(self, monkeypatch):
+        from modules.audio_processor import AudioProcessor
+        from modules.chunked_transcriber import ChunkedTranscriber
+
+        t = np.arange(2 * SAMPLE_RATE) / SAMPLE_RATE
+        speech = (0.2 * np.sin(2 * np.pi * 440 * t) + 0.1 * np.sin(2 * np.pi * 1200 * t)).astype(np.float32)
+        silence = np.zeros(10 * SAMPLE_RATE, dtype=np.float32)
+        audio = np.concatenate([silence, speech, silence, speech])
+        received = []
+
+        def fake_transcribe(self, chunk_audio, language="ja", prompt=None, on_submitted=None):
+            duration = len(chunk_audio) / SAMPLE_RATE
+            received.append(duration)
+            return {"text": "b", "language": language,
+                    "segments": [{"start": duration - 1.0, "end": duration - 0.5, "text": "b"}]}
+
+        monkeypatch.setattr(ChunkedTranscriber, "transcribe", fake_transcribe)
+        processor = AudioProcessor()
+        processor.load_audio = lambda path: audio
+
+        result = processor.transcribe_chunked("meeting.wav", workers=2, enable_vad=True)
+
+        assert received[0] < 6
+        assert result["vad"]["skipped_seconds"] > 15
+        assert 22.5 < result["segments"][0]["start"] < 24
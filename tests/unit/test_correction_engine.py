@@ -0,0 +1,58 @@
+"""
+Correction engine unit tests
+"""
+
+import pytest
+from modules.correction_engine import CorrectionEngine, load_dictionary
+
+
+class TestCorrectionEngine:
+    """Single-pass dictionary correction tests"""
+
+    def test_default_dictionary_loads(self):
+        engine = CorrectionEngine.from_file()
+        assert engine.apply("八中の成球所")[0] == "発注の請求書"
+
+    def test_longest_match_wins(self):
+        engine = CorrectionEngine([("八中", "発注"), ("八中書", "発注書"), ("八", "X")])
+        assert engine.apply("八中書と八中と八")[0] == "発注書と発注とX"
+
+    def test_regex_metacharacters_are_literal(self):
+        engine = CorrectionEngine([("a.b", "ok"), ("(x)", "y")])
+        assert engine.apply("a.b axb (x)") == ("ok axb y", 2)
+
+    def test_load_dictionary(self, tmp_path):
+        path = tmp_path / "terms.tsv"
+        path.write_text("# comment\n\nインフマート\tインフォマート\n", encoding="utf-8")
+        assert load_dictionary(str(path)) == [("インフマート", "インフォマート")]
+
+        path.write_text("no tab here\n", encoding="utf-8")
+        with pytest.raises(ValueError):
+            load_dictionary(str(path))
+
+    def test_words_spanning_a_term_are_merged(self):
+        engine = CorrectionEngine([("八乗っと", "発注ロット")])
+        words = [
+            {"word": "この", "start": 0.0, "end": 0.3},
+            {"word": "八乗", "start": 0.3, "end": 0.6},
+            {"word": "っと", "start": 0.6, "end": 0.9},
+            {"word": "です", "start": 0.9, "end": 1.2},
+        ]
+        assert engine.apply_to_words(words) == 1
+        assert [w["word"] for w in words] == ["この", "発注ロット", "です"]
+        assert words[1]["start"] == 0.3 and words[1]["end"] == 0.9
+
+    def test_apply_to_result_records_hits(self):
+        engine = CorrectionEngine([("悦子", "えつこ")])
+        result = {
+            "text": "悦子さん",
+            "segments": [
+                {"text": "悦子さん", "words": [{"word": "悦子", "start": 0, "end": 1}]},
+                {"text": "こんにちは"},
+            ],
+        }
+        engine.apply_to_result(result)
+
+        assert result["text"] == "えつこさん"
+        assert result["segments"][0]["words"][0]["word"] == "えつこ"
+        assert [s["corrections"] for s in result["segments"]] == [1, 0]
@@ -0,0 +1,140 @@
+"""
+Decode profile and retry telemetry unit tests (fake Whisper model, no Whisper required)
+"""
+
+import threading
+import time
+from types import SimpleNamespace
+import pytest
+from modules.audio_processor import AudioProcessor
+from modules.decode_profiles import count_retries, decode_report, resolve_profile
+from modules.inference_backends import WhisperBackend
+
+
+class FakeWhisperModel:
+    """
+    Mimics openai-whisper's transcribe loop: each 30s window is decoded through
+    model.decode with increasing temperatures until it is accepted
+    """
+
+    def __init__(self, windows):
+        # 各ウィンドウが確定する温度の段階番号
+        self.windows = windows
+        self.received = None
+
+    def decode(self, mel, options):
+        time.sleep(0.01)
+        return SimpleNamespace(avg_logprob=-0.1 * (mel + 1) - options.temperature, temperature=options.temperature)
+
+    def transcribe(self, audio, language=None, temperature=0.0, word_timestamps=False,
+                   compression_ratio_threshold=2.4):
+        self.received = dict(language=language, temperature=temperature)
+        ladder = temperature if isinstance(temperature, tuple) else (temperature,)
+        segments = []
+        for window, accepted in enumerate(self.windows):
+            for temp in ladder[:accepted + 1]:
+                result = self.decode(window, SimpleNamespace(temperature=temp))
+            for part in range(2):
+                segments.append({"seek": window * 3000, "start": window * 30.0 + part, "end": window * 30.0 + part + 1,
+                                 "text": f" {window}-{part}", "temperature": result.temperature,
+                                 "avg_logprob": result.avg_logprob})
+        return {"text": "", "segments": segments, "language": language}
+
+
+class TestProfiles:
+    """Profile resolution and Whisper parameters"""
+
+    def test_max_retries_truncates_ladder(self):
+        assert resolve_profile("fast")["temperatures"] == (0.0,)
+        assert resolve_profile("balanced")["temperatures"] == (0.0, 0.2, 0.4)
+        assert resolve_profile("accurate", max_retries=1)["temperatures"] == (0.0, 0.2)
+        with pytest.raises(ValueError):
+            resolve_profile("turbo")
+
+    def test_fast_keeps_previous_parameters(self):
+        params = AudioProcessor().build_transcribe_params("ja")
+        assert params["temperature"] == 0.0
+        assert "beam_size" not in params and "best_of" not in params
+
+    def test_accurate_parameters(self):
+        params = AudioProcessor(decode_profile="accurate").build_transcribe_params("ja")
+        assert params["beam_size"] == 5
+        assert params["best_of"] == 5
+        assert params["temperature"] == (0.0, 0.2, 0.4, 0.6, 0.8, 1.0)
+
+    def test_retry_counting(self):
+        assert count_retries(0.0, [0.0, 0.2, 0.4]) == 0
+        assert count_retries(0.4, [0.0, 0.2, 0.4]) == 2
+        report = decode_report([{"retries": 2, "retry_seconds": 0.5}, {"retries": 0}], "balanced")
+        assert report == {"profile": "balanced", "cached": False, "retries": 2, "retried_segments": 1,
+                          "retry_seconds": 0.5}
+
+
+class TestRetryTelemetry:
+    """Per-segment retry counts and retry time"""
+
+    def test_segments_record_retries_and_time(self, capsys):
+        processor = AudioProcessor(decode_profile="balanced")
+        processor.backend = WhisperBackend()
+        model = FakeWhisperModel(windows=[0, 2, 1])
+        processor._model = model
+
+        result = processor._run_whisper("clip.wav", processor.build_transcribe_params("ja"))
+
+        assert [segment["retries"] for segment in result["segments"]] == [0, 0, 2, 2, 1, 1]
+        seconds = [segment["retry_seconds"] for segment in result["segments"]]
+        assert seconds[0] == seconds[1] == 0.0
+        assert seconds[2] > seconds[4] > 0
+        assert "decode" not in model.__dict__
+
+        # 非対応のパラメータはデコード前に取り除き、再実行しない
+        assert model.received == {"language": "ja", "temperature": (0.0, 0.2, 0.4)}
+        output = capsys.readouterr().out
+        assert "best_of" in output and "task" in output
+
+        processor._run_whisper("clip.wav", processor.build_transcribe_params("ja"))
+        assert "サポートされていません" not in capsys.readouterr().out
+
+    def test_cache_hit_reports_no_retries(self, tmp_path):
+        from modules.transcription_cache import TranscriptionCache
+        audio_path = tmp_path / "clip.wav"
+        audio_path.write_bytes(b"RIFF")
+        processor = AudioProcessor(decode_profile="balanced", cache=TranscriptionCache(str(tmp_path / "cache")))
+        processor.backend = WhisperBackend()
+        processor._model = FakeWhisperModel(windows=[2])
+
+        decoded = processor.transcribe(str(audio_path))["decode"]
+        cached = processor.transcribe(str(audio_path))["decode"]
+
+        assert (decoded["cached"], decoded["retries"]) == (False, 4)
+        assert decoded["retry_seconds"] > 0
+        assert cached == {"profile": "balanced", "cached": True, "retries": 0, "retried_segments": 0,
+                          "retry_seconds": 0.0}
+
+    def test_shared_model_is_decoded_one_thread_at_a_time(self):
+        active, overlaps = [], []
+
+        class TrackedModel(FakeWhisperModel):
+            def decode(self, mel, options):
+                active.append(1)
+                overlaps.append(len(active))
+                try:
+                    return super().decode(mel, options)
+                finally:
+                    active.pop()
+
+        model = TrackedModel(windows=[1, 1])
+        params = AudioProcessor(decode_profile="balanced").build_transcribe_params("ja")
+        results = []
+        # AudioProcessorごとに別のバックエンドでも、同じモデルのデコードは同じロックで直列化される
+        threads = [threading.Thread(
+            target=lambda: results.append(WhisperBackend().transcribe(model, "clip.wav", params)))
+                   for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(5)
+
+        assert len(results) == 4 and max(overlaps) == 1
+        assert all(segment["retry_seconds"] > 0 for result in results for segment in result["segments"])
+        assert "decode" not in model.__dict__
@@ -0,0 +1,182 @@
+"""
+Speaker diarization unit tests (synthetic voices, no Whisper required)
+"""
+
+import copy
+import json
+import threading
+import numpy as np
+import pytest
+from modules.audio_processor import AudioProcessor
+from modules.audio_segmenter import SAMPLE_RATE
+from modules.diarization import SpeakerDiarizer, assign_speakers
+from modules.output_formatter import OutputFormatter
+
+# (基本周波数, フォルマント) の異なる合成話者
+VOICES = [(110, (500, 1500, 2500)), (220, (800, 1200, 2800)), (160, (350, 2200, 3000))]
+
+
+def voice(f0, formants, seconds, rng):
+    """Harmonic source shaped by formant peaks, with slow pitch and amplitude modulation"""
+    t = np.arange(int(seconds * SAMPLE_RATE)) / SAMPLE_RATE
+    phase = 2 * np.pi * np.cumsum(f0 * (1 + 0.05 * np.sin(2 * np.pi * 3 * t))) / SAMPLE_RATE
+    signal = np.zeros_like(t)
+    for harmonic in range(1, int(4000 / f0)):
+        amplitude = sum(np.exp(-((harmonic * f0 - formant) / 150) ** 2) for formant in formants) + 0.05
+        signal += amplitude * np.sin(harmonic * phase)
+    envelope = 0.5 + 0.5 * np.sin(2 * np.pi * 4 * t + rng.uniform(0, 6)) ** 2
+    return (0.1 * signal * envelope / np.abs(signal).max()).astype(np.float32)
+
+
+def conversation(num_speakers, turns=12, seed=0):
+    """Alternating speaker turns separated by short pauses; returns (audio, [(start, end, speaker)])"""
+    rng = np.random.default_rng(seed)
+    parts, truth, position = [], [], 0.0
+    for i in range(turns):
+        duration = rng.uniform(2.0, 4.0)
+        parts.append(voice(*VOICES[i % num_speakers], duration, rng))
+        truth.append((position, position + duration, i % num_speakers))
+        pause = rng.uniform(0.6, 1.0)
+        parts.append(np.zeros(int(pause * SAMPLE_RATE), dtype=np.float32))
+        position += duration + pause
+    audio = np.concatenate(parts)
+    audio += 0.003 * rng.standard_normal(len(audio)).astype(np.float32)
+    return audio, truth
+
+
+def speaker_at(turns, t):
+    return next((speaker for start, end, speaker in turns if start <= t <= end), None)
+
+
+class TestSpeakerDiarizer:
+    """Embedding + spectral clustering on synthetic conversations"""
+
+    @pytest.mark.parametrize("num_speakers", [1, 2, 3])
+    def test_estimates_speakers_and_turns(self, num_speakers):
+        audio, truth = conversation(num_speakers)
+
+        turns = SpeakerDiarizer().diarize(audio)
+
+        assert len({speaker for _, _, speaker in turns}) == num_speakers
+        mapping = {}
+        for start, end, true_speaker in truth:
+            mapping.setdefault(true_speaker, set()).add(speaker_at(turns, (start + end) / 2))
+        assert all(len(labels) == 1 and None not in labels for labels in mapping.values())
+        assert len({label for labels in mapping.values() for label in labels}) == num_speakers
+
+    def test_fixed_speaker_count(self):
+        audio, _ = conversation(2)
+        turns = SpeakerDiarizer(num_speakers=2).diarize(audio)
+        assert {speaker for _, _, speaker in turns} == {"話者1", "話者2"}
+
+    def test_silence_has_no_turns(self):
+        assert SpeakerDiarizer().diarize(np.zeros(SAMPLE_RATE * 5, dtype=np.float32)) == []
+
+    def test_subsampled_clustering_skips_empty_labels(self, monkeypatch):
+        import warnings
+        from modules import diarization
+        # クラスタリングがラベル1を使わなかった場合
+        monkeypatch.setattr(diarization, "spectral_cluster",
+                            lambda embeddings, *args: np.where(embeddings[:, 0] > 0, 2, 0))
+        embeddings = np.array([[1.0, 0.0], [0.9, 0.1], [-1.0, 0.0], [-0.9, -0.1]] * 5, dtype=np.float32)
+
+        with warnings.catch_warnings():
+            warnings.simplefilter("error")
+            labels = SpeakerDiarizer(max_cluster_windows=6)._cluster(embeddings)
+
+        assert list(labels) == [2, 2, 0, 0] * 5
+
+
+class TestAssignSpeakers:
+    """Linear alignment of speaker turns to segments and words"""
+
+    def test_assigns_by_overlap_and_nearest(self):
+        turns = [(0.0, 4.0, "話者1"), (4.0, 9.0, "話者2"), (12.0, 15.0, "話者1")]
+        segments = [
+            {"start": 0.5, "end": 3.0, "text": "a",
+             "words": [{"word": "a", "start": 0.5, "end": 1.0}, {"word": "b", "start": 4.5, "end": 5.0}]},
+            {"start": 3.5, "end": 8.0, "text": "b"},
+            {"start": 9.5, "end": 10.0, "text": "c"},
+            {"start": 14.0, "end": 20.0, "text": "d"},
+        ]
+
+        assign_speakers(segments, turns)
+
+        assert [segment["speaker"] for segment in segments] == ["話者1", "話者2", "話者2", "話者1"]
+        assert [word["speaker"] for word in segments[0]["words"]] == ["話者1", "話者2"]
+
+    def test_no_turns_leaves_segments_unlabelled(self):
+        segments = [{"start": 0.0, "end": 1.0, "text": "a"}]
+        assign_speakers(segments, [])
+        assert "speaker" not in segments[0]
+
+
+class FakeBackend:
+    """Backend that records which thread decoded and whether diarization was running"""
+
+    name = "fake"
+    cache_id = "fake"
+    thread_safe = True
+
+    def __init__(self, diarizer):
+        self.diarizer = diarizer
+
+    def load_model(self, model_name, device):
+        return object()
+
+    def transcribe(self, model, audio, params):
+        self.overlapped = self.diarizer.started.wait(5)
+        return {"text": "こんにちは。はい。", "language": "ja", "segments": [
+            {"start": 0.5, "end": 2.0, "text": " こんにちは。"},
+            {"start": 4.5, "end": 6.0, "text": " はい。"},
+        ]}
+
+
+class FakeDiarizer:
+    def __init__(self):
+        self.started = threading.Event()
+
+    def diarize(self, audio):
+        self.started.set()
+        return [(0.0, 3.0, "話者1"), (4.0, 7.0, "話者2")]
+
+
+class TestProcessorDiarization:
+    """Diarization runs alongside decoding and labels every output format"""
+
+    @pytest.fixture
+    def result(self, tmp_path):
+        diarizer = FakeDiarizer()
+        processor = AudioProcessor(diarizer=diarizer)
+        processor.backend = FakeBackend(diarizer)
+        processor.load_audio = lambda path: np.zeros(SAMPLE_RATE * 7, dtype=np.float32)
+        audio_file = tmp_path / "meeting.wav"
+        audio_file.write_bytes(b"")
+
+        result = processor.transcribe(str(audio_file), enable_vad=False)
+
+        assert processor.backend.overlapped
+        return processor, result
+
+    def test_labels_and_report(self, result):
+        processor, result = result
+        assert [segment["speaker"] for segment in result["segments"]] == ["話者1", "話者2"]
+        assert result["diarization"]["speakers"] == 2
+        assert result["diarization"]["seconds"] >= 0
+
+    def test_text_formats(self, result):
+        processor, result = result
+        assert processor.create_formatted_text(result, "standard") == (
+            "[00:00:00 - 00:00:02] 話者1: こんにちは。\n[00:00:04 - 00:00:06] 話者2: はい。\n")
+        assert processor.create_formatted_text(result, "continuous") == "話者1: こんにちは。\n話者2: はい。"
+
+    def test_structured_formats(self, result, tmp_path):
+        processor, result = result
+        formatter = OutputFormatter(str(tmp_path))
+
+        with open(formatter.save_structured(copy.deepcopy(result), "meeting.wav", "json"), encoding="utf-8") as f:
+            assert [s["speaker"] for s in json.load(f)["segments"]] == ["話者1", "話者2"]
+        with open(formatter.save_structured(result, "meeting.wav", "srt"), encoding="utf-8") as f:
+            assert "話者1: こんにちは。" in f.read()
+        with open(formatter.save_structured(result, "meeting.wav", "vtt"), encoding="utf-8") as f:
+            assert "<v 話者2>はい。" in f.read()
@@ -0,0 +1,59 @@
+"""
+Structured exporter unit tests
+"""
+
+import json
+from modules.exporters import format_srt_timestamp, format_vtt_timestamp
+from modules.output_formatter import OutputFormatter
+
+RESULT = {
+    "language": "ja",
+    "text": "それでは始めます。議題は発注です。",
+    "segments": [
+        {"id": 0, "start": 5.0, "end": 10.5, "text": " それでは始めます。", "avg_logprob": -0.2,
+         "words": [{"word": "それでは", "start": 5.0, "end": 6.0, "probability": 0.9}]},
+        {"id": 1, "start": 3661.25, "end": 3663.0, "text": " 議題は発注です。"},
+        {"id": 2, "start": 3663.0, "end": 3663.5, "text": "  "},
+    ],
+}
+
+
+def read(path):
+    with open(path, encoding="utf-8") as f:
+        return f.read()
+
+
+class TestExporters:
+    """JSON/SRT/VTT export tests"""
+
+    def test_timestamps(self):
+        assert format_srt_timestamp(3661.25) == "01:01:01,250"
+        assert format_vtt_timestamp(5.0) == "00:00:05.000"
+
+    def test_json_contains_segments_and_words(self, tmp_path):
+        path = OutputFormatter(str(tmp_path)).save_structured(RESULT, "meeting.m4a", "json",
+                                                              metadata={"whisper_model": "base"})
+        data = json.loads(read(path))
+
+        assert path.endswith(".json")
+        assert data["metadata"]["whisper_model"] == "base"
+        assert data["segments"][0]["text"] == "それでは始めます。"
+        assert data["segments"][0]["words"][0]["word"] == "それでは"
+        assert data["segments"][0]["avg_logprob"] == -0.2
+
+    def test_srt(self, tmp_path):
+        content = read(OutputFormatter(str(tmp_path)).save_structured(RESULT, "meeting.m4a", "srt"))
+        assert content == (
+            "1\n00:00:05,000 --> 00:00:10,500\nそれでは始めます。\n\n"
+            "2\n01:01:01,250 --> 01:01:03,000\n議題は発注です。\n\n"
+        )
+
+    def test_vtt(self, tmp_path):
+        content = read(OutputFormatter(str(tmp_path)).save_structured(RESULT, "meeting.m4a", "vtt"))
+        assert content.startswith("WEBVTT\n\n00:00:05.000 --> 00:00:10.500\nそれでは始めます。\n")
+
+    def test_existing_structured_output_is_found(self, tmp_path):
+        formatter = OutputFormatter(str(tmp_path))
+        formatter.save_structured(RESULT, "meeting.m4a", "srt")
+        assert formatter.find_existing_output("meeting.m4a", output_format="srt") is not None
+        assert formatter.find_existing_output("meeting.m4a", output_format="vtt") is None
@@ -0,0 +1,180 @@
+"""
+Watch-folder daemon unit tests (fake handler, no Whisper required)
+"""
+
+import os
+import threading
+import time
+import pytest
+from modules.folder_watcher import FolderWatcher, InotifySource, JobLedger, PollingSource, create_source
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if condition():
+            return True
+        time.sleep(0.02)
+    return False
+
+
+class RecordingHandler:
+    """Handler that records processed paths; optionally blocks until released"""
+
+    def __init__(self, block=False):
+        self.paths = []
+        self.release = threading.Event()
+        if not block:
+            self.release.set()
+        self.running = 0
+        self.max_running = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, path):
+        with self._lock:
+            self.running += 1
+            self.max_running = max(self.max_running, self.running)
+        self.release.wait(5)
+        with self._lock:
+            self.running -= 1
+            self.paths.append(os.path.basename(path))
+        return {"status": "success", "output_path": path + ".txt"}
+
+
+@pytest.fixture(params=["inotify", "polling"])
+def start_watcher(request, tmp_path):
+    """Start a watcher on tmp_path/input in a background thread; stops it after the test"""
+    if request.param == "inotify":
+        try:
+            InotifySource(str(tmp_path)).close()
+        except OSError:
+            pytest.skip("inotify not available")
+    started = []
+
+    def start(handler, ledger=None, **options):
+        directory = tmp_path / "input"
+        directory.mkdir(exist_ok=True)
+        ledger = ledger or JobLedger(str(tmp_path / "ledger.sqlite3"))
+        watcher = FolderWatcher(str(directory), handler, ledger, settle_seconds=0.3,
+                                poll_interval=0.05, use_inotify=request.param == "inotify", **options)
+        thread = threading.Thread(target=watcher.run)
+        thread.start()
+        started.append((watcher, thread))
+        return watcher, directory
+
+    yield start
+    for watcher, thread in started:
+        watcher.stop()
+        thread.join(5)
+
+
+def stop(watcher):
+    watcher.stop()
+    time.sleep(0.1)
+
+
+class TestFolderWatcher:
+    """Completed-file detection, dedupe, bounded pool and restart safety"""
+
+    def test_processes_new_and_existing_files(self, start_watcher, tmp_path):
+        (tmp_path / "input").mkdir()
+        (tmp_path / "input" / "before.wav").write_bytes(b"existing")
+        handler = RecordingHandler()
+        watcher, directory = start_watcher(handler)
+
+        (directory / "after.mp3").write_bytes(b"new recording")
+        (directory / "notes.txt").write_bytes(b"not audio")
+        (directory / "upload.wav.part").write_bytes(b"partial")
+
+        assert wait_for(lambda: len(handler.paths) == 2)
+        assert sorted(handler.paths) == ["after.mp3", "before.wav"]
+        assert watcher.ledger.counts() == {"done": 2}
+
+    def test_waits_until_writes_stop(self, start_watcher):
+        handler = RecordingHandler()
+        watcher, directory = start_watcher(handler)
+
+        path = directory / "growing.wav"
+        with open(path, "wb") as f:
+            for _ in range(8):
+                f.write(b"x" * 1024)
+                f.flush()
+                time.sleep(0.1)
+            assert handler.paths == []
+
+        assert wait_for(lambda: handler.paths == ["growing.wav"])
+
+    def test_duplicate_content_is_skipped(self, start_watcher):
+        handler = RecordingHandler()
+        watcher, directory = start_watcher(handler)
+
+        (directory / "a.wav").write_bytes(b"same audio")
+        assert wait_for(lambda: handler.paths == ["a.wav"])
+        (directory / "copy_of_a.wav").write_bytes(b"same audio")
+
+        assert wait_for(lambda: watcher.stats["duplicate"] == 1)
+        assert handler.paths == ["a.wav"]
+
+    def test_bounded_pool(self, start_watcher):
+        handler = RecordingHandler(block=True)
+        watcher, directory = start_watcher(handler, workers=2)
+
+        for i in range(5):
+            (directory / f"{i}.wav").write_bytes(f"audio {i}".encode())
+        assert wait_for(lambda: handler.running == 2)
+        time.sleep(0.3)
+        handler.release.set()
+
+        assert wait_for(lambda: len(handler.paths) == 5)
+        assert handler.max_running == 2
+
+    def test_restart_does_not_reprocess(self, start_watcher, tmp_path):
+        first = RecordingHandler()
+        watcher, directory = start_watcher(first)
+        (directory / "a.wav").write_bytes(b"audio a")
+        assert wait_for(lambda: first.paths == ["a.wav"])
+        stop(watcher)
+
+        second = RecordingHandler()
+        watcher, directory = start_watcher(second, ledger=JobLedger(str(tmp_path / "ledger.sqlite3")))
+        (directory / "b.wav").write_bytes(b"audio b")
+
+        assert wait_for(lambda: second.paths == ["b.wav"])
+        time.sleep(0.3)
+        assert second.paths == ["b.wav"]
+        assert watcher.stats["duplicate"] == 0
+
+
+class TestJobLedger:
+    """Durable job states"""
+
+    def test_interrupted_job_is_retried(self, tmp_path):
+        ledger = JobLedger(str(tmp_path / "ledger.sqlite3"))
+        assert ledger.claim("h1", "/input/a.wav", 10, 1.0) == (True, None)
+        assert ledger.claim("h1", "/input/copy.wav", 10, 1.0)[0] is False
+
+        reopened = JobLedger(str(tmp_path / "ledger.sqlite3"))
+        assert reopened.recover() == ["/input/a.wav"]
+        assert reopened.claim("h1", "/input/a.wav", 10, 1.0) == (True, None)
+        reopened.complete("h1", "/output/a.txt")
+
+        assert reopened.get("h1")["status"] == "done"
+        assert reopened.get("h1")["attempts"] == 1
+        assert reopened.is_done("/input/a.wav", 10, 1.0)
+        assert not reopened.is_done("/input/a.wav", 11, 1.0)
+
+    def test_failed_job_retries_up_to_limit(self, tmp_path):
+        ledger = JobLedger(str(tmp_path / "ledger.sqlite3"), max_attempts=2)
+        for _ in range(2):
+            assert ledger.claim("h1", "/input/a.wav")[0]
+            ledger.fail("h1", "decode failed")
+
+        claimed, existing = ledger.claim("h1", "/input/a.wav")
+        assert not claimed
+        assert existing["status"] == "failed"
+
+
+def test_polling_fallback(tmp_path):
+    source = create_source(str(tmp_path / "missing"), use_inotify=True, poll_interval=0.01)
+    assert isinstance(source, PollingSource)
+    assert source.wait(1.0) is None
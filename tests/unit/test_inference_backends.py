@@ -0,0 +1,100 @@
+"""
+Inference backend unit tests with fake engines (no Whisper/CTranslate2 required)
+"""
+
+from types import SimpleNamespace
+import pytest
+from modules.audio_processor import AudioProcessor
+from modules.inference_backends import FasterWhisperBackend, create_backend
+from modules.transcription_cache import TranscriptionCache
+
+
+class FakeFasterWhisperModel:
+    """Mimics faster_whisper.WhisperModel.transcribe (lazy segment generator + info)"""
+
+    def __init__(self):
+        self.options = None
+
+    def transcribe(self, audio, **options):
+        self.options = options
+        words = [SimpleNamespace(word="会議", start=0.0, end=0.5, probability=0.9),
+                 SimpleNamespace(word="です", start=0.5, end=1.0, probability=0.8)]
+        segments = (
+            SimpleNamespace(id=i + 1, seek=0, start=float(i), end=i + 1.0, text=f" 会議です{i}",
+                            tokens=[1, 2], temperature=0.0, avg_logprob=-0.2,
+                            compression_ratio=1.1, no_speech_prob=0.01, words=words)
+            for i in range(2)
+        )
+        return segments, SimpleNamespace(language="ja")
+
+
+class RecordingBackend:
+    """Backend stub used to check AudioProcessor delegates decoding"""
+
+    name = "fake"
+    cache_id = "fake-int8"
+
+    def __init__(self):
+        self.calls = 0
+
+    def load_model(self, model_name, device):
+        return object()
+
+    def transcribe(self, model, audio, params):
+        self.calls += 1
+        return {"text": "スクレッドシート", "language": "ja",
+                "segments": [{"id": 0, "start": 0.0, "end": 1.0, "text": "スクレッドシート"}]}
+
+
+class TestFasterWhisperBackend:
+    """Parameter mapping and result shape"""
+
+    def test_result_matches_whisper_shape(self):
+        model = FakeFasterWhisperModel()
+        params = AudioProcessor(backend="faster-whisper").build_transcribe_params("ja", "議事録")
+
+        result = FasterWhisperBackend().transcribe(model, "clip.wav", params)
+
+        assert set(result) == {"text", "segments", "language"}
+        assert result["text"] == " 会議です0 会議です1"
+        assert [segment["id"] for segment in result["segments"]] == [0, 1]
+        segment = result["segments"][0]
+        for key in ("start", "end", "text", "avg_logprob", "no_speech_prob", "compression_ratio"):
+            assert key in segment
+        assert segment["words"][1] == {"word": "です", "start": 0.5, "end": 1.0, "probability": 0.8}
+
+        assert model.options["log_prob_threshold"] == -1.0
+        assert model.options["initial_prompt"] == "議事録"
+        assert "logprob_threshold" not in model.options
+        assert "verbose" not in model.options
+
+    def test_unknown_backend_rejected(self):
+        with pytest.raises(ValueError):
+            create_backend("onnx")
+
+
+class TestAudioProcessorBackend:
+    """AudioProcessor delegates to the backend and keys the cache by it"""
+
+    def test_transcribe_uses_backend_and_applies_corrections(self, tmp_path):
+        audio_path = tmp_path / "clip.wav"
+        audio_path.write_bytes(b"RIFF")
+        processor = AudioProcessor()
+        processor.backend = RecordingBackend()
+
+        result = processor.transcribe(str(audio_path), enable_vad=False)
+
+        assert processor.backend.calls == 1
+        assert result["segments"][0]["text"] == "スプレッドシート"
+
+    def test_cache_key_includes_backend(self, tmp_path):
+        audio_path = tmp_path / "clip.wav"
+        audio_path.write_bytes(b"RIFF")
+        cache = TranscriptionCache(str(tmp_path / "cache"))
+        reference = AudioProcessor(cache=cache)
+        int8 = AudioProcessor(cache=cache, backend="faster-whisper", compute_type="int8")
+        fp32 = AudioProcessor(cache=cache, backend="faster-whisper", compute_type="float32")
+        params = reference.build_transcribe_params()
+
+        keys = {processor._cache_key(str(audio_path), params) for processor in (reference, int8, fp32)}
+        assert len(keys) == 3
@@ -0,0 +1,44 @@
+"""
+LLM response cache unit tests
+"""
+
+import time
+from modules.llm_cache import LLMResponseCache
+
+
+class TestLLMResponseCache:
+    """SQLite response cache tests"""
+
+    def test_roundtrip_and_counters(self, tmp_path):
+        cache = LLMResponseCache(str(tmp_path / "llm.sqlite3"))
+        key = cache.make_key("deepseek", "deepseek-chat", 0.1, "prompt")
+
+        assert cache.get(key) is None
+        cache.put(key, "deepseek", "応答")
+        assert cache.get(key) == "応答"
+        assert cache.stats() == {"hits": 1, "misses": 1, "entries": 1}
+
+    def test_key_includes_provider_model_and_temperature(self):
+        base = LLMResponseCache.make_key("deepseek", "deepseek-chat", 0.1, "prompt")
+        assert LLMResponseCache.make_key("openai", "deepseek-chat", 0.1, "prompt") != base
+        assert LLMResponseCache.make_key("deepseek", "other", 0.1, "prompt") != base
+        assert LLMResponseCache.make_key("deepseek", "deepseek-chat", 0.3, "prompt") != base
+
+    def test_expired_entries_are_ignored(self, tmp_path):
+        cache = LLMResponseCache(str(tmp_path / "llm.sqlite3"), ttl_seconds=0.05)
+        cache.put("key", "deepseek", "応答")
+        time.sleep(0.1)
+        assert cache.get("key") is None
+        assert cache.stats()["entries"] == 0
+
+    def test_evicts_least_recently_used(self, tmp_path):
+        cache = LLMResponseCache(str(tmp_path / "llm.sqlite3"), max_entries=2)
+        cache.put("a", "deepseek", "A")
+        time.sleep(0.01)
+        cache.put("b", "deepseek", "B")
+        time.sleep(0.01)
+        cache.get("a")
+        cache.put("c", "deepseek", "C")
+
+        assert cache.contains("a") and cache.contains("c")
+        assert not cache.contains("b")
@@ -0,0 +1,227 @@
+"""
+LLM processor unit tests against a local stub server
+"""
+
+import json
+import threading
+import time
+import pytest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from modules.llm_cache import LLMResponseCache
+from modules.llm_processor import LLMProcessor
+
+
+class StubChatServer:
+    """OpenAI-compatible chat completions stub"""
+
+    def __init__(self, fail_first=0, delay=0.05, usage=None):
+        self.fail_first = fail_first
+        self.delay = delay
+        self.usage = usage
+        self.requests = 0
+        self.active = 0
+        self.max_active = 0
+        self.lock = threading.Lock()
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}/v1/chat/completions"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def _handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                with stub.lock:
+                    stub.requests += 1
+                    failing = stub.requests <= stub.fail_first
+                    stub.active += 1
+                    stub.max_active = max(stub.max_active, stub.active)
+                time.sleep(stub.delay)
+                with stub.lock:
+                    stub.active -= 1
+
+                if failing:
+                    self.send_response(429)
+                    self.send_header("Retry-After", "0")
+                    self.end_headers()
+                    return
+
+                prompt = body["messages"][0]["content"]
+                text = prompt.split("【修正対象テキスト】\n", 1)[1].split("\n\n【修正後テキスト】", 1)[0]
+                response = {"choices": [{"message": {"content": text.replace("ミーティン", "ミーティング")}}]}
+                if stub.usage is not None:
+                    response["usage"] = {"total_tokens": stub.usage}
+                payload = json.dumps(response)
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.end_headers()
+                self.wfile.write(payload.encode("utf-8"))
+
+        return Handler
+
+    def close(self):
+        self.server.shutdown()
+
+
+@pytest.fixture
+def make_processor():
+    servers = []
+
+    def factory(fail_first=0, **kwargs):
+        server = StubChatServer(fail_first=fail_first)
+        servers.append(server)
+        processor = LLMProcessor(**kwargs)
+        processor.available_apis = ["deepseek"]
+        processor.config.DEEPSEEK_API_URL = server.url
+        return processor, server
+
+    yield factory
+    for server in servers:
+        server.close()
+
+
+def make_transcript(lines):
+    return "\n".join(f"[00:00:{i:02d} - 00:00:{i + 1:02d}] ミーティン{i}" for i in range(lines))
+
+
+class TestLLMProcessor:
+    """Chunked concurrent post-processing tests"""
+
+    def test_split_keeps_lines_whole(self, make_processor):
+        processor, _ = make_processor(chunk_chars=80)
+        transcript = make_transcript(10)
+        chunks = processor._split_transcript(transcript)
+
+        assert len(chunks) > 1
+        assert "\n".join(chunks) == transcript
+        assert all(line.startswith("[") for chunk in chunks for line in chunk.split("\n"))
+
+    def test_chunks_dispatched_concurrently_and_reassembled(self, make_processor):
+        processor, server = make_processor(chunk_chars=80, max_concurrency=3)
+        transcript = make_transcript(12)
+
+        improved = processor.improve_transcription(transcript, "deepseek")
+
+        assert improved == transcript.replace("ミーティン", "ミーティング")
+        assert server.max_active > 1
+        assert server.max_active <= 3
+
+    def test_retries_on_rate_limit(self, make_processor):
+        processor, server = make_processor(fail_first=2, max_retries=3)
+        improved = processor.improve_transcription(make_transcript(1), "deepseek")
+
+        assert "ミーティング0" in improved
+        assert server.requests == 3
+
+    def test_falls_back_to_raw_chunk_after_retries(self, make_processor):
+        processor, _ = make_processor(fail_first=10, max_retries=1)
+        transcript = make_transcript(1)
+        assert processor.improve_transcription(transcript, "deepseek") == transcript
+
+    def test_cached_chunks_are_not_resent_or_billed(self, make_processor, tmp_path):
+        cache = LLMResponseCache(str(tmp_path / "llm.sqlite3"))
+        processor, server = make_processor(chunk_chars=80, cache=cache)
+        transcript = make_transcript(6)
+
+        assert processor.estimate_cost(transcript, "deepseek") > 0
+        first = processor.improve_transcription(transcript, "deepseek")
+        sent = server.requests
+
+        assert processor.improve_transcription(transcript, "deepseek") == first
+        assert server.requests == sent
+        assert cache.stats()["hits"] == sent
+        assert processor.estimate_cost(transcript, "deepseek") == 0
+
+    def test_compare_providers_runs_in_parallel(self, make_processor):
+        processor, server = make_processor()
+        processor.available_apis = ["deepseek", "openai"]
+        processor.config.OPENAI_API_URL = server.url
+        server.delay = 0.4
+
+        start = time.time()
+        comparison = processor.compare_providers(make_transcript(2))
+        elapsed = time.time() - start
+
+        assert set(comparison) == {"deepseek", "openai"}
+        assert all("ミーティング1" in entry["text"] for entry in comparison.values())
+        assert all(entry["latency"] >= 0.4 and entry["tokens"] > 0 for entry in comparison.values())
+        assert elapsed < 0.7  # sequential calls would take >= 0.8s
+
+    def test_compare_reports_api_usage(self, make_processor):
+        processor, server = make_processor()
+        server.usage = 1234
+
+        entry = processor.compare_providers(make_transcript(2), ["deepseek"])["deepseek"]
+
+        assert entry["error"] is None
+        assert entry["tokens"] == 1234 * server.requests
+
+    def test_compare_reports_failed_chunks(self, make_processor):
+        processor, server = make_processor(max_retries=0)
+        server.fail_first = 100
+
+        entry = processor.compare_providers(make_transcript(2), ["deepseek"])["deepseek"]
+
+        assert "ミーティン1" in entry["text"]
+        assert entry["error"] is not None and "チャンクで失敗" in entry["error"]
+        assert entry["tokens"] == 0
+
+
+def make_result(confidences, corrections=()):
+    """Whisper-like result: one segment per avg_logprob value"""
+    segments = [{"id": i, "start": float(i), "end": i + 1.0, "text": f" ミーティン{i}", "avg_logprob": logprob,
+                 "no_speech_prob": 0.01, "compression_ratio": 1.2, "corrections": 1 if i in corrections else 0}
+                for i, logprob in enumerate(confidences)]
+    return {"text": "".join(s["text"] for s in segments), "segments": segments, "language": "ja"}
+
+
+class TestSelectivePostProcessing:
+    """Only weak or dictionary-hit segments are sent, with context, and merged back by ID"""
+
+    def test_selects_weak_and_corrected_segments(self):
+        from modules.llm_processor import select_segments
+        result = make_result([-0.1, -0.9, -0.1, -0.1, -0.1], corrections=(3,))
+        assert select_segments(result["segments"]) == [1, 3]
+
+    def test_merges_corrections_by_segment_id(self, make_processor):
+        processor, server = make_processor()
+        result = make_result([-0.1] * 10 + [-0.9] + [-0.1] * 9)
+
+        improved = processor.improve_segments(result, "deepseek")
+
+        texts = [segment["text"] for segment in improved["segments"]]
+        assert texts[10] == " ミーティング10"
+        assert texts[9] == " ミーティン9" and texts[11] == " ミーティン11"
+        assert texts[:9] == [segment["text"] for segment in result["segments"][:9]]
+        assert improved["llm"] == {"provider": "deepseek", "selected": 1, "segments": 20, "corrected": 1}
+        assert result["segments"][10]["text"] == " ミーティン10"
+        assert server.requests == 1
+
+    def test_prompt_contains_only_targets_and_context(self, make_processor):
+        processor, _ = make_processor(chunk_chars=40)
+        segments = make_result([-0.9, -0.1, -0.1, -0.1, -0.9, -0.1])["segments"]
+
+        batches = processor._build_selective_batches(segments, [0, 4], context_segments=1)
+
+        assert batches == [("[#0] ミーティン0\n(文脈) ミーティン1", {0}),
+                           ("(文脈) ミーティン3\n[#4] ミーティン4\n(文脈) ミーティン5", {4})]
+
+    def test_ignores_unknown_ids_in_response(self):
+        from modules.llm_processor import parse_segment_lines
+        response = "[#2] 修正後\n(文脈) 前の行\n[#7] 頼んでいない行\n説明文"
+        assert parse_segment_lines(response, {2, 3}) == {2: "修正後"}
+
+    def test_estimate_reports_saved_tokens(self, make_processor):
+        processor, _ = make_processor()
+        result = make_result([-0.1] * 19 + [-0.9])
+        transcript = make_transcript(20)
+
+        usage = processor.estimate_usage(transcript, "deepseek", result)
+
+        assert 0 < usage["tokens"] < usage["full_tokens"]
+        assert usage["saved_tokens"] == usage["full_tokens"] - usage["tokens"]
+        assert processor.estimate_cost(transcript, "deepseek", result) < processor.estimate_cost(transcript, "deepseek")
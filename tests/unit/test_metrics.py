@@ -0,0 +1,93 @@
+"""
+Instrumentation unit tests (spans, JSON logs, Prometheus rendering)
+"""
+
+import json
+import pytest
+from modules import metrics
+from modules.audio_processor import AudioProcessor
+from modules.model_registry import MODEL_REGISTRY
+
+
+class FakeBackend:
+    name = "fake"
+    cache_id = "fake"
+
+    def load_model(self, model_name, device):
+        return object()
+
+    def transcribe(self, model, audio, params):
+        return {"text": "成球所", "language": "ja",
+                "segments": [{"id": 0, "start": 0.0, "end": 1.0, "text": "成球所"}]}
+
+
+@pytest.fixture
+def log_file(tmp_path):
+    metrics.REGISTRY.reset()
+    MODEL_REGISTRY.clear()
+    path = tmp_path / "logs" / "transcriber.log"
+    metrics.configure_logging(str(path), "INFO")
+    yield path
+    metrics.configure_logging(None)
+    metrics.REGISTRY.reset()
+
+
+def read_log(path):
+    return [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+
+
+class TestSpans:
+    """Span timing, nesting and error accounting"""
+
+    def test_span_records_histogram_and_json_log(self, log_file):
+        with metrics.span("outer", stage="a"):
+            with metrics.span("inner"):
+                pass
+
+        assert metrics.REGISTRY.histogram_value("outer_seconds", stage="a")["count"] == 1
+        records = read_log(log_file)
+        assert [record["span"] for record in records] == ["inner", "outer"]
+        assert records[0]["parent"] == "outer"
+        assert records[1]["stage"] == "a"
+        assert records[1]["duration_ms"] >= records[0]["duration_ms"]
+
+    def test_span_counts_errors(self, log_file):
+        with pytest.raises(RuntimeError):
+            with metrics.span("inference", model="base"):
+                raise RuntimeError("boom")
+
+        assert metrics.REGISTRY.counter_value("inference_errors_total", model="base") == 1
+        record = read_log(log_file)[0]
+        assert record["status"] == "error" and record["level"] == "WARNING"
+        assert "boom" in record["error"]
+
+    def test_prometheus_rendering(self, log_file):
+        metrics.increment("jobs_total", status="done")
+        metrics.increment("jobs_total", 2, status="done")
+        metrics.REGISTRY.observe("inference_seconds", 0.3, model="base")
+
+        text = metrics.REGISTRY.render_prometheus()
+
+        assert "# TYPE mojiokoshi_jobs_total counter" in text
+        assert 'mojiokoshi_jobs_total{status="done"} 3' in text
+        assert 'mojiokoshi_inference_seconds_bucket{model="base",le="0.25"} 0' in text
+        assert 'mojiokoshi_inference_seconds_bucket{model="base",le="0.5"} 1' in text
+        assert 'mojiokoshi_inference_seconds_bucket{model="base",le="+Inf"} 1' in text
+        assert 'mojiokoshi_inference_seconds_count{model="base"} 1' in text
+
+
+class TestAudioProcessorInstrumentation:
+    """The hot path emits one span per stage"""
+
+    def test_transcribe_and_format_spans(self, log_file, tmp_path):
+        audio_path = tmp_path / "clip.wav"
+        audio_path.write_bytes(b"RIFF")
+        processor = AudioProcessor()
+        processor.backend = FakeBackend()
+
+        result = processor.transcribe(str(audio_path), enable_vad=False)
+        processor.create_formatted_text(result, "minimal")
+
+        spans = [record["span"] for record in read_log(log_file)]
+        assert spans == ["model_load", "inference", "corrections", "format"]
+        assert metrics.REGISTRY.counter_value("segments_decoded_total", model="base") == 1
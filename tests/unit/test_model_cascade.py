@@ -0,0 +1,150 @@
+"""
+Confidence-driven model cascade unit tests (fake backend, no Whisper required)
+"""
+
+import numpy as np
+from modules.audio_processor import AudioProcessor
+from modules.audio_segmenter import SAMPLE_RATE
+from modules.model_cascade import ModelCascade, find_weak_ranges, is_weak_segment, splice_segments
+
+
+def segment(start, end, text, avg_logprob=-0.2, no_speech_prob=0.1, compression_ratio=1.2, **extra):
+    return dict(start=start, end=end, text=text, avg_logprob=avg_logprob,
+                no_speech_prob=no_speech_prob, compression_ratio=compression_ratio, **extra)
+
+
+class FinalBackend:
+    """Large-model stand-in: returns one confident segment per clip and records clip lengths and prompts"""
+
+    name = "fake"
+    cache_id = "fake"
+    thread_safe = True
+
+    def __init__(self):
+        self.calls = []
+
+    def load_model(self, model_name, device):
+        return object()
+
+    def transcribe(self, model, audio, params):
+        duration = len(audio) / SAMPLE_RATE
+        self.calls.append((duration, params.get("initial_prompt")))
+        return {"text": " 修正済み", "language": "ja", "segments": [
+            segment(0.0, 0.2, " 余白"),
+            segment(0.3, duration - 0.3, " 修正済み"),
+        ]}
+
+
+def make_cascade(seconds=20, **options):
+    processor = AudioProcessor(model_name="large-v3")
+    processor.backend = FinalBackend()
+    processor.load_audio = lambda path: np.zeros(SAMPLE_RATE * seconds, dtype=np.float32)
+    return ModelCascade(processor, **options), processor.backend
+
+
+class TestWeakRanges:
+    """Segment confidence checks and range merging"""
+
+    def test_each_signal_escalates(self):
+        assert not is_weak_segment(segment(0, 1, "ok"))
+        assert is_weak_segment(segment(0, 1, "low", avg_logprob=-1.1))
+        assert is_weak_segment(segment(0, 1, "silence", no_speech_prob=0.9))
+        assert is_weak_segment(segment(0, 1, "repeat", compression_ratio=3.0))
+        assert not is_weak_segment(segment(0, 1, " ", avg_logprob=-2.0))
+        assert not is_weak_segment({"start": 0, "end": 1, "text": "no metrics"})
+
+    def test_nearby_weak_segments_are_merged(self):
+        segments = [
+            segment(0.0, 2.0, "a", avg_logprob=-1.0),
+            segment(2.5, 4.0, "b", avg_logprob=-1.0),
+            segment(4.0, 8.0, "c"),
+            segment(8.0, 9.0, "d", compression_ratio=3.0),
+        ]
+        assert find_weak_ranges(segments) == [(0.0, 4.0), (8.0, 9.0)]
+        assert find_weak_ranges(segments, merge_gap=0.1) == [(0.0, 2.0), (2.5, 4.0), (8.0, 9.0)]
+
+
+class TestSplice:
+    """Replacement of draft segments inside escalated ranges"""
+
+    def test_replaces_by_midpoint_and_inherits_speaker(self):
+        draft = [
+            segment(0.0, 2.0, "keep", speaker="話者1"),
+            segment(2.0, 4.0, "weak", speaker="話者2"),
+            segment(4.0, 6.0, "keep too", speaker="話者1"),
+        ]
+        decoded = [segment(1.8, 2.1, "padding"), segment(2.1, 3.9, "better")]
+
+        spliced = splice_segments(draft, [(2.0, 4.0, decoded)])
+
+        assert [s["text"] for s in spliced] == ["keep", "better", "keep too"]
+        assert [s["id"] for s in spliced] == [0, 1, 2]
+        assert spliced[1]["speaker"] == "話者2"
+
+    def test_spliced_words_inherit_word_speakers(self):
+        draft = [segment(0.0, 4.0, "weak", speaker="話者1", words=[
+            {"start": 0.0, "end": 2.5, "word": "はい", "speaker": "話者1"},
+            {"start": 2.5, "end": 4.0, "word": "どうぞ", "speaker": "話者2"},
+        ])]
+        decoded = [segment(0.0, 4.0, "better", words=[
+            {"start": 0.1, "end": 2.4, "word": "はい。"},
+            {"start": 2.6, "end": 3.9, "word": "どうぞ"},
+        ])]
+
+        spliced, = splice_segments(draft, [(0.0, 4.0, decoded)])
+
+        assert spliced["speaker"] == "話者1"
+        assert [word["speaker"] for word in spliced["words"]] == ["話者1", "話者2"]
+
+
+class TestModelCascade:
+    """Only weak ranges reach the large model"""
+
+    def test_refine_reports_escalation_ratio(self):
+        cascade, backend = make_cascade(seconds=20)
+        draft = {"text": "", "language": "ja", "segments": [
+            segment(0.0, 5.0, " 確かな部分。"),
+            segment(5.0, 7.0, " あやしい", avg_logprob=-1.2),
+            segment(7.0, 20.0, " 確かな続き。"),
+        ]}
+
+        result = cascade.refine("meeting.wav", draft, prompt="議事録")
+
+        assert [s["text"] for s in result["segments"]] == [" 確かな部分。", " 修正済み", " 確かな続き。"]
+        assert result["segments"][1]["start"] == 5.0
+        assert result["text"] == " 確かな部分。 修正済み 確かな続き。"
+        assert len(backend.calls) == 1
+        duration, prompt = backend.calls[0]
+        assert abs(duration - 2.6) < 1e-6
+        assert prompt == "議事録 確かな部分。"
+        report = result["cascade"]
+        assert report["model"] == "large-v3"
+        assert report["ranges"] == 1
+        assert abs(report["escalation_ratio"] - 2.6 / 20) < 1e-6
+
+    def test_overlapping_padded_windows_are_counted_once(self):
+        cascade, backend = make_cascade(seconds=4, merge_gap=0.1, padding=0.3)
+        draft = {"text": "", "segments": [
+            segment(0.0, 1.0, " 弱い", avg_logprob=-1.2),
+            segment(1.0, 1.4, " 確か"),
+            segment(1.4, 3.0, " 弱い", avg_logprob=-1.2),
+            segment(3.0, 4.0, " 確か"),
+        ]}
+
+        result = cascade.refine("meeting.wav", draft)
+
+        assert len(backend.calls) == 1
+        report = result["cascade"]
+        assert report["ranges"] == 1
+        assert abs(report["escalated_seconds"] - 3.3) < 1e-6
+        assert report["escalation_ratio"] <= 1.0
+
+    def test_confident_draft_is_not_redecoded(self):
+        cascade, backend = make_cascade()
+        draft = {"text": " 全部確か。", "segments": [segment(0.0, 3.0, " 全部確か。")]}
+
+        result = cascade.refine("meeting.wav", draft)
+
+        assert backend.calls == []
+        assert result["text"] == " 全部確か。"
+        assert result["cascade"]["escalation_ratio"] == 0.0
@@ -0,0 +1,128 @@
+"""
+Model registry and fork-after-load sharing unit tests (fake backends, no Whisper required)
+"""
+
+import os
+import threading
+import time
+import uuid
+import numpy as np
+import pytest
+from modules.audio_processor import AudioProcessor
+from modules.audio_segmenter import SAMPLE_RATE
+from modules.chunked_transcriber import ChunkedTranscriber
+from modules.model_registry import MODEL_REGISTRY, ModelRegistry, fork_sharing_available, process_memory
+
+
+@pytest.fixture(autouse=True)
+def clear_registry():
+    MODEL_REGISTRY.clear()
+    yield
+    MODEL_REGISTRY.clear()
+
+
+class CountingBackend:
+    """Backend whose models carry a unique token; counts load_model calls"""
+
+    name = "counting"
+    cache_id = "counting"
+    thread_safe = True
+    fork_safe = True
+
+    def __init__(self):
+        self.loads = 0
+        self.threads = None
+
+    def load_model(self, model_name, device):
+        self.loads += 1
+        time.sleep(0.05)
+        return {"token": uuid.uuid4().hex, "weights": np.ones(1024, dtype=np.float32)}
+
+    def set_num_threads(self, cpu_threads):
+        self.threads = cpu_threads
+
+    def transcribe(self, model, audio, params):
+        duration = len(audio) / SAMPLE_RATE
+        return {"text": model["token"], "language": "ja",
+                "segments": [{"start": 0.0, "end": duration,
+                              "text": f"{model['token']}:{os.getpid()}"}]}
+
+
+class TestModelRegistry:
+    """Per-process caching keyed by backend, model and device"""
+
+    def test_loads_once_per_key(self):
+        registry = ModelRegistry()
+        backend = CountingBackend()
+
+        first = registry.get(backend, "base")
+        second = registry.get(backend, "base")
+        other = registry.get(backend, "small")
+
+        assert first is second
+        assert other is not first
+        assert backend.loads == 2
+        assert registry.load_time(backend, "base") > 0
+
+    def test_concurrent_requests_share_one_load(self):
+        registry = ModelRegistry()
+        backend = CountingBackend()
+        models = []
+
+        threads = [threading.Thread(target=lambda: models.append(registry.get(backend, "base")))
+                   for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert backend.loads == 1
+        assert all(model is models[0] for model in models)
+
+    def test_non_thread_safe_backend_shares_model_across_threads(self):
+        registry = ModelRegistry()
+        backend = CountingBackend()
+        backend.thread_safe = False
+        models = []
+
+        models.append(registry.get(backend, "base"))
+        thread = threading.Thread(target=lambda: models.append(registry.get(backend, "base")))
+        thread.start()
+        thread.join()
+
+        assert backend.loads == 1
+        assert models[0] is models[1]
+
+    def test_processors_share_registry_model(self):
+        backend = CountingBackend()
+        first, second = AudioProcessor(), AudioProcessor()
+        first.backend = second.backend = backend
+
+        assert first.model is second.model
+        assert backend.loads == 1
+
+    def test_process_memory(self):
+        usage = process_memory()
+        assert usage["rss_mb"] > 0
+
+
+@pytest.mark.skipif(not fork_sharing_available(CountingBackend()), reason="fork not available")
+class TestForkSharing:
+    """Chunk workers inherit the parent's model instead of loading their own"""
+
+    def test_workers_share_parent_model(self):
+        processor = AudioProcessor()
+        processor.backend = CountingBackend()
+        audio = np.zeros(SAMPLE_RATE * 130, dtype=np.float32)
+
+        chunked = ChunkedTranscriber(workers=2, processor=processor)
+        result = chunked.transcribe(audio)
+
+        token = processor.model["token"]
+        assert processor.backend.loads == 1
+        assert len(result["segments"]) >= 2
+        assert all(segment["text"].startswith(token) for segment in result["segments"])
+        worker_pids = {int(segment["text"].split(":")[1]) for segment in result["segments"]}
+        assert os.getpid() not in worker_pids
+        assert chunked.worker_stats
+        assert all(stats["load_time"] == 0.0 for stats in chunked.worker_stats)
@@ -0,0 +1,121 @@
+"""
+PCM cache unit tests (decode-once, memory-mapped 16 kHz mono float32)
+"""
+
+import os
+import shutil
+import wave
+import numpy as np
+import pytest
+from modules.audio_processor import AudioProcessor
+from modules.audio_segmenter import SAMPLE_RATE
+from modules.pcm_cache import PCMCache, read_pcm_range
+
+
+class SyntheticPCMCache(PCMCache):
+    """Decodes to a deterministic ramp instead of calling ffmpeg; counts decodes"""
+
+    def __init__(self, *args, seconds=2.0, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.seconds = seconds
+        self.decodes = 0
+
+    def _decode(self, audio_path, output_path):
+        self.decodes += 1
+        samples = np.arange(int(self.seconds * SAMPLE_RATE), dtype=np.float32) / SAMPLE_RATE
+        samples.tofile(output_path)
+
+
+class RecordingBackend:
+    name = "fake"
+    cache_id = "fake"
+
+    def __init__(self):
+        self.inputs = []
+
+    def load_model(self, model_name, device):
+        return object()
+
+    def transcribe(self, model, audio, params):
+        self.inputs.append(audio)
+        return {"text": "", "language": "ja", "segments": []}
+
+
+def make_audio(tmp_path, name, content=b"RIFF"):
+    path = tmp_path / name
+    path.write_bytes(content)
+    return str(path)
+
+
+class TestPCMCache:
+    """Decode once, read by offset"""
+
+    def test_decodes_once_and_memory_maps(self, tmp_path):
+        cache = SyntheticPCMCache(str(tmp_path / "pcm"))
+        audio_path = make_audio(tmp_path, "clip.m4a")
+
+        first = cache.load(audio_path)
+        second = cache.load(audio_path)
+
+        assert cache.decodes == 1
+        assert isinstance(first, np.memmap) and isinstance(second, np.memmap)
+        assert first.dtype == np.float32 and len(first) == 2 * SAMPLE_RATE
+        np.testing.assert_array_equal(first, second)
+
+    def test_read_range_by_offset(self, tmp_path):
+        cache = SyntheticPCMCache(str(tmp_path / "pcm"))
+        pcm_path = cache.pcm_path(make_audio(tmp_path, "clip.m4a"))
+
+        chunk = read_pcm_range(pcm_path, SAMPLE_RATE, SAMPLE_RATE + 10)
+
+        assert not isinstance(chunk, np.memmap)
+        np.testing.assert_allclose(chunk[0], 1.0)
+        assert len(chunk) == 10
+
+    def test_evicts_least_recently_used(self, tmp_path):
+        # each entry is 2s * 16000 * 4 bytes = 125 KiB
+        cache = SyntheticPCMCache(str(tmp_path / "pcm"), max_size_mb=0.2)
+        first = cache.pcm_path(make_audio(tmp_path, "a.m4a", b"a"))
+        os.utime(first, (0, 0))
+        second = cache.pcm_path(make_audio(tmp_path, "b.m4a", b"b"))
+
+        assert not os.path.exists(first)
+        assert os.path.exists(second)
+
+    @pytest.mark.skipif(shutil.which("ffmpeg") is None, reason="ffmpeg not installed")
+    def test_ffmpeg_decode(self, tmp_path):
+        audio_path = str(tmp_path / "tone.wav")
+        tone = (np.sin(np.arange(8000) / 10) * 10000).astype(np.int16)
+        with wave.open(audio_path, "wb") as f:
+            f.setnchannels(1)
+            f.setsampwidth(2)
+            f.setframerate(8000)
+            f.writeframes(tone.tobytes())
+
+        audio = PCMCache(str(tmp_path / "pcm")).load(audio_path)
+
+        assert abs(len(audio) - SAMPLE_RATE) < 100
+
+
+class TestAudioProcessorPCM:
+    """AudioProcessor hands the memory-mapped waveform to the backend"""
+
+    def test_transcribe_reads_from_pcm_cache(self, tmp_path):
+        pcm_cache = SyntheticPCMCache(str(tmp_path / "pcm"))
+        processor = AudioProcessor(pcm_cache=pcm_cache)
+        processor.backend = RecordingBackend()
+        audio_path = make_audio(tmp_path, "clip.m4a")
+
+        processor.transcribe(audio_path, enable_vad=False)
+        processor.transcribe(audio_path, enable_vad=True)
+
+        assert pcm_cache.decodes == 1
+        assert isinstance(processor.backend.inputs[0], np.memmap)
+
+    def test_vad_is_off_unless_requested(self, tmp_path):
+        processor = AudioProcessor(pcm_cache=SyntheticPCMCache(str(tmp_path / "pcm")))
+        processor.backend = RecordingBackend()
+
+        result = processor.transcribe(make_audio(tmp_path, "clip.m4a"))
+
+        assert "vad" not in result
@@ -0,0 +1,247 @@
+"""
+LLM rate limiter and scheduler tests against a local fake server that enforces RPM/TPM quotas
+"""
+
+import json
+import threading
+import time
+import pytest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from modules.llm_processor import LLMProcessor
+from modules.rate_limiter import ProviderScheduler, RateLimiter, estimate_tokens
+
+
+class QuotaServer:
+    """
+    OpenAI-compatible chat stub with its own request/token buckets.
+    Requests over quota get 429 with Retry-After; accepted ones report usage.total_tokens.
+    The first len(failures) requests use up quota but answer with the given status codes
+    """
+
+    def __init__(self, requests_per_minute=0, tokens_per_minute=0, burst=0.01, failures=(),
+                 retry_after="0.2"):
+        self.rpm = requests_per_minute
+        self.tpm = tokens_per_minute
+        # ネットワークの揺らぎ分だけクライアントより1リクエスト分余裕を持たせる
+        self.request_capacity = max(1.0, requests_per_minute * burst) + 1
+        self.token_capacity = max(1.0, tokens_per_minute * burst) * 1.1
+        self.request_level = self.request_capacity
+        self.token_level = self.token_capacity
+        self.updated = time.monotonic()
+        self.accepted = 0
+        self.rejected = 0
+        self.failures = list(failures)
+        self.retry_after = retry_after
+        self.lock = threading.Lock()
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}/v1/chat/completions"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def forced_failure(self):
+        with self.lock:
+            return self.failures.pop(0) if self.failures else None
+
+    def admit(self, tokens):
+        with self.lock:
+            now = time.monotonic()
+            elapsed, self.updated = now - self.updated, now
+            self.request_level = min(self.request_capacity, self.request_level + elapsed * self.rpm / 60)
+            self.token_level = min(self.token_capacity, self.token_level + elapsed * self.tpm / 60)
+            if (self.rpm and self.request_level < 1) or (self.tpm and self.token_level < tokens):
+                self.rejected += 1
+                return False
+            self.request_level -= 1
+            self.token_level -= tokens
+            self.accepted += 1
+            return True
+
+    def _handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                prompt = body["messages"][0]["content"]
+                text = prompt.split("【修正対象テキスト】\n", 1)[1].split("\n\n【修正後テキスト】", 1)[0]
+                usage = len(prompt) + len(text)
+                failure = stub.forced_failure()
+                admitted = stub.admit(usage)
+                if admitted and failure:
+                    with stub.lock:
+                        stub.accepted -= 1
+                        stub.rejected += 1
+                if not admitted or failure:
+                    self.send_response(failure or 429)
+                    if (failure or 429) == 429:
+                        self.send_header("Retry-After", stub.retry_after)
+                    self.end_headers()
+                    return
+                time.sleep(0.02)
+                payload = json.dumps({"choices": [{"message": {"content": text.replace("ミーティン", "ミーティング")}}],
+                                      "usage": {"total_tokens": usage}})
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.end_headers()
+                self.wfile.write(payload.encode("utf-8"))
+
+        return Handler
+
+    def close(self):
+        self.server.shutdown()
+
+
+@pytest.fixture
+def servers():
+    started = []
+
+    def start(**quota):
+        server = QuotaServer(**quota)
+        started.append(server)
+        return server
+
+    yield start
+    for server in started:
+        server.close()
+
+
+def make_processor(scheduler, deepseek, openai=None, **kwargs):
+    processor = LLMProcessor(scheduler=scheduler, **kwargs)
+    processor.available_apis = ["deepseek"] + (["openai"] if openai else [])
+    processor.config.DEEPSEEK_API_URL = deepseek.url
+    if openai:
+        processor.config.OPENAI_API_URL = openai.url
+    return processor
+
+
+def make_transcript(lines):
+    return "\n".join(f"[00:00:{i:02d} - 00:00:{i + 1:02d}] ミーティン{i}" for i in range(lines))
+
+
+class TestTokenEstimate:
+    """Script-aware token estimate"""
+
+    def test_counts_by_script(self):
+        japanese = "本日の会議では、スプレッドシートの共有について話し合いました。"
+        assert estimate_tokens(japanese) > len(japanese) // 2
+        english = "The quick brown fox jumps over the lazy dog."
+        assert estimate_tokens(english) < len(english) // 2
+        assert estimate_tokens("") == 0
+
+
+class TestRateLimiter:
+    """Token bucket pacing, FIFO order and shared pauses"""
+
+    def test_paces_at_requests_per_minute(self):
+        limiter = RateLimiter(requests_per_minute=600, burst=0.001)  # 10/s、1件まで同時
+        start = time.monotonic()
+        for _ in range(4):
+            limiter.acquire(1)
+        assert time.monotonic() - start >= 0.28
+
+    def test_grants_in_arrival_order(self):
+        limiter = RateLimiter(requests_per_minute=1200, burst=0.001)
+        limiter.acquire(1)
+        order = []
+
+        def worker(i):
+            limiter.acquire(1)
+            order.append(i)
+
+        threads = []
+        for i in range(5):
+            threads.append(threading.Thread(target=worker, args=(i,)))
+            threads[-1].start()
+            time.sleep(0.005)
+        for thread in threads:
+            thread.join(5)
+        assert order == [0, 1, 2, 3, 4]
+
+    def test_pause_blocks_and_settle_refunds(self):
+        limiter = RateLimiter(tokens_per_minute=6000, burst=0.01)  # 60トークン
+        limiter.acquire(60)
+        limiter.settle(60, 10)
+        assert limiter.wait_time(50) == 0
+
+        limiter.pause(0.2)
+        assert limiter.acquire(10) >= 0.15
+        assert limiter.stats["pauses"] == 1
+
+
+class TestScheduledProcessor:
+    """LLMProcessor stays within the fake server's quota instead of falling back to raw text"""
+
+    def test_without_limits_requests_are_rejected(self, servers):
+        server = servers(requests_per_minute=1200, burst=0.005)
+        processor = make_processor(ProviderScheduler({}), server,
+                                   chunk_chars=40, max_concurrency=8, max_retries=0)
+
+        processor.improve_transcription(make_transcript(30), "deepseek")
+
+        assert server.rejected > 0
+
+    def test_request_quota_is_respected(self, servers):
+        server = servers(requests_per_minute=1200, burst=0.005)
+        scheduler = ProviderScheduler({"deepseek": (1200, 0)}, burst=0.005)
+        processor = make_processor(scheduler, server, chunk_chars=40, max_concurrency=8, max_retries=0)
+        transcript = make_transcript(30)
+
+        improved = processor.improve_transcription(transcript, "deepseek")
+
+        assert improved == transcript.replace("ミーティン", "ミーティング")
+        assert server.rejected == 0
+        assert processor.rate_limit_report()["waited_seconds"] > 0
+
+    def test_token_quota_is_respected(self, servers):
+        server = servers(tokens_per_minute=60000, burst=0.02)  # 1200トークン、1000トークン/秒
+        scheduler = ProviderScheduler({"deepseek": (0, 60000)}, burst=0.02)
+        processor = make_processor(scheduler, server, chunk_chars=200, max_concurrency=8, max_retries=0)
+        transcript = make_transcript(40)
+
+        improved = processor.improve_transcription(transcript, "deepseek")
+
+        assert improved == transcript.replace("ミーティン", "ミーティング")
+        assert server.rejected == 0
+
+    def test_retries_take_a_request_slot(self, servers):
+        server = servers(requests_per_minute=1200, burst=0.005, failures=[429, 429], retry_after="0")
+        scheduler = ProviderScheduler({"deepseek": (1200, 0)}, burst=0.005)
+        processor = make_processor(scheduler, server, chunk_chars=40, max_concurrency=8, max_retries=2)
+        transcript = make_transcript(30)
+
+        improved = processor.improve_transcription(transcript, "deepseek")
+
+        assert improved == transcript.replace("ミーティン", "ミーティング")
+        assert server.rejected == 2
+        assert scheduler.limiter("deepseek").stats["requests"] == server.accepted + server.rejected
+
+    def test_server_error_backs_off_only_the_failing_request(self, servers):
+        server = servers(failures=[503])
+        scheduler = ProviderScheduler({"deepseek": (0, 0)})
+        processor = make_processor(scheduler, server, chunk_chars=40, max_concurrency=4, max_retries=1)
+        transcript = make_transcript(4)
+
+        improved = processor.improve_transcription(transcript, "deepseek")
+
+        assert improved == transcript.replace("ミーティン", "ミーティング")
+        assert server.rejected == 1
+        assert scheduler.limiter("deepseek").stats["pauses"] == 0
+        assert scheduler.limiter("deepseek").stats["requests"] == 5
+
+    def test_spillover_to_available_provider(self, servers):
+        slow = servers(requests_per_minute=60, burst=0.01)
+        fast = servers()
+        scheduler = ProviderScheduler({"deepseek": (60, 0)}, burst=0.01, spillover=True, max_wait=0.3)
+        processor = make_processor(scheduler, slow, openai=fast, chunk_chars=40, max_concurrency=6,
+                                   max_retries=0)
+        transcript = make_transcript(8)
+
+        start = time.monotonic()
+        improved = processor.improve_transcription(transcript, "deepseek")
+
+        assert improved == transcript.replace("ミーティン", "ミーティング")
+        assert fast.accepted > 0 and slow.rejected == 0
+        assert scheduler.spilled == fast.accepted
+        assert time.monotonic() - start < 4  # deepseekだけなら8件で7秒以上
@@ -0,0 +1,132 @@
+"""
+Segment merge, rendering and word-level re-segmentation unit tests
+"""
+
+import pytest
+from modules.audio_processor import AudioProcessor
+from modules.segments import (Segment, format_timestamp, is_sentence_end, merge_segments,
+                              resegment_by_words, timestamped_lines)
+
+
+def word(text, start, end):
+    return {"word": text, "start": start, "end": end, "probability": 0.9}
+
+
+class TestFormatTimestamp:
+    """Integer HH:MM:SS conversion"""
+
+    @pytest.mark.parametrize("seconds, expected", [
+        (0, "00:00:00"),
+        (59.999, "00:00:59"),
+        (61.5, "00:01:01"),
+        (3600, "01:00:00"),
+        (36125.9, "10:02:05"),
+    ])
+    def test_values(self, seconds, expected):
+        assert format_timestamp(seconds) == expected
+
+
+class TestMergeSegments:
+    """Linear-time merge of short segments into sentences"""
+
+    def test_merges_until_sentence_end(self):
+        segments = [
+            {"start": 0.0, "end": 1.0, "text": " 本日は"},
+            {"start": 1.2, "end": 2.0, "text": " 会議です。"},
+            {"start": 2.1, "end": 3.0, "text": " 次の議題"},
+        ]
+
+        merged = merge_segments(segments)
+
+        assert [(s.start, s.end, s.text) for s in merged] == [
+            (0.0, 2.0, "本日は会議です。"), (2.1, 3.0, "次の議題")]
+
+    def test_splits_on_silence_and_length(self):
+        segments = [
+            {"start": 0.0, "end": 1.0, "text": "あ"},
+            {"start": 3.0, "end": 4.0, "text": "い"},
+            {"start": 4.1, "end": 40.0, "text": "う"},
+            {"start": 40.1, "end": 41.0, "text": "え"},
+        ]
+
+        merged = merge_segments(segments)
+
+        assert [s.text for s in merged] == ["あ", "いう", "え"]
+
+    def test_sentence_end_ignores_empty_tail(self):
+        segments = [
+            {"start": 0.0, "end": 1.0, "text": "終わり。"},
+            {"start": 1.0, "end": 1.5, "text": "  "},
+            {"start": 1.5, "end": 2.0, "text": "次"},
+        ]
+
+        merged = merge_segments(segments)
+
+        assert [s.text for s in merged] == ["終わり。", "次"]
+
+    def test_segment_uses_slots(self):
+        segment = Segment(0.0, 1.0, "text")
+        assert not hasattr(segment, "__dict__")
+        assert segment.to_dict() == {"start": 0.0, "end": 1.0, "text": "text"}
+
+    def test_processor_methods_keep_output(self):
+        processor = AudioProcessor()
+        result = {"text": "", "segments": [
+            {"start": 0.0, "end": 1.0, "text": " こんにちは。"},
+            {"start": 65.0, "end": 66.0, "text": " 次です"},
+        ]}
+
+        assert processor.create_timestamped_text(result) == (
+            "[00:00:00 - 00:00:01] こんにちは。\n[00:01:05 - 00:01:06] 次です\n")
+        assert processor.create_continuous_text(result) == "こんにちは。次です"
+        assert processor.create_continuous_text(result, enable_timestamps=True) == (
+            "[00:00:00 - 00:00:01] こんにちは。\n[00:01:05 - 00:01:06] 次です")
+        assert processor.merge_segments(result)[1] == {"start": 65.0, "end": 66.0, "text": "次です"}
+        assert is_sentence_end("です。 ")
+        assert timestamped_lines([Segment(0, 1, "a")]) == ["[00:00:00 - 00:00:01] a"]
+
+
+class TestResegmentByWords:
+    """Re-segmentation on sentence ends, pauses and maximum duration"""
+
+    def test_splits_inside_segment_at_sentence_end(self):
+        segments = [{"start": 0.0, "end": 3.0, "text": "はい。次に",
+                     "words": [word("はい。", 0.0, 0.5), word("次に", 0.6, 1.0)]},
+                    {"start": 3.0, "end": 4.0, "text": "進みます",
+                     "words": [word("進みます", 1.1, 1.8)]}]
+
+        resegmented = resegment_by_words(segments)
+
+        assert [(s["start"], s["end"], s["text"]) for s in resegmented] == [
+            (0.0, 0.5, "はい。"), (0.6, 1.8, "次に進みます")]
+        assert [s["id"] for s in resegmented] == [0, 1]
+
+    def test_splits_on_pause_and_duration(self):
+        words = [word("a", 0.0, 1.0), word("b", 2.5, 3.0), word("c", 3.1, 12.0), word("d", 12.1, 14.0)]
+
+        resegmented = resegment_by_words([{"start": 0.0, "end": 14.0, "text": "abcd", "words": words}],
+                                         max_duration=10.0, max_gap=0.8)
+
+        assert [s["text"] for s in resegmented] == ["a", "bc", "d"]
+
+    def test_confidence_and_corrections_are_carried_over(self):
+        from modules.llm_processor import select_segments
+        segments = [{"start": 0.0, "end": 3.0, "text": "はい。次に", "avg_logprob": -0.2, "no_speech_prob": 0.1,
+                     "compression_ratio": 1.1, "corrections": 0,
+                     "words": [word("はい。", 0.0, 0.5), word("次に", 0.6, 1.0)]},
+                    {"start": 3.0, "end": 4.0, "text": "進みます", "avg_logprob": -0.9, "no_speech_prob": 0.05,
+                     "compression_ratio": 1.3, "corrections": 2,
+                     "words": [word("進みます", 1.1, 1.8)]}]
+
+        first, second = resegment_by_words(segments)
+
+        assert (first["avg_logprob"], first["corrections"]) == (-0.2, 0)
+        assert (second["avg_logprob"], second["no_speech_prob"], second["compression_ratio"],
+                second["corrections"]) == (-0.9, 0.1, 1.3, 2)
+        assert select_segments([first, second]) == [1]
+
+    def test_segments_without_words_are_kept(self):
+        processor = AudioProcessor()
+        result = {"text": "x", "segments": [{"start": 0.0, "end": 1.0, "text": "x"}]}
+
+        assert processor.resegment_words(result) is result
@@ -0,0 +1,72 @@
+"""
+CLI startup tests: heavy dependencies must load only on the paths that use them
+(wall-clock timing lives in benchmarks/bench_startup.py)
+"""
+
+import json
+import os
+import subprocess
+import sys
+from modules.audio_processor import AudioProcessor
+from modules.transcription_cache import TranscriptionCache
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+HEAVY_MODULES = ("whisper", "torch", "requests", "numpy")
+
+RUNNER = """
+import json, runpy, sys
+sys.argv = ["transcriber.py"] + sys.argv[1:]
+try:
+    runpy.run_path("transcriber.py", run_name="__main__")
+except SystemExit:
+    pass
+print(json.dumps([name for name in %r if name in sys.modules]))
+""" % (HEAVY_MODULES,)
+
+
+def run_cli(args, env=None):
+    completed = subprocess.run(
+        [sys.executable, "-c", RUNNER, *args],
+        cwd=REPO_ROOT, capture_output=True, text=True, timeout=60,
+        env=dict(os.environ, **(env or {})),
+    )
+    loaded = json.loads(completed.stdout.strip().splitlines()[-1])
+    return completed, loaded
+
+
+class TestStartupImports:
+    """--help and cache-hit re-formatting stay light"""
+
+    def test_help_is_light(self):
+        completed, loaded = run_cli(["--help"])
+
+        assert "usage:" in completed.stdout
+        assert loaded == []
+
+    def test_missing_file_does_not_load_whisper(self, tmp_path):
+        completed, loaded = run_cli([str(tmp_path / "missing.wav")])
+
+        assert "見つかりません" in completed.stdout
+        assert loaded == []
+
+    def test_reformat_from_cache_skips_whisper(self, tmp_path):
+        audio_path = tmp_path / "clip.wav"
+        audio_path.write_bytes(b"RIFF" + os.urandom(256))
+        cache_dir = tmp_path / "cache"
+
+        processor = AudioProcessor(cache=TranscriptionCache(str(cache_dir)))
+        params = processor._cache_params(processor.build_transcribe_params("ja", None), enable_vad=False)
+        processor.cache.put(processor._cache_key(str(audio_path), params), {
+            "text": "キャッシュ済み", "language": "ja",
+            "segments": [{"id": 0, "start": 0.0, "end": 1.5, "text": "キャッシュ済み"}],
+        })
+
+        completed, loaded = run_cli(
+            [str(audio_path), "--format", "minimal"],
+            env={"TRANSCRIPTION_CACHE_DIR": str(cache_dir), "OUTPUT_DIR": str(tmp_path / "output")},
+        )
+
+        assert "キャッシュ済みの文字起こし結果を使用します" in completed.stdout
+        assert "whisper" not in loaded and "torch" not in loaded
+        assert len(os.listdir(tmp_path / "output")) == 1
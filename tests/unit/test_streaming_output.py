@@ -0,0 +1,127 @@
+"""
+Streaming output and checkpoint unit tests
+"""
+
+import os
+from types import SimpleNamespace
+import pytest
+from modules.output_formatter import OutputFormatter
+
+
+def segment(start, end, text):
+    return {"start": start, "end": end, "text": text}
+
+
+class TestStreamingTranscript:
+    """Incremental append and resume tests"""
+
+    def test_appends_and_removes_checkpoint_when_finished(self, tmp_path):
+        formatter = OutputFormatter(str(tmp_path))
+        stream = formatter.open_stream("meeting.m4a", echo=False)
+        stream.write_header("# header")
+        stream.write_segments([segment(0, 2, "一つ目")])
+        stream.complete_window(0)
+        stream.write_segments([segment(3661, 3662, "二つ目")])
+        stream.complete_window(1)
+        stream.close()
+
+        with open(stream.output_path, encoding="utf-8") as f:
+            content = f.read()
+        assert "[00:00:00 - 00:00:02] 一つ目" in content
+        assert "[01:01:01 - 01:01:02] 二つ目" in content
+        assert not os.path.exists(stream.checkpoint_path)
+
+    def test_resume_discards_uncommitted_window(self, tmp_path):
+        formatter = OutputFormatter(str(tmp_path))
+        key = {"audio_size": 10, "whisper_model": "base"}
+
+        stream = formatter.open_stream("meeting.m4a", resume_key=key, echo=False)
+        stream.write_segments([segment(0, 2, "完了済み")])
+        stream.complete_window(0)
+        stream.write_segments([segment(30, 32, "書きかけ")])
+        stream.close(finished=False)  # crash before checkpoint
+
+        resumed = formatter.open_stream("meeting.m4a", resume_key=key, echo=False)
+        assert resumed.completed_windows == 1
+        resumed.write_segments([segment(30, 32, "再開後")])
+        resumed.complete_window(1)
+        resumed.close()
+
+        with open(resumed.output_path, encoding="utf-8") as f:
+            content = f.read()
+        assert "完了済み" in content and "再開後" in content
+        assert "書きかけ" not in content
+
+    def test_changed_settings_start_over(self, tmp_path):
+        formatter = OutputFormatter(str(tmp_path))
+        stream = formatter.open_stream("meeting.m4a", resume_key={"whisper_model": "base"}, echo=False)
+        stream.write_segments([segment(0, 2, "古い結果")])
+        stream.complete_window(0)
+        stream.close(finished=False)
+
+        restarted = formatter.open_stream("meeting.m4a", resume_key={"whisper_model": "small"}, echo=False)
+        assert restarted.completed_windows == 0
+        restarted.close()
+        assert os.path.getsize(restarted.output_path) == 0
+
+
+class FakeStreamProcessor:
+    """Stands in for AudioProcessor.transcribe_stream; optionally interrupts after the first window"""
+
+    def __init__(self, profile="balanced", interrupt=False):
+        self.model_name = "base"
+        self.backend = SimpleNamespace(cache_id="whisper")
+        self.decode_profile = {"name": profile, "max_retries": 2}
+        self.min_silence_duration = 0.5
+        self.interrupt = interrupt
+        self.start_windows = []
+
+    def transcribe_stream(self, audio_path, prompt=None, window_length=30.0, start_window=0):
+        self.start_windows.append(start_window)
+        for index in range(start_window, 2):
+            if self.interrupt and index > 0:
+                raise KeyboardInterrupt
+            yield index, 2, [segment(index * 30, index * 30 + 2, f"窓{index}")]
+
+
+def stream_args(audio_file, **options):
+    args = dict(audio_file=audio_file, model="base", prompt=None, stream_window=30.0, verbose=False,
+                diarize=False, cascade=None, enable_vad=False, resegment=False, workers=1,
+                llm="whisper", compare=False, output_format="txt", format="standard")
+    args.update(options)
+    return SimpleNamespace(**args)
+
+
+class TestStreamMode:
+    """run_stream warnings and resume key"""
+
+    def test_ignored_options_are_reported(self, tmp_path, capsys):
+        from transcriber import run_stream
+        audio = tmp_path / "meeting.wav"
+        audio.write_bytes(b"RIFF")
+
+        run_stream(stream_args(str(audio), enable_vad=True, output_format="json", llm="openai", workers=4),
+                   FakeStreamProcessor(), OutputFormatter(str(tmp_path / "output")))
+
+        out = capsys.readouterr().out
+        for option in ("--enable-vad", "--output-format", "--llm / --compare", "--workers"):
+            assert f"{option}は無視されます" in out
+        assert "--format" not in out.replace("--output-format", "")
+
+    def test_changed_decode_profile_starts_over(self, tmp_path):
+        from transcriber import run_stream
+        audio = tmp_path / "meeting.wav"
+        audio.write_bytes(b"RIFF")
+        formatter = OutputFormatter(str(tmp_path / "output"))
+
+        with pytest.raises(KeyboardInterrupt):
+            run_stream(stream_args(str(audio)), FakeStreamProcessor("fast", interrupt=True), formatter)
+        resumed = FakeStreamProcessor("fast")
+        run_stream(stream_args(str(audio)), resumed, formatter)
+        assert resumed.start_windows == [1]
+
+        with pytest.raises(KeyboardInterrupt):
+            run_stream(stream_args(str(audio)), FakeStreamProcessor("fast", interrupt=True), formatter)
+        restarted = FakeStreamProcessor("accurate")
+        run_stream(stream_args(str(audio)), restarted, formatter)
+        assert restarted.start_windows == [0]
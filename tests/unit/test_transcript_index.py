@@ -0,0 +1,140 @@
+"""
+Transcript full-text search index tests (SQLite FTS5 trigram, no Whisper required)
+"""
+
+import os
+from types import SimpleNamespace
+from modules.output_formatter import OutputFormatter
+from modules.transcript_index import TranscriptIndex, parse_subtitles, parse_transcript_text
+
+RESULT = {"text": "", "language": "ja", "segments": [
+    {"start": 0.0, "end": 4.0, "text": " 本日の議題は三点です。", "speaker": "話者1"},
+    {"start": 4.0, "end": 9.5, "text": " 発注ロットを来月から五百個に変更します。", "speaker": "話者2"},
+    {"start": 9.5, "end": 12.0, "text": " 承知しました。", "speaker": "話者1"},
+    {"start": 12.0, "end": 15.0, "text": " 次回の会議は金曜日です。", "speaker": "話者1"},
+]}
+
+
+def make_formatter(tmp_path):
+    index = TranscriptIndex(str(tmp_path / "index.sqlite3"))
+    return OutputFormatter(str(tmp_path / "output"), index=index), index
+
+
+class TestParsing:
+    """Segments recovered from saved txt/srt/vtt outputs"""
+
+    def test_timestamped_lines_with_header(self):
+        text = ("# 音声文字起こし結果\n- 使用API: whisper\n" + "=" * 80 + "\n文字起こし結果\n" + "=" * 80 + "\n\n"
+                "[00:01:05 - 00:01:09] 話者2: 発注ロットの件です\n[01:00:00 - 01:00:02] 了解")
+        assert parse_transcript_text(text) == [
+            {"start": 65.0, "end": 69.0, "speaker": "話者2", "text": "発注ロットの件です"},
+            {"start": 3600.0, "end": 3602.0, "speaker": None, "text": "了解"},
+        ]
+
+    def test_continuous_text_is_split_into_sentences(self):
+        segments = parse_transcript_text("発注ロットを変更します。承知しました。")
+        assert [s["text"] for s in segments] == ["発注ロットを変更します。", "承知しました。"]
+        assert segments[0]["start"] is None
+
+    def test_subtitles(self):
+        srt = "1\n00:00:04,000 --> 00:00:09,500\n話者2: 発注ロット\n\n"
+        vtt = "WEBVTT\n\n00:00:04.000 --> 00:00:09.500\n<v 話者2>発注ロット\n\n"
+        expected = [{"start": 4.0, "end": 9.5, "speaker": "話者2", "text": "発注ロット"}]
+        assert parse_subtitles(srt) == expected
+        assert parse_subtitles(vtt) == expected
+
+
+class TestIncrementalIndex:
+    """Every save adds the file's segments to the index"""
+
+    def test_saved_outputs_are_searchable(self, tmp_path):
+        formatter, index = make_formatter(tmp_path)
+        txt_path = formatter.save_transcription("", "meeting.m4a", "whisper", segments=RESULT["segments"])
+        json_path = formatter.save_structured(RESULT, "meeting.m4a", "json")
+
+        hits = index.search("発注ロット")
+
+        assert {hit["path"] for hit in hits} == {os.path.abspath(txt_path), os.path.abspath(json_path)}
+        hit = hits[0]
+        assert (hit["start"], hit["end"], hit["speaker"]) == (4.0, 9.5, "話者2")
+        assert [s["text"] for s in hit["before"]] == ["本日の議題は三点です。"]
+        assert [s["text"] for s in hit["after"]] == ["承知しました。"]
+
+    def test_llm_output_is_indexed_from_its_lines(self, tmp_path):
+        formatter, index = make_formatter(tmp_path)
+        formatter.save_transcription("[00:00:04 - 00:00:09] 話者2: 発注ロットを変更します", "meeting.m4a", "openai")
+
+        hit, = index.search("発注ロット")
+        assert (hit["api"], hit["start"], hit["audio_file"]) == ("openai", 4.0, "meeting.m4a")
+
+    def test_finished_stream_is_indexed(self, tmp_path):
+        formatter, index = make_formatter(tmp_path)
+        stream = formatter.open_stream("meeting.m4a", echo=False)
+        stream.write_segments(RESULT["segments"][:2])
+        stream.complete_window(0)
+        stream.close(finished=False)
+        assert index.search("発注ロット") == []
+
+        stream = formatter.open_stream("meeting.m4a", echo=False)
+        stream.close()
+        assert len(index.search("発注ロット")) == 1
+
+    def test_unavailable_index_does_not_stop_saving(self, tmp_path, capsys):
+        from transcriber import create_search_index
+        blocker = tmp_path / "cache"
+        blocker.write_text("not a directory", encoding="utf-8")
+        config = SimpleNamespace(ENABLE_SEARCH_INDEX=True, SEARCH_INDEX_PATH=str(blocker / "index.sqlite3"))
+
+        index = create_search_index(config)
+
+        assert index is None
+        assert "検索インデックスを開けない" in capsys.readouterr().out
+        path = OutputFormatter(str(tmp_path / "output"), index=index).save_transcription(
+            "[00:00:00 - 00:00:01] 発注ロット", "meeting.m4a")
+        assert os.path.exists(path)
+
+    def test_failing_index_does_not_stop_saving(self, tmp_path, capsys):
+        formatter, index = make_formatter(tmp_path)
+        index.close()
+
+        path = formatter.save_structured(RESULT, "meeting.m4a", "json")
+
+        assert os.path.exists(path)
+        assert "検索インデックスへの登録に失敗" in capsys.readouterr().out
+
+    def test_resaving_a_path_replaces_its_segments(self, tmp_path):
+        index = TranscriptIndex(str(tmp_path / "index.sqlite3"))
+        path = tmp_path / "meeting.txt"
+        path.write_text("x", encoding="utf-8")
+        index.add(str(path), RESULT["segments"])
+        index.add(str(path), RESULT["segments"][:1])
+        assert index.stats() == {"files": 1, "segments": 1}
+
+
+class TestSearch:
+    """Query syntax and directory synchronisation"""
+
+    def test_short_and_multiple_terms(self, tmp_path):
+        formatter, index = make_formatter(tmp_path)
+        formatter.save_structured(RESULT, "meeting.m4a", "srt")
+
+        assert [hit["text"] for hit in index.search("会議")] == ["次回の会議は金曜日です。"]
+        assert [hit["text"] for hit in index.search("来月 五百個")] == ["発注ロットを来月から五百個に変更します。"]
+        assert index.search("来月 金曜日") == []
+        assert index.search('"発注') == []
+        assert index.search("  ") == []
+
+    def test_update_directory_is_incremental(self, tmp_path):
+        output = tmp_path / "output"
+        OutputFormatter(str(output)).save_structured(RESULT, "meeting.m4a", "vtt")
+        (output / "batch_summary_20250101_000000.txt").write_text("発注ロット", encoding="utf-8")
+        index = TranscriptIndex(str(tmp_path / "index.sqlite3"))
+
+        assert index.update_directory(str(output)) == {"indexed": 1, "unchanged": 0, "removed": 0}
+        assert index.update_directory(str(output)) == {"indexed": 0, "unchanged": 1, "removed": 0}
+        assert index.search("発注ロット")[0]["speaker"] == "話者2"
+
+        for path in output.glob("*.vtt"):
+            path.unlink()
+        assert index.update_directory(str(output))["removed"] == 1
+        assert index.search("発注ロット") == []
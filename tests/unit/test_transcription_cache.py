@@ -0,0 +1,73 @@
+"""
+Transcription cache unit tests
+"""
+
+import os
+import pytest
+from modules.transcription_cache import FileHashMemo, TranscriptionCache
+
+
+@pytest.fixture
+def audio_file(tmp_path):
+    path = tmp_path / "meeting.wav"
+    path.write_bytes(b"RIFF" + b"\x00" * 64)
+    return str(path)
+
+
+class TestTranscriptionCache:
+    """Cache key and eviction tests"""
+
+    def test_roundtrip(self, tmp_path, audio_file):
+        cache = TranscriptionCache(str(tmp_path / "cache"))
+        key = cache.make_key(audio_file, "base", {"language": "ja"})
+        assert cache.get(key) is None
+
+        result = {"text": "こんにちは", "segments": [{"start": 0.0, "end": 1.0, "text": "こんにちは"}]}
+        cache.put(key, result)
+        assert cache.get(key) == result
+
+    def test_key_depends_on_content_model_and_params(self, tmp_path, audio_file):
+        cache = TranscriptionCache(str(tmp_path / "cache"))
+        base_key = cache.make_key(audio_file, "base", {"language": "ja"})
+
+        assert cache.make_key(audio_file, "small", {"language": "ja"}) != base_key
+        assert cache.make_key(audio_file, "base", {"language": "en"}) != base_key
+
+        # Same content under another name shares the entry
+        copy_path = os.path.join(os.path.dirname(audio_file), "copy.wav")
+        with open(audio_file, "rb") as src, open(copy_path, "wb") as dst:
+            dst.write(src.read())
+        assert cache.make_key(copy_path, "base", {"language": "ja"}) == base_key
+
+    def test_evicts_least_recently_used(self, tmp_path, audio_file):
+        cache = TranscriptionCache(str(tmp_path / "cache"), max_size_mb=0.002)
+        payload = {"text": "x" * 800, "segments": []}
+
+        cache.put("old", payload)
+        cache.put("used", payload)
+        os.utime(cache._entry_path("old"), (1, 1))
+        os.utime(cache._entry_path("used"), (2, 2))
+        cache.get("used")  # refresh
+        cache.put("new", payload)
+
+        assert cache.get("old") is None
+        assert cache.get("used") is not None
+        assert cache.get("new") is not None
+
+
+class TestFileHashMemo:
+    """Bounded memo of file content hashes"""
+
+    def test_keeps_only_recent_files(self, tmp_path):
+        memo = FileHashMemo(max_entries=2)
+        paths = []
+        for i in range(3):
+            paths.append(tmp_path / f"{i}.wav")
+            paths[-1].write_bytes(bytes([i]) * 16)
+
+        digests = [memo.get(str(path)) for path in paths]
+
+        assert len(memo) == 2
+        assert len(set(digests)) == 3
+        paths[0].write_bytes(b"changed")
+        assert memo.get(str(paths[0])) != digests[0]
@@ -0,0 +1,165 @@
+"""
+Transcription service unit tests with a fake processor (no Whisper required)
+"""
+
+import json
+import threading
+import time
+import urllib.error
+import urllib.request
+import pytest
+from modules.transcription_service import TranscriptionService, create_http_server
+
+
+class FakeProcessor:
+    """Stands in for AudioProcessor; counts model loads and records call order"""
+
+    loads = 0
+    calls = []
+    gate = None
+
+    def __init__(self, model_name):
+        self.model_name = model_name
+        self._model = None
+
+    @property
+    def model(self):
+        if self._model is None:
+            FakeProcessor.loads += 1
+            self._model = object()
+        return self._model
+
+    def transcribe(self, audio_path, language="ja", enable_vad=False, prompt=None):
+        self.model
+        if FakeProcessor.gate is not None:
+            FakeProcessor.gate.wait(5)
+        FakeProcessor.calls.append(audio_path)
+        if audio_path.endswith("broken.wav"):
+            raise RuntimeError("decode failed")
+        return {"text": "テスト", "language": language,
+                "segments": [{"start": 0.0, "end": 1.0, "text": " テスト"}]}
+
+    def create_formatted_text(self, result, format_type="standard"):
+        return f"[{self.model_name}] {result['text']}"
+
+
+@pytest.fixture
+def service():
+    FakeProcessor.loads = 0
+    FakeProcessor.calls = []
+    FakeProcessor.gate = None
+    services = []
+
+    def factory(**kwargs):
+        svc = TranscriptionService(FakeProcessor, **kwargs)
+        svc.start()
+        services.append(svc)
+        return svc
+
+    yield factory
+    if FakeProcessor.gate is not None:
+        FakeProcessor.gate.set()
+    for svc in services:
+        svc.shutdown()
+
+
+def make_audio(tmp_path, name):
+    path = tmp_path / name
+    path.write_bytes(b"RIFF")
+    return str(path)
+
+
+def wait_done(svc, job, timeout=5):
+    deadline = time.time() + timeout
+    while svc.get(job.id).status in ("queued", "running"):
+        assert time.time() < deadline
+        time.sleep(0.01)
+    return svc.get(job.id)
+
+
+class TestTranscriptionService:
+    """Warm model, priority queue and job lifecycle"""
+
+    def test_models_loaded_once_at_startup(self, service, tmp_path):
+        svc = service(max_concurrency=2)
+        assert FakeProcessor.loads == 1
+
+        jobs = [svc.submit(make_audio(tmp_path, f"clip{i}.wav")) for i in range(5)]
+        jobs += [svc.submit(make_audio(tmp_path, f"small{i}.wav"), model="small") for i in range(3)]
+        for job in jobs:
+            assert wait_done(svc, job).status == "done"
+        assert FakeProcessor.loads == 2  # one per model, shared by both workers
+        assert svc.get(jobs[0].id).result["text"] == "[base] テスト"
+        assert svc.get(jobs[-1].id).result["text"] == "[small] テスト"
+
+    def test_unknown_model_rejected(self, service, tmp_path):
+        svc = service(allowed_models=["base", "small"])
+        with pytest.raises(ValueError):
+            svc.submit(make_audio(tmp_path, "clip.wav"), model="large-v3")
+        with pytest.raises(ValueError):
+            svc.submit(make_audio(tmp_path, "clip.wav"), model="../../etc/passwd")
+        assert svc.stats()["queued"] == 0
+
+    def test_higher_priority_jobs_run_first(self, service, tmp_path):
+        svc = service(max_concurrency=1)
+        FakeProcessor.gate = threading.Event()
+        blocker = svc.submit(make_audio(tmp_path, "blocker.wav"))
+        while svc.get(blocker.id).status != "running":
+            time.sleep(0.01)
+
+        low = svc.submit(make_audio(tmp_path, "low.wav"), priority=9)
+        high = svc.submit(make_audio(tmp_path, "high.wav"), priority=0)
+        FakeProcessor.gate.set()
+        wait_done(svc, low)
+        wait_done(svc, high)
+
+        assert [path.rsplit("/", 1)[1] for path in FakeProcessor.calls] == ["blocker.wav", "high.wav", "low.wav"]
+
+    def test_failed_job_reports_error(self, service, tmp_path):
+        svc = service()
+        job = wait_done(svc, svc.submit(make_audio(tmp_path, "broken.wav")))
+        assert job.status == "failed"
+        assert "decode failed" in job.error
+
+    def test_missing_file_rejected(self, service, tmp_path):
+        svc = service()
+        with pytest.raises(FileNotFoundError):
+            svc.submit(str(tmp_path / "missing.wav"))
+
+    def test_http_interface(self, service, tmp_path):
+        svc = service()
+        server = create_http_server(svc, port=0)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        base = f"http://127.0.0.1:{server.server_address[1]}"
+        try:
+            request = urllib.request.Request(
+                f"{base}/jobs",
+                data=json.dumps({"audio_path": make_audio(tmp_path, "clip.wav"), "model": "small"}).encode(),
+                headers={"Content-Type": "application/json"},
+            )
+            with urllib.request.urlopen(request) as response:
+                assert response.status == 202
+                job_id = json.loads(response.read())["id"]
+
+            wait_done(svc, svc.get(job_id))
+            with urllib.request.urlopen(f"{base}/jobs/{job_id}/result") as response:
+                payload = json.loads(response.read())
+            assert payload["status"] == "done"
+            assert payload["result"]["text"] == "[small] テスト"
+            assert payload["result"]["segments"][0]["text"] == "テスト"
+
+            with pytest.raises(urllib.error.HTTPError) as error:
+                urllib.request.urlopen(f"{base}/jobs/unknown")
+            assert error.value.code == 404
+
+            request = urllib.request.Request(
+                f"{base}/jobs",
+                data=json.dumps({"audio_path": make_audio(tmp_path, "clip.wav"), "model": "huge"}).encode(),
+                headers={"Content-Type": "application/json"},
+            )
+            with pytest.raises(urllib.error.HTTPError) as error:
+                urllib.request.urlopen(request)
+            assert error.value.code == 400
+        finally:
+            server.shutdown()
+            server.server_close()
@@ -0,0 +1,76 @@
+"""
+Voice activity detection unit tests
+"""
+
+import numpy as np
+from modules.audio_segmenter import SAMPLE_RATE
+from modules.vad import SpeechTimeline, VoiceActivityDetector
+
+
+def make_audio(pattern):
+    """Build audio from (seconds, kind) pairs: 'speech', 'silence' or 'hum'"""
+    rng = np.random.default_rng(1)
+    parts = []
+    for seconds, kind in pattern:
+        n = int(seconds * SAMPLE_RATE)
+        t = np.arange(n) / SAMPLE_RATE
+        if kind == "speech":
+            # band-limited tone mixture inside the speech band
+            part = 0.2 * np.sin(2 * np.pi * 440 * t) + 0.1 * np.sin(2 * np.pi * 1200 * t)
+        elif kind == "hum":
+            part = 0.3 * np.sin(2 * np.pi * 60 * t)
+        else:
+            part = 0.0005 * rng.standard_normal(n)
+        parts.append(part.astype(np.float32))
+    return np.concatenate(parts)
+
+
+class TestVoiceActivityDetector:
+    """Speech region detection tests"""
+
+    def test_detects_speech_between_silence(self):
+        audio = make_audio([(3, "silence"), (2, "speech"), (4, "silence"), (1, "speech"), (2, "silence")])
+        regions = VoiceActivityDetector(min_silence_duration=0.5, speech_pad=0.0).detect(audio)
+
+        assert len(regions) == 2
+        assert abs(regions[0][0] - 3.0) < 0.1 and abs(regions[0][1] - 5.0) < 0.1
+        assert abs(regions[1][0] - 9.0) < 0.1 and abs(regions[1][1] - 10.0) < 0.1
+
+    def test_short_pauses_are_merged(self):
+        audio = make_audio([(1, "silence"), (1, "speech"), (0.3, "silence"), (1, "speech"), (1, "silence")])
+        regions = VoiceActivityDetector(min_silence_duration=0.5).detect(audio)
+        assert len(regions) == 1
+
+    def test_recording_without_silence_keeps_its_speech(self):
+        t = np.arange(10 * SAMPLE_RATE) / SAMPLE_RATE
+        # loudness varies by ~14 dB, so the 10th percentile is quiet speech, not silence
+        envelope = 0.6 + 0.4 * np.sin(2 * np.pi * 0.5 * t)
+        audio = (0.2 * np.sin(2 * np.pi * 440 * t) * envelope).astype(np.float32)
+
+        assert VoiceActivityDetector().detect(make_audio([(10, "speech")])) == [(0.0, 10.0)]
+        assert VoiceActivityDetector().detect(audio) == [(0.0, 10.0)]
+
+    def test_low_frequency_hum_is_not_speech(self):
+        audio = make_audio([(2, "silence"), (3, "hum"), (2, "silence")])
+        assert VoiceActivityDetector().detect(audio) == []
+
+
+class TestSpeechTimeline:
+    """Compacted audio and timestamp remapping tests"""
+
+    def test_remaps_to_original_timeline(self):
+        timeline = SpeechTimeline([(10.0, 12.0), (30.0, 31.0)], gap=0.2)
+        audio = np.zeros(40 * SAMPLE_RATE, dtype=np.float32)
+
+        assert len(timeline.build_audio(audio)) == int(3.2 * SAMPLE_RATE)
+
+        segments = [
+            {"start": 0.5, "end": 1.5, "text": "a", "words": [{"word": "a", "start": 0.5, "end": 1.0}]},
+            {"start": 2.3, "end": 3.2, "text": "b"},
+        ]
+        timeline.remap_segments(segments)
+
+        assert segments[0]["start"] == 10.5
+        assert segments[0]["words"][0]["end"] == 11.0
+        assert abs(segments[1]["start"] - 30.1) < 1e-9
+        assert segments[1]["end"] == 31.0
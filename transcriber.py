@@ -5,42 +5,139 @@ OpenAI Whisper + LLM後処理による日本語会議記録文字起こし
 """
 
 import argparse
+import atexit
+import glob
 import time
 import os
 from modules.config import Config
-from modules.audio_processor import AudioProcessor
-from modules.llm_processor import LLMProcessor
-from modules.output_formatter import OutputFormatter
+
+# whisper/torch・requests等の重い依存は、それを使う処理に入ってから読み込む
+# （--help や引数エラー、キャッシュからの再出力を即座に返すため）
 
 def main():
     """メイン処理"""
     parser = argparse.ArgumentParser(description="高精度音声文字起こしアプリ")
-    parser.add_argument("audio_file", help="音声ファイルパス")
+    parser.add_argument("audio_files", nargs="*", metavar="audio_file",
+                       help="音声ファイルパス（複数指定・globパターン・ディレクトリも可）")
     parser.add_argument("--llm", choices=["deepseek", "gemini", "openai"], 
                        default="whisper", help="使用するLLM API (デフォルト: whisper only)")
     parser.add_argument("--model", default="base", 
                        choices=["tiny", "base", "small", "medium", "large", "large-v2", "large-v3"],
                        help="Whisperモデル (デフォルト: base)")
+    parser.add_argument("--cascade", default=Config.CASCADE_MODEL, metavar="MODEL",
+                       choices=["tiny", "base", "small", "medium", "large", "large-v2", "large-v3"],
+                       help="--modelで全体をデコードし、信頼度の低い区間だけをこのモデルで再デコード")
+    parser.add_argument("--backend", choices=["whisper", "faster-whisper"], default=Config.WHISPER_BACKEND,
+                       help=f"推論バックエンド (デフォルト: {Config.WHISPER_BACKEND})")
+    parser.add_argument("--compute-type", default=Config.WHISPER_COMPUTE_TYPE,
+                       help=f"faster-whisperの演算精度 (デフォルト: {Config.WHISPER_COMPUTE_TYPE})")
+    parser.add_argument("--cpu-threads", type=int, default=Config.WHISPER_CPU_THREADS,
+                       help="推論スレッド数 (デフォルト: 0=ライブラリの既定値)")
+    parser.add_argument("--profile", choices=["fast", "balanced", "accurate"], default=Config.DECODE_PROFILE,
+                       help=f"デコードプロファイル（ビームサーチ幅・温度フォールバック） (デフォルト: {Config.DECODE_PROFILE})")
+    parser.add_argument("--max-retries", type=int, default=Config.DECODE_MAX_RETRIES,
+                       help="温度フォールバックの再試行回数の上限 (デフォルト: プロファイルの既定値)")
+    parser.add_argument("--llm-selective", action="store_true", default=Config.LLM_SELECTIVE,
+                       help="信頼度の低いセグメント・誤認識辞書に該当したセグメントだけを前後の文脈付きでLLMに送る")
+    parser.add_argument("--llm-spillover", action="store_true", default=Config.LLM_SPILLOVER,
+                       help="レート制限の待ちが長い送信を他の利用可能なLLM APIへ回す")
     parser.add_argument("--compare", action="store_true", 
-                       help="複数APIで比較実行")
+                       help="利用可能な全APIで並列に比較実行")
     parser.add_argument("--verbose", "-v", action="store_true", 
                        help="詳細ログ出力")
     parser.add_argument("--format", choices=["standard", "continuous", "minimal"],
                        default="standard", help="出力形式 (デフォルト: standard)")
+    parser.add_argument("--output-format", choices=["txt", "json", "srt", "vtt"],
+                       default=Config.OUTPUT_FORMAT,
+                       help=f"出力ファイル形式 (デフォルト: {Config.OUTPUT_FORMAT})")
     parser.add_argument("--enable-vad", action="store_true",
                        help="VAD (Voice Activity Detection) を有効化")
     parser.add_argument("--prompt", type=str,
                        help="Whisperに与える初期プロンプト（文脈を提供）")
+    parser.add_argument("--batch", action="store_true",
+                       help="一括処理モード（モデルを一度だけ読み込んで複数ファイルを処理）")
+    parser.add_argument("--batch-size", type=int, default=Config.BATCH_SIZE,
+                       help=f"同時に処理するファイル数 (デフォルト: {Config.BATCH_SIZE})")
+    parser.add_argument("--overwrite", action="store_true",
+                       help="一括処理で出力済みのファイルも再処理")
+    parser.add_argument("--workers", type=int, default=1,
+                       help="長時間音声をチャンク分割して並列処理するワーカープロセス数 (デフォルト: 1)")
+    parser.add_argument("--chunk-length", type=float, default=Config.CHUNK_LENGTH_SECONDS,
+                       help=f"チャンクの最大長（秒） (デフォルト: {Config.CHUNK_LENGTH_SECONDS:.0f})")
+    parser.add_argument("--diarize", action="store_true", default=Config.ENABLE_DIARIZATION,
+                       help="話者分離を行い、各出力形式に話者ラベルを付ける（CPUでデコードと並行実行）")
+    parser.add_argument("--num-speakers", type=int, default=Config.DIARIZATION_NUM_SPEAKERS,
+                       help="話者分離の話者数（0は自動推定）")
+    parser.add_argument("--resegment", action="store_true",
+                       help="単語タイムスタンプでセグメントを文・無音単位に区切り直す")
+    parser.add_argument("--stream", action="store_true",
+                       help="逐次モード（デコードしたウィンドウから順に出力・中断しても続きから再開）")
+    parser.add_argument("--stream-window", type=float, default=30.0,
+                       help="逐次モードのウィンドウ長（秒） (デフォルト: 30)")
+    parser.add_argument("--no-cache", action="store_true",
+                       help="文字起こし・LLM応答キャッシュを使用しない")
+    parser.add_argument("--log-file", default=Config.LOG_FILE,
+                       help="処理区間ごとの構造化ログ（JSON Lines）の出力先")
+    parser.add_argument("--metrics-file", default=Config.METRICS_FILE,
+                       help="終了時にPrometheusテキスト形式のメトリクスを書き出すファイル")
+    parser.add_argument("--serve", action="store_true",
+                       help="常駐サービスとして起動（モデルを読み込んだままHTTPでジョブを受け付け）")
+    parser.add_argument("--host", default=Config.SERVICE_HOST,
+                       help=f"サービスの待ち受けアドレス (デフォルト: {Config.SERVICE_HOST})")
+    parser.add_argument("--port", type=int, default=Config.SERVICE_PORT,
+                       help=f"サービスの待ち受けポート (デフォルト: {Config.SERVICE_PORT})")
+    parser.add_argument("--service-workers", type=int, default=Config.SERVICE_WORKERS,
+                       help=f"サービスで同時に処理するジョブ数 (デフォルト: {Config.SERVICE_WORKERS})")
+    parser.add_argument("--watch", nargs="?", const=Config.WATCH_DIR, metavar="DIR",
+                       help=f"監視フォルダモード（書き込みが完了した音声を順次文字起こし） "
+                            f"(デフォルト: {Config.WATCH_DIR})")
+    parser.add_argument("--watch-workers", type=int, default=Config.WATCH_WORKERS,
+                       help=f"監視フォルダモードで同時に処理するファイル数 (デフォルト: {Config.WATCH_WORKERS})")
+    parser.add_argument("--search", metavar="QUERY",
+                       help="保存済みの文字起こしを全文検索（空白区切りの語句をすべて含む発言を表示）")
+    parser.add_argument("--search-limit", type=int, default=20,
+                       help="検索結果の最大件数 (デフォルト: 20)")
+    parser.add_argument("--reindex", action="store_true",
+                       help="出力ディレクトリの文字起こしを検索インデックスに登録（変更のあったファイルのみ）")
     
     args = parser.parse_args()
+    if not args.serve and not args.watch and not args.search and not args.reindex and not args.audio_files:
+        parser.error("音声ファイルを指定してください（常駐サービスは --serve、監視フォルダは --watch、"
+                     "検索は --search）")
     
     # 設定確認
     config = Config()
     available_apis = config.validate_api_keys()
     
+    # 計測（処理区間のJSONログとPrometheus形式のメトリクス）
+    from modules import metrics
+    metrics.configure_logging(args.log_file, config.LOG_LEVEL)
+    if args.metrics_file:
+        atexit.register(metrics.REGISTRY.write_prometheus, args.metrics_file)
+    
     if args.verbose:
         print(f"利用可能なAPI: {available_apis}")
-        print(f"Whisperモデル: {args.model}")
+        print(f"Whisperモデル: {args.model} ({args.backend})")
+    
+    if args.serve:
+        run_service(args, config)
+        return
+    
+    if args.search or args.reindex:
+        run_search(args, config)
+        return
+    
+    if args.watch:
+        run_watch(args, config)
+        return
+    
+    # 一括処理モード（複数ファイル・ディレクトリ・globパターン指定時）
+    if (args.batch or len(args.audio_files) > 1
+            or any(os.path.isdir(path) or glob.has_magic(path) for path in args.audio_files)):
+        run_batch(args, config)
+        return
+    
+    args.audio_file = args.audio_files[0]
     
     # 音声ファイル存在確認
     if not os.path.exists(args.audio_file):
@@ -48,52 +145,121 @@ def main():
         return
     
     try:
+        from modules.output_formatter import OutputFormatter
+        
         # 音声処理器を初期化
-        audio_processor = AudioProcessor(model_name=args.model)
-        output_formatter = OutputFormatter(config.OUTPUT_DIR)
+        audio_processor = create_audio_processor(args, config)
+        output_formatter = OutputFormatter(config.OUTPUT_DIR, index=create_search_index(config))
+        
+        if args.stream:
+            run_stream(args, audio_processor, output_formatter)
+            return
         
         # Whisperで文字起こし
         print("\n=== Whisper文字起こし開始 ===")
         start_time = time.time()
         
-        whisper_result = audio_processor.transcribe(
-            args.audio_file,
-            enable_vad=args.enable_vad,
-            prompt=args.prompt
-        )
+        if args.workers > 1:
+            whisper_result = audio_processor.transcribe_chunked(
+                args.audio_file,
+                workers=args.workers,
+                chunk_length=args.chunk_length,
+                min_silence=config.MIN_SILENCE_DURATION,
+                prompt=args.prompt,
+                enable_vad=args.enable_vad
+            )
+        else:
+            whisper_result = audio_processor.transcribe(
+                args.audio_file,
+                enable_vad=args.enable_vad,
+                prompt=args.prompt
+            )
+        if args.cascade:
+            whisper_result = create_cascade(args, config).refine(
+                args.audio_file, whisper_result, prompt=args.prompt)
+        if args.resegment:
+            whisper_result = audio_processor.resegment_words(whisper_result)
         
         # 出力形式に応じてテキストを生成
-        if args.format == "continuous":
-            output_text = audio_processor.create_continuous_text(whisper_result, enable_timestamps=False)
-        elif args.format == "minimal":
-            output_text = audio_processor.create_continuous_text(whisper_result, enable_timestamps=True)
-        else:
-            output_text = audio_processor.create_timestamped_text(whisper_result)
+        output_text = audio_processor.create_formatted_text(whisper_result, args.format)
         
         whisper_time = time.time() - start_time
         print(f"Whisper処理時間: {whisper_time:.2f}秒")
+        if "vad" in whisper_result:
+            vad_report = whisper_result["vad"]
+            print(f"VAD: 発話率 {vad_report['speech_ratio']:.1%} / "
+                  f"省略した無音 {vad_report['skipped_seconds']:.1f}秒")
+        if "diarization" in whisper_result:
+            print(f"話者分離: {whisper_result['diarization']['speakers']}人 / "
+                  f"処理時間 {whisper_result['diarization']['seconds']:.2f}秒（デコードと並行）")
+        if "decode" in whisper_result:
+            decode_report = whisper_result["decode"]
+            retry_time = (f"、{decode_report['retry_seconds']:.2f}秒"
+                          if decode_report["retry_seconds"] is not None else "")
+            if decode_report["cached"]:
+                print(f"デコード: プロファイル {decode_report['profile']} / キャッシュ済み（再試行なし）")
+            else:
+                print(f"デコード: プロファイル {decode_report['profile']} / 再試行 {decode_report['retries']}回 "
+                      f"({decode_report['retried_segments']}セグメント{retry_time})")
+        if "cascade" in whisper_result:
+            cascade_report = whisper_result["cascade"]
+            print(f"カスケード: {cascade_report['model']}で再デコード "
+                  f"{cascade_report['escalated_seconds']:.1f}秒 / {cascade_report['total_seconds']:.1f}秒 "
+                  f"(エスカレーション率 {cascade_report['escalation_ratio']:.1%}、"
+                  f"{cascade_report['seconds']:.2f}秒)")
         
         # 結果を保存
         metadata = {
             "whisper_model": args.model,
+            "backend": args.backend,
             "processing_time": whisper_time,
             "enable_vad": args.enable_vad,
-            "format": args.format
+            "format": args.format,
+            "workers": args.workers,
+            "decode_profile": args.profile
         }
+        if "decode" in whisper_result:
+            metadata["decode_retries"] = whisper_result["decode"]["retries"]
+            metadata["decode_retry_seconds"] = whisper_result["decode"]["retry_seconds"]
+            metadata["decode_cached"] = whisper_result["decode"]["cached"]
+        if "vad" in whisper_result:
+            metadata["vad_speech_ratio"] = whisper_result["vad"]["speech_ratio"]
+            metadata["vad_skipped_seconds"] = whisper_result["vad"]["skipped_seconds"]
+        if "diarization" in whisper_result:
+            metadata["speakers"] = whisper_result["diarization"]["speakers"]
+            metadata["diarization_time"] = whisper_result["diarization"]["seconds"]
+        if "cascade" in whisper_result:
+            metadata["cascade_model"] = whisper_result["cascade"]["model"]
+            metadata["cascade_escalation_ratio"] = whisper_result["cascade"]["escalation_ratio"]
         
-        whisper_output_path = output_formatter.save_transcription(
-            output_text, 
-            args.audio_file, 
-            "whisper",
-            metadata,
-            format_type=args.format
-        )
+        if args.output_format == "txt":
+            whisper_output_path = output_formatter.save_transcription(
+                output_text, 
+                args.audio_file, 
+                "whisper",
+                metadata,
+                format_type=args.format,
+                segments=whisper_result["segments"]
+            )
+        else:
+            whisper_output_path = output_formatter.save_structured(
+                whisper_result,
+                args.audio_file,
+                args.output_format,
+                "whisper",
+                metadata
+            )
         
         if args.verbose:
             print("\n=== Whisper結果プレビュー ===")
             preview = output_formatter.format_for_display(output_text, 10)
             print(preview)
         
+        # LLM後処理（--compare 時は利用可能な全APIで並列実行）
+        if args.compare or args.llm != "whisper":
+            run_llm(args, config, output_text, metadata, output_formatter,
+                    whisper_result=whisper_result, audio_processor=audio_processor)
+        
         print("\n=== 処理完了 ===")
         print(f"総処理時間: {time.time() - start_time:.2f}秒")
         
@@ -105,5 +271,409 @@ def main():
             import traceback
             traceback.print_exc()
 
+def run_stream(args, audio_processor, output_formatter):
+    """逐次モード - ウィンドウごとにデコード結果を追記し、チェックポイントを保存"""
+    # 逐次モードはWhisperの結果をテキスト（standard形式）で追記するのみ
+    ignored_options = [
+        (args.diarize, "話者分離を行いません", "--diarize"),
+        (args.cascade, "カスケードを行いません", "--cascade"),
+        (args.enable_vad, "VADを行いません", "--enable-vad"),
+        (args.resegment, "セグメントを区切り直しません", "--resegment"),
+        (args.workers > 1, "チャンクの並列処理を行いません", "--workers"),
+        (args.llm != "whisper" or args.compare, "LLM後処理を行いません", "--llm / --compare"),
+        (args.output_format != "txt", "txtのみ出力します", "--output-format"),
+        (args.format != "standard", "standard形式のみ出力します", "--format"),
+    ]
+    for enabled, action, option in ignored_options:
+        if enabled:
+            print(f"逐次モードでは{action}（{option}は無視されます）")
+    window_length = args.stream_window
+    stat = os.stat(args.audio_file)
+    # 結果が変わる設定が異なる場合は再開せず最初からやり直す
+    resume_key = {
+        "audio_size": stat.st_size,
+        "audio_mtime": stat.st_mtime,
+        "whisper_model": audio_processor.model_name,
+        "backend": audio_processor.backend.cache_id,
+        "decode_profile": audio_processor.decode_profile["name"],
+        "max_retries": audio_processor.decode_profile["max_retries"],
+        "min_silence_duration": audio_processor.min_silence_duration,
+        "window_length": window_length,
+        "prompt": args.prompt,
+    }
+    stream = output_formatter.open_stream(args.audio_file, "whisper", resume_key)
+    stream.write_header(output_formatter.create_header(
+        args.audio_file, "whisper", {"whisper_model": args.model, "processing_time": "逐次処理"}
+    ))
+    
+    print("\n=== Whisper逐次文字起こし開始 ===")
+    start_time = time.time()
+    try:
+        for index, total, segments in audio_processor.transcribe_stream(
+                args.audio_file,
+                prompt=args.prompt,
+                window_length=window_length,
+                start_window=stream.completed_windows):
+            stream.write_segments(segments)
+            stream.complete_window(index)
+            if args.verbose:
+                print(f"ウィンドウ {index + 1}/{total} 完了 ({time.time() - start_time:.1f}秒経過)")
+    except BaseException:
+        stream.close(finished=False)
+        print(f"\n中断しました。同じコマンドで {stream.completed_windows} ウィンドウ目から再開できます")
+        raise
+    
+    stream.close()
+    print("\n=== 処理完了 ===")
+    print(f"総処理時間: {time.time() - start_time:.2f}秒")
+    print(f"文字起こし結果: {stream.output_path}")
+
+def run_llm(args, config, whisper_text, metadata, output_formatter,
+            whisper_result=None, audio_processor=None):
+    """LLM後処理 - 単一APIでの改善（全文または選択したセグメントのみ）、または複数APIの並列比較"""
+    from modules.llm_processor import LLMProcessor
+    
+    llm_processor = LLMProcessor(cache=create_llm_cache(args, config),
+                                 scheduler=create_llm_scheduler(args, config))
+    
+    if args.compare:
+        providers = llm_processor.available_apis
+        if not providers:
+            print("比較できるAPIがありません（.envにAPIキーを設定してください）")
+            return
+        
+        print("\n=== LLM比較開始 ===")
+        compare_start = time.time()
+        comparison = llm_processor.compare_providers(whisper_text, providers)
+        wall_time = time.time() - compare_start
+        
+        for api_name, entry in comparison.items():
+            print(f"{api_name}: {entry['latency']:.2f}秒 / {entry['tokens']}トークン / "
+                  f"${entry['estimated_cost']:.4f}" + (f" (エラー: {entry['error']})" if entry["error"] else ""))
+        print(f"比較の所要時間: {wall_time:.2f}秒 "
+              f"(APIごとの合計: {sum(e['latency'] for e in comparison.values()):.2f}秒)")
+        
+        results = {"whisper": whisper_text}
+        results.update({api_name: entry["text"] for api_name, entry in comparison.items()})
+        metrics = {api_name: {key: value for key, value in entry.items() if key != "text"}
+                   for api_name, entry in comparison.items()}
+        output_formatter.create_comparison_report(results, args.audio_file, metrics)
+    else:
+        print(f"\n=== LLM後処理開始 ({args.llm}) ===")
+        llm_start = time.time()
+        if args.llm_selective and whisper_result is not None:
+            selection = {"context_segments": config.LLM_CONTEXT_SEGMENTS,
+                         "logprob_threshold": config.LLM_SELECT_LOGPROB_THRESHOLD}
+            usage = llm_processor.estimate_usage(whisper_text, args.llm, whisper_result, **selection)
+            improved_result = llm_processor.improve_segments(whisper_result, args.llm, **selection)
+            improved_text = audio_processor.create_formatted_text(improved_result, args.format)
+            improved_segments = improved_result["segments"]
+            print(f"LLM選択的後処理: {improved_result['llm']['corrected']}セグメントを修正 / "
+                  f"送信 {usage['tokens']}トークン (全文 {usage['full_tokens']}トークン、"
+                  f"{usage['saved_tokens']}トークン節約)")
+        else:
+            if args.llm_selective:
+                print("選択的後処理にはセグメント情報が必要なため、全文を送信します")
+            usage = llm_processor.estimate_usage(whisper_text, args.llm)
+            improved_text = llm_processor.improve_transcription(whisper_text, args.llm)
+            # 検索インデックスには修正後のテキストの行から復元したセグメントを登録する
+            improved_segments = None
+        estimated_cost = usage["cost"]
+        llm_time = time.time() - llm_start
+        print(f"LLM処理時間: {llm_time:.2f}秒 (推定コスト: ${estimated_cost:.4f})")
+        rate_limit = llm_processor.rate_limit_report()
+        if rate_limit["waited_seconds"] >= 0.1 or rate_limit["pauses"] or rate_limit["spilled"]:
+            print(f"レート制限: 送信待ち {rate_limit['waited_seconds']:.1f}秒 / "
+                  f"429等による停止 {rate_limit['pauses']}回 / 他のAPIへ回した送信 {rate_limit['spilled']}件")
+        
+        llm_metadata = dict(metadata, processing_time=metadata["processing_time"] + llm_time,
+                            estimated_cost=estimated_cost, llm_tokens=usage["tokens"],
+                            llm_saved_tokens=usage["saved_tokens"])
+        output_formatter.save_transcription(
+            improved_text,
+            args.audio_file,
+            args.llm,
+            llm_metadata,
+            format_type=args.format,
+            segments=improved_segments
+        )
+    
+    if llm_processor.cache is not None:
+        stats = llm_processor.cache.stats()
+        print(f"LLM応答キャッシュ: ヒット {stats['hits']} / ミス {stats['misses']}")
+
+def create_search_index(config):
+    """
+    保存した文字起こしを登録する検索インデックスを作成
+    
+    ENABLE_SEARCH_INDEX=false時、またはインデックスを開けない場合（FTS5/trigramに未対応のSQLite、
+    書き込めないディレクトリ等）はNone。登録は付加機能のため文字起こし自体は止めない。
+    """
+    if not config.ENABLE_SEARCH_INDEX:
+        return None
+    import sqlite3
+    from modules.transcript_index import TranscriptIndex
+    try:
+        return TranscriptIndex(config.SEARCH_INDEX_PATH)
+    except (sqlite3.Error, OSError) as e:
+        print(f"警告: 検索インデックスを開けないため登録を行いません ({config.SEARCH_INDEX_PATH}): {e}")
+        return None
+
+def run_search(args, config):
+    """検索モード - 出力ディレクトリとの同期（--reindex）と全文検索（--search）"""
+    from modules.segments import format_timestamp
+    from modules.transcript_index import TranscriptIndex
+    
+    index = TranscriptIndex(config.SEARCH_INDEX_PATH)
+    try:
+        if args.reindex:
+            start_time = time.time()
+            stats = index.update_directory(config.OUTPUT_DIR)
+            print(f"検索インデックスを更新しました: 登録 {stats['indexed']}件 / 変更なし {stats['unchanged']}件 / "
+                  f"削除 {stats['removed']}件 ({time.time() - start_time:.2f}秒)")
+        if not args.search:
+            return
+        
+        start_time = time.time()
+        hits = index.search(args.search, limit=args.search_limit, context=config.SEARCH_CONTEXT_SEGMENTS)
+        elapsed_ms = (time.time() - start_time) * 1000
+        
+        def describe(segment):
+            timestamp = (f"[{format_timestamp(segment['start'])} - {format_timestamp(segment['end'])}] "
+                         if segment["start"] is not None else "")
+            speaker = f"{segment['speaker']}: " if segment["speaker"] else ""
+            return timestamp + speaker + segment["text"]
+        
+        for hit in hits:
+            print(f"\n{hit['path']}")
+            for segment in hit["before"]:
+                print(f"    {describe(segment)}")
+            print(f"  > {describe(hit)}")
+            for segment in hit["after"]:
+                print(f"    {describe(segment)}")
+        stats = index.stats()
+        print(f"\n「{args.search}」: {len(hits)}件 ({elapsed_ms:.1f}ms / "
+              f"{stats['files']}ファイル・{stats['segments']}セグメントから検索)")
+        if not stats["files"]:
+            print("インデックスが空です。既存の出力を登録するには --reindex を指定してください")
+    finally:
+        index.close()
+
+def create_llm_scheduler(args, config):
+    """API別のRPM/TPM設定からLLM送信のスケジューラを作成"""
+    from modules.rate_limiter import ProviderScheduler
+    return ProviderScheduler(config.llm_rate_limits(), burst=config.LLM_RATE_BURST,
+                             spillover=args.llm_spillover, max_wait=config.LLM_SPILLOVER_MAX_WAIT)
+
+def create_llm_cache(args, config):
+    """LLM応答キャッシュを作成（--no-cache指定時はNone）"""
+    if args.no_cache:
+        return None
+    from modules.llm_cache import LLMResponseCache
+    return LLMResponseCache(
+        config.LLM_CACHE_PATH,
+        ttl_seconds=config.LLM_CACHE_TTL_HOURS * 3600,
+        max_entries=config.LLM_CACHE_MAX_ENTRIES
+    )
+
+def create_audio_processor(args, config, model_name=None):
+    """コマンドライン引数と設定からAudioProcessorを作成（model_name指定時はそのモデル）"""
+    from modules.audio_processor import AudioProcessor
+    return AudioProcessor(
+        model_name=model_name or args.model,
+        cache=create_cache(args, config),
+        min_silence_duration=config.MIN_SILENCE_DURATION,
+        correction_dictionary=config.CORRECTION_DICTIONARY,
+        backend=args.backend,
+        compute_type=args.compute_type,
+        cpu_threads=args.cpu_threads,
+        pcm_cache=create_pcm_cache(args, config),
+        worker_start_method=config.WORKER_START_METHOD,
+        diarizer=create_diarizer(args, config),
+        decode_profile=args.profile,
+        max_retries=args.max_retries if args.max_retries >= 0 else None
+    )
+
+def create_cascade(args, config):
+    """--cascadeのモデルで低信頼区間を再デコードするModelCascadeを作成"""
+    from modules.model_cascade import ModelCascade
+    final_processor = create_audio_processor(args, config, model_name=args.cascade)
+    # 話者ラベルは下書きの結果から引き継ぐため、再デコード側では話者分離しない
+    final_processor.diarizer = None
+    return ModelCascade(final_processor,
+                        logprob_threshold=config.CASCADE_LOGPROB_THRESHOLD,
+                        no_speech_threshold=config.CASCADE_NO_SPEECH_THRESHOLD,
+                        compression_threshold=config.CASCADE_COMPRESSION_THRESHOLD)
+
+def create_diarizer(args, config):
+    """話者分離器を作成（--diarize未指定時はNone）"""
+    if not args.diarize:
+        return None
+    from modules.diarization import SpeakerDiarizer
+    return SpeakerDiarizer(num_speakers=args.num_speakers or None,
+                           max_speakers=config.DIARIZATION_MAX_SPEAKERS,
+                           min_silence_duration=config.MIN_SILENCE_DURATION)
+
+def create_cache(args, config):
+    """文字起こしキャッシュを作成（--no-cache指定時はNone）"""
+    if args.no_cache:
+        return None
+    from modules.transcription_cache import TranscriptionCache
+    return TranscriptionCache(config.TRANSCRIPTION_CACHE_DIR, config.TRANSCRIPTION_CACHE_MAX_MB)
+
+def create_pcm_cache(args, config):
+    """PCMキャッシュを作成（--no-cache指定時はNone）"""
+    if args.no_cache:
+        return None
+    from modules.pcm_cache import PCMCache
+    return PCMCache(config.PCM_CACHE_DIR, config.PCM_CACHE_MAX_MB)
+
+def run_service(args, config):
+    """常駐サービスモード - モデルを読み込んだままHTTPでジョブを受け付ける"""
+    from modules.transcription_service import TranscriptionService, create_http_server
+    
+    cache = create_cache(args, config)
+    pcm_cache = create_pcm_cache(args, config)
+    
+    def processor_factory(model_name):
+        processor = create_audio_processor(args, config, model_name)
+        processor.cache = cache
+        processor.pcm_cache = pcm_cache
+        return processor
+    
+    service = TranscriptionService(processor_factory, default_model=args.model,
+                                   max_concurrency=args.service_workers,
+                                   allowed_models=config.SERVICE_MODELS,
+                                   cascade=create_cascade(args, config) if args.cascade else None)
+    print(f"Whisperモデルを読み込み中: {args.model} (ワーカー数: {args.service_workers})")
+    service.start()
+    
+    server = create_http_server(service, args.host, args.port)
+    print(f"サービス起動: http://{args.host}:{server.server_address[1]}")
+    print("  POST /jobs  {\"audio_path\": ..., \"priority\": 5}  → ジョブID")
+    print("  GET  /jobs/<id>  /jobs/<id>/result  /health")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\nサービスを停止します")
+    finally:
+        server.server_close()
+        service.shutdown()
+
+def run_watch(args, config):
+    """監視フォルダモード - 書き込みが完了した音声ファイルを検出し、1つのモデルを共有して文字起こし"""
+    from modules.batch_processor import BatchProcessor
+    from modules.folder_watcher import FolderWatcher, JobLedger
+    from modules.output_formatter import OutputFormatter
+    
+    if not check_llm_unsupported(args, "監視フォルダモード"):
+        return
+    audio_processor = create_audio_processor(args, config)
+    # 最初のファイルが届く前にモデルを読み込んでおく
+    audio_processor.model
+    batch_processor = BatchProcessor(audio_processor,
+                                     OutputFormatter(config.OUTPUT_DIR, index=create_search_index(config)),
+                                     args.watch_workers,
+                                     cascade=create_cascade(args, config) if args.cascade else None)
+    metadata = batch_metadata(args)
+    
+    def handler(audio_file):
+        # 同じ内容の再処理は台帳で防ぐため、同名の出力があっても処理する
+        return batch_processor.process_file(
+            audio_file,
+            format_type=args.format,
+            enable_vad=args.enable_vad,
+            prompt=args.prompt,
+            overwrite=True,
+            metadata=metadata,
+            output_format=args.output_format,
+            resegment=args.resegment
+        )
+    
+    ledger = JobLedger(config.WATCH_LEDGER_PATH)
+    watcher = FolderWatcher(args.watch, handler, ledger,
+                            workers=args.watch_workers,
+                            settle_seconds=config.WATCH_SETTLE_SECONDS,
+                            poll_interval=config.WATCH_POLL_INTERVAL)
+    try:
+        watcher.run()
+    except KeyboardInterrupt:
+        print("\n監視を終了します（処理中のファイルは完了まで待ちます）")
+        watcher.stop()
+    finally:
+        stats = watcher.stats
+        print(f"処理: {stats['processed']}件 / 重複スキップ: {stats['duplicate']}件 / "
+              f"失敗: {stats['failed']}件")
+        ledger.close()
+
+def check_llm_unsupported(args, mode):
+    """LLM後処理に対応しないモードで--llm/--compareが指定されていればエラーを表示してFalseを返す"""
+    if args.llm != "whisper" or args.compare:
+        print(f"エラー: {mode}ではLLM後処理（--llm / --compare）に対応していません。"
+              f"ファイルごとに単一ファイルモードで実行してください")
+        return False
+    return True
+
+def batch_metadata(args):
+    """一括処理・監視フォルダモードで各出力に付けるメタデータ"""
+    return {
+        "whisper_model": args.model,
+        "backend": args.backend,
+        "enable_vad": args.enable_vad,
+        "diarize": args.diarize,
+        "decode_profile": args.profile,
+        "format": args.format
+    }
+
+def run_batch(args, config):
+    """一括処理モード"""
+    from modules.batch_processor import BatchProcessor, collect_audio_files
+    from modules.output_formatter import OutputFormatter
+    
+    if not check_llm_unsupported(args, "一括処理"):
+        return
+    audio_files = collect_audio_files(args.audio_files)
+    missing = [path for path in audio_files if not os.path.exists(path)]
+    for path in missing:
+        print(f"エラー: 音声ファイルが見つかりません - {path}")
+    audio_files = [path for path in audio_files if path not in missing]
+    
+    if not audio_files:
+        print("エラー: 処理対象の音声ファイルがありません")
+        return
+    
+    print(f"一括処理: {len(audio_files)}ファイル (同時処理数: {args.batch_size})")
+    
+    try:
+        # モデルは一度だけ読み込んで全ファイルで共有
+        audio_processor = create_audio_processor(args, config)
+        output_formatter = OutputFormatter(config.OUTPUT_DIR, index=create_search_index(config))
+        batch_processor = BatchProcessor(audio_processor, output_formatter, args.batch_size,
+                                         cascade=create_cascade(args, config) if args.cascade else None)
+        
+        summary = batch_processor.process(
+            audio_files,
+            format_type=args.format,
+            enable_vad=args.enable_vad,
+            prompt=args.prompt,
+            overwrite=args.overwrite,
+            output_format=args.output_format,
+            resegment=args.resegment,
+            metadata=batch_metadata(args)
+        )
+        batch_processor.save_summary(summary)
+        
+        failed = [entry for entry in summary["files"] if entry["status"] == "failed"]
+        print("\n=== 一括処理完了 ===")
+        print(f"総処理時間: {summary['total_time']:.2f}秒 (失敗: {len(failed)}件)")
+        
+    except KeyboardInterrupt:
+        print("\n処理が中断されました")
+    except Exception as e:
+        print(f"エラーが発生しました: {e}")
+        if args.verbose:
+            import traceback
+            traceback.print_exc()
+
 if __name__ == "__main__":
     main()
\ No newline at end of file